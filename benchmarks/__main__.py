@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import tempfile
+
+from .harness import Results, compare
+from .controller import benchmark_controller, benchmark_port_manager
+from .micro import benchmark_ubridge_parser, benchmark_telnet_iac_parser, benchmark_uncompress_LZC
+
+
+def parse_arguments(argv):
+
+    parser = argparse.ArgumentParser(description="GNS3 server benchmarks")
+    parser.add_argument("--nodes", type=int, default=50, help="number of nodes of the topology")
+    parser.add_argument("--links", type=int, default=50, help="number of links of the topology")
+    parser.add_argument("--drawings", type=int, default=10, help="number of drawings of the topology")
+    parser.add_argument("--computes", type=int, default=2, help="number of fake computes")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of the fake computes in seconds")
+    parser.add_argument("--listeners", type=int, default=10, help="number of notification clients")
+    parser.add_argument("--events", type=int, default=1000, help="number of notifications sent")
+    parser.add_argument("--ports", type=int, default=1000, help="number of ports allocated by the port manager")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs of each benchmark")
+    parser.add_argument("--filter", action="append", help="run only the benchmarks whose name contains this string")
+    parser.add_argument("--output", help="JSON file where the results are written")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as a regression")
+    parser.add_argument("--debug", action="store_true", help="show the debug logs")
+    return parser.parse_args(argv)
+
+
+@asyncio.coroutine
+def run(args, directory):
+    """
+    Runs all the benchmarks.
+
+    :returns: Results instance
+    """
+
+    parameters = {key: getattr(args, key) for key in ("nodes", "links", "drawings", "computes", "latency", "listeners", "events", "ports", "repeat")}
+    results = Results(parameters, selection=args.filter)
+
+    benchmark_uncompress_LZC(results, repeat=args.repeat)
+    yield from benchmark_ubridge_parser(results, repeat=args.repeat)
+    yield from benchmark_telnet_iac_parser(results, repeat=args.repeat)
+    if results.selected("port_manager"):
+        benchmark_port_manager(results, ports=args.ports, repeat=args.repeat)
+    if any(results.selected(name) for name in ("controller.create_nodes", "controller.create_links", "controller.project_dump",
+                                               "controller.notification_fan_out", "controller.snapshot", "controller.export",
+                                               "controller.import", "controller.project_close", "controller.project_open")):
+        yield from benchmark_controller(results, directory,
+                                        nodes=args.nodes,
+                                        links=args.links,
+                                        drawings=args.drawings,
+                                        computes=args.computes,
+                                        latency=args.latency,
+                                        listeners=args.listeners,
+                                        events=args.events,
+                                        repeat=args.repeat)
+    return results
+
+
+def main(argv=None):
+
+    args = parse_arguments(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.debug:
+        # the benchmarks generate a lot of events
+        logging.getLogger("gns3server").setLevel(logging.ERROR)
+
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as directory:
+        results = loop.run_until_complete(run(args, directory))
+
+    if args.output:
+        results.save(args.output)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results.__json__(), baseline, threshold=args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmarks of the controller, the nodes run on in-process fake computes.
+"""
+
+import os
+import uuid
+import asyncio
+import aiohttp.web
+import contextlib
+
+from gns3server.config import Config
+from gns3server.controller import Controller
+from gns3server.controller.export_project import export_project
+from gns3server.controller.import_project import import_project
+from gns3server.compute.port_manager import PortManager
+
+from .fake_compute import FakeCompute
+from .topology import generate_topology
+
+
+def configure(directory):
+    """
+    Uses a configuration independent of the user configuration.
+    """
+
+    Config.reset()
+    config = Config.instance(files=[])
+    config.set_section_config("Server", {
+        "projects_path": os.path.join(directory, "projects"),
+        "images_path": os.path.join(directory, "images"),
+        "symbols_path": os.path.join(directory, "symbols"),
+        "appliances_path": os.path.join(directory, "appliances"),
+        "configs_path": os.path.join(directory, "configs"),
+        "image_cache_path": os.path.join(directory, "image_cache"),
+        "report_errors": False,
+    })
+    Controller._instance = None
+    controller = Controller.instance()
+    controller._config_file = os.path.join(directory, "gns3_controller.conf")
+    controller._settings = {}
+    PortManager._instance = None
+    return controller
+
+
+@asyncio.coroutine
+def _create_topology(project, topology):
+
+    controller = project.controller
+    yield from asyncio.gather(*[project.add_node(controller.get_compute(node["compute_id"]),
+                                                 node["name"],
+                                                 node["node_id"],
+                                                 dump=False,
+                                                 node_type=node["node_type"],
+                                                 x=node["x"],
+                                                 y=node["y"],
+                                                 properties=dict(node["properties"])) for node in topology["nodes"]])
+
+
+@asyncio.coroutine
+def _create_links(project, topology):
+
+    @asyncio.coroutine
+    def create_link(link_data):
+        link = yield from project.add_link(link_id=link_data["link_id"], dump=False)
+        for node_link in link_data["nodes"]:
+            node = project.get_node(node_link["node_id"])
+            yield from link.add_node(node, node_link["adapter_number"], node_link["port_number"], dump=False)
+
+    yield from asyncio.gather(*[create_link(link_data) for link_data in topology["links"]])
+
+
+@asyncio.coroutine
+def _create_drawings(project, topology):
+
+    for drawing in topology["drawings"]:
+        yield from project.add_drawing(dump=False, **drawing)
+
+
+def benchmark_port_manager(results, ports=1000, repeat=5):
+    """
+    Allocation and release of console and UDP ports.
+    """
+
+    class Project:
+
+        def record_tcp_port(self, port):
+            pass
+
+        def record_udp_port(self, port):
+            pass
+
+        def remove_tcp_port(self, port):
+            pass
+
+        def remove_udp_port(self, port):
+            pass
+
+    project = Project()
+
+    def allocate(kind):
+        port_manager = PortManager()
+        get_free_port = getattr(port_manager, "get_free_{}_port".format(kind))
+        release_port = getattr(port_manager, "release_{}_port".format(kind))
+        allocated = [get_free_port(project) for _ in range(ports)]
+        for port in allocated:
+            release_port(port, project)
+
+    results.measure("port_manager.tcp_allocation", lambda: allocate("tcp"), repeat=repeat, ports=ports)
+    results.measure("port_manager.udp_allocation", lambda: allocate("udp"), repeat=repeat, ports=ports)
+
+
+@asyncio.coroutine
+def benchmark_controller(results, directory, nodes=50, links=50, drawings=10, computes=2, latency=0.0, listeners=10, events=1000, repeat=5):
+    """
+    Creates a synthetic topology on fake computes and measures the project operations.
+
+    :param directory: Working directory
+    :param computes: Number of fake computes
+    :param latency: Latency of the fake computes (seconds)
+    :param listeners: Number of clients listening to the project notifications
+    :param events: Number of notifications sent to the clients
+    """
+
+    controller = configure(directory)
+    fake_computes = [FakeCompute(index=i + 1, latency=latency) for i in range(computes)]
+    for fake_compute in fake_computes:
+        yield from fake_compute.start()
+
+    try:
+        compute_ids = []
+        for i, fake_compute in enumerate(fake_computes):
+            compute = yield from controller.add_compute(compute_id="benchmark{}".format(i + 1),
+                                                        name="Benchmark {}".format(i + 1),
+                                                        protocol="http",
+                                                        host="127.0.0.1",
+                                                        port=fake_compute.port,
+                                                        user=None,
+                                                        password=None)
+            compute_ids.append(compute.id)
+
+        topology = generate_topology(nodes, links, drawings, compute_ids)
+        project = yield from controller.add_project(name="benchmark")
+
+        yield from results.measure_async("controller.create_nodes", lambda: _create_topology(project, topology), nodes=nodes)
+        yield from results.measure_async("controller.create_links", lambda: _create_links(project, topology), links=links)
+        yield from _create_drawings(project, topology)
+        project.dump()
+
+        results.measure("controller.project_dump", project.dump, repeat=repeat)
+
+        @asyncio.coroutine
+        def fan_out():
+            with contextlib.ExitStack() as stack:
+                queues = [stack.enter_context(controller.notification.queue(project)) for _ in range(listeners)]
+                node = next(iter(project.nodes.values()))
+                for _ in range(events):
+                    controller.notification.emit("node.updated", node.__json__())
+                for queue in queues:
+                    while not queue.empty():
+                        queue.get_nowait()
+
+        yield from results.measure_async("controller.notification_fan_out", fan_out, repeat=repeat, listeners=listeners, events=events)
+
+        snapshots = iter(range(repeat))
+        yield from results.measure_async("controller.snapshot", lambda: project.snapshot("snapshot-{}".format(next(snapshots))), repeat=repeat)
+
+        export_path = os.path.join(directory, "benchmark.gns3project")
+
+        @asyncio.coroutine
+        def export():
+            export_directory = os.path.join(directory, "export")
+            os.makedirs(export_directory, exist_ok=True)
+            zipstream = yield from export_project(project, export_directory, keep_compute_id=True)
+            with open(export_path, "wb") as f:
+                for data in zipstream:
+                    f.write(data)
+
+        yield from results.measure_async("controller.export", export, repeat=repeat)
+
+        @asyncio.coroutine
+        def import_():
+            with open(export_path, "rb") as f:
+                imported = yield from import_project(controller, str(uuid.uuid4()), f, keep_compute_id=True)
+            controller.remove_project(imported)
+
+        yield from results.measure_async("controller.import", import_, repeat=repeat)
+
+        yield from results.measure_async("controller.project_close", project.close, repeat=repeat, setup=project.open)
+        yield from results.measure_async("controller.project_open", project.open, repeat=repeat, setup=project.close)
+        yield from project.close()
+    finally:
+        for compute in list(controller.computes.values()):
+            yield from compute.close()
+        for fake_compute in fake_computes:
+            yield from fake_compute.stop()
+        Controller._instance = None
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+In-process compute implementing the part of the /v2/compute API used by
+the controller. Nodes, ports and files are only kept in memory and every
+request waits for the configured latency before being answered.
+"""
+
+import sys
+import json
+import asyncio
+import hashlib
+import aiohttp
+import aiohttp.web
+
+from gns3server.version import __version__
+
+
+class FakeCompute:
+
+    """
+    :param index: Index of the compute, used for its IP address (127.0.0.<index>)
+    :param latency: Delay added to each request (seconds)
+    :param node_file_size: Size of the file created in the directory of each node
+    """
+
+    def __init__(self, index=1, latency=0, node_file_size=1024):
+
+        self._index = index
+        self._latency = latency
+        self._node_file_size = node_file_size
+        self._app = None
+        self._handler = None
+        self._server = None
+        self._port = None
+        self._projects = {}  # project_id => {"nodes": {}, "files": {}}
+        self._next_port = 10000
+        self._websockets = set()
+        self.requests = 0
+
+    @property
+    def port(self):
+
+        return self._port
+
+    @property
+    def ip_address(self):
+
+        return "127.0.0.{}".format(self._index)
+
+    @asyncio.coroutine
+    def start(self):
+        """
+        Starts the compute on a random port of 127.0.0.1.
+        """
+
+        self._app = aiohttp.web.Application(middlewares=[self._latency_middleware])
+        routes = (
+            ("GET", "/capabilities", self._capabilities),
+            ("GET", "/notifications/ws", self._notifications),
+            ("GET", "/network/interfaces", self._interfaces),
+            ("GET", "/{node_type}/images", self._images),
+            ("POST", "/projects", self._create_project),
+            ("POST", "/projects/{project_id}/close", self._close_project),
+            ("DELETE", "/projects/{project_id}", self._delete_project),
+            ("GET", "/projects/{project_id}/files", self._list_files),
+            ("GET", "/projects/{project_id}/files/{path:.+}", self._read_file),
+            ("POST", "/projects/{project_id}/files/{path:.+}", self._write_file),
+            ("POST", "/projects/{project_id}/ports/udp", self._allocate_udp_port),
+            ("POST", "/projects/{project_id}/{node_type}/nodes", self._create_node),
+            ("GET", "/projects/{project_id}/{node_type}/nodes/{node_id}", self._get_node),
+            ("PUT", "/projects/{project_id}/{node_type}/nodes/{node_id}", self._update_node),
+            ("DELETE", "/projects/{project_id}/{node_type}/nodes/{node_id}", self._delete_node),
+            ("POST", "/projects/{project_id}/{node_type}/nodes/{node_id}/adapters/{adapter_number}/ports/{port_number}/nio", self._nio),
+            ("PUT", "/projects/{project_id}/{node_type}/nodes/{node_id}/adapters/{adapter_number}/ports/{port_number}/nio", self._nio),
+            ("DELETE", "/projects/{project_id}/{node_type}/nodes/{node_id}/adapters/{adapter_number}/ports/{port_number}/nio", self._empty),
+            ("POST", "/projects/{project_id}/{node_type}/nodes/{node_id}/{action}", self._node_action),
+        )
+        for method, path, handler in routes:
+            self._app.router.add_route(method, "/v2/compute" + path, handler)
+
+        loop = asyncio.get_event_loop()
+        self._handler = self._app.make_handler(access_log=None)
+        self._server = yield from loop.create_server(self._handler, "127.0.0.1", 0)
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    @asyncio.coroutine
+    def stop(self):
+
+        for ws in list(self._websockets):
+            yield from ws.close()
+        if self._server:
+            self._server.close()
+            yield from self._server.wait_closed()
+        if self._app:
+            yield from self._app.shutdown()
+        if self._handler:
+            yield from self._handler.shutdown(1)
+        if self._app:
+            yield from self._app.cleanup()
+
+    @asyncio.coroutine
+    def _latency_middleware(self, app, handler):
+
+        @asyncio.coroutine
+        def middleware(request):
+            self.requests += 1
+            if self._latency:
+                yield from asyncio.sleep(self._latency)
+            return (yield from handler(request))
+        return middleware
+
+    @staticmethod
+    def _json(data, status=200):
+
+        return aiohttp.web.Response(status=status, text=json.dumps(data), content_type="application/json")
+
+    def _project(self, request):
+
+        project_id = request.match_info["project_id"]
+        project = self._projects.get(project_id)
+        if project is None:
+            raise aiohttp.web.HTTPNotFound(text="Project {} doesn't exist".format(project_id))
+        return project
+
+    def _node(self, request):
+
+        node = self._project(request)["nodes"].get(request.match_info["node_id"])
+        if node is None:
+            raise aiohttp.web.HTTPNotFound(text="Node {} doesn't exist".format(request.match_info["node_id"]))
+        return node
+
+    @asyncio.coroutine
+    def _capabilities(self, request):
+
+        return self._json({
+            "version": __version__,
+            "platform": sys.platform,
+            "node_types": ["qemu", "vpcs", "ethernet_switch", "ethernet_hub", "cloud", "nat"],
+            "probes": {},
+            "memory": {"capacity": 64 * 1024, "reserved": 0, "overcommit_ratio": 1.0,
+                       "policy": "reject", "reservations": 0, "queued": 0}
+        })
+
+    @asyncio.coroutine
+    def _notifications(self, request):
+
+        ws = aiohttp.web.WebSocketResponse()
+        yield from ws.prepare(request)
+        self._websockets.add(ws)
+        try:
+            # the controller never sends anything
+            yield from ws.receive()
+        finally:
+            self._websockets.discard(ws)
+        return ws
+
+    @asyncio.coroutine
+    def _interfaces(self, request):
+
+        return self._json([{"id": "lo", "name": "lo", "ip_address": self.ip_address,
+                            "netmask": "255.0.0.0", "mac_address": "", "type": "ethernet"}])
+
+    @asyncio.coroutine
+    def _images(self, request):
+
+        return self._json([])
+
+    @asyncio.coroutine
+    def _create_project(self, request):
+
+        data = yield from request.json()
+        self._projects.setdefault(data["project_id"], {"nodes": {}, "files": {}})
+        return self._json({"project_id": data["project_id"], "name": data.get("name"), "variables": None}, status=201)
+
+    @asyncio.coroutine
+    def _close_project(self, request):
+
+        # like on a real compute the files are kept
+        project = self._projects.get(request.match_info["project_id"])
+        if project:
+            project["nodes"] = {}
+        return aiohttp.web.Response(status=204)
+
+    @asyncio.coroutine
+    def _delete_project(self, request):
+
+        self._projects.pop(request.match_info["project_id"], None)
+        return aiohttp.web.Response(status=204)
+
+    @asyncio.coroutine
+    def _list_files(self, request):
+
+        files = self._project(request)["files"]
+        return self._json([{"path": path, "md5sum": hashlib.md5(content).hexdigest()} for path, content in sorted(files.items())])
+
+    @asyncio.coroutine
+    def _read_file(self, request):
+
+        content = self._project(request)["files"].get(request.match_info["path"])
+        if content is None:
+            raise aiohttp.web.HTTPNotFound()
+        return aiohttp.web.Response(body=content, content_type="application/octet-stream")
+
+    @asyncio.coroutine
+    def _write_file(self, request):
+
+        self._project(request)["files"][request.match_info["path"]] = yield from request.read()
+        return aiohttp.web.Response(status=200)
+
+    @asyncio.coroutine
+    def _allocate_udp_port(self, request):
+
+        self._project(request)
+        self._next_port += 1
+        return self._json({"udp_port": self._next_port}, status=201)
+
+    @asyncio.coroutine
+    def _create_node(self, request):
+
+        project = self._project(request)
+        data = yield from request.json()
+        node_type = request.match_info["node_type"]
+        node = dict(data)
+        node.update({
+            "project_id": request.match_info["project_id"],
+            "status": "stopped",
+            "console": self._next_port,
+            "console_type": data.get("console_type") or "telnet",
+            "node_directory": "/tmp/project-files/{}/{}".format(node_type, data["node_id"]),
+        })
+        self._next_port += 1
+        project["nodes"][data["node_id"]] = node
+        path = "project-files/{}/{}/disk.img".format(node_type, data["node_id"])
+        project["files"].setdefault(path, data["node_id"].encode() * (self._node_file_size // 36 + 1))
+        return self._json(node, status=201)
+
+    @asyncio.coroutine
+    def _get_node(self, request):
+
+        return self._json(self._node(request))
+
+    @asyncio.coroutine
+    def _update_node(self, request):
+
+        node = self._node(request)
+        data = yield from request.json()
+        node.update(data)
+        return self._json(node)
+
+    @asyncio.coroutine
+    def _delete_node(self, request):
+
+        self._project(request)["nodes"].pop(request.match_info["node_id"], None)
+        return aiohttp.web.Response(status=204)
+
+    @asyncio.coroutine
+    def _nio(self, request):
+
+        self._node(request)
+        data = yield from request.json()
+        return self._json(data, status=201)
+
+    @asyncio.coroutine
+    def _node_action(self, request):
+
+        node = self._node(request)
+        action = request.match_info["action"]
+        if action == "start":
+            node["status"] = "started"
+        elif action == "stop":
+            node["status"] = "stopped"
+        return self._json(node)
+
+    @asyncio.coroutine
+    def _empty(self, request):
+
+        return aiohttp.web.Response(status=204)
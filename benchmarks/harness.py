@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import time
+import json
+import asyncio
+import datetime
+import platform
+import statistics
+
+from gns3server.version import __version__
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class Results:
+
+    """
+    Durations of the benchmarks, saved as JSON to compare the releases.
+
+    :param parameters: Parameters of the run (sizes of the topology, latency...)
+    :param selection: Only the benchmarks whose name contains one of these strings are run
+    """
+
+    def __init__(self, parameters, selection=None):
+
+        self._parameters = parameters
+        self._selection = selection
+        self._benchmarks = {}
+
+    def selected(self, name):
+
+        return not self._selection or any(pattern in name for pattern in self._selection)
+
+    def add(self, name, durations, **extra):
+        """
+        :param name: Name of the benchmark
+        :param durations: Durations of the runs in seconds
+        :param extra: Additional values saved with the durations
+        """
+
+        result = {
+            "runs": len(durations),
+            "min": min(durations),
+            "median": statistics.median(durations),
+            "mean": statistics.mean(durations),
+            "max": max(durations),
+        }
+        result.update(extra)
+        self._benchmarks[name] = result
+        log.info("{}: median {:.6f}s, min {:.6f}s ({} runs)".format(name, result["median"], result["min"], result["runs"]))
+
+    def measure(self, name, func, repeat=1, **extra):
+        """
+        Runs a function several times and records its durations.
+        """
+
+        if not self.selected(name):
+            return
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+        self.add(name, durations, **extra)
+
+    @asyncio.coroutine
+    def measure_async(self, name, coroutine_function, repeat=1, setup=None, **extra):
+        """
+        Runs a coroutine function several times and records its durations.
+
+        :param setup: Coroutine function called before each run, not measured
+        """
+
+        if not self.selected(name):
+            return
+        durations = []
+        for _ in range(repeat):
+            if setup:
+                yield from setup()
+            start = time.perf_counter()
+            yield from coroutine_function()
+            durations.append(time.perf_counter() - start)
+        self.add(name, durations, **extra)
+
+    def __json__(self):
+
+        return {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "parameters": self._parameters,
+            "benchmarks": self._benchmarks
+        }
+
+    def save(self, path):
+
+        with open(path, "w") as f:
+            json.dump(self.__json__(), f, indent=4, sort_keys=True)
+
+
+def compare(results, baseline, threshold=0.1, output=sys.stdout):
+    """
+    Prints the median of each benchmark against a baseline.
+
+    :param results: Results of this run (JSON)
+    :param baseline: Results of the baseline (JSON)
+    :param threshold: Relative slowdown reported as a regression
+    :returns: Names of the regressed benchmarks
+    """
+
+    regressions = []
+    for name, result in sorted(results["benchmarks"].items()):
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None or not previous["median"]:
+            print("{:<45} {:>12.6f}s".format(name, result["median"]), file=output)
+            continue
+        ratio = result["median"] / previous["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = " REGRESSION"
+            regressions.append(name)
+        print("{:<45} {:>12.6f}s {:>7.2f}x{}".format(name, result["median"], ratio, flag), file=output)
+    return regressions
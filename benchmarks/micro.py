@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Microbenchmarks of the parsers.
+"""
+
+import random
+import asyncio
+
+from gns3server.ubridge.ubridge_hypervisor import UBridgeHypervisor
+from gns3server.utils.asyncio.telnet_server import AsyncioTelnetServer, TelnetConnection, IAC, DO, WILL, SB, SE, NAWS, ECHO, NOP
+from gns3server.compute.iou.utils.iou_export import uncompress_LZC
+
+
+class _Writer:
+
+    def write(self, data):
+        pass
+
+    @asyncio.coroutine
+    def drain(self):
+        pass
+
+
+def compress_LZC(data, maxbits=16):
+    """
+    Compresses data in the .Z format (block mode), the input of uncompress_LZC.
+    """
+
+    out = bytearray([0x1F, 0x9D, 0x80 | maxbits])
+    max_code = 1 << maxbits
+    n_bits = 9
+    group = []
+    dictionary = {bytes((i,)): i for i in range(256)}
+    free_ent = 257
+
+    def pack(bits):
+        value = 0
+        for i, code in enumerate(group):
+            value |= code << (i * bits)
+        return value.to_bytes((len(group) * bits + 7) // 8, "little")
+
+    w = b""
+    for byte in data:
+        wc = w + bytes((byte,))
+        if wc in dictionary:
+            w = wc
+            continue
+        # codes are written by groups of 8, a group is padded when the code size changes
+        group.append(dictionary[w])
+        if len(group) == 8:
+            out.extend(pack(n_bits))
+            group = []
+        if free_ent < max_code:
+            dictionary[wc] = free_ent
+            free_ent += 1
+        if free_ent > (1 << n_bits) and n_bits < maxbits:
+            if group:
+                out.extend(pack(n_bits).ljust(n_bits, b"\0"))
+                group = []
+            n_bits += 1
+        w = bytes((byte,))
+    if w:
+        group.append(dictionary[w])
+    if group:
+        out.extend(pack(n_bits))
+    return bytes(out)
+
+
+def _startup_config(size, seed=0):
+
+    rand = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        i = rand.randint(0, 255)
+        line = rand.choice([
+            "interface Ethernet{}/{}\n ip address 10.{}.{}.1 255.255.255.0\n no shutdown\n!\n".format(i // 16, i % 16, i, rand.randint(0, 255)),
+            "router ospf 1\n network 10.{}.0.0 0.0.255.255 area 0\n!\n".format(i),
+            "access-list {} permit ip host 192.168.{}.{} any\n".format(100 + i, i, rand.randint(1, 254)),
+        ])
+        lines.append(line)
+        length += len(line)
+    return "".join(lines).encode()
+
+
+@asyncio.coroutine
+def benchmark_ubridge_parser(results, lines=50, iterations=2000, repeat=5):
+    """
+    Parsing of the uBridge responses (multi-line answers received in chunks).
+    """
+
+    response = "".join("101 bridge{} running\r\n".format(i) for i in range(lines)) + "100-OK\r\n"
+    response = response.encode()
+
+    @asyncio.coroutine
+    def parse():
+        hypervisor = UBridgeHypervisor("127.0.0.1", 0)
+        hypervisor._reader = asyncio.StreamReader()
+        hypervisor._writer = _Writer()
+        for _ in range(iterations):
+            hypervisor._reader.feed_data(response)
+            yield from hypervisor.send("bridge list")
+
+    yield from results.measure_async("micro.ubridge_parser", parse, repeat=repeat, lines=lines, iterations=iterations)
+
+
+@asyncio.coroutine
+def benchmark_telnet_iac_parser(results, size=64 * 1024, repeat=5):
+    """
+    Removal of the Telnet commands from console output.
+    """
+
+    rand = random.Random(0)
+    commands = [bytes([IAC, DO, ECHO]), bytes([IAC, WILL, NAWS]), bytes([IAC, IAC]), bytes([IAC, NOP]),
+                bytes([IAC, SB, NAWS, 0, 80, 0, 24, IAC, SE])]
+    data = bytearray()
+    while len(data) < size:
+        data.extend(bytes(rand.randint(32, 126) for _ in range(rand.randint(16, 256))))
+        data.extend(rand.choice(commands))
+
+    server = AsyncioTelnetServer()
+    writer = _Writer()
+    connection = TelnetConnection(asyncio.StreamReader(), writer)
+
+    @asyncio.coroutine
+    def parse():
+        yield from server._IAC_parser(bytearray(data), asyncio.StreamReader(), writer, connection)
+
+    yield from results.measure_async("micro.telnet_iac_parser", parse, repeat=repeat, size=len(data))
+
+
+def benchmark_uncompress_LZC(results, size=128 * 1024, repeat=5):
+    """
+    Decompression of IOU NVRAM configurations.
+    """
+
+    config = _startup_config(size)
+    compressed = compress_LZC(config)
+    assert uncompress_LZC(compressed) == config
+    results.measure("micro.uncompress_LZC", lambda: uncompress_LZC(compressed), repeat=repeat, size=len(config), compressed_size=len(compressed))
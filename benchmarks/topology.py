@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Synthetic topologies. The same parameters and seed always give the same topology.
+"""
+
+import math
+import uuid
+import random
+
+
+def generate_topology(nodes, links, drawings, compute_ids, seed=0):
+    """
+    :param nodes: Number of nodes
+    :param links: Number of links
+    :param drawings: Number of drawings
+    :param compute_ids: Computes on which the nodes are spread
+    :param seed: Seed of the random generator
+    :returns: Dictionary with the nodes, links and drawings to create
+    """
+
+    rand = random.Random(seed)
+
+    if links and nodes < 2:
+        raise ValueError("At least 2 nodes are required to create links")
+    # each link uses one adapter on both nodes
+    adapters = max(1, math.ceil(links * 2 / max(nodes, 1)) + 1)
+
+    topology = {"nodes": [], "links": [], "drawings": []}
+    for i in range(nodes):
+        topology["nodes"].append({
+            "node_id": str(uuid.UUID(int=rand.getrandbits(128), version=4)),
+            "node_type": "qemu",
+            "name": "Node-{}".format(i + 1),
+            "compute_id": compute_ids[i % len(compute_ids)],
+            "x": (i % 20) * 80,
+            "y": (i // 20) * 80,
+            "properties": {"adapters": adapters, "ram": 256}
+        })
+
+    free_adapters = [list(range(adapters)) for _ in range(nodes)]
+    for i in range(links):
+        # a ring first, then random links between the nodes with free adapters
+        if i < nodes:
+            node1, node2 = i, (i + 1) % nodes
+        else:
+            candidates = [n for n in range(nodes) if free_adapters[n]]
+            node1, node2 = rand.sample(candidates, 2)
+        if node1 == node2 or not free_adapters[node1] or not free_adapters[node2]:
+            candidates = [n for n in range(nodes) if free_adapters[n]]
+            node1, node2 = rand.sample(candidates, 2)
+        topology["links"].append({
+            "link_id": str(uuid.UUID(int=rand.getrandbits(128), version=4)),
+            "nodes": [
+                {"node_id": topology["nodes"][node1]["node_id"], "adapter_number": free_adapters[node1].pop(0), "port_number": 0},
+                {"node_id": topology["nodes"][node2]["node_id"], "adapter_number": free_adapters[node2].pop(0), "port_number": 0}
+            ]
+        })
+
+    for i in range(drawings):
+        topology["drawings"].append({
+            "drawing_id": str(uuid.UUID(int=rand.getrandbits(128), version=4)),
+            "x": rand.randint(-500, 500),
+            "y": rand.randint(-500, 500),
+            "svg": '<svg height="100" width="200"><rect height="100" width="200" fill="#ffffff" /><text>Zone {}</text></svg>'.format(i + 1)
+        })
+
+    return topology
@@ -14,25 +14,50 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-
 import sys
 import os
+import importlib
 
-from .builtin import Builtin
-from .vpcs import VPCS
-from .virtualbox import VirtualBox
-from .dynamips import Dynamips
-from .qemu import Qemu
-from .vmware import VMware
-
-MODULES = [Builtin, VPCS, VirtualBox, Dynamips, Qemu, VMware]
+# Emulator modules (package, manager class). They are imported the first
+# time they are needed, a server running only the controller never loads them.
+MODULE_NAMES = [("builtin", "Builtin"),
+                ("vpcs", "VPCS"),
+                ("virtualbox", "VirtualBox"),
+                ("dynamips", "Dynamips"),
+                ("qemu", "Qemu"),
+                ("vmware", "VMware")]
 
 if sys.platform.startswith("linux") or hasattr(sys, "_called_from_test") or os.environ.get("PYTEST_BUILD_DOCUMENTATION") == "1":
 
-    from .docker import Docker
-    MODULES.append(Docker)
+    MODULE_NAMES.append(("docker", "Docker"))
 
     # IOU runs only on Linux but testsuite work on UNIX platform
     if not sys.platform.startswith("win"):
-        from .iou import IOU
-        MODULES.append(IOU)
+        MODULE_NAMES.append(("iou", "IOU"))
+
+
+def get_modules():
+    """
+    Imports the emulator modules.
+
+    :returns: List of manager classes
+    """
+
+    return [getattr(importlib.import_module("." + package, __name__), name) for package, name in MODULE_NAMES]
+
+
+def get_instantiated_managers():
+    """
+    Managers already created, the emulator modules not imported yet are
+    not loaded.
+
+    :returns: List of manager instances
+    """
+
+    managers = []
+    for package, name in MODULE_NAMES:
+        module = sys.modules.get("{}.{}".format(__name__, package))
+        manager = getattr(getattr(module, name, None), "_instance", None)
+        if manager is not None:
+            managers.append(manager)
+    return managers
@@ -35,6 +35,8 @@ from ..utils.asyncio import wait_run_in_executor
 from ..utils import force_unix_path
 from .project_manager import ProjectManager
 from .port_manager import PortManager
+from .probe_cache import ProbeCache
+from .image_upload import ImageUpload
 
 from .nios.nio_udp import NIOUDP
 from .nios.nio_tap import NIOTAP
@@ -58,6 +60,7 @@ class BaseManager:
         self._nodes = {}
         self._port_manager = None
         self._config = Config.instance()
+        self._uploads = {}
 
     @classmethod
     def node_types(cls):
@@ -357,6 +360,11 @@ class BaseManager:
         :returns: True or False
         """
 
+        return ProbeCache.instance().probe_sync("privileged access", executable, BaseManager._has_privileged_access, executable)
+
+    @staticmethod
+    def _has_privileged_access(executable):
+
         if sys.platform.startswith("win"):
             # do not check anything on Windows
             return True
@@ -517,15 +525,16 @@ class BaseManager:
         return path
 
     @asyncio.coroutine
-    def list_images(self):
+    def list_images(self, checksums=True):
         """
         Return the list of available images for this node type
 
+        :param checksums: Compute the md5sum of the images
         :returns: Array of hash
         """
 
         try:
-            return list_images(self._NODE_TYPE)
+            return list_images(self._NODE_TYPE, checksums=checksums)
         except OSError as e:
             raise aiohttp.web.HTTPConflict(text="Can not list images {}".format(e))
 
@@ -538,26 +547,43 @@ class BaseManager:
         raise NotImplementedError
 
     @asyncio.coroutine
-    def write_image(self, filename, stream):
+    def write_image(self, filename, stream, upload_id=None, offset=None, checksum=None, complete=True):
+        """
+        Writes an uploaded image.
+
+        :param filename: Image filename, relative to the images directory
+        :param stream: aiohttp stream with the image content
+        :param upload_id: Identifier of an upload done with several requests
+        :param offset: Offset of the data in the image, None to append them
+        :param checksum: MD5 checksum of the image, verified once the upload is complete
+        :param complete: True if this is the last part of the image
+        :returns: Number of bytes received for this image
+        """
+
         directory = self.get_images_directory()
         path = os.path.abspath(os.path.join(directory, *os.path.split(filename)))
         if os.path.commonprefix([directory, path]) != directory:
             raise aiohttp.web.HTTPForbidden(text="Could not write image: {}, {} is forbidden".format(filename, path))
+        if upload_id is not None and not ImageUpload.valid_upload_id(upload_id):
+            raise aiohttp.web.HTTPBadRequest(text="Invalid upload identifier: {}".format(upload_id))
         log.info("Writing image file %s", path)
         try:
-            remove_checksum(path)
-            # We store the file under his final name only when the upload is finished
-            tmp_path = path + ".tmp"
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(tmp_path, 'wb') as f:
-                while True:
-                    packet = yield from stream.read(4096)
-                    if not packet:
-                        break
-                    f.write(packet)
-            os.chmod(tmp_path, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
-            shutil.move(tmp_path, path)
-            md5sum(path)
+            if upload_id is None:
+                # We store the file under his final name only when the upload is finished
+                upload = ImageUpload(path, path + ".tmp")
+                yield from upload.start()
+            else:
+                upload = self._uploads.get((path, upload_id))
+                if upload is None:
+                    upload = ImageUpload(path, "{}.{}.tmp".format(path, upload_id))
+                    yield from upload.start(resume=True)
+                    self._uploads[(path, upload_id)] = upload
+            yield from upload.write(stream, offset)
+            if complete:
+                self._uploads.pop((path, upload_id), None)
+                remove_checksum(path)
+                yield from upload.finish(checksum)
+            return upload.offset
         except OSError as e:
             raise aiohttp.web.HTTPConflict(text="Could not write image: {} because {}".format(filename, e))
 
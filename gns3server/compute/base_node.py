@@ -34,6 +34,8 @@ from ..utils.asyncio.telnet_server import AsyncioTelnetServer
 from ..ubridge.hypervisor import Hypervisor
 from ..ubridge.ubridge_error import UbridgeError
 from .nios.nio_udp import NIOUDP
+from .memory_ledger import MemoryLedger
+from .resource_controller import ResourceController
 from .error import NodeError
 
 
@@ -72,6 +74,7 @@ class BaseNode:
         self._ubridge_hypervisor = None
         self._closed = False
         self._node_status = "stopped"
+        self._cgroup = None
         self._command_line = ""
         self._allocate_aux = allocate_aux
         self._wrap_console = wrap_console
@@ -131,6 +134,9 @@ class BaseNode:
     def status(self, status):
 
         self._node_status = status
+        if status == "stopped":
+            self.release_ram()
+            self._remove_cgroup()
         self.updated()
 
     def updated(self):
@@ -323,6 +329,8 @@ class BaseNode:
             self._manager.port_manager.release_tcp_port(self._aux, self._project)
             self._aux = None
 
+        self.release_ram()
+        self._remove_cgroup()
         self._closed = True
         return True
 
@@ -540,6 +548,8 @@ class BaseNode:
         if self._ubridge_hypervisor:
             log.info("Hypervisor {}:{} has successfully started".format(self._ubridge_hypervisor.host, self._ubridge_hypervisor.port))
             yield from self._ubridge_hypervisor.connect()
+            if self._ubridge_hypervisor.process:
+                self._control_resources(self._ubridge_hypervisor.process.pid)
 
     @asyncio.coroutine
     def _stop_ubridge(self):
@@ -735,3 +745,70 @@ class BaseNode:
                                                                                                                  percentage_left,
                                                                                                                  platform.node())
             self.project.emit("log.warning", {"message": message})
+
+    @asyncio.coroutine
+    def reserve_ram(self, requested_ram):
+        """
+        Reserves the RAM of the node on the compute before its process is launched,
+        waiting for other nodes to release memory if the compute is full.
+
+        :param requested_ram: requested amount of RAM in MB
+        """
+
+        yield from MemoryLedger.instance().reserve(self, requested_ram)
+        self.check_available_ram(requested_ram)
+
+    def release_ram(self):
+        """
+        Releases the RAM reserved by the node.
+        """
+
+        MemoryLedger.instance().release(self)
+
+    def _control_resources(self, pid, ram=None, cpu_throttling=None, priority=None):
+        """
+        Moves a process of the node in the node cgroup, and sets the limits
+        which are not None.
+
+        :param pid: Process identifier
+        :param ram: RAM of the node in MB, the memory limit is based on it
+        :param cpu_throttling: Percentage of one CPU allowed, 0 for no limit
+        :param priority: Process priority
+
+        :returns: True if the process is controlled by a cgroup
+        """
+
+        if self._cgroup is None:
+            self._cgroup = ResourceController.instance().create(self.id)
+            if self._cgroup is None:
+                return False
+        if not self._cgroup.add_process(pid):
+            return False
+        if ram is not None:
+            self._cgroup.set_memory_limit(ResourceController.instance().memory_limit(ram))
+        if cpu_throttling is not None:
+            self._cgroup.set_cpu_limit(cpu_throttling)
+        if priority is not None:
+            self._cgroup.set_priority(priority)
+        return True
+
+    def _remove_cgroup(self):
+        """
+        Removes the node cgroup once its processes have exited.
+        """
+
+        if self._cgroup is not None and self._cgroup.remove():
+            self._cgroup = None
+
+    @property
+    def resource_usage(self):
+        """
+        Returns the CPU time and memory used by the node processes,
+        read from the node cgroup.
+
+        :returns: dictionary or None if the node is not in a cgroup
+        """
+
+        if self._cgroup is None:
+            return None
+        return self._cgroup.usage()
@@ -24,6 +24,8 @@ import json
 import asyncio
 import logging
 import aiohttp
+import collections
+import time
 from gns3server.utils import parse_version
 from gns3server.utils.asyncio import locked_coroutine
 from gns3server.compute.base_manager import BaseManager
@@ -38,6 +40,13 @@ DOCKER_MINIMUM_API_VERSION = "1.25"
 DOCKER_MINIMUM_VERSION = "1.13"
 DOCKER_PREFERRED_API_VERSION = "1.30"
 
+# Number of container creations sent to the daemon at the same time
+DOCKER_DEFAULT_CONCURRENT_CREATES = 4
+
+# Images can be rebuilt or pulled outside of GNS3, cached information is checked again after this delay
+DOCKER_IMAGE_CACHE_TTL = 10
+DOCKER_IMAGE_CACHE_SIZE = 64
+
 
 class Docker(BaseManager):
 
@@ -52,6 +61,12 @@ class Docker(BaseManager):
         self._connector = None
         self._session = None
         self._api_version = DOCKER_MINIMUM_API_VERSION
+        # Image inspect results and the time they were retrieved, indexed by image name
+        self._image_cache = collections.OrderedDict()
+        self._image_queries = {}
+        concurrent_creates = self.config.get_section_config("Docker").getint("concurrent_creates", DOCKER_DEFAULT_CONCURRENT_CREATES)
+        self._create_semaphore = asyncio.Semaphore(max(1, concurrent_creates))
+        self._latencies = {"start": collections.deque(maxlen=100), "stop": collections.deque(maxlen=100)}
 
     @asyncio.coroutine
     def _check_connection(self):
@@ -182,6 +197,114 @@ class Docker(BaseManager):
                                                          autoping=True)
         return connection
 
+    @property
+    def create_semaphore(self):
+        """
+        Semaphore limiting the number of containers created at the same time
+        """
+
+        return self._create_semaphore
+
+    @asyncio.coroutine
+    def image_information(self, image):
+        """
+        Returns the inspect data of an image. The result is cached for a few
+        seconds and concurrent requests for the same image share a single query.
+
+        :param image: Image name
+        :returns: Dictionary information about the image
+        """
+
+        if image in self._image_cache:
+            retrieved_at, result = self._image_cache[image]
+            if time.time() - retrieved_at < DOCKER_IMAGE_CACHE_TTL:
+                self._image_cache.move_to_end(image)
+                return result
+
+        task = self._image_queries.get(image)
+        if task is None:
+            task = asyncio.async(self._inspect_image(image))
+            self._image_queries[image] = task
+            task.add_done_callback(lambda t: self._image_queries.pop(image, None))
+        return (yield from asyncio.shield(task))
+
+    @asyncio.coroutine
+    def _inspect_image(self, image):
+
+        result = yield from self.query("GET", "images/{}/json".format(image))
+        if isinstance(result, dict) and result.get("Id"):
+            self._image_cache.pop(image, None)
+            self._image_cache[image] = (time.time(), result)
+            while len(self._image_cache) > DOCKER_IMAGE_CACHE_SIZE:
+                self._image_cache.popitem(last=False)
+        return result
+
+    def invalidate_image(self, image):
+        """
+        Forget the cached information of an image, for example
+        because a newer version has been pulled.
+
+        :param image: Image name
+        """
+
+        self._image_cache.pop(image, None)
+
+    @asyncio.coroutine
+    def exec_command(self, container_id, command):
+        """
+        Run a command inside a running container using the exec endpoints
+        of the API instead of forking the docker client.
+
+        :param container_id: Container identifier
+        :param command: Command as a list of arguments
+        :returns: Exit code of the command
+        """
+
+        result = yield from self.query("POST", "containers/{}/exec".format(container_id), data={
+            "AttachStdin": False,
+            "AttachStdout": True,
+            "AttachStderr": True,
+            "Tty": False,
+            "Cmd": command
+        })
+        exec_id = result["Id"]
+        response = yield from self.http_query("POST", "exec/{}/start".format(exec_id), data={"Detach": False, "Tty": False}, timeout=None)
+        # The output is streamed until the command exits
+        yield from response.read()
+        response.close()
+        info = yield from self.query("GET", "exec/{}/json".format(exec_id))
+        exit_code = info.get("ExitCode")
+        if exit_code:
+            log.warning("Command %s in container %s exited with code %s", command, container_id, exit_code)
+        return exit_code
+
+    def record_latency(self, operation, duration):
+        """
+        Keep track of how long a container operation took.
+
+        :param operation: Operation name (start or stop)
+        :param duration: Duration in seconds
+        """
+
+        self._latencies.setdefault(operation, collections.deque(maxlen=100)).append(duration)
+
+    def latencies(self):
+        """
+        Returns statistics about the recorded container operations.
+
+        :returns: Dictionary with the count, average and maximum duration in seconds of each operation
+        """
+
+        stats = {}
+        for operation, durations in self._latencies.items():
+            if durations:
+                stats[operation] = {"count": len(durations),
+                                    "average": sum(durations) / len(durations),
+                                    "max": max(durations)}
+            else:
+                stats[operation] = {"count": 0, "average": 0.0, "max": 0.0}
+        return stats
+
     @locked_coroutine
     def pull_image(self, image, progress_callback=None):
         """
@@ -192,7 +315,7 @@ class Docker(BaseManager):
         """
 
         try:
-            yield from self.query("GET", "images/{}/json".format(image))
+            yield from self._inspect_image(image)
             return  # We already have the image skip the download
         except DockerHttp404Error:
             pass
@@ -221,6 +344,8 @@ class Docker(BaseManager):
             except ValueError:  # Partial JSON
                 pass
         response.close()
+        # The image name may now point to a new image ID
+        self.invalidate_image(image)
         if progress_callback:
             progress_callback("Success pulling image {}".format(image))
 
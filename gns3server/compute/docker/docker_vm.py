@@ -24,6 +24,7 @@ import shutil
 import psutil
 import shlex
 import aiohttp
+import time
 import os
 
 from gns3server.utils.asyncio.telnet_server import AsyncioTelnetServer
@@ -201,7 +202,7 @@ class DockerVM(BaseNode):
         """
         :returns: Dictionary information about the container image
         """
-        result = yield from self.manager.query("GET", "images/{}/json".format(self._image))
+        result = yield from self.manager.image_information(self._image)
         return result
 
     def _mount_binds(self, image_infos):
@@ -325,7 +326,13 @@ class DockerVM(BaseNode):
             params["Env"].append("DISPLAY=:{}".format(self._display))
             params["HostConfig"]["Binds"].append("/tmp/.X11-unix/:/tmp/.X11-unix/")
 
-        result = yield from self.manager.query("POST", "containers/create", data=params)
+        with (yield from self.manager.create_semaphore):
+            try:
+                result = yield from self.manager.query("POST", "containers/create", data=params)
+            except DockerHttp404Error:
+                # the image has been removed since we inspected it
+                self.manager.invalidate_image(self._image)
+                raise
         self._cid = result['Id']
         log.info("Docker container '{name}' [{id}] created".format(
             name=self._name, id=self._id))
@@ -352,6 +359,7 @@ class DockerVM(BaseNode):
     def start(self):
         """Starts this Docker container."""
 
+        start_time = time.time()
         try:
             state = yield from self._get_container_state()
         except DockerHttp404Error:
@@ -393,6 +401,7 @@ class DockerVM(BaseNode):
                 yield from self._start_aux()
 
         self.status = "started"
+        self.manager.record_latency("start", time.time() - start_time)
         log.info("Docker container '{name}' [{image}] started listen for {console_type} on {console}".format(name=self._name,
                                                                                                              image=self._image,
                                                                                                              console=self.console,
@@ -430,22 +439,23 @@ class DockerVM(BaseNode):
         for volume in self._volumes:
             log.debug("Docker container '{name}' [{image}] fix ownership on {path}".format(
                 name=self._name, image=self._image, path=volume))
-            process = yield from asyncio.subprocess.create_subprocess_exec(
-                "docker",
-                "exec",
-                self._cid,
-                "/gns3/bin/busybox",
-                "sh",
-                "-c",
-                "("
-                "/gns3/bin/busybox find \"{path}\" -depth -print0"
-                " | /gns3/bin/busybox xargs -0 /gns3/bin/busybox stat -c '%a:%u:%g:%n' > \"{path}/.gns3_perms\""
-                ")"
-                " && /gns3/bin/busybox chmod -R u+rX \"{path}\""
-                " && /gns3/bin/busybox chown {uid}:{gid} -R \"{path}\""
-                .format(uid=os.getuid(), gid=os.getgid(), path=volume),
-            )
-            yield from process.wait()
+            try:
+                yield from self.manager.exec_command(self._cid, [
+                    "/gns3/bin/busybox",
+                    "sh",
+                    "-c",
+                    "("
+                    "/gns3/bin/busybox find \"{path}\" -depth -print0"
+                    " | /gns3/bin/busybox xargs -0 /gns3/bin/busybox stat -c '%a:%u:%g:%n' > \"{path}/.gns3_perms\""
+                    ")"
+                    " && /gns3/bin/busybox chmod -R u+rX \"{path}\""
+                    " && /gns3/bin/busybox chown {uid}:{gid} -R \"{path}\""
+                    .format(uid=os.getuid(), gid=os.getgid(), path=volume)
+                ])
+            except DockerError as e:
+                # The container can exit right after being restarted, this must not prevent it from being stopped
+                log.warning("Could not fix permissions on {path} for Docker container '{name}': {error}".format(
+                    path=volume, name=self._name, error=e))
 
     @asyncio.coroutine
     def _start_vnc(self):
@@ -576,6 +586,7 @@ class DockerVM(BaseNode):
     def stop(self):
         """Stops this Docker container."""
 
+        stop_time = time.time()
         try:
             yield from self._clean_servers()
             yield from self._stop_ubridge()
@@ -604,6 +615,7 @@ class DockerVM(BaseNode):
         except RuntimeError as e:
             log.debug("Docker runtime error when closing: {}".format(str(e)))
             return
+        self.manager.record_latency("stop", time.time() - stop_time)
         self.status = "stopped"
 
     @asyncio.coroutine
@@ -30,19 +30,24 @@ import tempfile
 import logging
 import glob
 import re
+import hashlib
+import psutil
 
 log = logging.getLogger(__name__)
 
 from gns3server.utils.interfaces import interfaces, is_interface_up
 from gns3server.utils.asyncio import wait_run_in_executor
+from gns3server.utils.images import md5sum, default_images_directory
 from gns3server.utils import parse_version
 from uuid import uuid4
 from ..base_manager import BaseManager
 from ..port_manager import PortManager
+from ..error import NodeError, ImageMissingError
 from .dynamips_error import DynamipsError
 from .hypervisor import Hypervisor
 from .nodes.router import Router
 from .dynamips_factory import DynamipsFactory
+from .idlepc_database import IdlePCDatabase
 
 # NIOs
 from .nios.nio_udp import NIOUDP
@@ -112,16 +117,17 @@ class Dynamips(BaseManager):
 
     _NODE_CLASS = DynamipsFactory
     _NODE_TYPE = "dynamips"
-    _ghost_ios_lock = None
 
     def __init__(self):
 
         super().__init__()
-        Dynamips._ghost_ios_lock = asyncio.Lock()
         self._devices = {}
-        self._ghost_files = set()
+        # Ghost files shared by all the projects, indexed by (image, RAM, platform)
+        self._ghosts = {}
+        self._ghost_tasks = {}
         self._dynamips_path = None
         self._dynamips_ids = {}
+        self._idlepc_database = None
 
     @classmethod
     def node_types(cls):
@@ -169,6 +175,7 @@ class Dynamips(BaseManager):
     def unload(self):
 
         yield from BaseManager.unload(self)
+        yield from self._delete_unused_ghosts()
 
         tasks = []
         for device in self._devices.values():
@@ -227,8 +234,6 @@ class Dynamips(BaseManager):
         for file in files:
             try:
                 log.debug("Deleting file {}".format(file))
-                if file in self._ghost_files:
-                    self._ghost_files.remove(file)
                 yield from wait_run_in_executor(os.remove, file)
             except OSError as e:
                 log.warn("Could not delete file {}: {}".format(file, e))
@@ -318,11 +323,188 @@ class Dynamips(BaseManager):
 
         ghost_ios_support = self.config.get_section_config("Dynamips").getboolean("ghost_ios_support", True)
         if ghost_ios_support:
-            with (yield from Dynamips._ghost_ios_lock):
-                try:
-                    yield from self._set_ghost_ios(vm)
-                except GeneratorExit:
-                    log.warning("Could not create ghost IOS image {} (GeneratorExit)".format(vm.name))
+            try:
+                yield from self._set_ghost_ios(vm)
+            except GeneratorExit:
+                log.warning("Could not create ghost IOS image {} (GeneratorExit)".format(vm.name))
+
+    @asyncio.coroutine
+    def warmup_ghosts(self, project):
+        """
+        Builds the ghost files needed by the routers of a project
+        before they are started.
+
+        :param project: Project instance
+
+        :returns: List of ghost files
+        """
+
+        routers = [node for node in self.nodes if node.project.id == project.id and isinstance(node, Router)]
+        yield from asyncio.gather(*[self.ghost_ios_support(router) for router in routers])
+        return sorted(set(router.ghost_file for router in routers if router.ghost_file))
+
+    def ghosts(self):
+        """
+        :returns: List of the ghost files in the cache
+        """
+
+        ghosts = []
+        for path, ghost in sorted(self._ghosts.items()):
+            image, ram, platform = ghost["key"]
+            ghosts.append({"image": image,
+                           "ram": ram,
+                           "platform": platform,
+                           "path": path,
+                           "current": self._current_ghost(ghost["key"]) == path,
+                           "references": len(ghost["references"])})
+        return ghosts
+
+    def _ghost_cache_directory(self):
+        """
+        :returns: Directory where the ghost files are stored
+        """
+
+        path = self.config.get_section_config("Dynamips").get("ghost_cache_path")
+        if not path:
+            path = os.path.join(default_images_directory(self._NODE_TYPE), ".ghosts")
+        path = os.path.expanduser(path)
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            raise DynamipsError("Could not create the ghost files directory {}: {}".format(path, e))
+        return path
+
+    @staticmethod
+    def _image_signature(image):
+
+        try:
+            stat = os.stat(image)
+            return (stat.st_size, stat.st_mtime)
+        except OSError:
+            return None
+
+    def _ghost_file_path(self, vm, signature):
+        """
+        Each version of an image gets its own ghost file: images sharing
+        a filename never collide and a rebuilt ghost never replaces
+        a file still mapped by running routers.
+        """
+
+        digest = hashlib.md5("{}:{}:{}".format(vm.image, *signature).encode("utf-8")).hexdigest()[:12]
+        ghost_file = "{}-{}-{}".format(vm.platform, digest, vm.formatted_ghost_file())
+        return os.path.join(self._ghost_cache_directory(), ghost_file)
+
+    def _current_ghost(self, key):
+        """
+        A ghost file can be reused if it exists and the image has not changed since its creation
+
+        :param key: Tuple (image, RAM, platform)
+        :returns: Path of the ghost file or None
+        """
+
+        signature = self._image_signature(key[0])
+        for path, ghost in self._ghosts.items():
+            if ghost["key"] == key and ghost["signature"] == signature and os.path.isfile(path):
+                return path
+        return None
+
+    @asyncio.coroutine
+    def _acquire_ghost(self, path, vm):
+        """
+        Associates a router to a ghost file and releases its previous one.
+        """
+
+        for other_path, ghost in list(self._ghosts.items()):
+            if other_path != path and vm.id in ghost["references"]:
+                yield from self._release_ghost_reference(other_path, vm.id)
+        self._ghosts[path]["references"].add(vm.id)
+
+    @asyncio.coroutine
+    def release_ghost(self, vm):
+        """
+        Called when a router doesn't use its ghost file anymore.
+
+        :param vm: VM instance
+        """
+
+        for path, ghost in list(self._ghosts.items()):
+            if vm.id in ghost["references"]:
+                yield from self._release_ghost_reference(path, vm.id)
+
+    @asyncio.coroutine
+    def _release_ghost_reference(self, path, node_id):
+
+        ghost = self._ghosts.get(path)
+        if ghost is None:
+            return
+        ghost["references"].discard(node_id)
+        if not ghost["references"]:
+            log.debug("Ghost file {} is not used anymore".format(path))
+            ghost["last_used"] = time.time()
+            yield from self._evict_ghosts()
+
+    @asyncio.coroutine
+    def _evict_ghosts(self):
+        """
+        Deletes the ghost files replaced by a newer version of their image
+        and keeps at most ghost_cache_size unused ghost files.
+        """
+
+        unused = []
+        for path, ghost in list(self._ghosts.items()):
+            if ghost["references"]:
+                continue
+            if self._current_ghost(ghost["key"]) != path:
+                yield from self._delete_ghost(path)
+            else:
+                unused.append(path)
+
+        cache_size = self.config.get_section_config("Dynamips").getint("ghost_cache_size", 10)
+        unused.sort(key=lambda path: self._ghosts[path].get("last_used", 0))
+        for path in unused[:max(len(unused) - cache_size, 0)]:
+            yield from self._delete_ghost(path)
+
+    @asyncio.coroutine
+    def _delete_unused_ghosts(self):
+        """
+        Deletes the ghost files without any router using them.
+        """
+
+        for path, ghost in list(self._ghosts.items()):
+            if not ghost["references"]:
+                yield from self._delete_ghost(path)
+
+    @asyncio.coroutine
+    def prune_ghosts(self):
+        """
+        Deletes the ghost files left in the cache by a previous run of the
+        server: the references to the ghost files are only kept in memory.
+        """
+
+        try:
+            files = glob.glob(os.path.join(glob.escape(self._ghost_cache_directory()), "*.ghost"))
+        except DynamipsError as e:
+            log.warning(str(e))
+            return
+        for path in files:
+            # a ghost file is being created or is used
+            if self._ghost_tasks or path in self._ghosts:
+                continue
+            try:
+                log.debug("Deleting orphaned ghost file {}".format(path))
+                yield from wait_run_in_executor(os.remove, path)
+            except OSError as e:
+                log.warning("Could not delete ghost file {}: {}".format(path, e))
+
+    @asyncio.coroutine
+    def _delete_ghost(self, path):
+
+        del self._ghosts[path]
+        try:
+            log.debug("Deleting ghost file {}".format(path))
+            yield from wait_run_in_executor(os.remove, path)
+        except OSError as e:
+            log.warning("Could not delete ghost file {}: {}".format(path, e))
 
     @asyncio.coroutine
     def create_nio(self, node, nio_settings):
@@ -409,36 +591,63 @@ class Dynamips(BaseManager):
             log.warning("Ghost IOS is not supported for c7200 with NPE-G2")
             return
 
-        ghost_file = vm.formatted_ghost_file()
+        key = (vm.image, vm.ram, vm.platform)
+        ghost_file_path = self._current_ghost(key)
+        if ghost_file_path is None:
+            # Only one creation by ghost file, routers using other images are not blocked
+            task = self._ghost_tasks.get(key)
+            if task is None:
+                task = asyncio.async(self._create_ghost(vm, key))
+                self._ghost_tasks[key] = task
+                task.add_done_callback(lambda t: self._ghost_tasks.pop(key, None))
+            yield from asyncio.shield(task)
+            ghost_file_path = self._current_ghost(key)
+            if ghost_file_path is None:
+                return
 
-        module_workdir = vm.project.module_working_directory(self.module_name.lower())
-        ghost_file_path = os.path.join(module_workdir, ghost_file)
-        if ghost_file_path not in self._ghost_files:
-            # create a new ghost IOS instance
-            ghost_id = str(uuid4())
-            ghost = Router("ghost-" + ghost_file, ghost_id, vm.project, vm.manager, platform=vm.platform, hypervisor=vm.hypervisor, ghost_flag=True)
-            try:
-                yield from ghost.create()
-                yield from ghost.set_image(vm.image)
-                yield from ghost.set_ghost_status(1)
-                yield from ghost.set_ghost_file(ghost_file_path)
-                yield from ghost.set_ram(vm.ram)
-                try:
-                    yield from ghost.start()
-                    yield from ghost.stop()
-                    self._ghost_files.add(ghost_file_path)
-                except DynamipsError:
-                    raise
-                finally:
-                    yield from ghost.clean_delete()
-            except DynamipsError as e:
-                log.warn("Could not create ghost instance: {}".format(e))
-
-        if vm.ghost_file != ghost_file and os.path.isfile(ghost_file_path):
+        yield from self._acquire_ghost(ghost_file_path, vm)
+        if vm.ghost_file != ghost_file_path:
             # set the ghost file to the router
             yield from vm.set_ghost_status(2)
             yield from vm.set_ghost_file(ghost_file_path)
 
+    @asyncio.coroutine
+    def _create_ghost(self, vm, key):
+        """
+        Creates a ghost file by starting and stopping a temporary router.
+
+        :param vm: VM instance requesting the ghost file
+        :param key: Tuple (image, RAM, platform)
+        """
+
+        signature = self._image_signature(vm.image)
+        if signature is None:
+            log.warning("Could not create ghost instance: image {} doesn't exist".format(vm.image))
+            return
+
+        # create a new ghost IOS instance
+        ghost_id = str(uuid4())
+        ghost = Router("ghost-{}-{}".format(vm.platform, vm.formatted_ghost_file()), ghost_id, vm.project, vm.manager, platform=vm.platform, hypervisor=vm.hypervisor, ghost_flag=True)
+        try:
+            ghost_file_path = self._ghost_file_path(vm, signature)
+            if ghost_file_path in self._ghosts and self._ghosts[ghost_file_path]["references"]:
+                # The file is mapped by running routers, never write over it
+                return
+            yield from ghost.create()
+            yield from ghost.set_image(vm.image)
+            yield from ghost.set_ghost_status(1)
+            yield from ghost.set_ghost_file(ghost_file_path)
+            yield from ghost.set_ram(vm.ram)
+            try:
+                yield from ghost.start()
+                yield from ghost.stop()
+                self._ghosts[ghost_file_path] = {"key": key, "signature": signature, "references": set(), "last_used": time.time()}
+            finally:
+                yield from ghost.clean_delete()
+        except DynamipsError as e:
+            log.warn("Could not create ghost instance: {}".format(e))
+        yield from self._evict_ghosts()
+
     @asyncio.coroutine
     def update_vm_settings(self, vm, settings):
         """
@@ -551,11 +760,115 @@ class Dynamips(BaseManager):
 
         return os.path.join("configs", os.path.basename(path))
 
+    @property
+    def idlepc_database(self):
+        """
+        Returns the database of validated idle-PC values.
+
+        :returns: IdlePCDatabase instance
+        """
+
+        if self._idlepc_database is None:
+            path = self.config.get_section_config("Dynamips").get("idlepc_database_path")
+            if not path:
+                path = os.path.join(default_images_directory(self._NODE_TYPE), ".idlepc.json")
+            self._idlepc_database = IdlePCDatabase(os.path.expanduser(path))
+        return self._idlepc_database
+
     @asyncio.coroutine
-    def auto_idlepc(self, vm):
+    def auto_idlepc(self, vm, instances=None, use_database=True):
         """
         Try to find the best possible idle-pc value.
 
+        :param vm: VM instance
+        :param instances: Number of scratch routers used to probe the values concurrently
+        :param use_database: Look for a value already validated for this image
+
+        :returns: idle-pc value
+        """
+
+        if instances is None:
+            instances = self.config.get_section_config("Dynamips").getint("idlepc_probe_instances", 1)
+        instances = self._idlepc_probe_instances(instances)
+        checksum = yield from wait_run_in_executor(md5sum, vm.image)
+        if use_database:
+            known_idlepc = self.idlepc_database.get(checksum, vm.platform)
+            if known_idlepc:
+                log.info("Auto Idle-PC: using idle-PC value {} already validated for {}".format(known_idlepc, vm.image))
+                yield from vm.set_idlepc(known_idlepc)
+                return known_idlepc
+
+        if instances > 1:
+            validated_idlepc = yield from self._parallel_auto_idlepc(vm, instances)
+            yield from vm.set_idlepc(validated_idlepc)
+        else:
+            validated_idlepc = yield from self._sequential_auto_idlepc(vm)
+
+        self.idlepc_database.set(checksum, vm.platform, validated_idlepc, image=os.path.basename(vm.image))
+        return validated_idlepc
+
+    @staticmethod
+    def _idlepc_probe_instances(instances, concurrency=1):
+        """
+        Each probed router needs a CPU for itself: under contention a router
+        gets less CPU time and a bad idle-pc value looks valid.
+
+        :param instances: Number of scratch routers asked by image
+        :param concurrency: Number of images probed at the same time
+
+        :returns: Number of scratch routers by image
+        """
+
+        cpus = psutil.cpu_count() or 1
+        return max(1, min(instances, cpus // max(concurrency, 1)))
+
+    @staticmethod
+    def _idlepc_candidates(idlepcs):
+        """
+        :returns: List of valid idle-pc values from the proposals
+        """
+
+        candidates = []
+        for idlepc in idlepcs:
+            idlepc = idlepc.split()[0]
+            if re.search(r"^0x[0-9a-f]{8}$", idlepc):
+                candidates.append(idlepc)
+        return candidates
+
+    @asyncio.coroutine
+    def _probe_idlepc(self, vm, idlepc):
+        """
+        Applies an idle-pc value to a running router and measures its CPU usage.
+
+        :param vm: VM instance
+        :param idlepc: idle-pc value
+
+        :returns: True if the value reduces the CPU usage enough
+        """
+
+        yield from vm.set_idlepc(idlepc)
+        log.debug("Auto Idle-PC: trying idle-PC value {}".format(vm.idlepc))
+        start_time = time.time()
+        initial_cpu_usage = yield from vm.get_cpu_usage()
+        log.debug("Auto Idle-PC: initial CPU usage is {}%".format(initial_cpu_usage))
+        yield from asyncio.sleep(3)  # wait 3 seconds to probe the cpu again
+        elapsed_time = time.time() - start_time
+        cpu_usage = yield from vm.get_cpu_usage()
+        cpu_elapsed_usage = cpu_usage - initial_cpu_usage
+        cpu_usage = abs(cpu_elapsed_usage * 100.0 / elapsed_time)
+        if cpu_usage > 100:
+            cpu_usage = 100
+        log.debug("Auto Idle-PC: CPU usage is {}% after {:.2} seconds".format(cpu_usage, elapsed_time))
+        if cpu_usage < 70:
+            log.debug("Auto Idle-PC: idle-PC value {} has been validated".format(idlepc))
+            return True
+        return False
+
+    @asyncio.coroutine
+    def _sequential_auto_idlepc(self, vm):
+        """
+        Tries the idle-pc proposals one after the other on the router itself.
+
         :param vm: VM instance
         """
 
@@ -572,26 +885,9 @@ class Dynamips(BaseManager):
             if not idlepcs:
                 raise DynamipsError("No Idle-PC values found")
 
-            for idlepc in idlepcs:
-                match = re.search(r"^0x[0-9a-f]{8}$", idlepc.split()[0])
-                if not match:
-                   continue
-                yield from vm.set_idlepc(idlepc.split()[0])
-                log.debug("Auto Idle-PC: trying idle-PC value {}".format(vm.idlepc))
-                start_time = time.time()
-                initial_cpu_usage = yield from vm.get_cpu_usage()
-                log.debug("Auto Idle-PC: initial CPU usage is {}%".format(initial_cpu_usage))
-                yield from asyncio.sleep(3)  # wait 3 seconds to probe the cpu again
-                elapsed_time = time.time() - start_time
-                cpu_usage = yield from vm.get_cpu_usage()
-                cpu_elapsed_usage = cpu_usage - initial_cpu_usage
-                cpu_usage = abs(cpu_elapsed_usage * 100.0 / elapsed_time)
-                if cpu_usage > 100:
-                    cpu_usage = 100
-                log.debug("Auto Idle-PC: CPU usage is {}% after {:.2} seconds".format(cpu_usage, elapsed_time))
-                if cpu_usage < 70:
-                    validated_idlepc = vm.idlepc
-                    log.debug("Auto Idle-PC: idle-PC value {} has been validated".format(validated_idlepc))
+            for idlepc in self._idlepc_candidates(idlepcs):
+                if (yield from self._probe_idlepc(vm, idlepc)):
+                    validated_idlepc = idlepc
                     break
 
             if validated_idlepc is None:
@@ -604,6 +900,163 @@ class Dynamips(BaseManager):
                 yield from vm.stop()
         return validated_idlepc
 
+    @asyncio.coroutine
+    def _create_scratch_router(self, image, platform, ram, project):
+        """
+        Creates and boots a router, with its own hypervisor, used only to probe idle-pc values.
+        """
+
+        router = Router("idlepc", str(uuid4()), project, self, platform=platform, ghost_flag=True)
+        try:
+            yield from router.create()
+            yield from router.set_image(image)
+            yield from router.set_ram(ram)
+            yield from router.set_idlepc("0x0")
+            yield from router.start()
+        except Exception:
+            yield from self._delete_scratch_router(router)
+            raise
+        return router
+
+    @asyncio.coroutine
+    def _delete_scratch_router(self, router):
+
+        hypervisor = router.hypervisor
+        if not hypervisor:
+            return
+        # The router may not be fully created, each step can fail but the hypervisor must always be stopped
+        for cleanup in (router.stop, router.clean_delete, hypervisor.stop):
+            try:
+                yield from cleanup()
+            except (DynamipsError, ValueError, OSError) as e:
+                log.warning("Could not delete idle-PC scratch router {}: {}".format(router.name, e))
+
+    @asyncio.coroutine
+    def _parallel_auto_idlepc(self, vm, instances, image=None, platform=None, ram=None, project=None):
+        """
+        Boots several scratch routers running the same image and
+        shares the idle-pc proposals between them, so the candidates
+        are evaluated concurrently.
+
+        :param vm: VM instance (None when precomputing values)
+        :param instances: Number of scratch routers
+
+        :returns: validated idle-pc value
+        """
+
+        if vm is not None:
+            image, platform, ram, project = vm.image, vm.platform, vm.ram, vm.project
+
+        routers = []
+        try:
+            creations = [self._create_scratch_router(image, platform, ram, project) for _ in range(instances)]
+            results = yield from asyncio.gather(*creations, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    log.warning("Auto Idle-PC: could not create scratch router: {}".format(result))
+                else:
+                    routers.append(result)
+            if not routers:
+                raise DynamipsError("Could not create any router to probe idle-pc values")
+            yield from asyncio.sleep(20)  # leave time to the routers to boot
+
+            idlepcs = yield from routers[0].get_idle_pc_prop()
+            candidates = self._idlepc_candidates(idlepcs)
+            if not candidates:
+                raise DynamipsError("No Idle-PC values found")
+
+            validated = []
+
+            @asyncio.coroutine
+            def worker(router):
+                while candidates and not validated:
+                    idlepc = candidates.pop(0)
+                    if (yield from self._probe_idlepc(router, idlepc)):
+                        validated.append(idlepc)
+
+            yield from asyncio.gather(*[worker(router) for router in routers])
+
+            # The routers were competing for the CPU, confirm the value on a router running alone
+            while len(routers) > 1:
+                yield from self._delete_scratch_router(routers.pop())
+            for idlepc in validated + candidates:
+                if (yield from self._probe_idlepc(routers[0], idlepc)):
+                    return idlepc
+            raise DynamipsError("Sorry, no idle-pc value was suitable")
+        finally:
+            for router in routers:
+                yield from self._delete_scratch_router(router)
+
+    @staticmethod
+    def platform_from_image(image):
+        """
+        Guess the router platform from an IOS image filename.
+
+        :param image: Image filename
+        :returns: platform name or None
+        """
+
+        match = re.match(r"^c(\d{4})", os.path.basename(image).lower())
+        if not match:
+            return None
+        model = match.group(1)
+        if model in ("2691", "3725", "3745", "7200"):
+            return "c" + model
+        for prefix, platform in (("17", "c1700"), ("26", "c2600"), ("36", "c3600")):
+            if model.startswith(prefix):
+                return platform
+        return None
+
+    @asyncio.coroutine
+    def precompute_idlepcs(self, images=None, instances=2, concurrency=2):
+        """
+        Finds and stores the idle-pc values of images in advance.
+
+        :param images: List of dictionaries with image, platform and ram keys (default: all the IOS images)
+        :param instances: Number of scratch routers used for each image
+        :param concurrency: Number of images processed at the same time
+
+        :returns: Dictionary image => result
+        """
+
+        from ..project import Project
+
+        if images is None:
+            images = [{"image": image["path"]} for image in (yield from self.list_images())]
+
+        cpus = psutil.cpu_count() or 1
+        concurrency = max(1, min(concurrency, cpus))
+        instances = self._idlepc_probe_instances(instances, concurrency)
+        results = {}
+        project = Project(name="idlepc-precompute")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        @asyncio.coroutine
+        def compute(settings):
+            image = settings["image"]
+            platform = settings.get("platform") or self.platform_from_image(image)
+            if platform is None:
+                results[image] = {"error": "Could not detect the platform of the image"}
+                return
+            with (yield from semaphore):
+                try:
+                    path = self.get_abs_image_path(image)
+                    checksum = yield from wait_run_in_executor(md5sum, path)
+                    idlepc = self.idlepc_database.get(checksum, platform)
+                    if idlepc is None:
+                        ram = settings.get("ram", PLATFORMS_DEFAULT_RAM[platform])
+                        idlepc = yield from self._parallel_auto_idlepc(None, instances, image=path, platform=platform, ram=ram, project=project)
+                        self.idlepc_database.set(checksum, platform, idlepc, image=os.path.basename(path))
+                    results[image] = {"idlepc": idlepc, "platform": platform}
+                except (NodeError, ImageMissingError, aiohttp.web.HTTPException) as e:
+                    results[image] = {"error": str(e), "platform": platform}
+
+        try:
+            yield from asyncio.gather(*[compute(settings) for settings in images])
+        finally:
+            yield from project.delete()
+        return results
+
     @asyncio.coroutine
     def duplicate_node(self, source_node_id, destination_node_id):
         """
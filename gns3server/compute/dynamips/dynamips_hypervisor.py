@@ -26,6 +26,7 @@ import logging
 import asyncio
 
 from .dynamips_error import DynamipsError
+from ...utils.metrics import timed_command
 
 log = logging.getLogger(__name__)
 
@@ -221,7 +222,7 @@ class DynamipsHypervisor:
 
         self._host = host
 
-    @asyncio.coroutine
+    @timed_command("dynamips")
     def send(self, command):
         """
         Sends commands to this hypervisor.
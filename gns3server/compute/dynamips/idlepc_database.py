@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Persistent database of validated idle-PC values.
+"""
+
+import os
+import json
+import time
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class IdlePCDatabase:
+
+    """
+    Idle-PC values indexed by IOS image checksum and platform.
+    Because the key is the image checksum an entry stays valid
+    when an image is renamed or used in another project.
+
+    :param path: Path of the JSON file storing the database
+    """
+
+    def __init__(self, path):
+
+        self._path = path
+        self._entries = None
+
+    @property
+    def path(self):
+
+        return self._path
+
+    @staticmethod
+    def _key(checksum, platform):
+
+        return "{}:{}".format(checksum, platform)
+
+    def _load(self):
+
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+        except (OSError, ValueError) as e:
+            log.warning("Could not load idle-PC database {}: {}".format(self._path, e))
+
+    def get(self, checksum, platform):
+        """
+        Returns the idle-PC value validated for an image.
+
+        :param checksum: IOS image checksum
+        :param platform: Router platform
+        :returns: idle-PC value or None
+        """
+
+        if not checksum:
+            return None
+        self._load()
+        entry = self._entries.get(self._key(checksum, platform))
+        if entry:
+            return entry["idlepc"]
+        return None
+
+    def set(self, checksum, platform, idlepc, image=None):
+        """
+        Records a validated idle-PC value and saves the database.
+
+        :param checksum: IOS image checksum
+        :param platform: Router platform
+        :param idlepc: idle-PC value
+        :param image: Image filename (informative only)
+        """
+
+        if not checksum:
+            return
+        self._load()
+        self._entries[self._key(checksum, platform)] = {"checksum": checksum,
+                                                         "platform": platform,
+                                                         "idlepc": idlepc,
+                                                         "image": image,
+                                                         "validated_at": int(time.time())}
+        self.save()
+
+    def remove(self, checksum, platform):
+        """
+        Forgets the idle-PC value of an image.
+
+        :param checksum: IOS image checksum
+        :param platform: Router platform
+        """
+
+        self._load()
+        if self._entries.pop(self._key(checksum, platform), None) is not None:
+            self.save()
+
+    def entries(self):
+        """
+        :returns: List of the known idle-PC values
+        """
+
+        self._load()
+        return sorted(self._entries.values(), key=lambda e: (e.get("image") or "", e["platform"]))
+
+    def save(self):
+        """
+        Writes the database on disk.
+        """
+
+        self._load()
+        tmp_path = self._path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, sort_keys=True, indent=4)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            log.warning("Could not save idle-PC database {}: {}".format(self._path, e))
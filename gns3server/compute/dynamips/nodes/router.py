@@ -35,6 +35,7 @@ import logging
 log = logging.getLogger(__name__)
 
 from ...base_node import BaseNode
+from ...nvram_extractor import NVRAMExtractor
 from ..dynamips_error import DynamipsError
 from ..nios.nio_udp import NIOUDP
 
@@ -167,7 +168,8 @@ class Router(BaseNode):
                        "console_type": "telnet",
                        "aux": self.aux,
                        "mac_addr": self._mac_addr,
-                       "system_id": self._system_id}
+                       "system_id": self._system_id,
+                       "resource_usage": self.resource_usage}
 
         # return the relative path if the IOS image is in the images_path directory
         router_info["image"] = self.manager.get_relative_image_path(self._image)
@@ -279,9 +281,9 @@ class Router(BaseNode):
             if elf_header_start != b'\x7fELF\x01\x02\x01':
                 raise DynamipsError('"{}" is not a valid IOS image'.format(self._image))
 
-            # check if there is enough RAM to run
+            # reserve the RAM needed to run
             if not self._ghost_flag:
-                self.check_available_ram(self.ram)
+                yield from self.reserve_ram(self.ram)
 
             # config paths are relative to the working directory configured on Dynamips hypervisor
             startup_config_path = os.path.join("configs", "i{}_startup-config.cfg".format(self._dynamips_id))
@@ -292,13 +294,20 @@ class Router(BaseNode):
                 # an empty private-config can prevent a router to boot.
                 private_config_path = ''
 
-            yield from self._hypervisor.send('vm set_config "{name}" "{startup}" "{private}"'.format(
-                name=self._name,
-                startup=startup_config_path,
-                private=private_config_path))
-            yield from self._hypervisor.send('vm start "{name}"'.format(name=self._name))
+            try:
+                yield from self._hypervisor.send('vm set_config "{name}" "{startup}" "{private}"'.format(
+                    name=self._name,
+                    startup=startup_config_path,
+                    private=private_config_path))
+                yield from self._hypervisor.send('vm start "{name}"'.format(name=self._name))
+            except DynamipsError:
+                self.release_ram()
+                raise
             self.status = "started"
             log.info('router "{name}" [{id}] has been started'.format(name=self._name, id=self._id))
+            # a hypervisor shared by several routers cannot be controlled per router
+            if self._hypervisor.process and self._hypervisor.devices == [self]:
+                self._control_resources(self._hypervisor.process.pid, ram=self._ram)
 
             self._memory_watcher = FileWatcher(self._memory_files(), self._memory_changed, strategy='hash', delay=30)
             monitor_process(self._hypervisor.process, self._termination_callback)
@@ -395,6 +404,7 @@ class Router(BaseNode):
                         yield from nio.close()
 
         yield from self._stop_ubridge()
+        yield from self.manager.release_ghost(self)
 
         if self in self._hypervisor.devices:
             self._hypervisor.devices.remove(self)
@@ -1556,6 +1566,12 @@ class Router(BaseNode):
         except OSError as e:
             raise DynamipsError("Could could not create configuration directory {}: {}".format(config_path, e))
 
+        extractor = NVRAMExtractor.instance()
+        nvram_file = self._memory_files()[1]
+        if not extractor.has_changed(nvram_file):
+            log.debug("NVRAM {} has not changed since the configs were saved".format(nvram_file))
+            return
+
         startup_config_base64, private_config_base64 = yield from self.extract_config()
         if startup_config_base64:
             startup_config = self.startup_config_path
@@ -1580,6 +1596,9 @@ class Router(BaseNode):
             except (binascii.Error, OSError) as e:
                 raise DynamipsError("Could not save the private configuration {}: {}".format(config_path, e))
 
+        if startup_config_base64 is not None:
+            extractor.mark_extracted(nvram_file)
+
     def delete(self):
         """
         Delete this VM (including all its files).
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+
+import logging
+log = logging.getLogger(__name__)
+
+
+MANIFEST_FILENAME = ".gns3_manifest"
+
+# Number of files hashed at the same time
+HASH_WORKERS = 4
+
+# A file modified less than this number of seconds ago is hashed again
+# at the next refresh: a write in the same mtime tick would be missed
+MTIME_GRACE = 2
+
+
+def hash_file(path):
+    """
+    :returns: hexadecimal md5 of a file
+    """
+
+    m = hashlib.md5()
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(1024 * 1024)
+            if not buf:
+                break
+            m.update(buf)
+    return m.hexdigest()
+
+
+class FileManifest:
+
+    """
+    Manifest of the files of a project: path, size, modification time
+    and md5 of each file, saved in the project directory. Only the
+    files whose size or modification time changed since the previous
+    refresh are hashed again.
+
+    :param path: Project directory
+    """
+
+    def __init__(self, path):
+
+        self._path = path
+        self._files = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def path(self):
+
+        return self._path
+
+    @property
+    def manifest_path(self):
+
+        return os.path.join(self._path, MANIFEST_FILENAME)
+
+    def _load(self):
+
+        try:
+            with open(self.manifest_path) as f:
+                files = json.load(f)["files"]
+            return {path: tuple(entry) for path, entry in files.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+    def _save(self, files):
+
+        tmp_path = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_path, "w+") as f:
+                json.dump({"version": 1, "files": files}, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            log.warning("Could not save the file manifest {}: {}".format(self.manifest_path, e))
+
+    def _scan(self):
+        """
+        :returns: List of (relative path, size, mtime_ns) of the project files, in os.walk order
+        """
+
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self._path):
+            for filename in filenames:
+                if filename.endswith(".ghost") or filename in (MANIFEST_FILENAME, MANIFEST_FILENAME + ".tmp"):
+                    continue
+                path = os.path.normpath(os.path.join(os.path.relpath(dirpath, self._path), filename))
+                try:
+                    st = os.stat(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+                files.append((path, st.st_size, st.st_mtime_ns))
+        return files
+
+    @asyncio.coroutine
+    def refresh(self):
+        """
+        Updates the manifest with the current files of the project.
+
+        :returns: Array of files {"path": "test.bin", "md5sum": "aaaaa"}
+        """
+
+        with (yield from self._lock):
+            loop = asyncio.get_event_loop()
+            if self._files is None:
+                self._files = yield from loop.run_in_executor(None, self._load)
+            scanned = yield from loop.run_in_executor(None, self._scan)
+
+            semaphore = asyncio.Semaphore(HASH_WORKERS)
+
+            @asyncio.coroutine
+            def hash_entry(path):
+                with (yield from semaphore):
+                    try:
+                        return (yield from loop.run_in_executor(None, hash_file, os.path.join(self._path, path)))
+                    except OSError:
+                        return None
+
+            checksums = {}
+            to_hash = []
+            for path, size, mtime_ns in scanned:
+                known = self._files.get(path)
+                if known and known[0] == size and known[1] == mtime_ns:
+                    checksums[path] = known[2]
+                else:
+                    to_hash.append(path)
+            if to_hash:
+                log.debug("Hashing {} modified files of {}".format(len(to_hash), self._path))
+                results = yield from asyncio.gather(*[hash_entry(path) for path in to_hash])
+                checksums.update(zip(to_hash, results))
+
+            now = time.time()
+            files = []
+            manifest = {}
+            for path, size, mtime_ns in scanned:
+                checksum = checksums.get(path)
+                if checksum is None:
+                    # the file has been removed or can't be read
+                    continue
+                files.append({"path": path, "md5sum": checksum})
+                if now - mtime_ns / 1e9 > MTIME_GRACE:
+                    manifest[path] = (size, mtime_ns, checksum)
+
+            if manifest != self._files:
+                self._files = manifest
+                yield from loop.run_in_executor(None, self._save, manifest)
+            return files
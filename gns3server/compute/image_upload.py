@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import stat
+import shutil
+import asyncio
+import hashlib
+import aiohttp
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Size of the blocks written to the disk in a thread
+BLOCK_SIZE = 1024 * 1024
+
+UPLOAD_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ImageUpload:
+
+    """
+    Upload of an image. The data are hashed while they are received
+    and written by large blocks in a thread, the image is never read
+    again once uploaded.
+
+    An upload can be done with several requests: each one continues
+    at the offset reached by the previous one, a dropped connection
+    doesn't restart the upload from the beginning.
+
+    :param path: Final path of the image
+    :param tmp_path: Path where the image is written until the upload is complete
+    """
+
+    def __init__(self, path, tmp_path):
+
+        self._path = path
+        self._tmp_path = tmp_path
+        self._md5 = hashlib.md5()
+        self._offset = 0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def valid_upload_id(upload_id):
+
+        return UPLOAD_ID_RE.match(upload_id) is not None
+
+    @property
+    def path(self):
+
+        return self._path
+
+    @property
+    def offset(self):
+        """
+        :returns: Number of bytes received
+        """
+
+        return self._offset
+
+    @asyncio.coroutine
+    def start(self, resume=False):
+        """
+        Prepares the temporary file.
+
+        :param resume: Continue the data already in the temporary file (after a restart of the server)
+        """
+
+        os.makedirs(os.path.dirname(self._tmp_path), exist_ok=True)
+        loop = asyncio.get_event_loop()
+        if resume and os.path.exists(self._tmp_path):
+            yield from loop.run_in_executor(None, self._hash_tmp_file)
+            log.info("Resuming upload of %s at offset %d", self._path, self._offset)
+        else:
+            with open(self._tmp_path, "wb"):
+                pass
+
+    def _hash_tmp_file(self):
+
+        with open(self._tmp_path, "rb") as f:
+            while True:
+                block = f.read(BLOCK_SIZE)
+                if not block:
+                    break
+                self._md5.update(block)
+                self._offset += len(block)
+
+    def _write_block(self, f, block):
+
+        f.write(block)
+        self._md5.update(block)
+        self._offset += len(block)
+
+    @asyncio.coroutine
+    def write(self, stream, offset=None):
+        """
+        Appends the content of a stream to the upload. A block is written
+        in a thread while the next one is received.
+
+        :param stream: aiohttp stream
+        :param offset: Offset where the data start, None to append
+        """
+
+        with (yield from self._lock):
+            if offset is not None and offset != self._offset:
+                raise aiohttp.web.HTTPConflict(text="Upload of {} is at offset {}, not {}".format(os.path.basename(self._path), self._offset, offset))
+
+            loop = asyncio.get_event_loop()
+            with open(self._tmp_path, "ab") as f:
+                pending = None
+                buffer = bytearray()
+                try:
+                    while True:
+                        packet = yield from stream.read(BLOCK_SIZE)
+                        if packet:
+                            buffer.extend(packet)
+                        if len(buffer) >= BLOCK_SIZE or (not packet and buffer):
+                            if pending:
+                                yield from pending
+                            pending = loop.run_in_executor(None, self._write_block, f, bytes(buffer))
+                            buffer.clear()
+                        if not packet:
+                            break
+                finally:
+                    if pending:
+                        # the offset must match the data on the disk
+                        yield from asyncio.wait([pending])
+                    if buffer and (pending is None or pending.exception() is None):
+                        # keep what has been received before the connection has been lost
+                        yield from loop.run_in_executor(None, self._write_block, f, bytes(buffer))
+                if pending:
+                    pending.result()
+
+    @asyncio.coroutine
+    def finish(self, checksum=None):
+        """
+        Moves the image to its final path and writes its checksum.
+
+        :param checksum: MD5 checksum expected by the client
+        """
+
+        with (yield from self._lock):
+            digest = self._md5.hexdigest()
+            if checksum and checksum.lower() != digest:
+                os.remove(self._tmp_path)
+                raise aiohttp.web.HTTPConflict(text="Checksum of {} is {}, {} was expected".format(os.path.basename(self._path), digest, checksum))
+            os.chmod(self._tmp_path, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
+            shutil.move(self._tmp_path, self._path)
+            with open(self._path + ".md5sum", "w+") as f:
+                f.write(digest)
+            log.info("Image %s uploaded (%d bytes, md5 %s)", self._path, self._offset, digest)
+            return digest
+
+
+def upload_parameters(query):
+    """
+    Parameters of an image upload from the query string:
+    upload_id, offset, md5sum and complete (0 or 1).
+
+    :param query: Query of the request
+    :returns: Keyword parameters for BaseManager.write_image
+    """
+
+    upload_id = query.get("upload_id")
+    try:
+        offset = query.get("offset")
+        if offset is not None:
+            offset = int(offset)
+        # an upload without identifier is done with a single request
+        complete = upload_id is None or bool(int(query.get("complete", "0")))
+    except ValueError:
+        raise aiohttp.web.HTTPBadRequest(text="Invalid upload parameters")
+    return {"upload_id": upload_id,
+            "offset": offset,
+            "checksum": query.get("md5sum"),
+            "complete": complete}
@@ -39,9 +39,10 @@ from ..adapters.serial_adapter import SerialAdapter
 from ..nios.nio_udp import NIOUDP
 from ..base_node import BaseNode
 from .utils.iou_import import nvram_import
-from .utils.iou_export import nvram_export
 from gns3server.ubridge.ubridge_error import UbridgeError
 from gns3server.utils.file_watcher import FileWatcher
+from ..nvram_extractor import NVRAMExtractor
+from ..probe_cache import ProbeCache
 from gns3server.utils.asyncio.telnet_server import AsyncioTelnetServer
 from gns3server.utils.asyncio import locked_coroutine
 import gns3server.utils.asyncio
@@ -97,9 +98,18 @@ class IOUVM(BaseNode):
         Called when the NVRAM file has changed
         """
         log.debug("NVRAM changed: {}".format(path))
-        self.save_configs()
+        task = asyncio.async(self.save_configs())
+        task.add_done_callback(self._save_configs_done)
         self.updated()
 
+    def _save_configs_done(self, task):
+        """
+        Called when the configs saved after a NVRAM change are written
+        """
+
+        if not task.cancelled() and task.exception():
+            log.error("Could not save the configs of IOU VM {}: {}".format(self._name, task.exception()))
+
     @asyncio.coroutine
     def close(self):
         """
@@ -231,6 +241,7 @@ class IOUVM(BaseNode):
                        "l1_keepalives": self._l1_keepalives,
                        "use_default_iou_values": self._use_default_iou_values,
                        "command_line": self.command_line,
+                       "resource_usage": self.resource_usage,
                        "application_id": self.application_id}
 
         # return the relative path if the IOU image is in the images_path directory
@@ -367,7 +378,7 @@ class IOUVM(BaseNode):
         """
 
         try:
-            output = yield from gns3server.utils.asyncio.subprocess_check_output("ldd", self._path)
+            output = yield from ProbeCache.instance().probe("ldd", self._path, gns3server.utils.asyncio.subprocess_check_output, "ldd", self._path)
         except (FileNotFoundError, subprocess.SubprocessError) as e:
             log.warn("Could not determine the shared library dependencies for {}: {}".format(self._path, e))
             return
@@ -418,6 +429,7 @@ class IOUVM(BaseNode):
         # in tests or generating one
         if not hasattr(sys, "_called_from_test"):
             try:
+                # not cached: the host ID comes from /etc/hostid or the IP address of the host
                 hostid = (yield from gns3server.utils.asyncio.subprocess_check_output("hostid")).strip()
             except FileNotFoundError as e:
                 raise IOUError("Could not find hostid: {}".format(e))
@@ -507,8 +519,8 @@ class IOUVM(BaseNode):
                 yield from self.update_default_iou_values()
             self._push_configs_to_nvram()
 
-            # check if there is enough RAM to run
-            self.check_available_ram(self.ram)
+            # reserve the RAM needed to run
+            yield from self.reserve_ram(self.ram)
 
             self._nvram_watcher = FileWatcher(self._nvram_file(), self._nvram_changed, delay=2)
 
@@ -517,7 +529,11 @@ class IOUVM(BaseNode):
 
             if "IOURC" not in os.environ:
                 env["IOURC"] = iourc_path
-            command = yield from self._build_command()
+            try:
+                command = yield from self._build_command()
+            except IOUError:
+                self.release_ram()
+                raise
             try:
                 log.info("Starting IOU: {}".format(command))
                 self.command_line = ' '.join(command)
@@ -529,13 +545,16 @@ class IOUVM(BaseNode):
                     cwd=self.working_dir,
                     env=env)
                 log.info("IOU instance {} started PID={}".format(self._id, self._iou_process.pid))
+                self._control_resources(self._iou_process.pid, ram=self._ram)
                 self._started = True
                 self.status = "started"
                 callback = functools.partial(self._termination_callback, "IOU")
                 gns3server.utils.asyncio.monitor_process(self._iou_process, callback)
             except FileNotFoundError as e:
+                self.release_ram()
                 raise IOUError("Could not start IOU: {}: 32-bit binary support is probably not installed".format(e))
             except (OSError, subprocess.SubprocessError) as e:
+                self.release_ram()
                 iou_stdout = self.read_iou_stdout()
                 log.error("Could not start IOU {}: {}\n{}".format(self._path, e, iou_stdout))
                 raise IOUError("Could not start IOU {}: {}\n{}".format(self._path, e, iou_stdout))
@@ -647,7 +666,7 @@ class IOUVM(BaseNode):
             self._iou_process = None
 
         self._started = False
-        self.save_configs()
+        yield from self.save_configs()
 
     def _terminate_process_iou(self):
         """
@@ -1153,6 +1172,7 @@ class IOUVM(BaseNode):
         """
         self._application_id = application_id
 
+    @asyncio.coroutine
     def extract_configs(self):
         """
         Gets the contents of the config files
@@ -1161,31 +1181,21 @@ class IOUVM(BaseNode):
         :returns: tuple (startup-config, private-config)
         """
 
-        nvram_file = os.path.join(self.working_dir, "nvram_{:05d}".format(self.application_id))
-        if not os.path.exists(nvram_file):
-            return None, None
-        try:
-            with open(nvram_file, "rb") as file:
-                nvram_content = file.read()
-        except OSError as e:
-            log.warning("Cannot read nvram file {}: {}".format(nvram_file, e))
-            return None, None
-
-        try:
-            startup_config_content, private_config_content = nvram_export(nvram_content)
-        except ValueError as e:
-            log.warning("Could not export configs from nvram file {}: {}".format(nvram_file, e))
-            return None, None
-
-        return startup_config_content, private_config_content
+        return (yield from NVRAMExtractor.instance().extract(self._nvram_file()))
 
+    @asyncio.coroutine
     def save_configs(self):
         """
         Saves the startup-config and private-config to files.
         """
 
         if self.startup_config_content or self.private_config_content:
-            startup_config_content, private_config_content = self.extract_configs()
+            extractor = NVRAMExtractor.instance()
+            nvram_file = self._nvram_file()
+            if not extractor.has_changed(nvram_file):
+                log.debug("NVRAM {} has not changed since the configs were saved".format(nvram_file))
+                return
+            startup_config_content, private_config_content = yield from self.extract_configs()
             if startup_config_content:
                 config_path = os.path.join(self.working_dir, "startup-config.cfg")
                 try:
@@ -1205,6 +1215,7 @@ class IOUVM(BaseNode):
                         f.write(config.encode("utf-8"))
                 except (binascii.Error, OSError) as e:
                     raise IOUError("Could not save the private configuration {}: {}".format(config_path, e))
+            extractor.mark_extracted(nvram_file)
 
     @asyncio.coroutine
     def start_capture(self, adapter_number, port_number, output_file, data_link_type="DLT_EN10MB"):
@@ -44,16 +44,19 @@ import sys
 # Uncompress data in .Z file format.
 # Ported from dynamips' fs_nvram.c to python
 # Adapted from 7zip's ZDecoder.cpp, which is licensed under LGPL 2.1.
+#
+# Codes are packed in groups of numBits bytes (8 codes), each group is
+# read as a single integer and the dictionary stores the decoded strings,
+# so a code is converted with one lookup instead of walking its parents.
 def uncompress_LZC(data):
     LZC_NUM_BITS_MIN = 9
     LZC_NUM_BITS_MAX = 16
 
-    in_data = bytearray(data)
+    in_data = bytes(data)
     in_len = len(in_data)
-    out_data = bytearray()
 
     if in_len == 0:
-        return out_data
+        return bytearray()
     if in_len < 3:
         raise ValueError('invalid length')
     if in_data[0] != 0x1F or in_data[1] != 0x9D:
@@ -65,79 +68,60 @@ def uncompress_LZC(data):
     if maxbits < LZC_NUM_BITS_MIN or maxbits > LZC_NUM_BITS_MAX:
         raise ValueError('not supported')
 
-    parents = [0] * numItems
-    suffixes = [0] * numItems
+    strings = [bytes((i,)) for i in range(256)] + [b""] * (numItems - 256)
+    out_data = []
 
     in_pos = 3
     numBits = LZC_NUM_BITS_MIN
     head = 256
     if blockMode:
         head += 1
-
-    needPrev = 0
-    bitPos = 0
-    numBufBits = 0
-
-    parents[256] = 0
-    suffixes[256] = 0
-
-    buf_extend = bytearray([0] * 3)
-
-    while True:
-        # fill buffer, when empty
-        if numBufBits == bitPos:
-            buf_len = min(in_len - in_pos, numBits)
-            buf = in_data[in_pos:in_pos + buf_len] + buf_extend
-            numBufBits = buf_len << 3
-            bitPos = 0
-            in_pos += buf_len
-
-        # extract next symbol
-        bytePos = bitPos >> 3
-        symbol = buf[bytePos] | buf[bytePos + 1] << 8 | buf[bytePos + 2] << 16
-        symbol >>= bitPos & 7
-        symbol &= (1 << numBits) - 1
-        bitPos += numBits
-
-        # check for special conditions: end, bad data, re-initialize dictionary
-        if bitPos > numBufBits:
-            break
-        if symbol >= head:
-            raise ValueError('invalid data')
-        if blockMode and symbol == 256:
-            numBufBits = bitPos = 0
-            numBits = LZC_NUM_BITS_MIN
-            head = 257
-            needPrev = 0
-            continue
-
-        # convert symbol to string
-        stack = []
-        cur = symbol
-        while cur >= 256:
-            stack.append(suffixes[cur])
-            cur = parents[cur]
-        stack.append(cur)
-        if needPrev:
-            suffixes[head - 1] = cur
-            if symbol == head - 1:
-                stack[0] = cur
-        stack.reverse()
-        out_data.extend(stack)
-
-        # update parents, check for numBits change
-        if head < numItems:
-            needPrev = 1
-            parents[head] = symbol
-            head += 1
-            if head > (1 << numBits):
-                if numBits < maxbits:
-                    numBufBits = bitPos = 0
+    prev = None
+
+    while in_pos < in_len:
+        # read the next group of codes
+        group_len = min(in_len - in_pos, numBits)
+        group = int.from_bytes(in_data[in_pos:in_pos + group_len], "little")
+        in_pos += group_len
+        groupBits = group_len << 3
+        mask = (1 << numBits) - 1
+        bitPos = 0
+
+        while bitPos + numBits <= groupBits:
+            symbol = (group >> bitPos) & mask
+            bitPos += numBits
+
+            # check for special conditions: bad data, re-initialize dictionary
+            if symbol >= head:
+                raise ValueError('invalid data')
+            if blockMode and symbol == 256:
+                numBits = LZC_NUM_BITS_MIN
+                head = 257
+                prev = None
+                break
+
+            # convert symbol to string
+            if prev is not None:
+                if symbol == head - 1:
+                    string = prev + prev[:1]
+                else:
+                    string = strings[symbol]
+                strings[head - 1] = prev + string[:1]
+            else:
+                string = strings[symbol]
+            out_data.append(string)
+
+            # update dictionary, check for numBits change
+            if head < numItems:
+                prev = string
+                head += 1
+                if head > (1 << numBits) and numBits < maxbits:
                     numBits += 1
-        else:
-            needPrev = 0
+                    break
+            else:
+                prev = None
 
-    return out_data
+    return bytearray(b"".join(out_data))
 
 
 # extract 16 bit unsigned int from data
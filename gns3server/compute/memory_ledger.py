@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Ledger of the RAM reserved by the running nodes.
+"""
+
+import asyncio
+import collections
+import psutil
+
+from gns3server.config import Config
+from .error import NodeError
+
+import logging
+log = logging.getLogger(__name__)
+
+
+ADMISSION_POLICIES = ("queue", "reject", "warn")
+
+
+class MemoryLedger:
+
+    """
+    Reserves the RAM declared by a node before its process is launched,
+    so nodes started at the same time cannot all see the same free memory.
+
+    The capacity is the host total memory multiplied by the overcommit ratio.
+    A start which doesn't fit is queued until enough memory is released,
+    rejected, or only logged depending on the admission policy.
+    """
+
+    def __init__(self):
+
+        self._reservations = collections.OrderedDict()
+        self._waiters = collections.deque()
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of MemoryLedger.
+
+        :returns: instance of MemoryLedger
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def _config(self):
+
+        return Config.instance().get_section_config("Server")
+
+    @property
+    def overcommit_ratio(self):
+
+        return max(0.1, self._config.getfloat("memory_overcommit_ratio", 1.5))
+
+    @property
+    def policy(self):
+
+        policy = self._config.get("memory_admission", "queue")
+        if policy not in ADMISSION_POLICIES:
+            log.warning("Unknown memory admission policy '{}', using 'queue'".format(policy))
+            return "queue"
+        return policy
+
+    @property
+    def timeout(self):
+
+        return self._config.getint("memory_admission_timeout", 60)
+
+    @property
+    def capacity(self):
+        """
+        :returns: RAM in MB which can be reserved
+        """
+
+        return int(psutil.virtual_memory().total / (1024 * 1024) * self.overcommit_ratio)
+
+    @property
+    def reserved(self):
+        """
+        :returns: RAM in MB reserved by the nodes
+        """
+
+        return sum(reservation["ram"] for reservation in self._reservations.values())
+
+    def _fits(self, node_id, ram):
+
+        current = self._reservations.get(node_id)
+        already_reserved = current["ram"] if current else 0
+        return self.reserved - already_reserved + ram <= self.capacity
+
+    def _record(self, node, ram):
+
+        self._reservations[node.id] = {"name": node.name, "ram": ram}
+        log.debug("{}MB of RAM reserved for {} ({}MB/{}MB)".format(ram, node.name, self.reserved, self.capacity))
+
+    def _wakeup(self):
+
+        # the first waiter is woken up, it wakes up the next one once it has its memory
+        for future in self._waiters:
+            if not future.done():
+                future.set_result(True)
+                break
+
+    @asyncio.coroutine
+    def reserve(self, node, ram):
+        """
+        Reserves RAM for a node. Starts waiting for memory are served in order.
+
+        :param node: Node instance
+        :param ram: RAM in MB
+        """
+
+        if not ram or ram <= 0:
+            return
+
+        if ram > self.capacity and self.policy != "warn":
+            raise NodeError('"{}" requires {}MB of RAM but only {}MB can be reserved on this server'.format(node.name, ram, self.capacity))
+
+        if not self._waiters and self._fits(node.id, ram):
+            self._record(node, ram)
+            return
+
+        policy = self.policy
+        if policy == "warn":
+            log.warning('"{}" requires {}MB of RAM but {}MB out of {}MB are already reserved'.format(node.name, ram, self.reserved, self.capacity))
+            self._record(node, ram)
+            return
+        if policy == "reject":
+            raise NodeError('"{}" requires {}MB of RAM but {}MB out of {}MB are already reserved'.format(node.name, ram, self.reserved, self.capacity))
+
+        log.info('Start of "{}" is waiting for {}MB of RAM'.format(node.name, ram))
+        future = asyncio.Future()
+        self._waiters.append(future)
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            while True:
+                if self._waiters[0] is future and self._fits(node.id, ram):
+                    self._record(node, ram)
+                    return
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise NodeError('Timeout while waiting for {}MB of RAM to start "{}" ({}MB out of {}MB are reserved)'.format(ram, node.name, self.reserved, self.capacity))
+                try:
+                    yield from asyncio.wait_for(asyncio.shield(future), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                if future.done():
+                    future = self._replace_waiter(future)
+        finally:
+            self._waiters.remove(future)
+            self._wakeup()
+
+    def _replace_waiter(self, future):
+
+        new_future = asyncio.Future()
+        self._waiters[self._waiters.index(future)] = new_future
+        return new_future
+
+    def release(self, node):
+        """
+        Releases the RAM reserved by a node.
+
+        :param node: Node instance
+        """
+
+        if self._reservations.pop(node.id, None) is not None:
+            log.debug("RAM reserved for {} released ({}MB/{}MB)".format(node.name, self.reserved, self.capacity))
+            self._wakeup()
+
+    def __json__(self):
+
+        return {"capacity": self.capacity,
+                "reserved": self.reserved,
+                "overcommit_ratio": self.overcommit_ratio,
+                "policy": self.policy,
+                "reservations": len(self._reservations),
+                "queued": len(self._waiters)}
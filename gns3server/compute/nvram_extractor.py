@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extraction of the startup and private configs stored in NVRAM files.
+"""
+
+import os
+import asyncio
+import concurrent.futures
+
+from gns3server.config import Config
+from gns3server.utils.asyncio.pool import Pool
+from .error import NodeError
+
+import logging
+log = logging.getLogger(__name__)
+
+
+def export_nvram_file(path):
+    """
+    Reads an IOU NVRAM file and exports its configs. Runs in a worker process.
+
+    :param path: Path of the NVRAM file
+    :returns: tuple (startup-config, private-config)
+    """
+
+    from .iou.utils.iou_export import nvram_export
+
+    with open(path, "rb") as f:
+        nvram = f.read()
+    startup, private = nvram_export(nvram)
+    if private is not None:
+        private = bytes(private)
+    return bytes(startup), private
+
+
+class NVRAMExtractor:
+
+    """
+    Decompresses the NVRAM files in a pool of worker processes, the
+    decoding is CPU bound and would otherwise block the event loop,
+    and remembers which NVRAM files changed since their last extraction.
+    """
+
+    def __init__(self):
+
+        self._executor = None
+        self._signatures = {}
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of NVRAMExtractor.
+
+        :returns: instance of NVRAMExtractor
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _get_executor(self):
+
+        if self._executor is None:
+            workers = Config.instance().get_section_config("Server").getint("nvram_workers", min(4, os.cpu_count() or 1))
+            if workers > 0:
+                try:
+                    self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+                except (OSError, NotImplementedError) as e:
+                    log.warning("Could not create the NVRAM extraction workers, using threads instead: {}".format(e))
+        return self._executor
+
+    @staticmethod
+    def _signature(path):
+
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def has_changed(self, path):
+        """
+        :param path: Path of the NVRAM file
+        :returns: False if the file is the same as during its last extraction
+        """
+
+        signature = self._signature(path)
+        return signature is None or self._signatures.get(path) != signature
+
+    def mark_extracted(self, path):
+        """
+        Records the state of a NVRAM file after its configs have been saved.
+
+        :param path: Path of the NVRAM file
+        """
+
+        signature = self._signature(path)
+        if signature is not None:
+            self._signatures[path] = signature
+
+    def forget(self, path):
+        """
+        Next extraction of the NVRAM file will not be skipped.
+
+        :param path: Path of the NVRAM file
+        """
+
+        self._signatures.pop(path, None)
+
+    @asyncio.coroutine
+    def extract(self, path):
+        """
+        Exports the configs of an IOU NVRAM file.
+
+        :param path: Path of the NVRAM file
+        :returns: tuple (startup-config, private-config), (None, None) in case of error
+        """
+
+        if not os.path.exists(path):
+            return None, None
+        loop = asyncio.get_event_loop()
+        try:
+            return (yield from loop.run_in_executor(self._get_executor(), export_nvram_file, path))
+        except OSError as e:
+            log.warning("Cannot read nvram file {}: {}".format(path, e))
+        except ValueError as e:
+            log.warning("Could not export configs from nvram file {}: {}".format(path, e))
+        except concurrent.futures.process.BrokenProcessPool as e:
+            log.warning("NVRAM extraction worker died while reading {}: {}".format(path, e))
+            self._executor = None
+        return None, None
+
+    @asyncio.coroutine
+    def save_configs(self, nodes, concurrency=10):
+        """
+        Saves the configs of several nodes at the same time.
+
+        :param nodes: Nodes with a save_configs coroutine
+        :param concurrency: Maximum number of nodes saved at the same time
+        """
+
+        @asyncio.coroutine
+        def save(node):
+            try:
+                yield from node.save_configs()
+            except NodeError as e:
+                log.warning("Could not save the configs of {}: {}".format(node.name, e))
+
+        pool = Pool(concurrency=concurrency)
+        for node in nodes:
+            if hasattr(node, "save_configs"):
+                pool.append(save, node)
+        yield from pool.join()
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cache of the facts learned by probing executables (version, libraries, capabilities...).
+"""
+
+import os
+import shutil
+import asyncio
+
+from gns3server.config import Config
+from gns3server.utils.asyncio import subprocess_check_output
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ProbeCache:
+
+    """
+    Results of probes on files, reused as long as the file
+    (inode, mtime, ctime and size) doesn't change. Concurrent
+    probes of the same file share a single execution.
+    """
+
+    def __init__(self):
+
+        self._results = {}
+        self._tasks = {}
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of ProbeCache.
+
+        :returns: instance of ProbeCache
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def _signature(path):
+
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+        # ctime changes when capabilities or permissions are set on the file
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size)
+
+    def _cached(self, key, signature):
+
+        result = self._results.get(key)
+        if result is not None and signature is not None and result["signature"] == signature:
+            return True, result["value"]
+        return False, None
+
+    def _store(self, key, signature, value):
+
+        if signature is not None:
+            self._results[key] = {"signature": signature, "value": value}
+
+    @asyncio.coroutine
+    def probe(self, name, path, func, *args, **kwargs):
+        """
+        Returns the result of a probe coroutine, running it only if the
+        file has changed since the last probe. Exceptions are not cached.
+
+        :param name: Probe name
+        :param path: Path of the probed file
+        :param func: Coroutine function doing the probe
+        :param args: Parameters of the function
+        :param kwargs: Keyword parameters of the function
+
+        :returns: Result of the probe
+        """
+
+        key = (name, path)
+        signature = self._signature(path)
+        found, value = self._cached(key, signature)
+        if found:
+            return value
+
+        task = self._tasks.get(key)
+        if task is None:
+            @asyncio.coroutine
+            def run():
+                value = yield from func(*args, **kwargs)
+                self._store(key, signature, value)
+                return value
+
+            task = asyncio.async(run())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._tasks.pop(key, None))
+        return (yield from asyncio.shield(task))
+
+    def probe_sync(self, name, path, func, *args, **kwargs):
+        """
+        Same as probe for a function which doesn't block.
+        """
+
+        key = (name, path)
+        signature = self._signature(path)
+        found, value = self._cached(key, signature)
+        if found:
+            return value
+        value = func(*args, **kwargs)
+        self._store(key, signature, value)
+        return value
+
+    @asyncio.coroutine
+    def check_output(self, path, *args, cwd=None, env=None, stderr=False):
+        """
+        Runs an executable once as long as it doesn't change, for
+        example to get its version, and returns its output.
+
+        :param path: Executable path or name
+        :param args: Command arguments
+        :param cwd: Current working directory
+        :param env: Command environment
+        :param stderr: Read on stderr
+
+        :returns: Command output
+        """
+
+        full_path = shutil.which(path) or path
+        name = " ".join(("stderr" if stderr else "stdout",) + args)
+        return (yield from self.probe(name, full_path, subprocess_check_output, full_path, *args, cwd=cwd, env=env, stderr=stderr))
+
+    @asyncio.coroutine
+    def version(self, path):
+        """
+        Runs "<path> -v" under the "version" probe used by the
+        uBridge and VPCS version checks.
+
+        :param path: Executable path or name
+
+        :returns: Command output
+        """
+
+        full_path = shutil.which(path) or path
+        return (yield from self.probe("version", full_path, subprocess_check_output, full_path, "-v"))
+
+    def facts(self):
+        """
+        :returns: List of the cached probe results
+        """
+
+        facts = []
+        for (name, path), result in sorted(self._results.items()):
+            value = result["value"]
+            if isinstance(value, str):
+                value = value.strip().split("\n")[0]
+            elif not isinstance(value, (bool, int, float)) and value is not None:
+                value = str(value)
+            facts.append({"name": name, "path": path, "result": value})
+        return facts
+
+    def clear(self):
+
+        self._results = {}
+
+    @asyncio.coroutine
+    def warmup(self):
+        """
+        Probes the executables used by the emulators in parallel, so
+        the first nodes started don't have to wait for them.
+        """
+
+        from .qemu import Qemu
+
+        server_config = Config.instance().get_section_config("Server")
+        vpcs_config = Config.instance().get_section_config("VPCS")
+        probes = [self.version(server_config.get("ubridge_path", "ubridge")),
+                  self.version(vpcs_config.get("vpcs_path", "vpcs")),
+                  Qemu.binary_list(),
+                  Qemu.img_binary_list()]
+        for result in (yield from asyncio.gather(*probes, return_exceptions=True)):
+            if isinstance(result, Exception):
+                log.debug("Probe failed during warmup: {}".format(result))
@@ -19,7 +19,6 @@ import os
 import aiohttp
 import shutil
 import asyncio
-import hashlib
 import zipstream
 import zipfile
 import json
@@ -27,6 +26,7 @@ import json
 from uuid import UUID, uuid4
 from .port_manager import PortManager
 from .notification_manager import NotificationManager
+from .file_manifest import FileManifest
 from ..config import Config
 from ..utils.asyncio import wait_run_in_executor
 from ..utils.path import check_path_allowed, get_default_project_directory
@@ -61,6 +61,7 @@ class Project:
         self._nodes = set()
         self._used_tcp_ports = set()
         self._used_udp_ports = set()
+        self._manifest = None
 
         if path is None:
             location = get_default_project_directory()
@@ -315,6 +316,15 @@ class Project:
         except OSError:
             pass
 
+    @asyncio.coroutine
+    def save_configs(self):
+        """
+        Saves the configs of all the nodes of the project
+        """
+
+        from .nvram_extractor import NVRAMExtractor
+        yield from NVRAMExtractor.instance().save_configs(self._nodes)
+
     @asyncio.coroutine
     def _close_and_clean(self, cleanup):
         """
@@ -375,8 +385,8 @@ class Project:
         """
 
         # We import it at the last time to avoid circular dependencies
-        from ..compute import MODULES
-        return MODULES
+        from ..compute import get_modules
+        return get_modules()
 
     def emit(self, action, event):
         """
@@ -393,35 +403,6 @@ class Project:
         :returns: Array of files in project without temporary files. The files are dictionary {"path": "test.bin", "md5sum": "aaaaa"}
         """
 
-        files = []
-        for dirpath, dirnames, filenames in os.walk(self.path):
-            for filename in filenames:
-                if not filename.endswith(".ghost"):
-                    path = os.path.relpath(dirpath, self.path)
-                    path = os.path.join(path, filename)
-                    path = os.path.normpath(path)
-                    file_info = {"path": path}
-
-                    try:
-                        file_info["md5sum"] = yield from wait_run_in_executor(self._hash_file, os.path.join(dirpath, filename))
-                    except OSError:
-                        continue
-                    files.append(file_info)
-
-        return files
-
-    def _hash_file(self, path):
-        """
-        Compute and md5 hash for file
-
-        :returns: hexadecimal md5
-        """
-
-        m = hashlib.md5()
-        with open(path, "rb") as f:
-            while True:
-                buf = f.read(128)
-                if not buf:
-                    break
-                m.update(buf)
-        return m.hexdigest()
+        if self._manifest is None or self._manifest.path != self.path:
+            self._manifest = FileManifest(self.path)
+        return (yield from self._manifest.refresh())
@@ -28,8 +28,11 @@ import subprocess
 
 from ...utils.asyncio import subprocess_check_output
 from ..base_manager import BaseManager
+from ..probe_cache import ProbeCache
 from .qemu_error import QemuError
 from .qemu_vm import QemuVM
+from .qcow2 import Qcow2, Qcow2Error
+from .linked_clone_pool import LinkedClonePool
 
 import logging
 log = logging.getLogger(__name__)
@@ -40,6 +43,55 @@ class Qemu(BaseManager):
     _NODE_CLASS = QemuVM
     _NODE_TYPE = "qemu"
 
+    def __init__(self):
+
+        super().__init__()
+        self._linked_clone_pool = None
+
+    @property
+    def linked_clone_pool(self):
+        """
+        Pool of linked clones created in advance, None if disabled.
+
+        :returns: LinkedClonePool instance
+        """
+
+        qemu_config = self.config.get_section_config("Qemu")
+        size = qemu_config.getint("linked_clone_pool_size", 0)
+        if size <= 0:
+            return None
+        if self._linked_clone_pool is None or self._linked_clone_pool.size != size:
+            directory = qemu_config.get("linked_clone_pool_path", os.path.join(self.get_images_directory(), ".linked_clones"))
+            self._linked_clone_pool = LinkedClonePool(os.path.expanduser(directory), size)
+        return self._linked_clone_pool
+
+    @staticmethod
+    @asyncio.coroutine
+    def create_linked_clone(qemu_img, base_image, path):
+        """
+        Creates a qcow2 image backed by a base image. The image is written
+        directly when the base image is a qcow2, qemu-img is used otherwise.
+
+        :param qemu_img: qemu-img binary path
+        :param base_image: Path of the base image
+        :param path: Path of the linked clone
+        """
+
+        try:
+            Qcow2.create_linked_clone(path, base_image)
+            return
+        except Qcow2Error as e:
+            log.debug("Using qemu-img to create the linked clone of {}: {}".format(base_image, e))
+
+        try:
+            process = yield from asyncio.create_subprocess_exec(qemu_img, "create", "-o", "backing_file={}".format(base_image), "-f", "qcow2", path,
+                                                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            retcode = yield from process.wait()
+        except (OSError, subprocess.SubprocessError) as e:
+            raise QemuError("Could not create linked clone {}: {}".format(path, e))
+        if retcode:
+            raise QemuError("Could not create linked clone {}: qemu-img returned with {}".format(path, retcode))
+
     @staticmethod
     @asyncio.coroutine
     def get_kvm_archs():
@@ -114,7 +166,7 @@ class Qemu(BaseManager):
         :returns: Array of dictionary {"path": Qemu binary path, "version": version of Qemu}
         """
 
-        qemus = []
+        qemu_paths = []
         for path in Qemu.paths_list():
             try:
                 for f in os.listdir(path):
@@ -126,18 +178,16 @@ class Qemu(BaseManager):
                         if archs is not None:
                             for arch in archs:
                                 if f.endswith(arch) or f.endswith("{}.exe".format(arch)) or f.endswith("{}w.exe".format(arch)):
-                                    qemu_path = os.path.join(path, f)
-                                    version = yield from Qemu.get_qemu_version(qemu_path)
-                                    qemus.append({"path": qemu_path, "version": version})
+                                    qemu_paths.append(os.path.join(path, f))
                         else:
-                            qemu_path = os.path.join(path, f)
-                            version = yield from Qemu.get_qemu_version(qemu_path)
-                            qemus.append({"path": qemu_path, "version": version})
+                            qemu_paths.append(os.path.join(path, f))
 
             except OSError:
                 continue
 
-        return qemus
+        # the binaries are probed in parallel, versions are cached by the probe cache
+        versions = yield from asyncio.gather(*[Qemu.get_qemu_version(qemu_path) for qemu_path in qemu_paths])
+        return [{"path": qemu_path, "version": version} for qemu_path, version in zip(qemu_paths, versions)]
 
     @staticmethod
     def img_binary_list():
@@ -146,20 +196,19 @@ class Qemu(BaseManager):
 
         :returns: Array of dictionary {"path": Qemu-img binary path, "version": version of Qemu-img}
         """
-        qemu_imgs = []
+        qemu_img_paths = []
         for path in Qemu.paths_list():
             try:
                 for f in os.listdir(path):
                     if (f == "qemu-img" or f == "qemu-img.exe") and \
                             os.access(os.path.join(path, f), os.X_OK) and \
                             os.path.isfile(os.path.join(path, f)):
-                        qemu_path = os.path.join(path, f)
-                        version = yield from Qemu._get_qemu_img_version(qemu_path)
-                        qemu_imgs.append({"path": qemu_path, "version": version})
+                        qemu_img_paths.append(os.path.join(path, f))
             except OSError:
                 continue
 
-        return qemu_imgs
+        versions = yield from asyncio.gather(*[Qemu._get_qemu_img_version(qemu_path) for qemu_path in qemu_img_paths])
+        return [{"path": qemu_path, "version": version} for qemu_path, version in zip(qemu_img_paths, versions)]
 
     @staticmethod
     @asyncio.coroutine
@@ -186,7 +235,7 @@ class Qemu(BaseManager):
             return ""
         else:
             try:
-                output = yield from subprocess_check_output(qemu_path, "-version")
+                output = yield from ProbeCache.instance().probe("version", qemu_path, subprocess_check_output, qemu_path, "-version")
                 match = re.search("version\s+([0-9a-z\-\.]+)", output)
                 if match:
                     version = match.group(1)
@@ -206,7 +255,7 @@ class Qemu(BaseManager):
         """
 
         try:
-            output = yield from subprocess_check_output(qemu_img_path, "--version")
+            output = yield from ProbeCache.instance().probe("version", qemu_img_path, subprocess_check_output, qemu_img_path, "--version")
             match = re.search("version\s+([0-9a-z\-\.]+)", output)
             if match:
                 version = match.group(1)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import uuid
+import shutil
+import asyncio
+import hashlib
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class LinkedClonePool:
+
+    """
+    Linked clone disks created in advance for each base image. A node
+    takes one with a rename, which is atomic, instead of creating its
+    disk when it starts for the first time. The pool is refilled in
+    the background.
+
+    :param directory: Directory where the pools are stored
+    :param size: Number of disks kept ready for each base image
+    """
+
+    def __init__(self, directory, size):
+
+        self._directory = directory
+        self._size = size
+        self._refills = {}
+
+    @staticmethod
+    def _image_key(base_image):
+
+        return hashlib.md5(os.path.abspath(base_image).encode("utf-8")).hexdigest()
+
+    def _pool_directory(self, base_image):
+        """
+        The directory depends on the base image state: the clones
+        of a replaced base image are never used.
+        """
+
+        stat = os.stat(base_image)
+        signature = "{}:{}:{}".format(stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return os.path.join(self._directory, "{}-{}".format(self._image_key(base_image),
+                                                             hashlib.md5(signature.encode("utf-8")).hexdigest()[:12]))
+
+    @property
+    def size(self):
+
+        return self._size
+
+    def claim(self, base_image, path, create):
+        """
+        Moves a ready linked clone of a base image to path.
+
+        :param base_image: Path of the base image
+        :param path: Destination of the linked clone
+        :param create: Coroutine function (base_image, path) used to refill the pool
+        :returns: True if a clone has been claimed
+        """
+
+        try:
+            pool_directory = self._pool_directory(base_image)
+            clones = sorted(f for f in os.listdir(pool_directory) if f.endswith(".qcow2"))
+        except OSError:
+            clones = []
+
+        claimed = False
+        for clone in clones:
+            clone_path = os.path.join(pool_directory, clone)
+            claimed_path = clone_path + ".claimed"
+            try:
+                # only one node can win the rename
+                os.rename(clone_path, claimed_path)
+            except OSError:
+                continue
+            try:
+                shutil.move(claimed_path, path)
+                claimed = True
+                break
+            except OSError as e:
+                log.warning("Could not move linked clone {} to {}: {}".format(claimed_path, path, e))
+                try:
+                    os.remove(claimed_path)
+                except OSError:
+                    pass
+
+        if claimed:
+            log.debug("Linked clone of {} taken from the pool for {}".format(base_image, path))
+        self.refill(base_image, create)
+        return claimed
+
+    def refill(self, base_image, create):
+        """
+        Creates the missing linked clones of a base image in the background.
+
+        :param base_image: Path of the base image
+        :param create: Coroutine function (base_image, path) creating a linked clone
+        :returns: Refill task
+        """
+
+        key = self._image_key(base_image)
+        task = self._refills.get(key)
+        if task is None or task.done():
+            task = asyncio.async(self._refill(base_image, create))
+            self._refills[key] = task
+        return task
+
+    @asyncio.coroutine
+    def _refill(self, base_image, create):
+
+        try:
+            pool_directory = self._pool_directory(base_image)
+            os.makedirs(pool_directory, exist_ok=True)
+        except OSError as e:
+            log.warning("Could not create the linked clone pool of {}: {}".format(base_image, e))
+            return
+
+        self._remove_outdated(base_image, pool_directory)
+        try:
+            ready = len([f for f in os.listdir(pool_directory) if f.endswith(".qcow2")])
+        except OSError:
+            return
+        for _ in range(self._size - ready):
+            # the clone gets its final name only when it's complete
+            path = os.path.join(pool_directory, str(uuid.uuid4()))
+            try:
+                yield from create(base_image, path)
+                os.rename(path, path + ".qcow2")
+            except Exception as e:
+                log.warning("Could not create a linked clone of {}: {}".format(base_image, e))
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                return
+
+    def _remove_outdated(self, base_image, pool_directory):
+        """
+        Removes the clones made from a previous version of the base image.
+        """
+
+        prefix = self._image_key(base_image) + "-"
+        try:
+            directories = os.listdir(self._directory)
+        except OSError:
+            return
+        for directory in directories:
+            path = os.path.join(self._directory, directory)
+            if directory.startswith(prefix) and path != pool_directory:
+                log.info("Removing outdated linked clones {}".format(path))
+                shutil.rmtree(path, ignore_errors=True)
+
+    @asyncio.coroutine
+    def wait_refills(self):
+        """
+        Waits for the refills in progress.
+        """
+
+        tasks = [task for task in self._refills.values() if not task.done()]
+        if tasks:
+            yield from asyncio.wait(tasks)
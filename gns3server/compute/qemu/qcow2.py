@@ -20,6 +20,11 @@ import asyncio
 import struct
 
 
+QCOW2_MAGIC = 1363560955  # The first 4 bytes contain the characters 'Q', 'F', 'I' followed by 0xfb.
+QCOW2_CLUSTER_BITS = 16
+QCOW2_BACKING_FORMAT_EXTENSION = 0xE2792ACA
+
+
 class Qcow2Error(Exception):
     pass
 
@@ -67,9 +72,105 @@ class Qcow2:
             except struct.error:
                 raise Qcow2Error("Invalid file header for {}".format(self._path))
 
-        if self.magic != 1363560955:  # The first 4 bytes contain the characters 'Q', 'F', 'I' followed by 0xfb.
+        if self.magic != QCOW2_MAGIC:
             raise Qcow2Error("Invalid magic for {}".format(self._path))
 
+    @staticmethod
+    def virtual_size(path):
+        """
+        Returns the size of the disk seen by the guest.
+
+        :param path: Path of a qcow2 version 2 or 3 image
+        :returns: size in bytes
+        """
+
+        try:
+            with open(path, "rb") as f:
+                content = f.read(32)
+            magic, version, _, _, _, size = struct.unpack(">IIQIIQ", content)
+        except (OSError, struct.error) as e:
+            raise Qcow2Error("Could not read the header of {}: {}".format(path, e))
+        if magic != QCOW2_MAGIC or version not in (2, 3):
+            raise Qcow2Error("{} is not a qcow2 image".format(path))
+        return size
+
+    @staticmethod
+    def create_linked_clone(path, base_image):
+        """
+        Creates an empty qcow2 (version 3) image backed by a qcow2 base image, it's
+        the same image as "qemu-img create -o backing_file=base_image -f qcow2 path"
+        without spawning qemu-img. Base images in another format are not supported.
+
+        The layout is the one of qemu-img: header, refcount table, refcount block
+        and L1 table each in their own cluster.
+
+        :param path: Path of the image to create
+        :param base_image: Path of the base image
+        """
+
+        size = Qcow2.virtual_size(base_image)
+        backing_file = base_image.encode("utf-8")
+        backing_format = b"qcow2"
+        if len(backing_file) > 1023:
+            raise Qcow2Error("Base image path {} is too long".format(base_image))
+
+        cluster_size = 1 << QCOW2_CLUSTER_BITS
+        # each L2 table maps cluster_size / 8 clusters
+        l2_coverage = (cluster_size // 8) * cluster_size
+        l1_size = (size + l2_coverage - 1) // l2_coverage
+        l1_clusters = max(1, (l1_size * 8 + cluster_size - 1) // cluster_size)
+        refcount_table_offset = cluster_size
+        refcount_block_offset = 2 * cluster_size
+        l1_table_offset = 3 * cluster_size
+        used_clusters = 3 + l1_clusters
+        if used_clusters > cluster_size // 2:
+            raise Qcow2Error("Base image {} is too large".format(base_image))
+
+        header_length = 104
+        extensions = struct.pack(">II", QCOW2_BACKING_FORMAT_EXTENSION, len(backing_format))
+        extensions += backing_format + b"\0" * (-len(backing_format) % 8)
+        extensions += struct.pack(">II", 0, 0)
+        backing_file_offset = header_length + len(extensions)
+
+        header = struct.pack(">IIQIIQIIQQIIQQQQII",
+                             QCOW2_MAGIC,
+                             3,  # version
+                             backing_file_offset,
+                             len(backing_file),
+                             QCOW2_CLUSTER_BITS,
+                             size,
+                             0,  # crypt_method
+                             l1_size,
+                             l1_table_offset,
+                             refcount_table_offset,
+                             1,  # refcount_table_clusters
+                             0,  # nb_snapshots
+                             0,  # snapshots_offset
+                             0,  # incompatible_features
+                             0,  # compatible_features
+                             0,  # autoclear_features
+                             4,  # refcount_order: 16 bits refcounts
+                             header_length)
+
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header + extensions + backing_file)
+                f.seek(refcount_table_offset)
+                f.write(struct.pack(">Q", refcount_block_offset))
+                f.seek(refcount_block_offset)
+                f.write(struct.pack(">{}H".format(used_clusters), *([1] * used_clusters)))
+                # the L1 table is empty, the file ends with it like with qemu-img
+                l1_table_length = max(512, (l1_size * 8 + 511) // 512 * 512)
+                f.truncate(l1_table_offset + l1_table_length)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise Qcow2Error("Could not create {}: {}".format(path, e))
+
     @property
     def backing_file(self):
         """
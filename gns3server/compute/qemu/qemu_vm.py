@@ -34,6 +34,7 @@ import subprocess
 from gns3server.utils import parse_version
 from gns3server.utils.asyncio import subprocess_check_output
 from .qemu_error import QemuError
+from .qmp import QMPClient, QMPError
 from ..adapters.ethernet_adapter import EthernetAdapter
 from ..nios.nio_udp import NIOUDP
 from ..nios.nio_tap import NIOTAP
@@ -74,6 +75,9 @@ class QemuVM(BaseNode):
         self._process = None
         self._cpulimit_process = None
         self._monitor = None
+        self._qmp = None
+        self._qmp_lock = asyncio.Lock()
+        self._qmp_connect_task = None
         self._stdout_file = ""
         self._qemu_img_stdout_file = ""
         self._execute_lock = asyncio.Lock()
@@ -611,6 +615,9 @@ class QemuVM(BaseNode):
                                                                                                  id=self._id,
                                                                                                  cpu=cpu_throttling))
         self._cpu_throttling = cpu_throttling
+        if self._cgroup:
+            self._cgroup.set_cpu_limit(cpu_throttling)
+            return
         self._stop_cpulimit()
         if cpu_throttling:
             self._set_cpu_throttling()
@@ -637,6 +644,8 @@ class QemuVM(BaseNode):
                                                                                              id=self._id,
                                                                                              priority=process_priority))
         self._process_priority = process_priority
+        if self._cgroup:
+            self._cgroup.set_priority(process_priority)
 
     @property
     def ram(self):
@@ -899,10 +908,14 @@ class QemuVM(BaseNode):
                 except OSError as e:
                     raise QemuError("Could not find free port for the Qemu monitor: {}".format(e))
 
-            # check if there is enough RAM to run
-            self.check_available_ram(self.ram)
+            # reserve the RAM needed to run
+            yield from self.reserve_ram(self.ram)
 
-            command = yield from self._build_command()
+            try:
+                command = yield from self._build_command()
+            except QemuError:
+                self.release_ram()
+                raise
             command_string = " ".join(shlex.quote(s) for s in command)
             try:
                 log.info("Starting QEMU with: {}".format(command_string))
@@ -927,14 +940,23 @@ class QemuVM(BaseNode):
                 log.info('QEMU VM "{}" started PID={}'.format(self._name, self._process.pid))
                 self.status = "started"
                 monitor_process(self._process, self._termination_callback)
+                # the QMP connection is kept open to receive the status changes
+                if self._monitor:
+                    self._qmp_connect_task = asyncio.async(self._connect_qmp())
             except (OSError, subprocess.SubprocessError, UnicodeEncodeError) as e:
                 stdout = self.read_stdout()
+                self.release_ram()
                 log.error("Could not start QEMU {}: {}\n{}".format(self.qemu_path, e, stdout))
                 raise QemuError("Could not start QEMU {}: {}\n{}".format(self.qemu_path, e, stdout))
 
-            yield from self._set_process_priority()
-            if self._cpu_throttling:
-                self._set_cpu_throttling()
+            # cpulimit and renice are only used when cgroups are not available
+            if not self._control_resources(self._process.pid,
+                                           ram=self._ram,
+                                           cpu_throttling=self._cpu_throttling,
+                                           priority=self._process_priority):
+                yield from self._set_process_priority()
+                if self._cpu_throttling:
+                    self._set_cpu_throttling()
 
             if "-enable-kvm" in command_string:
                 self._hw_virtualization = True
@@ -972,7 +994,7 @@ class QemuVM(BaseNode):
                 log.info('Stopping QEMU VM "{}" PID={}'.format(self._name, self._process.pid))
                 try:
                     if self.acpi_shutdown:
-                        yield from self._control_vm("system_powerdown")
+                        yield from self._qmp_command("system_powerdown")
                         yield from gns3server.utils.asyncio.wait_for_process_termination(self._process, timeout=30)
                     else:
                         self._process.terminate()
@@ -988,49 +1010,92 @@ class QemuVM(BaseNode):
                         if self._process.returncode is None:
                             log.warn('QEMU VM "{}" PID={} is still running'.format(self._name, self._process.pid))
             self._process = None
+            self._close_qmp()
             self._stop_cpulimit()
             yield from super().stop()
 
     @asyncio.coroutine
-    def _control_vm(self, command, expected=None):
+    def _qmp_client(self):
         """
-        Executes a command with QEMU monitor when this VM is running.
-
-        :param command: QEMU monitor command (e.g. info status, stop etc.)
-        :param expected: An array of expected strings
+        Returns the QMP connection of this VM, connecting if needed.
+        QEMU could be still opening the QMP socket so we retry for a few seconds.
 
-        :returns: result of the command (matched object or None)
+        :returns: QMPClient instance
         """
 
-        result = None
-        if self.is_running() and self._monitor:
-            log.debug("Execute QEMU monitor command: {}".format(command))
-            try:
-                log.info("Connecting to Qemu monitor on {}:{}".format(self._monitor_host, self._monitor))
-                reader, writer = yield from asyncio.open_connection(self._monitor_host, self._monitor)
-            except OSError as e:
-                log.warn("Could not connect to QEMU monitor: {}".format(e))
-                return result
-            try:
-                writer.write(command.encode('ascii') + b"\n")
-            except OSError as e:
-                log.warn("Could not write to QEMU monitor: {}".format(e))
-                writer.close()
-                return result
-            if expected:
+        with (yield from self._qmp_lock):
+            if self._qmp is not None and self._qmp.connected:
+                return self._qmp
+            client = QMPClient(self._monitor_host, self._monitor, self._qmp_event)
+            for attempt in range(50):
+                if not self.is_running():
+                    raise QMPError("QEMU VM is not running")
                 try:
-                    while result is None:
-                        line = yield from reader.readline()
-                        if not line:
-                            break
-                        for expect in expected:
-                            if expect in line:
-                                result = line.decode("utf-8").strip()
-                                break
-                except EOFError as e:
-                    log.warn("Could not read from QEMU monitor: {}".format(e))
-            writer.close()
-        return result
+                    yield from client.connect()
+                    break
+                except QMPError:
+                    if attempt == 49:
+                        raise
+                    yield from asyncio.sleep(0.2)
+            log.info("Connected to QMP of QEMU VM {} on {}:{}".format(self._name, self._monitor_host, self._monitor))
+            self._qmp = client
+            return client
+
+    @asyncio.coroutine
+    def _connect_qmp(self):
+
+        try:
+            yield from self._qmp_client()
+        except QMPError as e:
+            log.warning("Could not connect to QMP of QEMU VM {}: {}".format(self._name, e))
+
+    def _close_qmp(self):
+
+        if self._qmp_connect_task is not None:
+            self._qmp_connect_task.cancel()
+            self._qmp_connect_task = None
+        if self._qmp is not None:
+            self._qmp.close()
+            self._qmp = None
+
+    def _qmp_event(self, event, data):
+        """
+        Called when QEMU sends an event, it keeps the status of the node in sync
+        without polling.
+
+        :param event: Event name
+        :param data: Event data
+        """
+
+        if event == "STOP" and self.status == "started":
+            self.status = "suspended"
+        elif event == "RESUME" and self.status == "suspended":
+            self.status = "started"
+        elif event == "SHUTDOWN":
+            log.info('QEMU VM "{}" has been shutdown by the guest'.format(self._name))
+        elif event == "RESET":
+            log.info('QEMU VM "{}" has been reset'.format(self._name))
+
+    @asyncio.coroutine
+    def _qmp_command(self, command, arguments=None):
+        """
+        Executes a QMP command when this VM is running.
+
+        :param command: QMP command (e.g. query-status, stop etc.)
+        :param arguments: Dictionary of command arguments
+
+        :returns: result of the command or None
+        """
+
+        if not self.is_running() or not self._monitor:
+            return None
+        log.debug("Execute QMP command: {}".format(command))
+        try:
+            client = yield from self._qmp_client()
+            return (yield from client.execute(command, arguments))
+        except QMPError as e:
+            log.warn("Could not execute QMP command {}: {}".format(command, e))
+            return None
 
     @asyncio.coroutine
     def close(self):
@@ -1066,15 +1131,10 @@ class QemuVM(BaseNode):
         :returns: status (string)
         """
 
-        result = yield from self._control_vm("info status", [
-            b"debug", b"inmigrate", b"internal-error", b"io-error",
-            b"paused", b"postmigrate", b"prelaunch", b"finish-migrate",
-            b"restore-vm", b"running", b"save-vm", b"shutdown", b"suspended",
-            b"watchdog", b"guest-panicked"
-        ])
-        if result is None:
-            return result
-        status = result.rsplit(' ', 1)[1]
+        result = yield from self._qmp_command("query-status")
+        if not result:
+            return None
+        status = result["status"]
         if status == "running" or status == "prelaunch":
             self.status = "started"
         elif status == "suspended":
@@ -1094,7 +1154,7 @@ class QemuVM(BaseNode):
             if vm_status is None:
                 raise QemuError("Suspending a QEMU VM is not supported")
             elif vm_status == "running" or vm_status == "prelaunch":
-                yield from self._control_vm("stop")
+                yield from self._qmp_command("stop")
                 self.status = "suspended"
                 log.debug("QEMU VM has been suspended")
             else:
@@ -1106,7 +1166,7 @@ class QemuVM(BaseNode):
         Reloads this QEMU VM.
         """
 
-        yield from self._control_vm("system_reset")
+        yield from self._qmp_command("system_reset")
         log.debug("QEMU VM has been reset")
 
     @asyncio.coroutine
@@ -1119,7 +1179,7 @@ class QemuVM(BaseNode):
         if vm_status is None:
             raise QemuError("Resuming a QEMU VM is not supported")
         elif vm_status == "paused":
-            yield from self._control_vm("cont")
+            yield from self._qmp_command("cont")
             log.debug("QEMU VM has been resumed")
         else:
             log.info("QEMU VM is not paused to be resumed, current status is {}".format(vm_status))
@@ -1357,7 +1417,7 @@ class QemuVM(BaseNode):
     def _monitor_options(self):
 
         if self._monitor:
-            return ["-monitor", "tcp:{}:{},server,nowait".format(self._monitor_host, self._monitor)]
+            return ["-qmp", "tcp:{}:{},server,nowait".format(self._monitor_host, self._monitor)]
         else:
             return []
 
@@ -1395,6 +1455,36 @@ class QemuVM(BaseNode):
         log.info("{} returned with {}".format(self._get_qemu_img(), retcode))
         return retcode
 
+    def _claim_linked_clone(self, qemu_img_path, disk_image, disk):
+        """
+        Takes a linked clone of a disk image prepared in advance.
+
+        :returns: True if a linked clone has been claimed
+        """
+
+        pool = self.manager.linked_clone_pool
+        if pool is None:
+            return False
+
+        @asyncio.coroutine
+        def create(base_image, path):
+            yield from self.manager.create_linked_clone(qemu_img_path, base_image, path)
+
+        try:
+            return pool.claim(disk_image, disk, create)
+        except OSError as e:
+            log.warning("Could not use the linked clone pool for {}: {}".format(disk, e))
+            return False
+
+    @asyncio.coroutine
+    def _create_linked_clone(self, qemu_img_path, disk_image, disk):
+        """
+        Creates a linked clone of a disk image.
+        """
+
+        yield from self.manager.create_linked_clone(qemu_img_path, disk_image, disk)
+        log.info("Linked clone {} of {} created".format(disk, disk_image))
+
     @asyncio.coroutine
     def _disk_options(self):
         options = []
@@ -1436,19 +1526,11 @@ class QemuVM(BaseNode):
 
             if self.linked_clone:
                 disk = os.path.join(self.working_dir, "{}_disk.qcow2".format(disk_name))
-                if not os.path.exists(disk):
+                if not os.path.exists(disk) and self._claim_linked_clone(qemu_img_path, disk_image, disk):
+                    log.info("{} disk image of {} taken from the linked clone pool".format(disk_name, self._name))
+                elif not os.path.exists(disk):
                     # create the disk
-                    try:
-                        command = [qemu_img_path, "create", "-o", "backing_file={}".format(disk_image), "-f", "qcow2", disk]
-                        retcode = yield from self._qemu_img_exec(command)
-                        if retcode:
-                            stdout = self.read_qemu_img_stdout()
-                            raise QemuError("Could not create '{}' disk image: qemu-img returned with {}\n{}".format(disk_name,
-                                                                                                                     retcode,
-                                                                                                                     stdout))
-                    except (OSError, subprocess.SubprocessError) as e:
-                        stdout = self.read_qemu_img_stdout()
-                        raise QemuError("Could not create '{}' disk image: {}\n{}".format(disk_name, e, stdout))
+                    yield from self._create_linked_clone(qemu_img_path, disk_image, disk)
                 else:
                     # The disk exists we check if the clone works
                     try:
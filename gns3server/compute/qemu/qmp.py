@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Client for the QEMU Machine Protocol (QMP).
+http://wiki.qemu.org/QMP
+"""
+
+import json
+import asyncio
+
+from .qemu_error import QemuError
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class QMPError(QemuError):
+
+    pass
+
+
+class QMPClient:
+
+    """
+    Persistent connection to the QMP server of a QEMU process.
+    Commands are pipelined: each one gets an identifier and several
+    commands can wait for their answer at the same time.
+    Asynchronous events (STOP, RESUME, SHUTDOWN...) are sent to a callback.
+
+    :param host: QMP server host
+    :param port: QMP server port
+    :param event_callback: Function called with the event name and its data
+    """
+
+    def __init__(self, host, port, event_callback=None):
+
+        self._host = host
+        self._port = port
+        self._event_callback = event_callback
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending = {}
+        self._next_id = 0
+        self._connected = False
+
+    @property
+    def connected(self):
+
+        return self._connected
+
+    @asyncio.coroutine
+    def connect(self, timeout=10):
+        """
+        Connects to the QMP server and negotiates the capabilities.
+
+        :param timeout: Timeout in seconds for the connection and the negotiation
+        """
+
+        try:
+            self._reader, self._writer = yield from asyncio.wait_for(asyncio.open_connection(self._host, self._port), timeout=timeout)
+            greeting = yield from asyncio.wait_for(self._read_message(), timeout=timeout)
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            self._close_writer()
+            raise QMPError("Could not connect to QMP on {}:{}: {}".format(self._host, self._port, e))
+        if greeting is None or "QMP" not in greeting:
+            self._close_writer()
+            raise QMPError("Invalid QMP greeting from {}:{}".format(self._host, self._port))
+
+        self._connected = True
+        self._read_task = asyncio.async(self._read_loop())
+        try:
+            yield from asyncio.wait_for(self.execute("qmp_capabilities"), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.close()
+            raise QMPError("Timeout while negotiating QMP capabilities on {}:{}".format(self._host, self._port))
+        log.debug("Connected to QMP on {}:{}".format(self._host, self._port))
+
+    @asyncio.coroutine
+    def _read_message(self):
+
+        line = yield from self._reader.readline()
+        if not line:
+            return None
+        return json.loads(line.decode("utf-8"))
+
+    @asyncio.coroutine
+    def _read_loop(self):
+
+        try:
+            while True:
+                try:
+                    message = yield from self._read_message()
+                except ValueError as e:
+                    log.warning("Invalid QMP message from {}:{}: {}".format(self._host, self._port, e))
+                    continue
+                if message is None:
+                    break
+                if "event" in message:
+                    self._dispatch_event(message)
+                elif "id" in message:
+                    future = self._pending.pop(message["id"], None)
+                    if future is not None and not future.done():
+                        future.set_result(message)
+        except (OSError, EOFError) as e:
+            log.debug("QMP connection to {}:{} lost: {}".format(self._host, self._port, e))
+        finally:
+            self._connected = False
+            self._close_writer()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(QMPError("QMP connection to {}:{} closed".format(self._host, self._port)))
+            self._pending = {}
+
+    def _dispatch_event(self, message):
+
+        log.debug("QMP event from {}:{}: {}".format(self._host, self._port, message["event"]))
+        if self._event_callback:
+            try:
+                self._event_callback(message["event"], message.get("data", {}))
+            except Exception as e:
+                log.error("Error while processing QMP event {}: {}".format(message["event"], e), exc_info=1)
+
+    @asyncio.coroutine
+    def execute(self, command, arguments=None):
+        """
+        Executes a QMP command.
+
+        :param command: QMP command name (e.g. query-status, stop)
+        :param arguments: Dictionary of command arguments
+
+        :returns: Value returned by the command
+        """
+
+        if not self._connected:
+            raise QMPError("Not connected to QMP on {}:{}".format(self._host, self._port))
+
+        self._next_id += 1
+        command_id = self._next_id
+        message = {"execute": command, "id": command_id}
+        if arguments:
+            message["arguments"] = arguments
+        future = asyncio.Future()
+        self._pending[command_id] = future
+        try:
+            self._writer.write(json.dumps(message).encode("utf-8") + b"\r\n")
+        except OSError as e:
+            self._pending.pop(command_id, None)
+            raise QMPError("Could not send QMP command {}: {}".format(command, e))
+
+        try:
+            response = yield from future
+        finally:
+            self._pending.pop(command_id, None)
+        if "error" in response:
+            raise QMPError("QMP command {} failed: {}".format(command, response["error"].get("desc", response["error"])))
+        return response.get("return")
+
+    def _close_writer(self):
+
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except OSError:
+                pass
+            self._writer = None
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+
+        self._connected = False
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        self._close_writer()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending = {}
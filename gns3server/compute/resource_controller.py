@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Resource control of the node processes with cgroup v2.
+https://www.kernel.org/doc/Documentation/cgroup-v2.txt
+"""
+
+import os
+import sys
+
+from gns3server.config import Config
+
+import logging
+log = logging.getLogger(__name__)
+
+
+CONTROLLERS = ("cpu", "cpuset", "memory", "io")
+
+# period used for cpu.max, in microseconds
+CPU_PERIOD = 100000
+
+# memory in MB used by the emulator and uBridge themselves, added to the node RAM
+MEMORY_OVERHEAD = 256
+
+# cpu.weight and io.weight for each process priority (100 is the kernel default)
+PRIORITY_WEIGHTS = {
+    "realtime": 1000,
+    "very high": 500,
+    "high": 200,
+    "normal": 100,
+    "low": 50,
+    "very low": 10
+}
+
+
+class NodeCgroup:
+
+    """
+    cgroup of a node, holding all its processes (emulator and uBridge).
+
+    :param path: Path of the cgroup directory
+    """
+
+    def __init__(self, path):
+
+        self._path = path
+
+    @property
+    def path(self):
+
+        return self._path
+
+    def _write(self, name, value):
+
+        try:
+            with open(os.path.join(self._path, name), "w") as f:
+                f.write(str(value))
+        except OSError as e:
+            log.warning("Could not write '{}' to {}: {}".format(value, os.path.join(self._path, name), e))
+            return False
+        return True
+
+    def _read(self, name):
+
+        try:
+            with open(os.path.join(self._path, name)) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def add_process(self, pid):
+        """
+        Moves a process in the cgroup, its future children will be in the cgroup too.
+
+        :param pid: Process identifier
+        :returns: True if the process has been moved
+        """
+
+        return self._write("cgroup.procs", pid)
+
+    def set_cpu_limit(self, percentage):
+        """
+        :param percentage: Percentage of one CPU allowed, 0 for no limit
+        """
+
+        if percentage:
+            return self._write("cpu.max", "{} {}".format(int(CPU_PERIOD * percentage / 100), CPU_PERIOD))
+        return self._write("cpu.max", "max {}".format(CPU_PERIOD))
+
+    def set_priority(self, priority):
+        """
+        :param priority: Process priority (realtime, very high, high, normal, low or very low)
+        """
+
+        weight = PRIORITY_WEIGHTS.get(priority, PRIORITY_WEIGHTS["normal"])
+        success = self._write("cpu.weight", weight)
+        # the io controller is not always available
+        if os.path.exists(os.path.join(self._path, "io.weight")):
+            self._write("io.weight", "default {}".format(weight))
+        return success
+
+    def set_memory_limit(self, memory):
+        """
+        Sets memory.high: above it the node memory is reclaimed and throttled,
+        the node is never killed by the OOM killer like with memory.max.
+
+        :param memory: Memory in MB, None for no limit
+        """
+
+        if memory:
+            return self._write("memory.high", int(memory) * 1024 * 1024)
+        return self._write("memory.high", "max")
+
+    def set_cpus(self, cpus):
+        """
+        :param cpus: CPUs which can be used (e.g. "0-3,6")
+        """
+
+        return self._write("cpuset.cpus", cpus)
+
+    def usage(self):
+        """
+        :returns: Dictionary with the CPU time in microseconds and the memory used in bytes
+        """
+
+        usage = {}
+        cpu_stat = self._read("cpu.stat")
+        if cpu_stat:
+            for line in cpu_stat.splitlines():
+                key, _, value = line.partition(" ")
+                if key == "usage_usec":
+                    usage["cpu_usage_usec"] = int(value)
+        memory_current = self._read("memory.current")
+        if memory_current:
+            usage["memory_usage"] = int(memory_current)
+        return usage
+
+    def remove(self):
+        """
+        Removes the cgroup, only possible once all the processes have exited.
+
+        :returns: True if the cgroup has been removed
+        """
+
+        try:
+            os.rmdir(self._path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.debug("Could not remove cgroup {}: {}".format(self._path, e))
+            return False
+        return True
+
+
+class ResourceController:
+
+    """
+    Creates a cgroup v2 for each node under a cgroup dedicated to GNS3.
+    When cgroups are not available (other OS, cgroup v1, no write access)
+    the nodes use their previous mechanisms (cpulimit, renice).
+    """
+
+    def __init__(self):
+
+        self._available = None
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of ResourceController.
+
+        :returns: instance of ResourceController
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def _config(self):
+
+        return Config.instance().get_section_config("Server")
+
+    @property
+    def root(self):
+        """
+        :returns: Path of the cgroup containing the node cgroups
+        """
+
+        return self._config.get("cgroup_path", "/sys/fs/cgroup/gns3")
+
+    @property
+    def cpus(self):
+        """
+        :returns: CPUs the nodes are pinned to, None if not pinned
+        """
+
+        return self._config.get("cgroup_cpus", "").strip() or None
+
+    @property
+    def memory_margin(self):
+        """
+        :returns: Percentage added to the RAM of a node for its memory.high limit, None for no limit
+        """
+
+        margin = self._config.getint("cgroup_memory_margin", 25)
+        if margin < 0:
+            return None
+        return margin
+
+    @staticmethod
+    def _enable_controllers(path):
+
+        try:
+            with open(os.path.join(path, "cgroup.controllers")) as f:
+                available = f.read().split()
+        except OSError:
+            return
+        for controller in CONTROLLERS:
+            if controller in available:
+                try:
+                    with open(os.path.join(path, "cgroup.subtree_control"), "w") as f:
+                        f.write("+{}".format(controller))
+                except OSError as e:
+                    log.debug("Could not enable the {} controller in {}: {}".format(controller, path, e))
+
+    @property
+    def available(self):
+        """
+        :returns: True if the node processes can be put in cgroups
+        """
+
+        if self._available is None:
+            self._available = self._setup()
+        return self._available
+
+    def _setup(self):
+
+        if not sys.platform.startswith("linux") or not self._config.getboolean("cgroups", False):
+            return False
+
+        root = self.root
+        parent = os.path.dirname(root)
+        if not os.path.exists(os.path.join(parent, "cgroup.controllers")):
+            log.info("cgroup v2 is not available in {}, using cpulimit and renice for the nodes".format(parent))
+            return False
+        try:
+            os.makedirs(root, exist_ok=True)
+        except OSError as e:
+            log.info("Could not create cgroup {}, using cpulimit and renice for the nodes: {}".format(root, e))
+            return False
+        if not os.access(os.path.join(root, "cgroup.procs"), os.W_OK):
+            log.info("cgroup {} is not writable, using cpulimit and renice for the nodes".format(root))
+            return False
+
+        self._enable_controllers(parent)
+        self._enable_controllers(root)
+        log.info("Node processes are controlled with cgroup {}".format(root))
+        return True
+
+    def create(self, node_id):
+        """
+        Creates the cgroup of a node.
+
+        :param node_id: Node identifier
+        :returns: NodeCgroup instance, None if cgroups are not available
+        """
+
+        if not self.available:
+            return None
+        path = os.path.join(self.root, node_id)
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            log.warning("Could not create cgroup {}: {}".format(path, e))
+            return None
+        cgroup = NodeCgroup(path)
+        if self.cpus:
+            cgroup.set_cpus(self.cpus)
+        return cgroup
+
+    def memory_limit(self, ram):
+        """
+        :param ram: RAM of a node in MB
+        :returns: Memory limit of the node in MB, None for no limit
+        """
+
+        margin = self.memory_margin
+        if not ram or margin is None:
+            return None
+        return int(ram * (100 + margin) / 100) + MEMORY_OVERHEAD
+
+    def __json__(self):
+
+        return {"available": self.available,
+                "path": self.root,
+                "cpus": self.cpus}
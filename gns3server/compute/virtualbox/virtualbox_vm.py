@@ -267,13 +267,17 @@ class VirtualBoxVM(BaseNode):
         yield from self._set_network_options()
         yield from self._set_serial_console()
 
-        # check if there is enough RAM to run
-        self.check_available_ram(self.ram)
+        # reserve the RAM needed to run
+        yield from self.reserve_ram(self.ram)
 
         args = [self._vmname]
         if self._headless:
             args.extend(["--type", "headless"])
-        result = yield from self.manager.execute("startvm", args)
+        try:
+            result = yield from self.manager.execute("startvm", args)
+        except VirtualBoxError:
+            self.release_ram()
+            raise
         self.status = "started"
         log.info("VirtualBox VM '{name}' [{id}] started".format(name=self.name, id=self.id))
         log.debug("Start result: {}".format(result))
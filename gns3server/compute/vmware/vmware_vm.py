@@ -440,17 +440,21 @@ class VMwareVM(BaseNode):
 
         yield from self._start_ubridge()
         self._read_vmx_file()
-        # check if there is enough RAM to run
+        # reserve the RAM needed to run
         if "memsize" in self._vmx_pairs:
-            self.check_available_ram(int(self._vmx_pairs["memsize"]))
-        self._set_network_options()
-        self._set_serial_console()
-        self._write_vmx_file()
+            yield from self.reserve_ram(int(self._vmx_pairs["memsize"]))
+        try:
+            self._set_network_options()
+            self._set_serial_console()
+            self._write_vmx_file()
 
-        if self._headless:
-            yield from self._control_vm("start", "nogui")
-        else:
-            yield from self._control_vm("start")
+            if self._headless:
+                yield from self._control_vm("start", "nogui")
+            else:
+                yield from self._control_vm("start")
+        except VMwareError:
+            self.release_ram()
+            raise
 
         try:
             if self._ubridge_hypervisor:
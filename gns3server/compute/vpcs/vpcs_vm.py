@@ -39,6 +39,7 @@ from ..adapters.ethernet_adapter import EthernetAdapter
 from ..nios.nio_udp import NIOUDP
 from ..nios.nio_tap import NIOTAP
 from ..base_node import BaseNode
+from ..probe_cache import ProbeCache
 
 
 import logging
@@ -132,7 +133,8 @@ class VPCSVM(BaseNode):
                 "console": self._console,
                 "console_type": "telnet",
                 "project_id": self.project.id,
-                "command_line": self.command_line}
+                "command_line": self.command_line,
+                "resource_usage": self.resource_usage}
 
     def _vpcs_path(self):
         """
@@ -206,7 +208,8 @@ class VPCSVM(BaseNode):
         Checks if the VPCS executable version is >= 0.8b or == 0.6.1.
         """
         try:
-            output = yield from subprocess_check_output(self._vpcs_path(), "-v", cwd=self.working_dir)
+            vpcs_path = self._vpcs_path()
+            output = yield from ProbeCache.instance().probe("version", vpcs_path, subprocess_check_output, vpcs_path, "-v", cwd=self.working_dir)
             match = re.search("Welcome to Virtual PC Simulator, version ([0-9a-z\.]+)", output)
             if match:
                 version = match.group(1)
@@ -243,6 +246,7 @@ class VPCSVM(BaseNode):
                                                                               cwd=self.working_dir,
                                                                               creationflags=flags)
                     monitor_process(self._process, self._termination_callback)
+                self._control_resources(self._process.pid)
 
                 yield from self._start_ubridge()
                 if nio:
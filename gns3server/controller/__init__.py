@@ -31,6 +31,8 @@ from .appliance_template import ApplianceTemplate
 from .compute import Compute, ComputeError
 from .notification import Notification
 from .symbols import Symbols
+from .image_distribution import ImageDistribution
+from .image_cache import ImageCache
 from ..version import __version__
 from .topology import load_topology
 from .gns3vm import GNS3VM
@@ -55,16 +57,19 @@ class Controller:
         self._notification = Notification(self)
         self.gns3vm = GNS3VM(self)
         self.symbols = Symbols()
+        self.image_distribution = ImageDistribution(self)
+        self.image_cache = ImageCache()
 
         # Store settings shared by the different GUI will be replace by dedicated API later
         self._settings = None
         self._appliances = {}
-        self._appliance_templates = {}
+        # the appliance templates are loaded the first time they are requested
+        self._appliance_templates = None
 
         self._config_file = os.path.join(Config.instance().config_dir, "gns3_controller.conf")
         log.info("Load controller configuration file {}".format(self._config_file))
 
-    def load_appliances(self):
+    def _load_appliance_templates(self):
         self._appliance_templates = {}
         for directory, builtin in (
             (get_resource('appliances'), True,), (self.appliances_path(), False,)
@@ -85,6 +90,9 @@ class Controller:
                         log.warning("Cannot load appliance template file '%s': %s", path, str(e))
                         continue
 
+    def load_appliances(self):
+        # the templates are reloaded from the disk on the next access
+        self._appliance_templates = None
         self._appliances = {}
         vms = []
         for vm in self._settings.get("Qemu", {}).get("vms", []):
@@ -159,7 +167,11 @@ class Controller:
             self._appliances[b.id] = b
 
     @asyncio.coroutine
-    def start(self):
+    def start(self, local_compute=True):
+        """
+        :param local_compute: Add the compute running in this server
+        """
+
         log.info("Start controller")
         self.load_base_files()
         server_config = Config.instance().get_section_config("Server")
@@ -177,19 +189,20 @@ class Controller:
             name = "Main server"
 
         computes = yield from self._load_controller_settings()
-        try:
-            self._local_server = yield from self.add_compute(compute_id="local",
-                                                             name=name,
-                                                             protocol=server_config.get("protocol", "http"),
-                                                             host=host,
-                                                             console_host=console_host,
-                                                             port=server_config.getint("port", 3080),
-                                                             user=server_config.get("user", ""),
-                                                             password=server_config.get("password", ""),
-                                                             force=True)
-        except aiohttp.web_exceptions.HTTPConflict as e:
-            log.fatal("Can't access to the local server, make sure anything else is not running on the same port")
-            sys.exit(1)
+        if local_compute:
+            try:
+                self._local_server = yield from self.add_compute(compute_id="local",
+                                                                 name=name,
+                                                                 protocol=server_config.get("protocol", "http"),
+                                                                 host=host,
+                                                                 console_host=console_host,
+                                                                 port=server_config.getint("port", 3080),
+                                                                 user=server_config.get("user", ""),
+                                                                 password=server_config.get("password", ""),
+                                                                 force=True)
+            except aiohttp.web_exceptions.HTTPConflict as e:
+                log.fatal("Can't access to the local server, make sure anything else is not running on the same port")
+                sys.exit(1)
         for c in computes:
             try:
                 yield from self.add_compute(**c)
@@ -617,6 +630,8 @@ class Controller:
         """
         :returns: The dictionary of appliances templates managed by GNS3
         """
+        if self._appliance_templates is None:
+            self._load_appliance_templates()
         return self._appliance_templates
 
     @property
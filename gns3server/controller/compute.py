@@ -23,11 +23,14 @@ import json
 import uuid
 import sys
 import io
+import time
 from operator import itemgetter
 
 from ..utils import parse_version
 from ..utils.images import list_images
 from ..utils.asyncio import locked_coroutine
+from ..utils.metrics import Metrics, normalize_path
+from ..utils.encoding import MSGPACK_AVAILABLE, MSGPACK_CONTENT_TYPE, pack, unpack
 from ..controller.controller_error import ControllerError
 from ..version import __version__
 
@@ -35,6 +38,10 @@ from ..version import __version__
 import logging
 log = logging.getLogger(__name__)
 
+COMPUTE_REQUEST_DURATION = Metrics.instance().histogram("gns3_compute_request_duration_seconds",
+                                                        "Duration of the requests of the controller to the computes",
+                                                        ("compute_id", "method", "path"))
+
 
 class ComputeError(ControllerError):
     pass
@@ -95,6 +102,7 @@ class Compute:
         self._set_auth(user, password)
         self._cpu_usage_percent = None
         self._memory_usage_percent = None
+        self._memory_reservations = None
         self._capabilities = {
             "version": None,
             "node_types": []
@@ -102,6 +110,8 @@ class Compute:
         self.name = name
         # Websocket for notifications
         self._ws = None
+        # Use msgpack instead of JSON, negotiated with the capabilities
+        self._msgpack = False
 
         # Cache of interfaces on remote host
         self._interfaces_cache = None
@@ -279,6 +289,21 @@ class Compute:
     def memory_usage_percent(self):
         return self._memory_usage_percent
 
+    @property
+    def capabilities(self):
+        """
+        Capabilities reported by the compute (version, platform, node types...)
+        """
+        return self._capabilities
+
+    @property
+    def memory_reservations(self):
+        """
+        RAM reserved by the nodes started on the compute,
+        as reported by the last ping (capacity and reserved in MB)
+        """
+        return self._memory_reservations
+
     def __json__(self, topology_dump=False):
         """
         :param topology_dump: Filter to keep only properties require for saving on disk
@@ -430,6 +455,7 @@ class Compute:
                 self._http_session.close()
                 raise aiohttp.web.HTTPConflict(text="The server {} is not a GNS3 server".format(self._id))
             self._capabilities = response.json
+            self._msgpack = MSGPACK_AVAILABLE and "msgpack" in response.json.get("encodings", [])
             if parse_version(__version__)[:2] != parse_version(response.json["version"])[:2]:
                 self._http_session.close()
                 raise aiohttp.web.HTTPConflict(text="The server {} versions are not compatible {} != {}".format(self._id, __version__, response.json["version"]))
@@ -444,8 +470,11 @@ class Compute:
         """
         Connect to the notification stream
         """
+        url = self._getUrl("/notifications/ws")
+        if self._msgpack:
+            url += "?encoding=msgpack"
         try:
-            self._ws = yield from self._session().ws_connect(self._getUrl("/notifications/ws"), auth=self._auth)
+            self._ws = yield from self._session().ws_connect(url, auth=self._auth)
         except (aiohttp.WSServerHandshakeError, aiohttp.ClientResponseError):
             self._ws = None
         while self._ws is not None:
@@ -457,13 +486,17 @@ class Compute:
             if response.tp == aiohttp.WSMsgType.closed or response.tp == aiohttp.WSMsgType.error or response.data is None:
                 self._connected = False
                 break
-            msg = json.loads(response.data)
+            if response.tp == aiohttp.WSMsgType.binary:
+                msg = unpack(response.data)
+            else:
+                msg = json.loads(response.data)
             action = msg.pop("action")
             event = msg.pop("event")
 
             if action == "ping":
                 self._cpu_usage_percent = event["cpu_usage_percent"]
                 self._memory_usage_percent = event["memory_usage_percent"]
+                self._memory_reservations = event.get("memory_reservations")
                 self._controller.notification.emit("compute.updated", self.__json__())
             else:
                 yield from self._controller.notification.dispatch(action, event, compute_id=self.id)
@@ -474,8 +507,10 @@ class Compute:
         if not hasattr(sys, "_called_from_test") or not sys._called_from_test:
             asyncio.get_event_loop().call_later(1, lambda: asyncio.async(self.connect()))
         self._ws = None
+        self._msgpack = False
         self._cpu_usage_percent = None
         self._memory_usage_percent = None
+        self._memory_reservations = None
         self._controller.notification.emit("compute.updated", self.__json__())
 
     def _getUrl(self, path):
@@ -502,13 +537,18 @@ class Compute:
         with Timeout(timeout):
             url = self._getUrl(path)
             headers = {}
-            headers['content-type'] = 'application/json'
+            if self._msgpack:
+                headers['content-type'] = MSGPACK_CONTENT_TYPE
+                if not raw:
+                    headers['accept'] = '{}, application/json'.format(MSGPACK_CONTENT_TYPE)
+            else:
+                headers['content-type'] = 'application/json'
             chunked = None
             if data == {}:
                 data = None
             elif data is not None:
                 if hasattr(data, '__json__'):
-                    data = json.dumps(data.__json__())
+                    data = pack(data.__json__()) if self._msgpack else json.dumps(data.__json__())
                 elif isinstance(data, aiohttp.streams.EmptyStreamReader):
                     data = None
                 # Stream the request
@@ -520,13 +560,14 @@ class Compute:
                     chunked = True
                     headers['content-type'] = 'application/octet-stream'
                 else:
-                    data = json.dumps(data).encode("utf-8")
+                    data = pack(data) if self._msgpack else json.dumps(data).encode("utf-8")
         try:
             log.debug("Attempting request to compute: {method} {url} {headers}".format(
                 method=method,
                 url=url,
                 headers=headers
             ))
+            start = time.monotonic()
             response = yield from self._session().request(method, url, headers=headers, data=data, auth=self._auth, chunked=chunked, timeout=timeout)
         except asyncio.TimeoutError as e:
             raise ComputeError("Timeout error when connecting to {}".format(url))
@@ -534,15 +575,29 @@ class Compute:
             #  aiohttp 2.3.1 raises socket.gaierror when cannot find host
             raise ComputeError(str(e))
         body = yield from response.read()
+        COMPUTE_REQUEST_DURATION.observe(time.monotonic() - start, self._id, method, normalize_path(path))
+        answer = None
         if body and not raw:
-            body = body.decode()
+            if response.content_type == MSGPACK_CONTENT_TYPE:
+                try:
+                    answer = unpack(body)
+                except ValueError:
+                    raise aiohttp.web.HTTPConflict(text="The server {} is not a GNS3 server".format(self._id))
+                body = repr(answer)
+            else:
+                body = body.decode()
+
+        def decode_json():
+            if answer is not None:
+                return answer
+            return json.loads(body)
 
         if response.status >= 300:
             # Try to decode the GNS3 error
             if body and not raw:
                 try:
-                    msg = json.loads(body)["message"]
-                except (KeyError, ValueError):
+                    msg = decode_json()["message"]
+                except (KeyError, ValueError, TypeError):
                     msg = body
             else:
                 msg = ""
@@ -559,7 +614,7 @@ class Compute:
                 raise aiohttp.web.HTTPRequestTimeout(text="{} {} request timeout".format(method, path))
             elif response.status == 409:
                 try:
-                    raise ComputeConflict(json.loads(body))
+                    raise ComputeConflict(decode_json())
                 # If the 409 doesn't come from a GNS3 server
                 except ValueError:
                     raise aiohttp.web.HTTPConflict(text=msg)
@@ -574,7 +629,7 @@ class Compute:
                 response.body = body
             else:
                 try:
-                    response.json = json.loads(body)
+                    response.json = decode_json()
                 except ValueError:
                     raise aiohttp.web.HTTPConflict(text="The server {} is not a GNS3 server".format(self._id))
         else:
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import uuid
+import asyncio
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Directory of the controller project where the files of the remote computes are mirrored
+MIRROR_DIRECTORY = ".compute_files"
+
+# Size of the reads of the files downloaded from the computes
+CHUNK_SIZE = 1024 * 1024
+
+
+class ComputeFilesMirror:
+
+    """
+    Copy on the controller of the project files of a remote compute,
+    with the md5 of each file. A sync downloads only the files whose
+    md5 on the compute is different from the md5 of the copy.
+
+    :param project: Controller project
+    :param compute: Compute instance
+    """
+
+    def __init__(self, project, compute):
+
+        self._project = project
+        self._compute = compute
+        self._directory = os.path.join(project.path, MIRROR_DIRECTORY, compute.id)
+
+    @property
+    def directory(self):
+
+        return self._directory
+
+    @property
+    def _manifest_path(self):
+
+        return self._directory + ".json"
+
+    def _load(self):
+
+        try:
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save(self, manifest):
+
+        try:
+            with open(self._manifest_path + ".tmp", "w+") as f:
+                json.dump(manifest, f)
+            os.replace(self._manifest_path + ".tmp", self._manifest_path)
+        except OSError as e:
+            log.warning("Could not save the manifest of {}: {}".format(self._directory, e))
+
+    def _local_path(self, path):
+
+        local_path = os.path.normpath(os.path.join(self._directory, path))
+        if os.path.commonprefix([self._directory + os.sep, local_path]) != self._directory + os.sep:
+            raise ValueError("{} is outside of the project".format(path))
+        return local_path
+
+    @asyncio.coroutine
+    def _download(self, path, local_path):
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        tmp_path = "{}.{}.tmp".format(local_path, uuid.uuid4())
+        response = yield from self._compute.download_file(self._project, path)
+        try:
+            with open(tmp_path, "wb") as f:
+                while True:
+                    data = yield from response.content.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    f.write(data)
+            # a file read by a previous export keeps its content
+            os.replace(tmp_path, local_path)
+        finally:
+            response.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @asyncio.coroutine
+    def sync(self, files):
+        """
+        Updates the copy of the compute files.
+
+        :param files: Files to sync, as returned by the compute list of files ({"path", "md5sum"})
+        :returns: Dictionary path on the compute => path of the copy
+        """
+
+        os.makedirs(self._directory, exist_ok=True)
+        manifest = self._load()
+        paths = {}
+        downloaded = 0
+        try:
+            for compute_file in files:
+                path = compute_file["path"]
+                try:
+                    local_path = self._local_path(path)
+                except ValueError as e:
+                    log.warning(str(e))
+                    continue
+                md5sum = compute_file.get("md5sum")
+                if md5sum is None or manifest.get(path) != md5sum or not os.path.exists(local_path):
+                    manifest.pop(path, None)
+                    yield from self._download(path, local_path)
+                    if md5sum:
+                        manifest[path] = md5sum
+                    downloaded += 1
+                paths[path] = local_path
+        finally:
+            self._save(manifest)
+
+        # the files removed from the compute are removed from the copy
+        for path in set(manifest) - set(paths):
+            del manifest[path]
+            try:
+                os.remove(self._local_path(path))
+            except (OSError, ValueError):
+                pass
+        self._save(manifest)
+
+        log.info("{} files of compute {} downloaded, {} unchanged".format(downloaded, self._compute.id, len(paths) - downloaded))
+        return paths
@@ -189,9 +189,10 @@ class Drawing:
         self._project.controller.notification.emit("drawing.updated", data)
         self._project.dump()
 
-    def __json__(self, topology_dump=False):
+    def __json__(self, topology_dump=False, fields=None):
         """
         :param topology_dump: Filter to keep only properties require for saving on disk
+        :param fields: Fields required by the caller, the SVG is read only if it is required (all by default)
         """
         if topology_dump:
             return {
@@ -202,15 +203,17 @@ class Drawing:
                 "rotation": self._rotation,
                 "svg": self._svg
             }
-        return {
+        answer = {
             "project_id": self._project.id,
             "drawing_id": self._id,
             "x": self._x,
             "y": self._y,
             "z": self._z,
-            "rotation": self._rotation,
-            "svg": self.svg
+            "rotation": self._rotation
         }
+        if fields is None or "svg" in fields:
+            answer["svg"] = self.svg
+        return answer
 
     def __repr__(self):
         return "<gns3server.controller.Drawing {}>".format(self._id)
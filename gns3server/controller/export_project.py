@@ -17,12 +17,16 @@
 
 import os
 import json
+import uuid
+import shutil
 import asyncio
 import aiohttp
 import zipfile
-import tempfile
 import zipstream
 
+from .compute_files_mirror import ComputeFilesMirror, MIRROR_DIRECTORY
+from ..compute.file_manifest import MANIFEST_FILENAME
+
 
 import logging
 log = logging.getLogger(__name__)
@@ -79,25 +83,14 @@ def export_project(project, temporary_dir, include_images=False, keep_compute_id
             else:
                 z.write(path, os.path.relpath(path, project._path), compress_type=zipfile.ZIP_DEFLATED)
 
-    downloaded_files = set()
-
     for compute in project.computes:
         if compute.id != "local":
             compute_files = yield from compute.list_files(project)
-            for compute_file in compute_files:
-                if not _filter_files(compute_file["path"]):
-                    (fd, temp_path) = tempfile.mkstemp(dir=temporary_dir)
-                    f = open(fd, "wb", closefd=True)
-                    response = yield from compute.download_file(project, compute_file["path"])
-                    while True:
-                        data = yield from response.content.read(512)
-                        if not data:
-                            break
-                        f.write(data)
-                    response.close()
-                    f.close()
-                    z.write(temp_path, arcname=compute_file["path"], compress_type=zipfile.ZIP_DEFLATED)
-                    downloaded_files.add(compute_file['path'])
+            compute_files = [compute_file for compute_file in compute_files if not _filter_files(compute_file["path"])]
+            # only the files modified since the previous export are downloaded
+            paths = yield from ComputeFilesMirror(project, compute).sync(compute_files)
+            for path, local_path in paths.items():
+                z.write(_link_to_temporary_dir(local_path, temporary_dir), arcname=path, compress_type=zipfile.ZIP_DEFLATED)
 
     return z
 
@@ -122,11 +115,19 @@ def _filter_files(path):
     except (ValueError, IndexError):
         pass
 
+    # copy of the files of the remote computes
+    if MIRROR_DIRECTORY in s:
+        return True
+
     file_name = os.path.basename(path)
     # Ignore log files and OS noises
     if file_name.endswith('_log.txt') or file_name.endswith('.log') or file_name == '.DS_Store':
         return True
 
+    # manifest of the files of a local compute
+    if file_name == MANIFEST_FILENAME:
+        return True
+
     return False
 
 
@@ -183,32 +184,36 @@ def _export_project_file(project, path, z, include_images, keep_compute_id, allo
         if not keep_compute_id:
             topology["topology"]["computes"] = []  # Strip compute information because could contain secret info like password
 
-    local_images = set([i['image'] for i in images if i['compute_id'] == 'local'])
+    local_images = set([(i['image_type'], i['image']) for i in images if i['compute_id'] == 'local'])
 
-    for image in local_images:
-        _export_local_images(project, image, z)
+    for image_type, image in local_images:
+        _export_local_images(project, image_type, image, z)
 
     remote_images = set([
         (i['compute_id'], i['image_type'], i['image'])
         for i in images if i['compute_id'] != 'local'])
 
-    for compute_id, image_type, image in remote_images:
-        yield from _export_remote_images(project, compute_id, image_type, image, z, temporary_dir)
+    checksums = {}
+    for compute_id, image_type, image in sorted(remote_images):
+        yield from _export_remote_images(project, compute_id, image_type, image, z, temporary_dir, checksums)
 
     z.writestr("project.gns3", json.dumps(topology).encode())
 
     return images
 
-def _export_local_images(project, image, z):
+def _export_local_images(project, image_type, image, z):
     """
     Take a project file (.gns3) and export images to the zip
 
+    :param image_type: Image type
     :param image: Image path
     :param z: Zipfile instance for the export
     """
-    from ..compute import MODULES
+    from ..compute import get_modules
 
-    for module in MODULES:
+    # the module of the image type is searched first
+    modules = sorted(get_modules(), key=lambda module: module.__name__.lower() != image_type)
+    for module in modules:
         try:
             img_directory = module.instance().get_images_directory()
         except NotImplementedError:
@@ -228,41 +233,51 @@ def _export_local_images(project, image, z):
 
 
 @asyncio.coroutine
-def _export_remote_images(project, compute_id, image_type, image, project_zipfile, temporary_dir):
+def _export_remote_images(project, compute_id, image_type, image, project_zipfile, temporary_dir, checksums):
     """
-    Export specific image from remote compute
+    Export specific image from remote compute. The image is taken from
+    the controller image cache when its checksum is already there.
+
     :param project:
     :param compute_id:
     :param image_type:
     :param image:
     :param project_zipfile:
-    :return:
+    :param temporary_dir:
+    :param checksums: Checksums of the compute images by (compute_id, image_type), filled on demand
     """
 
-    log.info("Obtaining image `{}` from `{}`".format(image, compute_id))
-
     try:
         compute = [compute for compute in project.computes if compute.id == compute_id][0]
     except IndexError:
         raise aiohttp.web.HTTPConflict(
             text="Cannot export image from `{}` compute. Compute doesn't exist.".format(compute_id))
 
-    (fd, temp_path) = tempfile.mkstemp(dir=temporary_dir)
-    f = open(fd, "wb", closefd=True)
-    response = yield from compute.download_image(image_type, image)
+    image_cache = project.controller.image_cache
+    if (compute_id, image_type) not in checksums:
+        checksums[(compute_id, image_type)] = yield from image_cache.compute_checksums(compute, image_type)
+    path = yield from image_cache.fetch(compute, image_type, image, checksums=checksums[(compute_id, image_type)])
 
-    if response.status != 200:
-        raise aiohttp.web.HTTPConflict(
-            text="Cannot export image from `{}` compute. Compute sent `{}` status.".format(
-                compute_id, response.status))
-
-    while True:
-        data = yield from response.content.read(512)
-        if not data:
-            break
-        f.write(data)
-    response.close()
-    f.close()
     arcname = os.path.join("images", image_type, image)
     log.info("Saved {}".format(arcname))
-    project_zipfile.write(temp_path, arcname=arcname, compress_type=zipfile.ZIP_DEFLATED)
+    project_zipfile.write(_link_to_temporary_dir(path, temporary_dir), arcname=arcname, compress_type=zipfile.ZIP_DEFLATED)
+
+
+def _link_to_temporary_dir(path, temporary_dir):
+    """
+    The zip is read after the export, a hard link keeps the content
+    of a cached file even if the cache replaces or removes it meanwhile.
+    The file is copied when it can't be linked (e.g. another filesystem).
+
+    :returns: Path of the link or of the copy
+    """
+
+    temp_path = os.path.join(temporary_dir, str(uuid.uuid4()))
+    try:
+        os.link(path, temp_path)
+    except OSError:
+        try:
+            shutil.copy2(path, temp_path)
+        except OSError as e:
+            raise aiohttp.web.HTTPConflict(text="Could not export image {}: {}".format(path, e))
+    return temp_path
@@ -22,8 +22,6 @@ import aiohttp
 import ipaddress
 
 from ...utils.asyncio import locked_coroutine
-from .vmware_gns3_vm import VMwareGNS3VM
-from .virtualbox_gns3_vm import VirtualBoxGNS3VM
 from .remote_gns3_vm import RemoteGNS3VM
 from .gns3_vm_error import GNS3VMError
 from ...version import __version__
@@ -204,10 +202,14 @@ class GNS3VM:
         if engine in self._engines:
             return self._engines[engine]
 
+        # The VMware and VirtualBox engines use the compute modules, they
+        # are imported only when the GNS3 VM is used
         if engine == "vmware":
+            from .vmware_gns3_vm import VMwareGNS3VM
             self._engines["vmware"] = VMwareGNS3VM(self._controller)
             return self._engines["vmware"]
         elif engine == "virtualbox":
+            from .virtualbox_gns3_vm import VirtualBoxGNS3VM
             self._engines["virtualbox"] = VirtualBoxGNS3VM(self._controller)
             return self._engines["virtualbox"]
         elif engine == "remote":
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import uuid
+import asyncio
+import aiohttp
+import hashlib
+
+from ..config import Config
+from .controller_error import ControllerError
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Size of the reads of the images downloaded from the computes
+CHUNK_SIZE = 1024 * 1024
+
+CHECKSUM_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ImageCache:
+
+    """
+    Images downloaded from the computes, stored under their MD5 checksum.
+    When the cache is full the least recently used images are removed.
+
+    [Server] image_cache_path is the cache directory and
+    [Server] image_cache_size its maximum size in MB.
+    """
+
+    def __init__(self):
+
+        self._downloads = {}
+
+    @property
+    def _config(self):
+
+        return Config.instance().get_section_config("Server")
+
+    @property
+    def directory(self):
+
+        return os.path.expanduser(self._config.get("image_cache_path", "~/GNS3/image_cache"))
+
+    @property
+    def max_size(self):
+        """
+        :returns: Maximum size of the cache in bytes
+        """
+
+        return self._config.getint("image_cache_size", 10240) * 1024 * 1024
+
+    def get(self, checksum):
+        """
+        :param checksum: MD5 checksum of an image
+        :returns: Path of the image in the cache, None if it's not in the cache
+        """
+
+        if not checksum or not CHECKSUM_RE.match(checksum):
+            return None
+        path = os.path.join(self.directory, checksum)
+        try:
+            # the access time is used for the eviction, it's not updated on all filesystems
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    @asyncio.coroutine
+    def compute_checksums(self, compute, image_type):
+        """
+        :returns: Dictionary image path => md5sum of the images of a compute
+        """
+
+        try:
+            response = yield from compute.http_query("GET", "/{}/images".format(image_type), timeout=30)
+            checksums = {}
+            for image in response.json:
+                checksums[image["path"]] = image.get("md5sum")
+                checksums.setdefault(image["filename"], image.get("md5sum"))
+            return checksums
+        except (ControllerError, aiohttp.web.HTTPException, aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError) as e:
+            log.debug("Could not list {} images on compute {}: {}".format(image_type, compute.id, e))
+            return {}
+
+    @asyncio.coroutine
+    def fetch(self, compute, image_type, image, checksums=None):
+        """
+        Returns an image of a compute from the cache, the image
+        is downloaded only if it's not already in the cache.
+
+        :param compute: Compute instance
+        :param image_type: Image type (qemu, iou or dynamips)
+        :param image: Image path on the compute
+        :param checksums: Checksums of the images of the compute, listed if None
+        :returns: Path of the image in the cache
+        """
+
+        if checksums is None:
+            checksums = yield from self.compute_checksums(compute, image_type)
+        checksum = checksums.get(image) or checksums.get(os.path.basename(image))
+        path = self.get(checksum)
+        if path:
+            log.info("Image {} of compute {} found in the cache".format(image, compute.id))
+            return path
+
+        key = checksum or (compute.id, image_type, image)
+        download = self._downloads.get(key)
+        if download is None:
+            download = asyncio.async(self._download(compute, image_type, image, checksum))
+            self._downloads[key] = download
+            download.add_done_callback(lambda _: self._downloads.pop(key, None))
+        return (yield from asyncio.shield(download))
+
+    @asyncio.coroutine
+    def _download(self, compute, image_type, image, checksum):
+
+        directory = self.directory
+        os.makedirs(directory, exist_ok=True)
+        log.info("Obtaining image `{}` from `{}`".format(image, compute.id))
+        response = yield from compute.download_image(image_type, image)
+        if response.status != 200:
+            raise aiohttp.web.HTTPConflict(
+                text="Cannot export image from `{}` compute. Compute sent `{}` status.".format(compute.id, response.status))
+
+        tmp_path = os.path.join(directory, "{}.tmp".format(uuid.uuid4()))
+        md5 = hashlib.md5()
+        try:
+            with open(tmp_path, "wb") as f:
+                while True:
+                    data = yield from response.content.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    md5.update(data)
+                    f.write(data)
+            digest = md5.hexdigest()
+            if checksum and digest != checksum:
+                raise aiohttp.web.HTTPConflict(text="Image {} received from compute {} is corrupted".format(image, compute.id))
+            path = os.path.join(directory, digest)
+            os.replace(tmp_path, path)
+        finally:
+            response.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep=None):
+        """
+        Removes the least recently used images until the cache fits its size.
+        """
+
+        images = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and CHECKSUM_RE.match(entry.name):
+                    stat = entry.stat()
+                    images.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+        except OSError as e:
+            log.warning("Could not list the image cache: {}".format(e))
+            return
+
+        size = sum(image[1] for image in images)
+        max_size = self.max_size
+        for _, image_size, path in sorted(images):
+            if size <= max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                size -= image_size
+                log.info("Image {} removed from the cache".format(path))
+            except OSError as e:
+                log.warning("Could not remove {} from the image cache: {}".format(path, e))
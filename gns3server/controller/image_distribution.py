@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import asyncio
+import aiohttp
+
+from ..utils.asyncio import wait_run_in_executor
+from ..utils.images import images_directories, md5sum
+from .controller_error import ControllerError
+from .placement import IMAGE_PROPERTIES
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Seconds during which the list of the images of a compute is reused
+LISTING_TTL = 30
+
+
+class ImageDistribution:
+
+    """
+    Sends the images of the controller to the computes. The images
+    already on a compute are found with its image list and their
+    checksum, each missing image is sent only once to a compute even
+    when several nodes need it at the same time, and the transfers to
+    different computes run in parallel.
+
+    :param controller: Controller instance
+    """
+
+    def __init__(self, controller):
+
+        self._controller = controller
+        self._listings = {}
+        self._transfers = {}
+
+    @staticmethod
+    def local_image(node_type, image):
+        """
+        :param node_type: Node type (qemu, iou or dynamips)
+        :param image: Image path as set in the node properties
+        :returns: Path of the image on the controller, None if not found
+        """
+
+        for directory in images_directories(node_type):
+            path = os.path.join(directory, image)
+            if os.path.exists(path):
+                return path
+        return None
+
+    @asyncio.coroutine
+    def _compute_images(self, compute, node_type):
+        """
+        :returns: Dictionary filename => md5sum of the images on a compute, None if unknown
+        """
+
+        key = (compute.id, node_type)
+        listing = self._listings.get(key)
+        if listing is None or listing[0] + LISTING_TTL < time.time():
+            try:
+                response = yield from compute.http_query("GET", "/{}/images".format(node_type), timeout=30)
+                images = {image["filename"]: image.get("md5sum") for image in response.json}
+            except (ControllerError, aiohttp.web.HTTPException, aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError) as e:
+                log.debug("Could not list {} images on compute {}: {}".format(node_type, compute.id, e))
+                return None
+            listing = (time.time(), images)
+            self._listings[key] = listing
+        return listing[1]
+
+    @asyncio.coroutine
+    def ensure(self, compute, node_type, image, force=False):
+        """
+        Sends an image to a compute if it doesn't have it.
+
+        :param compute: Compute instance
+        :param node_type: Node type (qemu, iou or dynamips)
+        :param image: Image path as set in the node properties
+        :param force: Send the image even if the compute seems to have it (the compute reported it missing)
+        :returns: True if the image is on the compute, False if the controller doesn't have it
+        """
+
+        path = self.local_image(node_type, image)
+        if path is None:
+            return False
+        filename = os.path.basename(image)
+        if force:
+            # the listing is out of date
+            self._listings.pop((compute.id, node_type), None)
+
+        key = (compute.id, node_type, filename, force)
+        transfer = self._transfers.get(key)
+        if transfer is None:
+            transfer = asyncio.async(self._transfer(compute, node_type, path, filename, force))
+            self._transfers[key] = transfer
+            transfer.add_done_callback(lambda _: self._transfers.pop(key, None))
+        # a cancelled node creation doesn't stop the transfer needed by the other nodes
+        return (yield from asyncio.shield(transfer))
+
+    @asyncio.coroutine
+    def _transfer(self, compute, node_type, path, filename, force):
+
+        checksum = yield from wait_run_in_executor(md5sum, path)
+        images = None
+        if not force:
+            images = yield from self._compute_images(compute, node_type)
+            if images is not None and filename in images:
+                if checksum is not None and images[filename] == checksum:
+                    return True
+                # an image with the same name but another content, maybe in another directory
+                log.warning("Image {} on compute {} is different from the image on the controller".format(filename, compute.id))
+
+        self._controller.notification.emit("log.info", {"message": "Uploading missing image {}".format(filename)})
+        url = "/{}/images/{}".format(node_type, filename)
+        if checksum:
+            url += "?md5sum={}".format(checksum)
+        try:
+            with open(path, "rb") as f:
+                yield from compute.post(url, data=f, timeout=None)
+        except OSError as e:
+            raise aiohttp.web.HTTPConflict(text="Can't upload {}: {}".format(path, str(e)))
+        if images is not None:
+            images[filename] = checksum
+        self._controller.notification.emit("log.info", {"message": "Upload finished for {}".format(filename)})
+        return True
+
+    @asyncio.coroutine
+    def prestage(self, nodes):
+        """
+        Sends the images used by nodes to their computes before the nodes
+        are created. The errors are only logged: the node creation reports
+        them.
+
+        :param nodes: List of (compute, node_type, properties)
+        """
+
+        transfers = set()
+        for compute, node_type, properties in nodes:
+            if compute is None or not properties:
+                continue
+            for prop in IMAGE_PROPERTIES.get(node_type, ()):
+                image = properties.get(prop)
+                if image:
+                    transfers.add((compute, node_type, image))
+        if not transfers:
+            return
+
+        results = yield from asyncio.gather(*[self.ensure(compute, node_type, image) for compute, node_type, image in transfers], return_exceptions=True)
+        for (compute, node_type, image), result in zip(transfers, results):
+            if isinstance(result, Exception):
+                log.warning("Could not send image {} to compute {}: {}".format(image, compute.id, result))
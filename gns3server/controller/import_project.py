@@ -23,9 +23,9 @@ import shutil
 import asyncio
 import zipfile
 import aiohttp
-import itertools
 
 from .topology import load_topology
+from .placement import Placement
 
 
 """
@@ -117,10 +117,10 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
                         if node["node_type"] in ("docker", "qemu", "iou", "nat"):
                             node["compute_id"] = "vm"
                 else:
-                    # Round-robin through available compute resources.
-                    compute_nodes = itertools.cycle(controller.computes)
+                    # Spread the nodes on the least loaded computes, keeping linked nodes together
+                    placement = yield from Placement(controller).place(topology["topology"]["nodes"], topology["topology"]["links"])
                     for node in topology["topology"]["nodes"]:
-                        node["compute_id"] = next(compute_nodes)
+                        node["compute_id"] = placement.get(node["node_id"], node["compute_id"])
 
             compute_created = set()
             for node in topology["topology"]["nodes"]:
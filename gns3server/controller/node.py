@@ -25,7 +25,6 @@ import os
 
 from .compute import ComputeConflict, ComputeError
 from .ports.port_factory import PortFactory, StandardPortFactory, DynamipsPortFactory
-from ..utils.images import images_directories
 from ..utils.qt import qt_font_to_style
 
 
@@ -68,6 +67,7 @@ class Node:
         self._console_type = None
         self._properties = None
         self._command_line = None
+        self._resource_usage = None
         self._node_directory = None
         self._status = "stopped"
         self._x = 0
@@ -397,6 +397,8 @@ class Node:
                 self._node_directory = value
             elif key == "command_line":
                 self._command_line = value
+            elif key == "resource_usage":
+                self._resource_usage = value
             elif key == "status":
                 self._status = value
             elif key == "console_type":
@@ -542,20 +544,11 @@ class Node:
     def _upload_missing_image(self, type, img):
         """
         Search an image on local computer and upload it to remote compute
-        if the image exists
+        if the image exists. The compute has reported the image missing, it's
+        sent even if the list of the compute images contains it.
         """
-        for directory in images_directories(type):
-            image = os.path.join(directory, img)
-            if os.path.exists(image):
-                self.project.controller.notification.emit("log.info", {"message": "Uploading missing image {}".format(img)})
-                try:
-                    with open(image, 'rb') as f:
-                        yield from self._compute.post("/{}/images/{}".format(self._node_type, os.path.basename(img)), data=f, timeout=None)
-                except OSError as e:
-                    raise aiohttp.web.HTTPConflict(text="Can't upload {}: {}".format(image, str(e)))
-                self.project.controller.notification.emit("log.info", {"message": "Upload finished for {}".format(img)})
-                return True
-        return False
+
+        return (yield from self.project.controller.image_distribution.ensure(self._compute, type, img, force=True))
 
     @asyncio.coroutine
     def dynamips_auto_idlepc(self):
@@ -640,9 +633,10 @@ class Node:
             return False
         return self.id == other.id and other.project.id == self.project.id
 
-    def __json__(self, topology_dump=False):
+    def __json__(self, topology_dump=False, fields=None):
         """
         :param topology_dump: Filter to keep only properties require for saving on disk
+        :param fields: Fields required by the caller, the ports are built only if they are required (all by default)
         """
         if topology_dump:
             return {
@@ -664,7 +658,7 @@ class Node:
                 "port_segment_size": self._port_segment_size,
                 "first_port_name": self._first_port_name
             }
-        return {
+        answer = {
             "compute_id": str(self._compute.id),
             "project_id": self._project.id,
             "node_id": self._id,
@@ -675,6 +669,7 @@ class Node:
             "console_host": str(self._compute.console_host),
             "console_type": self._console_type,
             "command_line": self._command_line,
+            "resource_usage": self._resource_usage,
             "properties": self._properties,
             "status": self._status,
             "label": self._label,
@@ -686,6 +681,8 @@ class Node:
             "symbol": self._symbol,
             "port_name_format": self._port_name_format,
             "port_segment_size": self._port_segment_size,
-            "first_port_name": self._first_port_name,
-            "ports": [port.__json__() for port in self.ports]
+            "first_port_name": self._first_port_name
         }
+        if fields is None or "ports" in fields:
+            answer["ports"] = [port.__json__() for port in self.ports]
+        return answer
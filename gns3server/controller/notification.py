@@ -16,12 +16,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import aiohttp
 import asyncio
 from contextlib import contextmanager
 
 from ..notification_queue import NotificationQueue
 
+# Objects with a version in the delta notifications (kind => id field),
+# their updates are sent as the changed fields to the clients using the
+# delta mode
+VERSIONED_OBJECTS = {"node": "node_id", "link": "link_id"}
+
 
 class Notification:
     """
@@ -31,19 +37,76 @@ class Notification:
     def __init__(self, controller):
         self._controller = controller
         self._listeners = {}
+        # Last state sent to the clients using the delta mode
+        # project_id => {object_id => (version, {field: JSON of the value})}
+        self._states = {}
 
     @contextmanager
-    def queue(self, project):
+    def queue(self, project, delta=False):
         """
         Get a queue of notifications
 
         Use it with Python with
+
+        :param delta: The updates of the nodes and links are sent as the changed fields,
+        the queue starts with the complete state of the project
         """
-        queue = NotificationQueue()
+        queue = NotificationQueue(delta=delta)
         self._listeners.setdefault(project.id, set())
         self._listeners[project.id].add(queue)
-        yield queue
-        self._listeners[project.id].remove(queue)
+        if delta:
+            self.resync(project, queue)
+        try:
+            yield queue
+        finally:
+            self._listeners[project.id].remove(queue)
+            if not self._has_delta_listeners(project.id):
+                self._states.pop(project.id, None)
+
+    def _has_delta_listeners(self, project_id):
+
+        return any(listener.delta for listener in self._listeners.get(project_id, ()))
+
+    def resync(self, project, queue):
+        """
+        Sends the complete state of the nodes and links to a client using the
+        delta mode, when it connects or when it has missed an update.
+        """
+
+        for kind, objects in (("node", project.nodes), ("link", project.links)):
+            for obj in list(objects.values()):
+                event = obj.__json__()
+                version, changes = self._update_state(kind, event)
+                if changes:
+                    # the object has changed without notification, the other clients get the change too
+                    self._send_delta(event["project_id"], kind + ".updated", changes, version, exclude=queue)
+                queue.put_nowait((kind + ".updated", event, {"version": version}))
+
+    def _update_state(self, kind, event):
+        """
+        Records the state of an object sent to the clients.
+
+        :returns: Tuple (version, changed fields or None if nothing has changed)
+        """
+
+        id_field = VERSIONED_OBJECTS[kind]
+        states = self._states.setdefault(event["project_id"], {})
+        previous_version, previous = states.get(event[id_field], (0, {}))
+        state = {field: json.dumps(value, sort_keys=True) for field, value in event.items()}
+        changes = {field: event[field] for field, value in state.items() if previous.get(field) != value}
+        if not changes:
+            return previous_version, None
+        # the ids are always sent to identify the object
+        changes["project_id"] = event["project_id"]
+        changes[id_field] = event[id_field]
+        states[event[id_field]] = (previous_version + 1, state)
+        return previous_version + 1, changes
+
+    def _send_delta(self, project_id, action, changes, version, exclude=None):
+
+        for listener in self._listeners.get(project_id, ()):
+            if listener.delta and listener is not exclude:
+                listener.put_nowait((action, changes, {"version": version, "delta": True}))
 
     def project_has_listeners(self, project):
         """
@@ -116,6 +179,25 @@ class Notification:
             project_listeners = self._listeners[project_id]
         except KeyError:
             return
+
+        kind, _, operation = action.partition(".")
+        if kind in VERSIONED_OBJECTS and self._has_delta_listeners(project_id):
+            if operation == "deleted":
+                self._states.get(project_id, {}).pop(event.get(VERSIONED_OBJECTS[kind]), None)
+            elif operation in ("created", "updated") and VERSIONED_OBJECTS[kind] in event:
+                # the changes are computed once for all the clients
+                version, changes = self._update_state(kind, event)
+                for listener in project_listeners:
+                    if not listener.delta:
+                        listener.put_nowait((action, event, {}))
+                    elif changes and operation == "updated":
+                        listener.put_nowait((action, changes, {"version": version, "delta": True}))
+                    elif changes:
+                        listener.put_nowait((action, event, {"version": version}))
+                return
+        elif action == "project.closed":
+            self._states.pop(project_id, None)
+
         for listener in project_listeners:
             listener.put_nowait((action, event, {}))
 
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import asyncio
+import aiohttp
+
+from .controller_error import ControllerError
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Weight of each criteria in the score of a compute, the lowest score wins
+CPU_WEIGHT = 1.0
+MEMORY_WEIGHT = 2.0
+MEMORY_OVERCOMMIT_PENALTY = 10.0
+MISSING_IMAGE_WEIGHT = 3.0
+REMOTE_LINK_WEIGHT = 1.5
+SPREAD_WEIGHT = 0.01
+
+# Node properties referencing images which have to exist on the compute
+IMAGE_PROPERTIES = {
+    "qemu": ("hda_disk_image", "hdb_disk_image", "hdc_disk_image", "hdd_disk_image",
+             "cdrom_image", "initrd", "kernel_image", "bios_image"),
+    "iou": ("path",),
+    "dynamips": ("image",)
+}
+
+
+def _number(value):
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+class Placement:
+
+    """
+    Chooses on which compute nodes should run, from the load reported
+    by the computes in their pings, the RAM declared by the nodes,
+    the images already present on the computes and the links between
+    the nodes: linked nodes are kept on the same compute to avoid
+    UDP tunnels between hosts.
+
+    :param controller: Controller instance
+    :param computes: Candidate computes, all the connected computes by default
+    """
+
+    def __init__(self, controller, computes=None):
+
+        self._controller = controller
+        if computes is None:
+            self._computes = [(compute_id, compute) for compute_id, compute in controller.computes.items() if compute.connected]
+        else:
+            self._computes = [(compute.id, compute) for compute in computes]
+        self._images = {}
+        self._pending_ram = {compute_id: 0 for compute_id, _ in self._computes}
+        self._assigned = {compute_id: 0 for compute_id, _ in self._computes}
+        self._placement = {}
+
+    @staticmethod
+    def node_images(node):
+        """
+        :param node: Node settings (dictionary with node_type and properties)
+        :returns: Set of the image filenames used by the node
+        """
+
+        properties = node.get("properties") or {}
+        images = set()
+        for prop in IMAGE_PROPERTIES.get(node.get("node_type"), ()):
+            image = properties.get(prop)
+            if image:
+                images.add(os.path.basename(image))
+        return images
+
+    @staticmethod
+    def node_ram(node):
+        """
+        :param node: Node settings
+        :returns: RAM declared by the node in MB
+        """
+
+        properties = node.get("properties") or {}
+        return _number(properties.get("ram")) or 0
+
+    @asyncio.coroutine
+    def _compute_images(self, compute_id, compute, node_type):
+        """
+        Images available on a compute, asked only once per node type.
+        """
+
+        key = (compute_id, node_type)
+        if key not in self._images:
+            try:
+                response = yield from compute.http_query("GET", "/{}/images".format(node_type), timeout=30)
+                self._images[key] = set(image["filename"] for image in response.json)
+            except (ControllerError, aiohttp.web.HTTPException, aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError) as e:
+                log.debug("Could not list {} images on compute {}: {}".format(node_type, compute_id, e))
+                self._images[key] = None
+        return self._images[key]
+
+    def _supports(self, compute, node_type):
+
+        capabilities = compute.capabilities
+        node_types = capabilities.get("node_types") if isinstance(capabilities, dict) else None
+        if not node_types:
+            # capabilities not received yet
+            return True
+        return node_type in node_types
+
+    def _memory_load(self, compute_id, compute, ram):
+        """
+        Fraction of the compute memory used once the node is placed on it.
+        """
+
+        reservations = compute.memory_reservations
+        if isinstance(reservations, dict) and _number(reservations.get("capacity")):
+            reserved = (_number(reservations.get("reserved")) or 0) + self._pending_ram[compute_id] + ram
+            return reserved / reservations["capacity"]
+        memory_usage = _number(compute.memory_usage_percent)
+        if memory_usage is not None:
+            return memory_usage / 100
+        return 0
+
+    @asyncio.coroutine
+    def score(self, compute_id, compute, node, neighbors):
+        """
+        Scores a compute for a node, the lower the better.
+
+        :param compute_id: Compute identifier
+        :param compute: Compute instance
+        :param node: Node settings
+        :param neighbors: Node IDs linked to the node
+        :returns: tuple (score, reasons)
+        """
+
+        score = 0
+        reasons = []
+
+        cpu_usage = _number(compute.cpu_usage_percent)
+        if cpu_usage is not None:
+            score += CPU_WEIGHT * cpu_usage / 100
+            reasons.append("cpu {}%".format(cpu_usage))
+
+        memory_load = self._memory_load(compute_id, compute, self.node_ram(node))
+        score += MEMORY_WEIGHT * memory_load
+        if memory_load > 1:
+            score += MEMORY_OVERCOMMIT_PENALTY
+            reasons.append("not enough RAM")
+
+        images = self.node_images(node)
+        if images:
+            available = yield from self._compute_images(compute_id, compute, node["node_type"])
+            if available is not None:
+                missing = images - available
+                if missing:
+                    score += MISSING_IMAGE_WEIGHT * len(missing) / len(images)
+                    reasons.append("missing images: {}".format(", ".join(sorted(missing))))
+
+        placed_neighbors = [self._placement[neighbor] for neighbor in neighbors if neighbor in self._placement]
+        if placed_neighbors:
+            remote = len([neighbor_compute_id for neighbor_compute_id in placed_neighbors if neighbor_compute_id != compute_id])
+            score += REMOTE_LINK_WEIGHT * remote / len(placed_neighbors)
+            if remote:
+                reasons.append("{} links to other computes".format(remote))
+
+        score += SPREAD_WEIGHT * self._assigned[compute_id]
+        return score, reasons
+
+    def _assign(self, node, compute_id):
+
+        self._placement[node["node_id"]] = compute_id
+        if compute_id in self._assigned:
+            self._assigned[compute_id] += 1
+            self._pending_ram[compute_id] += self.node_ram(node)
+
+    @staticmethod
+    def _neighbors(nodes, links):
+
+        neighbors = {node["node_id"]: [] for node in nodes}
+        for link in links:
+            link_nodes = [link_node["node_id"] for link_node in link.get("nodes", [])]
+            for node_id in link_nodes:
+                if node_id in neighbors:
+                    neighbors[node_id].extend(other for other in link_nodes if other != node_id)
+        return neighbors
+
+    @asyncio.coroutine
+    def place(self, nodes, links=(), fixed=None):
+        """
+        Chooses a compute for each node.
+
+        :param nodes: List of node settings (node_id, node_type and properties)
+        :param links: List of links (with the node_id of their nodes)
+        :param fixed: Dictionary node ID => compute ID of the nodes which don't move
+        :returns: Dictionary node ID => compute ID. Nodes without
+        compute able to run them are not in the dictionary
+        """
+
+        neighbors = self._neighbors(nodes, links)
+        if fixed:
+            for node in nodes:
+                if node["node_id"] in fixed:
+                    self._assign(node, fixed[node["node_id"]])
+
+        # the most linked nodes are placed first, their neighbors follow them
+        to_place = [node for node in nodes if node["node_id"] not in self._placement]
+        to_place.sort(key=lambda node: len(neighbors[node["node_id"]]), reverse=True)
+
+        placement = {}
+        for node in to_place:
+            best = None
+            for compute_id, compute in self._computes:
+                if not self._supports(compute, node.get("node_type")):
+                    continue
+                score, _ = yield from self.score(compute_id, compute, node, neighbors[node["node_id"]])
+                if best is None or score < best[0]:
+                    best = (score, compute_id)
+            if best is None:
+                log.warning("No compute can run node {} of type {}".format(node.get("name", node["node_id"]), node.get("node_type")))
+                continue
+            self._assign(node, best[1])
+            placement[node["node_id"]] = best[1]
+        return placement
+
+    @staticmethod
+    def _project_topology(project):
+
+        nodes = []
+        for node in project.nodes.values():
+            nodes.append({"node_id": node.id,
+                          "name": node.name,
+                          "node_type": node.node_type,
+                          "properties": node.properties,
+                          "compute_id": node.compute.id,
+                          "status": node.status})
+        links = []
+        for link in project.links.values():
+            links.append({"nodes": [{"node_id": node.id} for node in link.nodes]})
+        return nodes, links
+
+    @staticmethod
+    def _cross_compute_links(links, placement):
+
+        count = 0
+        for link in links:
+            computes = set(placement.get(link_node["node_id"]) for link_node in link["nodes"])
+            if len(computes) > 1:
+                count += 1
+        return count
+
+    @asyncio.coroutine
+    def rebalance(self, project):
+        """
+        Suggests moves of the nodes of a project to balance the load
+        of the computes and reduce the links between computes.
+        Nothing is moved.
+
+        :param project: Project instance
+        :returns: Dictionary with the suggested moves
+        """
+
+        nodes, links = self._project_topology(project)
+        # the RAM of the started nodes is already reserved on their current compute
+        for node in nodes:
+            if node["status"] == "started" and node["compute_id"] in self._pending_ram:
+                self._pending_ram[node["compute_id"]] -= self.node_ram(node)
+
+        placement = yield from self.place(nodes, links)
+        current = {node["node_id"]: node["compute_id"] for node in nodes}
+        moves = []
+        for node in nodes:
+            suggested = placement.get(node["node_id"])
+            if suggested is not None and suggested != node["compute_id"]:
+                moves.append({"node_id": node["node_id"],
+                              "name": node["name"],
+                              "compute_id": node["compute_id"],
+                              "suggested_compute_id": suggested})
+        suggested = dict(current)
+        suggested.update(placement)
+        return {"moves": moves,
+                "cross_compute_links": self._cross_compute_links(links, current),
+                "suggested_cross_compute_links": self._cross_compute_links(links, suggested)}
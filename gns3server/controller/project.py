@@ -33,6 +33,7 @@ from .snapshot import Snapshot
 from .drawing import Drawing
 from .topology import project_to_topology, load_topology
 from .udp_link import UDPLink
+from .placement import Placement
 from ..config import Config
 from ..utils.path import check_path_allowed, get_default_project_directory
 from ..utils.asyncio.pool import Pool
@@ -137,6 +138,8 @@ class Project:
         Called when open/close a project. Cleanup internal stuff
         """
         self._allocated_node_names = set()
+        # next number to try for each node name template
+        self._node_name_numbers = {}
         self._nodes = {}
         self._links = {}
         self._drawings = {}
@@ -355,6 +358,8 @@ class Project:
 
         if name in self._allocated_node_names:
             self._allocated_node_names.remove(name)
+            # the freed name must be found again
+            self._node_name_numbers.clear()
 
     def update_allocated_node_name(self, base_name):
         """
@@ -372,7 +377,7 @@ class Project:
 
         if '{0}' in base_name or '{id}' in base_name:
             # base name is a template, replace {0} or {id} by an unique identifier
-            for number in range(1, 1000000):
+            for number in range(self._node_name_numbers.get(base_name, 1), 1000000):
                 try:
                     name = base_name.format(number, id=number, name="Node")
                 except KeyError as e:
@@ -381,16 +386,18 @@ class Project:
                     raise aiohttp.web.HTTPConflict(text="{} is not a valid replacement string in the node name".format(base_name))
                 if name not in self._allocated_node_names:
                     self._allocated_node_names.add(name)
+                    self._node_name_numbers[base_name] = number + 1
                     return name
         else:
             if base_name not in self._allocated_node_names:
                 self._allocated_node_names.add(base_name)
                 return base_name
             # base name is not unique, let's find a unique name by appending a number
-            for number in range(1, 1000000):
+            for number in range(self._node_name_numbers.get(base_name, 1), 1000000):
                 name = base_name + str(number)
                 if name not in self._allocated_node_names:
                     self._allocated_node_names.add(name)
+                    self._node_name_numbers[base_name] = number + 1
                     return name
         raise aiohttp.web.HTTPConflict(text="A node name could not be allocated (node limit reached?)")
 
@@ -401,12 +408,13 @@ class Project:
             return self.update_allocated_node_name(new_name)
         return new_name
 
-    @open_required
-    @asyncio.coroutine
-    def add_node_from_appliance(self, appliance_id, x=0, y=0, compute_id=None):
+    def _appliance_node_settings(self, appliance_id, x, y, compute_id):
         """
-        Create a node from an appliance
+        Settings of a node created from an appliance
+
+        :returns: dictionary with the node_id, node_type, name, compute_id and the node properties in template
         """
+
         try:
             template = self.controller.appliances[appliance_id].data
         except KeyError:
@@ -416,28 +424,136 @@ class Project:
         template["x"] = x
         template["y"] = y
         node_type = template.pop("node_type")
-        compute = self.controller.get_compute(template.pop("server", compute_id))
+        compute_id = template.pop("server", compute_id)
         name = template.pop("name")
         default_name_format = template.pop("default_name_format", "{name}-{0}")
-        name = default_name_format.replace("{name}", name)
-        node_id = str(uuid.uuid4())
-        node = yield from self.add_node(compute, name, node_id, node_type=node_type, **template)
+        properties = dict(template)
+        properties.update(template.get("properties", {}))
+        return {"node_id": str(uuid.uuid4()),
+                "node_type": node_type,
+                "name": default_name_format.replace("{name}", name),
+                "compute_id": compute_id,
+                "properties": properties,
+                "template": template}
+
+    @open_required
+    @asyncio.coroutine
+    def add_node_from_appliance(self, appliance_id, x=0, y=0, compute_id=None):
+        """
+        Create a node from an appliance
+        """
+
+        settings = self._appliance_node_settings(appliance_id, x, y, compute_id)
+        node_id = settings["node_id"]
+        node_type = settings["node_type"]
+        compute_id = settings["compute_id"]
+        if compute_id is None:
+            # no compute chosen by the user, we take the least loaded
+            placement = yield from Placement(self.controller).place([settings])
+            if node_id not in placement:
+                raise aiohttp.web.HTTPConflict(text="No compute available to run a {} node".format(node_type))
+            compute_id = placement[node_id]
+        compute = self.controller.get_compute(compute_id)
+        node = yield from self.add_node(compute, settings["name"], node_id, node_type=node_type, **settings["template"])
         return node
 
     @open_required
     @asyncio.coroutine
-    def add_node(self, compute, name, node_id, dump=True, node_type=None, **kwargs):
+    def add_nodes_from_appliances(self, nodes, compute_concurrency=4):
         """
-        Create a node or return an existing node
+        Create several nodes from appliances. The names are allocated in the
+        order of the list, the nodes are created concurrently on their
+        computes and the topology is saved once.
 
-        :param dump: Dump topology to disk
-        :param kwargs: See the documentation of node
+        :param nodes: List of dictionaries with appliance_id, x, y and optionally compute_id
+        :param compute_concurrency: Maximum number of nodes created at the same time on a compute
+        :returns: List of results, in the order of the nodes, with the created node
+        or the status and message of the error
         """
 
-        if node_id in self._nodes:
-            return self._nodes[node_id]
+        results = [{"appliance_id": node["appliance_id"]} for node in nodes]
+        settings = {}
+        for index, node in enumerate(nodes):
+            try:
+                settings[index] = self._appliance_node_settings(node["appliance_id"], node["x"], node["y"], node.get("compute_id"))
+            except aiohttp.web.HTTPException as e:
+                results[index].update({"status": e.status, "message": e.text})
+
+        # all the nodes without compute are placed together to spread them on the computes
+        to_place = [node_settings for node_settings in settings.values() if node_settings["compute_id"] is None]
+        if to_place:
+            placement = yield from Placement(self.controller).place(to_place)
+            for node_settings in to_place:
+                node_settings["compute_id"] = placement.get(node_settings["node_id"])
+
+        # the nodes are instantiated in order to allocate their names in one pass
+        created = {}
+        for index, node_settings in sorted(settings.items()):
+            try:
+                if node_settings["compute_id"] is None:
+                    raise aiohttp.web.HTTPConflict(text="No compute available to run a {} node".format(node_settings["node_type"]))
+                compute = self.controller.get_compute(node_settings["compute_id"])
+                created[index] = Node(self, compute, node_settings["name"], node_id=node_settings["node_id"],
+                                      node_type=node_settings["node_type"], **node_settings["template"])
+            except aiohttp.web.HTTPException as e:
+                results[index].update({"status": e.status, "message": e.text})
+
+        total = len(nodes)
+        progress = {"done": total - len(created), "failed": total - len(created)}
+
+        def failed(index, node, e):
+            log.error("Could not create node {}: {}".format(node.name, e))
+            self.remove_allocated_node_name(node.name)
+            results[index].update({"status": getattr(e, "status", 409), "message": getattr(e, "text", None) or str(e)})
+            progress["failed"] += 1
+
+        def notify_progress():
+            self.controller.notification.emit("project.nodes_creation", {"project_id": self._id,
+                                                                          "total": total,
+                                                                          "done": progress["done"],
+                                                                          "failed": progress["failed"]})
+
+        @asyncio.coroutine
+        def create(index, node):
+            try:
+                yield from node.create()
+            except (ComputeError, aiohttp.web.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                failed(index, node, e)
+            else:
+                self._nodes[node.id] = node
+                self.controller.notification.emit("node.created", node.__json__())
+                results[index].update({"status": 201, "node": node.__json__()})
+            progress["done"] += 1
+            notify_progress()
+
+        pools = {}
+        for index, node in created.items():
+            pools.setdefault(node.compute, Pool(concurrency=compute_concurrency)).append(create, index, node)
+
+        @asyncio.coroutine
+        def create_on_compute(compute, pool):
+            try:
+                yield from self._create_project_on_compute(compute)
+            except (ComputeError, aiohttp.web.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                for index, node in created.items():
+                    if node.compute is compute:
+                        failed(index, node, e)
+                        progress["done"] += 1
+                notify_progress()
+                return
+            yield from pool.join()
+
+        yield from asyncio.gather(*[create_on_compute(compute, pool) for compute, pool in pools.items()])
+        if any("node" in result for result in results):
+            self.dump()
+        return results
+
+    @asyncio.coroutine
+    def _create_project_on_compute(self, compute):
+        """
+        Create the project on a compute, if it's not already done
+        """
 
-        node = Node(self, compute, name, node_id=node_id, node_type=node_type, **kwargs)
         if compute not in self._project_created_on_compute:
             # For a local server we send the project path
             if compute.id == "local":
@@ -453,6 +569,22 @@ class Project:
                 })
 
             self._project_created_on_compute.add(compute)
+
+    @open_required
+    @asyncio.coroutine
+    def add_node(self, compute, name, node_id, dump=True, node_type=None, **kwargs):
+        """
+        Create a node or return an existing node
+
+        :param dump: Dump topology to disk
+        :param kwargs: See the documentation of node
+        """
+
+        if node_id in self._nodes:
+            return self._nodes[node_id]
+
+        node = Node(self, compute, name, node_id=node_id, node_type=node_type, **kwargs)
+        yield from self._create_project_on_compute(compute)
         yield from node.create()
         self._nodes[node.id] = node
         self.controller.notification.emit("node.created", node.__json__())
@@ -625,6 +757,7 @@ class Project:
 
             os.makedirs(os.path.join(self.path, "snapshots"), exist_ok=True)
 
+            yield from self.save_configs()
             with tempfile.TemporaryDirectory() as tmpdir:
                 zipstream = yield from export_project(self, tmpdir, keep_compute_id=True, allow_all_nodes=True)
                 try:
@@ -646,8 +779,28 @@ class Project:
         del self._snapshots[snapshot.id]
         os.remove(snapshot.path)
 
+    @asyncio.coroutine
+    def save_configs(self):
+        """
+        Save the configs of the nodes on all the computes
+        """
+
+        pool = Pool(concurrency=3)
+        for compute in list(self._project_created_on_compute):
+            pool.append(self._save_configs_on_compute, compute)
+        yield from pool.join()
+
+    @asyncio.coroutine
+    def _save_configs_on_compute(self, compute):
+        try:
+            yield from compute.post("/projects/{}/configs/save".format(self._id), dont_connect=True)
+        # The configs are saved again when the nodes stop
+        except (ComputeError, aiohttp.web.HTTPError, aiohttp.ClientResponseError, TimeoutError) as e:
+            log.warning("Could not save the configs on compute {}: {}".format(compute.id, e))
+
     @asyncio.coroutine
     def close(self, ignore_notification=False):
+        yield from self.save_configs()
         yield from self.stop_all()
         for compute in list(self._project_created_on_compute):
             try:
@@ -771,6 +924,10 @@ class Project:
             topology = project_data["topology"]
             for compute in topology.get("computes", []):
                 yield from self.controller.add_compute(**compute)
+
+            # the images are sent to the computes before creating the nodes
+            yield from self.controller.image_distribution.prestage([(self.controller.computes.get(node.get("compute_id")), node.get("node_type"), node.get("properties"))
+                                                                     for node in topology.get("nodes", [])])
             for node in topology.get("nodes", []):
                 compute = self.controller.get_compute(node.pop("compute_id"))
                 name = node.pop("name")
@@ -903,11 +1060,27 @@ class Project:
         """
         Start all nodes
         """
+        yield from self._warmup_ghosts()
         pool = Pool(concurrency=3)
         for node in self.nodes.values():
             pool.append(node.start)
         yield from pool.join()
 
+    @asyncio.coroutine
+    def _warmup_ghosts(self):
+        """
+        Ask the computes running Dynamips routers to build the
+        ghost IOS files before the routers are started
+        """
+
+        computes = set(node.compute for node in self.nodes.values() if node.node_type == "dynamips")
+        if not computes:
+            return
+        tasks = [compute.post("/projects/{}/dynamips/ghosts/warmup".format(self._id), timeout=None) for compute in computes]
+        for result in (yield from asyncio.gather(*tasks, return_exceptions=True)):
+            if isinstance(result, Exception):
+                log.warning("Could not build the ghost IOS files: {}".format(result))
+
     @asyncio.coroutine
     def stop_all(self):
         """
@@ -29,10 +29,8 @@ class Symbols:
     """
 
     def __init__(self):
-        try:
-            self.list()
-        except OSError:  # The error will be raised and forward later
-            pass
+        # The symbols are listed when they are requested for the first time
+        self._symbols_path = {}
         # Keep a cache of symbols size
         self._symbol_size_cache = {}
 
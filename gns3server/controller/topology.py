@@ -31,7 +31,6 @@ from ..version import __version__
 from ..schemas.topology import TOPOLOGY_SCHEMA
 from ..schemas import dynamips_vm
 from ..utils.qt import qt_font_to_style
-from ..compute.dynamips import PLATFORMS_DEFAULT_RAM
 
 import logging
 log = logging.getLogger(__name__)
@@ -378,6 +377,7 @@ def _convert_1_3_later(topo, topo_path):
                 if node["properties"]["platform"].startswith("c36"):
                     node["properties"]["platform"] = "c3600"
             if "ram" not in node["properties"] and old_node["type"].startswith("C"):
+                from ..compute.dynamips import PLATFORMS_DEFAULT_RAM
                 node["properties"]["ram"] = PLATFORMS_DEFAULT_RAM[old_node["type"].lower()]
         elif old_node["type"] == "VMwareVM":
             node["node_type"] = "vmware"
@@ -15,8 +15,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from gns3server.handlers.index_handler import IndexHandler
+"""
+The routes of the handlers are registered when their module is imported,
+only the API of the enabled server parts is loaded.
+"""
 
 
-from gns3server.handlers.api.controller import *
-from gns3server.handlers.api.compute import *
+def load_handlers(controller=True, compute=True):
+    """
+    Imports the handlers.
+
+    :param controller: Load the controller API
+    :param compute: Load the compute API
+    """
+
+    import gns3server.handlers.index_handler
+    if controller:
+        import gns3server.handlers.api.controller
+    if compute:
+        import gns3server.handlers.api.compute
@@ -21,7 +21,10 @@ from gns3server.web.route import Route
 from gns3server.config import Config
 from gns3server.schemas.capabilities import CAPABILITIES_SCHEMA
 from gns3server.version import __version__
-from gns3server.compute import MODULES
+from gns3server.compute import get_modules
+from gns3server.compute.probe_cache import ProbeCache
+from gns3server.compute.memory_ledger import MemoryLedger
+from gns3server.utils.encoding import ENCODINGS
 from aiohttp.web import HTTPConflict
 
 
@@ -34,11 +37,14 @@ class CapabilitiesHandler:
     def get(request, response):
 
         node_types = []
-        for module in MODULES:
+        for module in get_modules():
             node_types.extend(module.node_types())
 
         response.json({
             "version": __version__,
             "platform": sys.platform,
-            "node_types": node_types
+            "node_types": node_types,
+            "probes": ProbeCache.instance().facts(),
+            "memory": MemoryLedger.instance().__json__(),
+            "encodings": ENCODINGS
         })
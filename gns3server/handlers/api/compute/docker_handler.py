@@ -387,3 +387,13 @@ class DockerHandler:
         docker_manager = Docker.instance()
         images = yield from docker_manager.list_images()
         response.json(images)
+
+    @Route.get(
+        r"/docker/latencies",
+        status_codes={
+            200: "Success",
+        },
+        description="Get statistics about the duration of the recent container starts and stops")
+    def latencies(request, response):
+        docker_manager = Docker.instance()
+        response.json(docker_manager.latencies())
@@ -19,7 +19,9 @@ import os
 import sys
 import aiohttp
 
+from gns3server.compute.image_upload import upload_parameters
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.schemas.nio import NIO_SCHEMA
 from gns3server.compute.dynamips import Dynamips
 from gns3server.compute.dynamips.dynamips_error import DynamipsError
@@ -33,7 +35,8 @@ from gns3server.schemas.node import (
 from gns3server.schemas.dynamips_vm import (
     VM_CREATE_SCHEMA,
     VM_UPDATE_SCHEMA,
-    VM_OBJECT_SCHEMA
+    VM_OBJECT_SCHEMA,
+    IDLEPC_PRECOMPUTE_SCHEMA
 )
 
 DEFAULT_CHASSIS = {
@@ -404,6 +407,8 @@ class DynamipsVMHandler:
         parameters={
             "project_id": "Project UUID",
             "node_id": "Node UUID",
+            "instances": "Number of routers probing the values concurrently (optional)",
+            "use_database": "1 to reuse an idle-pc value already validated for the image, 0 to probe again (default 1)"
         },
         status_codes={
             200: "Best Idle-pc value found",
@@ -413,25 +418,98 @@ class DynamipsVMHandler:
         description="Retrieve the idlepc proposals")
     def get_auto_idlepc(request, response):
 
+        try:
+            instances = int(request.query.get("instances", "0"))
+        except ValueError:
+            raise aiohttp.web.HTTPBadRequest(text="instances must be a positive integer")
+        if instances < 0:
+            raise aiohttp.web.HTTPBadRequest(text="instances must be a positive integer")
+        use_database = request.query.get("use_database", "1")
+        if use_database not in ("0", "1"):
+            raise aiohttp.web.HTTPBadRequest(text="use_database must be 0 or 1")
+        use_database = use_database == "1"
+
         dynamips_manager = Dynamips.instance()
         vm = dynamips_manager.get_node(request.match_info["node_id"], project_id=request.match_info["project_id"])
-        idlepc = yield from dynamips_manager.auto_idlepc(vm)
+        idlepc = yield from dynamips_manager.auto_idlepc(vm, instances=instances or None, use_database=use_database)
         response.set_status(200)
         response.json({"idlepc": idlepc})
 
+    @Route.post(
+        r"/projects/{project_id}/dynamips/ghosts/warmup",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Ghost files built",
+            404: "Project doesn't exist"
+        },
+        description="Build the ghost IOS files needed by the routers of a project before starting them")
+    def warmup_ghosts(request, response):
+
+        dynamips_manager = Dynamips.instance()
+        project = ProjectManager.instance().get_project(request.match_info["project_id"])
+        ghost_files = yield from dynamips_manager.warmup_ghosts(project)
+        response.set_status(200)
+        response.json(ghost_files)
+
+    @Route.get(
+        r"/dynamips/ghosts",
+        status_codes={
+            200: "List of ghost IOS files",
+        },
+        description="Retrieve the ghost IOS files shared by the routers")
+    def list_ghosts(request, response):
+
+        dynamips_manager = Dynamips.instance()
+        response.set_status(200)
+        response.json(dynamips_manager.ghosts())
+
+    @Route.get(
+        r"/dynamips/idlepc",
+        status_codes={
+            200: "Known idle-PC values",
+        },
+        description="Retrieve the idle-PC values already validated for IOS images")
+    def list_idlepcs(request, response):
+
+        dynamips_manager = Dynamips.instance()
+        response.set_status(200)
+        response.json(dynamips_manager.idlepc_database.entries())
+
+    @Route.post(
+        r"/dynamips/idlepc/precompute",
+        status_codes={
+            200: "Idle-PC values computed",
+            400: "Invalid request"
+        },
+        description="Find and store in advance the idle-PC values of IOS images",
+        input=IDLEPC_PRECOMPUTE_SCHEMA)
+    def precompute_idlepcs(request, response):
+
+        dynamips_manager = Dynamips.instance()
+        results = yield from dynamips_manager.precompute_idlepcs(images=request.json.get("images"),
+                                                                 instances=request.json.get("instances", 2),
+                                                                 concurrency=request.json.get("concurrency", 2))
+        response.set_status(200)
+        response.json(results)
+
     @Route.get(
         r"/dynamips/images",
         status_codes={
             200: "List of Dynamips IOS images",
+            400: "Invalid query parameters"
         },
-        description="Retrieve the list of Dynamips IOS images",
+        description="Retrieve the list of Dynamips IOS images. Query parameters: fields (comma separated), limit and cursor (filename)",
         output=NODE_LIST_IMAGES_SCHEMA)
     def list_images(request, response):
 
+        query = ListQuery(request.query, cursor_field="filename")
         dynamips_manager = Dynamips.instance()
-        images = yield from dynamips_manager.list_images()
+        # the checksums are computed only if they are requested
+        images = yield from dynamips_manager.list_images(checksums=query.wants("md5sum"))
         response.set_status(200)
-        response.json(images)
+        query.respond(response, images)
 
     @Route.post(
         r"/dynamips/images/{filename:.+}",
@@ -439,15 +517,22 @@ class DynamipsVMHandler:
             "filename": "Image filename"
         },
         status_codes={
+            200: "Part of the image uploaded",
             204: "Upload a Dynamips IOS image",
+            409: "Upload offset or checksum mismatch",
         },
         raw=True,
         description="Upload a Dynamips IOS image")
     def upload_image(request, response):
 
         dynamips_manager = Dynamips.instance()
-        yield from dynamips_manager.write_image(request.match_info["filename"], request.content)
-        response.set_status(204)
+        parameters = upload_parameters(request.query)
+        offset = yield from dynamips_manager.write_image(request.match_info["filename"], request.content, **parameters)
+        if parameters["complete"]:
+            response.set_status(204)
+        else:
+            response.json({"offset": offset})
+            response.set_status(200)
 
     @Route.get(
         r"/dynamips/images/{filename:.+}",
@@ -19,7 +19,9 @@ import os
 
 import aiohttp.web
 
+from gns3server.compute.image_upload import upload_parameters
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.schemas.nio import NIO_SCHEMA
 from gns3server.compute.iou import IOU
 
@@ -384,15 +386,18 @@ class IOUHandler:
         r"/iou/images",
         status_codes={
             200: "List of IOU images",
+            400: "Invalid query parameters"
         },
-        description="Retrieve the list of IOU images",
+        description="Retrieve the list of IOU images. Query parameters: fields (comma separated), limit and cursor (filename)",
         output=NODE_LIST_IMAGES_SCHEMA)
     def list_iou_images(request, response):
 
+        query = ListQuery(request.query, cursor_field="filename")
         iou_manager = IOU.instance()
-        images = yield from iou_manager.list_images()
+        # the checksums are computed only if they are requested
+        images = yield from iou_manager.list_images(checksums=query.wants("md5sum"))
         response.set_status(200)
-        response.json(images)
+        query.respond(response, images)
 
     @Route.post(
         r"/iou/images/{filename:.+}",
@@ -400,15 +405,22 @@ class IOUHandler:
             "filename": "Image filename"
         },
         status_codes={
+            200: "Part of the image uploaded",
             204: "Image uploaded",
+            409: "Upload offset or checksum mismatch",
         },
         raw=True,
         description="Upload an IOU image")
     def upload_image(request, response):
 
         iou_manager = IOU.instance()
-        yield from iou_manager.write_image(request.match_info["filename"], request.content)
-        response.set_status(204)
+        parameters = upload_parameters(request.query)
+        offset = yield from iou_manager.write_image(request.match_info["filename"], request.content, **parameters)
+        if parameters["complete"]:
+            response.set_status(204)
+        else:
+            response.json({"offset": offset})
+            response.set_status(200)
 
 
     @Route.get(
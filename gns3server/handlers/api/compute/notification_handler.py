@@ -20,6 +20,7 @@ import aiohttp
 from aiohttp.web import WebSocketResponse
 from gns3server.web.route import Route
 from gns3server.compute.notification_manager import NotificationManager
+from gns3server.utils.encoding import websocket_msgpack
 
 
 @asyncio.coroutine
@@ -37,7 +38,7 @@ class NotificationHandler:
 
     @Route.get(
         r"/notifications/ws",
-        description="Send notifications using Websockets")
+        description="Send notifications using Websockets, as binary msgpack messages with ?encoding=msgpack")
     def notifications(request, response):
         notifications = NotificationManager.instance()
         ws = WebSocketResponse()
@@ -45,13 +46,20 @@ class NotificationHandler:
 
         asyncio.async(process_websocket(ws))
 
+        use_msgpack = websocket_msgpack(request)
         with notifications.queue() as queue:
             while True:
                 try:
-                    notification = yield from queue.get_json(1)
+                    if use_msgpack:
+                        notification = yield from queue.get_msgpack(1)
+                    else:
+                        notification = yield from queue.get_json(1)
                 except asyncio.futures.CancelledError:
                     break
                 if ws.closed:
                     break
-                ws.send_str(notification)
+                if use_msgpack:
+                    ws.send_bytes(notification)
+                else:
+                    ws.send_str(notification)
         return ws
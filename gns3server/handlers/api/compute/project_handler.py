@@ -23,7 +23,6 @@ import tempfile
 
 from gns3server.web.route import Route
 from gns3server.compute.project_manager import ProjectManager
-from gns3server.compute import MODULES
 from gns3server.utils.ping_stats import PingStats
 
 from gns3server.schemas.project import (
@@ -120,6 +119,23 @@ class ProjectHandler:
             log.warning("Skip project closing, another client is listening for project notifications")
         response.set_status(204)
 
+    @Route.post(
+        r"/projects/{project_id}/configs/save",
+        description="Save the configs stored in the NVRAM of the nodes to the project files",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            204: "Configs saved",
+            404: "The project doesn't exist"
+        })
+    def save_configs(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        yield from project.save_configs()
+        response.set_status(204)
+
     @Route.delete(
         r"/projects/{project_id}",
         description="Delete a project from disk",
@@ -215,8 +231,10 @@ class ProjectHandler:
         },
         status_codes={
             200: "File returned",
+            206: "Requested range of the file returned",
             403: "Permission denied",
-            404: "The file doesn't exist"
+            404: "The file doesn't exist",
+            416: "Requested range not satisfiable"
         })
     def get_file(request, response):
 
@@ -230,23 +248,7 @@ class ProjectHandler:
             raise aiohttp.web.HTTPForbidden()
         path = os.path.join(project.path, path)
 
-        response.content_type = "application/octet-stream"
-        response.set_status(200)
-        response.enable_chunked_encoding()
-
-        try:
-            with open(path, "rb") as f:
-                yield from response.prepare(request)
-                while True:
-                    data = f.read(4096)
-                    if not data:
-                        break
-                    yield from response.write(data)
-
-        except FileNotFoundError:
-            raise aiohttp.web.HTTPNotFound()
-        except PermissionError:
-            raise aiohttp.web.HTTPForbidden()
+        yield from response.file(path, content_type="application/octet-stream")
 
     @Route.get(
         r"/projects/{project_id}/stream/{path:.+}",
@@ -272,22 +274,7 @@ class ProjectHandler:
         path = os.path.join(project.path, path)
 
         response.content_type = "application/octet-stream"
-        response.set_status(200)
-        response.enable_chunked_encoding()
-
-        try:
-            with open(path, "rb") as f:
-                yield from response.prepare(request)
-                while True:
-                    data = f.read(4096)
-                    if not data:
-                        yield from asyncio.sleep(0.1)
-                    yield from response.write(data)
-
-        except FileNotFoundError:
-            raise aiohttp.web.HTTPNotFound()
-        except PermissionError:
-            raise aiohttp.web.HTTPForbidden()
+        yield from response.stream(path)
 
     @Route.post(
         r"/projects/{project_id}/files/{path:.+}",
@@ -20,7 +20,9 @@ import os.path
 
 import aiohttp.web
 
+from gns3server.compute.image_upload import upload_parameters
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.compute.project_manager import ProjectManager
 from gns3server.schemas.nio import NIO_SCHEMA
 from gns3server.compute.qemu import Qemu
@@ -454,15 +456,18 @@ class QEMUHandler:
         r"/qemu/images",
         status_codes={
             200: "List of Qemu images",
+            400: "Invalid query parameters"
         },
-        description="Retrieve the list of Qemu images",
+        description="Retrieve the list of Qemu images. Query parameters: fields (comma separated), limit and cursor (filename)",
         output=NODE_LIST_IMAGES_SCHEMA)
     def list_qemu_images(request, response):
 
+        query = ListQuery(request.query, cursor_field="filename")
         qemu_manager = Qemu.instance()
-        images = yield from qemu_manager.list_images()
+        # the checksums are computed only if they are requested
+        images = yield from qemu_manager.list_images(checksums=query.wants("md5sum"))
         response.set_status(200)
-        response.json(images)
+        query.respond(response, images)
 
     @Route.post(
         r"/qemu/images/{filename:.+}",
@@ -470,15 +475,22 @@ class QEMUHandler:
             "filename": "Image filename"
         },
         status_codes={
+            200: "Part of the image uploaded",
             204: "Image uploaded",
+            409: "Upload offset or checksum mismatch",
         },
         raw=True,
         description="Upload Qemu image")
     def upload_image(request, response):
 
         qemu_manager = Qemu.instance()
-        yield from qemu_manager.write_image(request.match_info["filename"], request.content)
-        response.set_status(204)
+        parameters = upload_parameters(request.query)
+        offset = yield from qemu_manager.write_image(request.match_info["filename"], request.content, **parameters)
+        if parameters["complete"]:
+            response.set_status(204)
+        else:
+            response.json({"offset": offset})
+            response.set_status(200)
 
     @Route.get(
         r"/qemu/images/{filename:.+}",
@@ -23,10 +23,49 @@ from gns3server.web.route import Route
 from gns3server.config import Config
 from gns3server.schemas.version import VERSION_SCHEMA
 from gns3server.compute.port_manager import PortManager
+from gns3server.compute.notification_manager import NotificationManager
+from gns3server.compute import get_instantiated_managers
+from gns3server.utils.metrics import Metrics
+from gns3server.utils.asyncio.loop_watchdog import LoopWatchdog
 from gns3server.version import __version__
 from aiohttp.web import HTTPConflict
 
 
+def collect_compute_metrics():
+    """
+    Reads the state of the compute when the metrics are requested.
+    """
+
+    metrics = Metrics.instance()
+
+    listeners = NotificationManager.instance()._listeners
+    metrics.gauge("gns3_compute_notification_clients",
+                  "Number of clients listening to the notifications of the compute").set(len(listeners))
+    metrics.gauge("gns3_compute_notification_queue_size",
+                  "Number of notifications waiting to be sent to the clients of the compute").set(sum(queue.qsize() for queue in listeners))
+
+    ports = metrics.gauge("gns3_compute_ports_used",
+                          "Number of ports allocated by the compute", ("protocol",))
+    ports_available = metrics.gauge("gns3_compute_ports_available",
+                                    "Number of ports in the port ranges of the compute", ("protocol",))
+    port_manager = PortManager.instance()
+    for protocol, used, port_range in (("tcp", port_manager.tcp_ports, port_manager.console_port_range),
+                                       ("udp", port_manager.udp_ports, port_manager.udp_port_range)):
+        ports.set(len(used), protocol)
+        ports_available.set(port_range[1] - port_range[0] + 1, protocol)
+
+    nodes = metrics.gauge("gns3_compute_nodes",
+                          "Number of nodes on the compute", ("emulator", "status"))
+    nodes.clear()
+    # don't create the managers which have never been used
+    for manager in get_instantiated_managers():
+        for node in manager.nodes:
+            nodes.inc(manager.module_name.lower(), node.status)
+
+
+Metrics.instance().add_collector(collect_compute_metrics)
+
+
 class ServerHandler:
 
     @Route.get(
@@ -40,6 +79,21 @@ class ServerHandler:
         response.json({"version": __version__, "local": local_server})
 
 
+    @Route.get(
+        r"/debug/event_loop",
+        description="Retrieve the lag of the event loop of the compute and the code which blocked it")
+    def event_loop(request, response):
+
+        response.json(LoopWatchdog.instance())
+
+    @Route.get(
+        r"/metrics",
+        description="Retrieve the metrics of the compute in the Prometheus text format")
+    def metrics(request, response):
+
+        response.content_type = "text/plain"
+        response.text = Metrics.instance().render()
+
     @Route.get(
         r"/debug",
         description="Return debug informations about the compute",
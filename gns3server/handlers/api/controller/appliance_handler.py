@@ -18,7 +18,7 @@
 from gns3server.web.route import Route
 from gns3server.controller import Controller
 from gns3server.schemas.node import NODE_OBJECT_SCHEMA
-from gns3server.schemas.appliance import APPLIANCE_USAGE_SCHEMA
+from gns3server.schemas.appliance import APPLIANCE_USAGE_SCHEMA, APPLIANCES_USAGE_SCHEMA, APPLIANCES_USAGE_RESULT_SCHEMA
 
 
 import logging
@@ -72,3 +72,24 @@ class ApplianceHandler:
                                                    y=request.json["y"],
                                                    compute_id=request.json.get("compute_id"))
         response.set_status(201)
+
+    @Route.post(
+        r"/projects/{project_id}/appliances",
+        description="Create several nodes from appliances. The nodes are created concurrently on their computes, "
+                    "the progress is sent with project.nodes_creation notifications",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Nodes created, the result of each node is in the response",
+            404: "The project doesn't exist"
+        },
+        input=APPLIANCES_USAGE_SCHEMA,
+        output=APPLIANCES_USAGE_RESULT_SCHEMA)
+    def create_nodes_from_appliances(request, response):
+
+        controller = Controller.instance()
+        project = controller.get_project(request.match_info["project_id"])
+        results = yield from project.add_nodes_from_appliances(request.json["nodes"],
+                                                               compute_concurrency=request.json.get("compute_concurrency", 4))
+        response.json({"nodes": results})
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.controller import Controller
 
 from gns3server.schemas.compute import (
@@ -85,14 +86,17 @@ class ComputeHandler:
         },
         status_codes={
             200: "OK",
+            400: "Invalid query parameters",
             404: "Instance doesn't exist"
         },
-        description="Return the list of images available on compute and controller for this emulator type")
+        description="Return the list of images available on compute and controller for this emulator type. "
+                    "Query parameters: fields (comma separated), limit and cursor (filename)")
     def images(request, response):
+        query = ListQuery(request.query, cursor_field="filename" if request.match_info["emulator"] in ("qemu", "dynamips", "iou") else "image")
         controller = Controller.instance()
         compute = controller.get_compute(request.match_info["compute_id"])
         res = yield from compute.images(request.match_info["emulator"])
-        response.json(res)
+        query.respond(response, res)
 
     @Route.get(
         r"/computes/endpoint/{compute_id}/{emulator}/{action:.+}",
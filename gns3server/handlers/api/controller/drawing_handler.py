@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.controller import Controller
 
 from gns3server.schemas.drawing import (
@@ -35,12 +36,14 @@ class DrawingHandler:
         },
         status_codes={
             200: "List of drawings returned",
+            400: "Invalid query parameters"
         },
-        description="List drawings of a project")
+        description="List drawings of a project. Query parameters: fields (comma separated), limit and cursor (drawing_id)")
     def list_drawings(request, response):
 
+        query = ListQuery(request.query, cursor_field="drawing_id")
         project = yield from Controller.instance().get_loaded_project(request.match_info["project_id"])
-        response.json([v for v in project.drawings.values()])
+        query.respond(response, project.drawings.values(), serialize=lambda drawing, fields: drawing.__json__(fields=fields))
 
     @Route.post(
         r"/projects/{project_id}/drawings",
@@ -20,6 +20,7 @@ import asyncio
 import aiohttp
 
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.controller import Controller
 
 from gns3server.schemas.link import (
@@ -40,12 +41,15 @@ class LinkHandler:
         },
         status_codes={
             200: "List of links returned",
+            400: "Invalid query parameters"
         },
-        description="List links of a project")
+        description="List links of a project. Query parameters: fields (comma separated), "
+                    "filters (link_type, capturing, suspend), limit and cursor (link_id)")
     def list_links(request, response):
 
+        query = ListQuery(request.query, filters=("link_type", "capturing", "suspend"), cursor_field="link_id")
         project = yield from Controller.instance().get_loaded_project(request.match_info["project_id"])
-        response.json([v for v in project.links.values()])
+        query.respond(response, project.links.values())
 
     @Route.post(
         r"/projects/{project_id}/links",
@@ -223,18 +227,8 @@ class LinkHandler:
         while not os.path.isfile(link.capture_file_path):
             yield from asyncio.sleep(0.5)
 
+        response.content_type = "application/vnd.tcpdump.pcap"
         try:
-            with open(link.capture_file_path, "rb") as f:
-
-                response.content_type = "application/vnd.tcpdump.pcap"
-                response.set_status(200)
-                response.enable_chunked_encoding()
-                yield from response.prepare(request)
-
-                while True:
-                    chunk = f.read(4096)
-                    if not chunk:
-                        yield from asyncio.sleep(0.1)
-                    yield from response.write(chunk)
-        except OSError:
+            yield from response.stream(link.capture_file_path)
+        except aiohttp.web.HTTPException:
             raise aiohttp.web.HTTPNotFound(text="pcap file {} not found or not accessible".format(link.capture_file_path))
@@ -18,6 +18,7 @@
 import aiohttp
 
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.controller import Controller
 from gns3server.utils import force_unix_path
 
@@ -77,12 +78,15 @@ class NodeHandler:
         },
         status_codes={
             200: "List of nodes returned",
+            400: "Invalid query parameters"
         },
-        description="List nodes of a project")
+        description="List nodes of a project. Query parameters: fields (comma separated), "
+                    "filters (status, compute_id, node_type, name, console_type), limit and cursor (node_id)")
     def list_nodes(request, response):
 
+        query = ListQuery(request.query, filters=("status", "compute_id", "node_type", "name", "console_type"), cursor_field="node_id")
         project = yield from Controller.instance().get_loaded_project(request.match_info["project_id"])
-        response.json([v for v in project.nodes.values()])
+        query.respond(response, project.nodes.values(), serialize=lambda node, fields: node.__json__(fields=fields))
 
     @Route.put(
         r"/projects/{project_id}/nodes/{node_id}",
@@ -16,22 +16,27 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import aiohttp
 import asyncio
 import tempfile
 
 from gns3server.web.route import Route
+from gns3server.web.list_query import ListQuery
 from gns3server.controller import Controller
 from gns3server.controller.import_project import import_project
 from gns3server.controller.export_project import export_project
+from gns3server.controller.placement import Placement
 from gns3server.config import Config
+from gns3server.utils.encoding import websocket_msgpack
 
 
 from gns3server.schemas.project import (
     PROJECT_OBJECT_SCHEMA,
     PROJECT_UPDATE_SCHEMA,
     PROJECT_LOAD_SCHEMA,
-    PROJECT_CREATE_SCHEMA
+    PROJECT_CREATE_SCHEMA,
+    PROJECT_REBALANCE_SCHEMA
 )
 
 import logging
@@ -39,16 +44,35 @@ log = logging.getLogger()
 
 
 @asyncio.coroutine
-def process_websocket(ws):
+def process_websocket(ws, resync=None):
     """
     Process ping / pong and close message
+
+    :param resync: Called when the client asks for the complete state with {"action": "resync"}
     """
     try:
-        yield from ws.receive()
+        while True:
+            msg = yield from ws.receive()
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            try:
+                action = json.loads(msg.data).get("action")
+            except (ValueError, AttributeError):
+                continue
+            if action == "resync" and resync:
+                resync()
     except aiohttp.WSServerHandshakeError:
         pass
 
 
+def delta_mode(request):
+    """
+    :returns: True if the client wants the delta notifications (?delta=1)
+    """
+
+    return request.query.get("delta", "0") not in ("0", "false", "")
+
+
 class ProjectHandler:
 
     @Route.post(
@@ -69,13 +93,16 @@ class ProjectHandler:
 
     @Route.get(
         r"/projects",
-        description="List projects",
+        description="List projects. Query parameters: fields (comma separated), "
+                    "filters (status, name), limit and cursor (project_id)",
         status_codes={
             200: "List of projects",
+            400: "Invalid query parameters"
         })
     def list_projects(request, response):
+        query = ListQuery(request.query, filters=("status", "name"), cursor_field="project_id")
         controller = Controller.instance()
-        response.json([p for p in controller.projects.values()])
+        query.respond(response, controller.projects.values())
 
     @Route.get(
         r"/projects/{project_id}",
@@ -92,6 +119,23 @@ class ProjectHandler:
         project = controller.get_project(request.match_info["project_id"])
         response.json(project)
 
+    @Route.get(
+        r"/projects/{project_id}/rebalance",
+        description="Suggest node moves to balance the load of the computes and keep linked nodes together. Nothing is moved",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            200: "Suggested moves returned",
+            404: "The project doesn't exist"
+        },
+        output=PROJECT_REBALANCE_SCHEMA)
+    def rebalance(request, response):
+        controller = Controller.instance()
+        project = controller.get_project(request.match_info["project_id"])
+        suggestion = yield from Placement(controller).rebalance(project)
+        response.json(suggestion)
+
     @Route.put(
         r"/projects/{project_id}",
         status_codes={
@@ -194,7 +238,9 @@ class ProjectHandler:
 
     @Route.get(
         r"/projects/{project_id}/notifications",
-        description="Receive notifications about projects",
+        description="Receive notifications about projects. With ?delta=1 the node.updated and link.updated "
+                    "notifications contain only the changed fields and a version per object, "
+                    "the stream starts with the complete state and a client reconnects to resync",
         parameters={
             "project_id": "Project UUID",
         },
@@ -212,7 +258,7 @@ class ProjectHandler:
         response.enable_chunked_encoding()
 
         yield from response.prepare(request)
-        with controller.notification.queue(project) as queue:
+        with controller.notification.queue(project, delta=delta_mode(request)) as queue:
             while True:
                 try:
                     msg = yield from queue.get_json(5)
@@ -230,7 +276,10 @@ class ProjectHandler:
 
     @Route.get(
         r"/projects/{project_id}/notifications/ws",
-        description="Receive notifications about projects from a Websocket",
+        description="Receive notifications about projects from a Websocket. With ?delta=1 the node.updated and "
+                    "link.updated notifications contain only the changed fields and a version per object, "
+                    "the client sends {\"action\": \"resync\"} to receive the complete state again. "
+                    "With ?encoding=msgpack the notifications are binary msgpack messages",
         parameters={
             "project_id": "Project UUID",
         },
@@ -246,17 +295,27 @@ class ProjectHandler:
         ws = aiohttp.web.WebSocketResponse()
         yield from ws.prepare(request)
 
-        asyncio.async(process_websocket(ws))
-
-        with controller.notification.queue(project) as queue:
+        delta = delta_mode(request)
+        use_msgpack = websocket_msgpack(request)
+        with controller.notification.queue(project, delta=delta) as queue:
+            resync = None
+            if delta:
+                resync = lambda: controller.notification.resync(project, queue)
+            asyncio.async(process_websocket(ws, resync=resync))
             while True:
                 try:
-                    notification = yield from queue.get_json(5)
+                    if use_msgpack:
+                        notification = yield from queue.get_msgpack(5)
+                    else:
+                        notification = yield from queue.get_json(5)
                 except asyncio.futures.CancelledError as e:
                     break
                 if ws.closed:
                     break
-                ws.send_str(notification)
+                if use_msgpack:
+                    ws.send_bytes(notification)
+                else:
+                    ws.send_str(notification)
 
         if project.auto_close:
             # To avoid trouble with client connecting disconnecting we sleep few seconds before checking
@@ -386,8 +445,10 @@ class ProjectHandler:
         },
         status_codes={
             200: "File returned",
+            206: "Requested range of the file returned",
             403: "Permission denied",
-            404: "The file doesn't exist"
+            404: "The file doesn't exist",
+            416: "Requested range not satisfiable"
         })
     def get_file(request, response):
 
@@ -401,23 +462,7 @@ class ProjectHandler:
             raise aiohttp.web.HTTPForbidden()
         path = os.path.join(project.path, path)
 
-        response.content_type = "application/octet-stream"
-        response.set_status(200)
-        response.enable_chunked_encoding()
-
-        try:
-            with open(path, "rb") as f:
-                yield from response.prepare(request)
-                while True:
-                    data = f.read(4096)
-                    if not data:
-                        break
-                    yield from response.write(data)
-
-        except FileNotFoundError:
-            raise aiohttp.web.HTTPNotFound()
-        except PermissionError:
-            raise aiohttp.web.HTTPForbidden()
+        yield from response.file(path, content_type="application/octet-stream")
 
     @Route.post(
         r"/projects/{project_id}/files/{path:.+}",
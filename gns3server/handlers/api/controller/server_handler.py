@@ -20,6 +20,8 @@ from gns3server.config import Config
 from gns3server.controller import Controller
 from gns3server.schemas.version import VERSION_SCHEMA
 from gns3server.version import __version__
+from gns3server.utils.metrics import Metrics
+from gns3server.utils.asyncio.loop_watchdog import LoopWatchdog
 
 from aiohttp.web import HTTPConflict, HTTPForbidden
 
@@ -33,6 +35,38 @@ import logging
 log = logging.getLogger(__name__)
 
 
+def collect_controller_metrics():
+    """
+    Reads the state of the controller when the metrics are requested.
+    """
+
+    metrics = Metrics.instance()
+    controller = Controller.instance()
+
+    clients = metrics.gauge("gns3_controller_notification_clients",
+                            "Number of clients listening to the notifications of a project", ("project_id",))
+    queues = metrics.gauge("gns3_controller_notification_queue_size",
+                           "Number of notifications waiting to be sent to the clients of a project", ("project_id",))
+    clients.clear()
+    queues.clear()
+    for project_id, listeners in list(controller.notification._listeners.items()):
+        if listeners:
+            clients.set(len(listeners), project_id)
+            queues.set(sum(queue.qsize() for queue in listeners), project_id)
+
+    computes = metrics.gauge("gns3_controller_computes_connected",
+                             "Connection state of the computes (1 if connected)", ("compute_id",))
+    computes.clear()
+    for compute in controller.computes.values():
+        computes.set(int(compute.connected), compute.id)
+
+    metrics.gauge("gns3_controller_projects_opened",
+                  "Number of opened projects").set(sum(1 for project in controller.projects.values() if project.status == "opened"))
+
+
+Metrics.instance().add_collector(collect_controller_metrics)
+
+
 class ServerHandler:
 
     @classmethod
@@ -131,6 +165,21 @@ class ServerHandler:
         response.json(controller.settings)
         response.set_status(201)
 
+    @Route.get(
+        r"/debug/event_loop",
+        description="Retrieve the lag of the event loop of the controller and the code which blocked it")
+    def event_loop(request, response):
+
+        response.json(LoopWatchdog.instance())
+
+    @Route.get(
+        r"/metrics",
+        description="Retrieve the metrics of the controller in the Prometheus text format")
+    def metrics(request, response):
+
+        response.content_type = "text/plain"
+        response.text = Metrics.instance().render()
+
     @Route.post(
         r"/debug",
         description="Dump debug informations to disk (debug directory in config directory). Work only for local server",
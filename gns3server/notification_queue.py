@@ -19,16 +19,20 @@ import asyncio
 import json
 
 from gns3server.utils.ping_stats import PingStats
+from gns3server.utils.encoding import pack
 
 
 class NotificationQueue(asyncio.Queue):
     """
     Queue returned by the notification manager.
+
+    :param delta: The client receives only the changed fields of the updated objects
     """
 
-    def __init__(self):
+    def __init__(self, delta=False):
         super().__init__()
         self._first = True
+        self.delta = delta
 
     @asyncio.coroutine
     def get(self, timeout):
@@ -48,9 +52,9 @@ class NotificationQueue(asyncio.Queue):
         return (action, msg, kwargs)
 
     @asyncio.coroutine
-    def get_json(self, timeout):
+    def get_message(self, timeout):
         """
-        Get a message as a JSON
+        Get a message as a dictionary
         """
         (action, msg, kwargs) = yield from self.get(timeout)
         if hasattr(msg, "__json__"):
@@ -58,4 +62,20 @@ class NotificationQueue(asyncio.Queue):
         else:
             msg = {"action": action, "event": msg}
         msg.update(kwargs)
+        return msg
+
+    @asyncio.coroutine
+    def get_json(self, timeout):
+        """
+        Get a message as a JSON
+        """
+        msg = yield from self.get_message(timeout)
         return json.dumps(msg, sort_keys=True)
+
+    @asyncio.coroutine
+    def get_msgpack(self, timeout):
+        """
+        Get a message encoded with msgpack
+        """
+        msg = yield from self.get_message(timeout)
+        return pack(msg)
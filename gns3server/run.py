@@ -105,6 +105,9 @@ def parse_arguments(argv):
     parser.add_argument("--daemon", action="store_true", help="start as a daemon")
     parser.add_argument("--pid", help="store process pid")
     parser.add_argument("--profile", help="Settings profile (blank will use default settings files)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--controller-only", action="store_true", help="run only the controller, the emulators are not loaded")
+    mode.add_argument("--compute-only", action="store_true", help="run only the compute")
 
     args = parser.parse_args(argv)
     if args.config:
@@ -245,7 +248,7 @@ def run():
 
     port = int(server_config["port"])
 
-    server = WebServer.instance(host, port)
+    server = WebServer.instance(host, port, controller=not args.compute_only, compute=not args.controller_only)
     try:
         server.run()
     except OSError as e:
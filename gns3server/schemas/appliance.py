@@ -37,3 +37,84 @@ APPLIANCE_USAGE_SCHEMA = {
     "additionalProperties": False,
     "required": ["x", "y"]
 }
+
+
+APPLIANCES_USAGE_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to create several nodes from appliances",
+    "type": "object",
+    "properties": {
+        "nodes": {
+            "description": "Nodes to create",
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "appliance_id": {
+                        "description": "Appliance template UUID",
+                        "type": "string"
+                    },
+                    "x": {
+                        "description": "X position",
+                        "type": "integer"
+                    },
+                    "y": {
+                        "description": "Y position",
+                        "type": "integer"
+                    },
+                    "compute_id": {
+                        "description": "If the appliance don't have a default compute use this compute, the least loaded compute if null",
+                        "type": ["null", "string"]
+                    }
+                },
+                "additionalProperties": False,
+                "required": ["appliance_id", "x", "y"]
+            }
+        },
+        "compute_concurrency": {
+            "description": "Maximum number of nodes created at the same time on a compute",
+            "type": "integer",
+            "minimum": 1
+        }
+    },
+    "additionalProperties": False,
+    "required": ["nodes"]
+}
+
+APPLIANCES_USAGE_RESULT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Result of the creation of several nodes from appliances",
+    "type": "object",
+    "properties": {
+        "nodes": {
+            "description": "Results in the order of the request",
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "appliance_id": {
+                        "description": "Appliance template UUID",
+                        "type": "string"
+                    },
+                    "status": {
+                        "description": "HTTP status of the node creation",
+                        "type": "integer"
+                    },
+                    "node": {
+                        "description": "Created node",
+                        "type": "object"
+                    },
+                    "message": {
+                        "description": "Error message if the node has not been created",
+                        "type": "string"
+                    }
+                },
+                "additionalProperties": False,
+                "required": ["appliance_id", "status"]
+            }
+        }
+    },
+    "additionalProperties": False,
+    "required": ["nodes"]
+}
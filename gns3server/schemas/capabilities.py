@@ -36,6 +36,67 @@ CAPABILITIES_SCHEMA = {
         "platform": {
             "type": "string",
             "description": "Platform where the compute is running"
+        },
+        "probes": {
+            "type": "array",
+            "description": "Cached results of the probes of the executables",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "description": "Probe name",
+                        "type": "string"
+                    },
+                    "path": {
+                        "description": "Probed file",
+                        "type": "string"
+                    },
+                    "result": {
+                        "description": "Result of the probe",
+                        "type": ["string", "boolean", "integer", "number", "null"]
+                    }
+                },
+                "required": ["name", "path", "result"],
+                "additionalProperties": False
+            }
+        },
+        "memory": {
+            "type": "object",
+            "description": "RAM reserved by the running nodes",
+            "properties": {
+                "capacity": {
+                    "description": "RAM in MB which can be reserved (total RAM multiplied by the overcommit ratio)",
+                    "type": "integer"
+                },
+                "reserved": {
+                    "description": "RAM in MB reserved by the running nodes",
+                    "type": "integer"
+                },
+                "overcommit_ratio": {
+                    "description": "Ratio of the total RAM which can be reserved",
+                    "type": "number"
+                },
+                "policy": {
+                    "description": "What happens to a node start when there is not enough RAM",
+                    "enum": ["queue", "reject", "warn"]
+                },
+                "reservations": {
+                    "description": "Number of nodes with reserved RAM",
+                    "type": "integer"
+                },
+                "queued": {
+                    "description": "Number of node starts waiting for RAM",
+                    "type": "integer"
+                }
+            },
+            "additionalProperties": False
+        },
+        "encodings": {
+            "type": "array",
+            "description": "Encodings of the API bodies and notifications supported by the compute",
+            "items": {
+                "enum": ["json", "msgpack"]
+            }
         }
     },
     "additionalProperties": False
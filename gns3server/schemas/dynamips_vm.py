@@ -604,6 +604,20 @@ VM_OBJECT_SCHEMA = {
             "type": "string",
             "minLength": 1,
         },
+        "resource_usage": {
+            "description": "CPU time in microseconds and memory in bytes used by the node processes, null if not available",
+            "type": ["null", "object"],
+            "properties": {
+                "cpu_usage_usec": {
+                    "description": "CPU time used by the node processes in microseconds",
+                    "type": "integer"
+                },
+                "memory_usage": {
+                    "description": "Memory used by the node processes in bytes",
+                    "type": "integer"
+                }
+            }
+        },
         "slot0": {
             "description": "Network module slot 0",
             "oneOf": [
@@ -709,3 +723,47 @@ VM_OBJECT_SCHEMA = {
     "additionalProperties": False,
     "required": ["name", "node_id", "project_id", "dynamips_id", "console", "console_type"]
 }
+
+IDLEPC_PRECOMPUTE_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to precompute the idle-PC values of IOS images",
+    "type": "object",
+    "properties": {
+        "images": {
+            "description": "Images to process (default: all the IOS images)",
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "image": {
+                        "description": "Path to the IOS image",
+                        "type": "string",
+                        "minLength": 1
+                    },
+                    "platform": {
+                        "description": "Cisco router platform (default: detected from the image filename)",
+                        "type": "string",
+                        "enum": ["c7200", "c3725", "c3745", "c3600", "c2691", "c2600", "c1700"]
+                    },
+                    "ram": {
+                        "description": "Amount of RAM in MB",
+                        "type": "integer"
+                    }
+                },
+                "additionalProperties": False,
+                "required": ["image"]
+            }
+        },
+        "instances": {
+            "description": "Number of routers used to probe the values of each image",
+            "type": "integer",
+            "minimum": 1
+        },
+        "concurrency": {
+            "description": "Number of images processed at the same time",
+            "type": "integer",
+            "minimum": 1
+        }
+    },
+    "additionalProperties": False
+}
@@ -126,6 +126,20 @@ NODE_OBJECT_SCHEMA = {
             "description": "Command line use to start the node",
             "type": ["null", "string"]
         },
+        "resource_usage": {
+            "description": "CPU time in microseconds and memory in bytes used by the node processes, null if not available",
+            "type": ["null", "object"],
+            "properties": {
+                "cpu_usage_usec": {
+                    "description": "CPU time used by the node processes in microseconds",
+                    "type": "integer"
+                },
+                "memory_usage": {
+                    "description": "Memory used by the node processes in bytes",
+                    "type": "integer"
+                }
+            }
+        },
         "name": {
             "description": "Node name",
             "type": "string",
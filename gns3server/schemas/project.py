@@ -253,3 +253,48 @@ PROJECT_FILE_LIST_SCHEMA = {
     ],
     "additionalProperties": False,
 }
+
+PROJECT_REBALANCE_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Suggested moves of the nodes of a project between computes",
+    "type": "object",
+    "properties": {
+        "moves": {
+            "description": "Nodes which should run on another compute",
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "node_id": {
+                        "description": "Node UUID",
+                        "type": "string"
+                    },
+                    "name": {
+                        "description": "Node name",
+                        "type": "string"
+                    },
+                    "compute_id": {
+                        "description": "Current compute of the node",
+                        "type": "string"
+                    },
+                    "suggested_compute_id": {
+                        "description": "Suggested compute for the node",
+                        "type": "string"
+                    }
+                },
+                "required": ["node_id", "name", "compute_id", "suggested_compute_id"],
+                "additionalProperties": False
+            }
+        },
+        "cross_compute_links": {
+            "description": "Number of links between nodes on different computes",
+            "type": "integer"
+        },
+        "suggested_cross_compute_links": {
+            "description": "Number of links between nodes on different computes after the moves",
+            "type": "integer"
+        }
+    },
+    "required": ["moves", "cross_compute_links", "suggested_cross_compute_links"],
+    "additionalProperties": False
+}
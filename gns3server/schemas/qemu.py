@@ -593,6 +593,20 @@ QEMU_OBJECT_SCHEMA = {
         "command_line": {
             "description": "Last command line used by GNS3 to start QEMU",
             "type": "string"
+        },
+        "resource_usage": {
+            "description": "CPU time in microseconds and memory in bytes used by the node processes, null if not available",
+            "type": ["null", "object"],
+            "properties": {
+                "cpu_usage_usec": {
+                    "description": "CPU time used by the node processes in microseconds",
+                    "type": "integer"
+                },
+                "memory_usage": {
+                    "description": "Memory used by the node processes in bytes",
+                    "type": "integer"
+                }
+            }
         }
     },
     "additionalProperties": False,
@@ -638,6 +652,7 @@ QEMU_OBJECT_SCHEMA = {
                  "options",
                  "node_directory",
                  "command_line",
+                 "resource_usage",
                  "status"]
 }
 
@@ -124,6 +124,20 @@ VPCS_OBJECT_SCHEMA = {
         "command_line": {
             "description": "Last command line used by GNS3 to start VPCS",
             "type": "string"
+        },
+        "resource_usage": {
+            "description": "CPU time in microseconds and memory in bytes used by the node processes, null if not available",
+            "type": ["null", "object"],
+            "properties": {
+                "cpu_usage_usec": {
+                    "description": "CPU time used by the node processes in microseconds",
+                    "type": "integer"
+                },
+                "memory_usage": {
+                    "description": "Memory used by the node processes in bytes",
+                    "type": "integer"
+                }
+            }
         }
     },
     "additionalProperties": False,
@@ -29,6 +29,7 @@ import re
 from gns3server.utils import parse_version
 from gns3server.utils.asyncio import wait_for_process_termination
 from gns3server.utils.asyncio import subprocess_check_output
+from gns3server.compute.probe_cache import ProbeCache
 from .ubridge_hypervisor import UBridgeHypervisor
 from .ubridge_error import UbridgeError
 
@@ -134,7 +135,7 @@ class Hypervisor(UBridgeHypervisor):
         Checks if the ubridge executable version
         """
         try:
-            output = yield from subprocess_check_output(self._path, "-v", cwd=self._working_dir, env=env)
+            output = yield from ProbeCache.instance().probe("version", self._path, subprocess_check_output, self._path, "-v", cwd=self._working_dir, env=env)
             match = re.search("ubridge version ([0-9a-z\.]+)", output)
             if match:
                 self._version = match.group(1)
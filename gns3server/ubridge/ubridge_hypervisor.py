@@ -21,6 +21,7 @@ import logging
 import asyncio
 
 from ..utils.asyncio import locked_coroutine
+from ..utils.metrics import timed_command
 from .ubridge_error import UbridgeError
 
 log = logging.getLogger(__name__)
@@ -177,6 +178,7 @@ class UBridgeHypervisor:
         self._host = host
 
     @locked_coroutine
+    @timed_command("ubridge")
     def send(self, command):
         """
         Sends commands to this hypervisor.
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import time
+import asyncio
+import weakref
+import threading
+import traceback
+
+from ...config import Config
+from ..metrics import Metrics
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Interval of the heartbeat callback of the event loop (seconds)
+HEARTBEAT_INTERVAL = 0.05
+
+# Maximum number of distinct offenders kept in memory
+MAX_OFFENDERS = 100
+
+LAG_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class LoopWatchdog:
+
+    """
+    Measures the lag of the event loop with a periodic callback. A thread
+    checks that the callback runs: when the loop is blocked longer than
+    the threshold, the stack of the loop thread is captured and attributed
+    to the current task, labelled with its API route when it's a request.
+
+    [Server] loop_lag_threshold is the threshold in seconds, 0 disables the watchdog.
+    """
+
+    def __init__(self):
+
+        self._loop = None
+        self._threshold = 0
+        self._thread = None
+        self._stopped = threading.Event()
+        self._handle = None
+        self._loop_thread_id = None
+        self._heartbeat = None
+        self._stall = None  # (heartbeat, label, stack) captured by the thread
+        self._offenders = {}  # (label, location) => offender
+        self._stalls = 0
+        self._max_lag = 0
+        self._task_labels = weakref.WeakKeyDictionary()
+        self._lag = Metrics.instance().histogram("gns3_event_loop_lag_seconds",
+                                                 "Delay of the callbacks of the event loop",
+                                                 buckets=LAG_BUCKETS)
+        self._blocked = Metrics.instance().counter("gns3_event_loop_stalls_total",
+                                                   "Number of times the event loop was blocked longer than the threshold")
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of LoopWatchdog.
+
+        :returns: instance of LoopWatchdog
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def threshold(self):
+
+        return Config.instance().get_section_config("Server").getfloat("loop_lag_threshold", 0.25)
+
+    @property
+    def running(self):
+
+        return self._thread is not None
+
+    def label_task(self, task, label):
+        """
+        Sets the label used to attribute the stalls of a task.
+
+        :param task: Task instance
+        :param label: Label (for example the API route), None to remove it
+        """
+
+        if task is None:
+            return
+        if label is None:
+            self._task_labels.pop(task, None)
+        else:
+            self._task_labels[task] = label
+
+    def start(self, loop=None):
+        """
+        Starts to watch the event loop, must be called from the loop thread.
+        """
+
+        threshold = self.threshold
+        if self.running or threshold <= 0:
+            return
+        self._threshold = threshold
+        self._loop = loop or asyncio.get_event_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._heartbeat = None
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        log.debug("Event loop watchdog started with a threshold of {}s".format(threshold))
+
+    def stop(self):
+
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _beat(self):
+        """
+        Periodic callback of the event loop.
+        """
+
+        now = time.monotonic()
+        if self._heartbeat is not None:
+            lag = max(0, now - self._heartbeat - HEARTBEAT_INTERVAL)
+            self._lag.observe(lag)
+            self._max_lag = max(self._max_lag, lag)
+            if lag >= self._threshold:
+                self._report(lag)
+        self._stall = None
+        self._heartbeat = now
+        self._handle = self._loop.call_later(HEARTBEAT_INTERVAL, self._beat)
+
+    def _watch(self):
+        """
+        Watchdog thread.
+        """
+
+        while not self._stopped.wait(self._threshold / 2):
+            heartbeat = self._heartbeat
+            if heartbeat is None or self._stall is not None:
+                continue
+            if time.monotonic() - heartbeat - HEARTBEAT_INTERVAL < self._threshold:
+                continue
+            # the first stack seen after the threshold is the blocking callback
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            if self._heartbeat == heartbeat:
+                self._stall = (heartbeat, self._current_label(), stack)
+
+    def _current_label(self):
+
+        try:
+            task = asyncio.Task.current_task(loop=self._loop)
+        except RuntimeError:
+            task = None
+        if task is None:
+            return "callback"
+        label = self._task_labels.get(task)
+        if label is None:
+            coro = getattr(task, "_coro", None)
+            label = "task {}".format(getattr(coro, "__qualname__", repr(coro)))
+        return label
+
+    @staticmethod
+    def _location(stack):
+        """
+        :returns: The innermost frame of the server code, or the innermost frame
+        """
+
+        package = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        for frame in reversed(stack):
+            if frame.filename.startswith(package) and frame.filename != __file__:
+                return "{}:{} in {}".format(os.path.relpath(frame.filename, os.path.dirname(package)), frame.lineno, frame.name)
+        if stack:
+            return "{}:{} in {}".format(stack[-1].filename, stack[-1].lineno, stack[-1].name)
+        return "unknown"
+
+    def _report(self, lag):
+
+        self._stalls += 1
+        self._blocked.inc()
+        if self._stall is None:
+            # the stall was shorter than the check interval of the thread
+            label, stack = "unknown", []
+        else:
+            _, label, stack = self._stall
+        location = self._location(stack)
+        formatted_stack = traceback.format_list(stack[-10:])
+
+        log.warning("Event loop blocked for {:.3f}s by {} at {}\n{}".format(lag, label, location, "".join(formatted_stack)))
+
+        key = (label, location)
+        offender = self._offenders.get(key)
+        if offender is None:
+            if len(self._offenders) >= MAX_OFFENDERS:
+                del self._offenders[min(self._offenders, key=lambda k: self._offenders[k]["total"])]
+            offender = self._offenders[key] = {"label": label, "location": location, "count": 0, "total": 0, "max": 0}
+        offender["count"] += 1
+        offender["total"] += lag
+        offender["max"] = max(offender["max"], lag)
+        offender["stack"] = formatted_stack
+
+    def __json__(self):
+
+        offenders = sorted(self._offenders.values(), key=lambda offender: offender["total"], reverse=True)
+        return {
+            "running": self.running,
+            "threshold": self.threshold,
+            "stalls": self._stalls,
+            "max_lag": self._max_lag,
+            "offenders": offenders[:20]
+        }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compression of the HTTP responses, negotiated with the Accept-Encoding
+header of the request.
+"""
+
+import os
+import zlib
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    # zstandard is an optional dependency
+    ZSTD_AVAILABLE = False
+
+# Supported encodings by order of preference
+ENCODINGS = ["zstd", "gzip", "deflate"] if ZSTD_AVAILABLE else ["gzip", "deflate"]
+
+# Content types which don't get smaller when compressed
+COMPRESSED_CONTENT_TYPES = frozenset([
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/x-7z-compressed",
+    "application/zip",
+    "application/zstd",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp"
+])
+
+# Files already compressed or too large to be compressed on the fly (disk images)
+COMPRESSED_EXTENSIONS = frozenset([
+    ".7z", ".bz2", ".gif", ".gns3project", ".gz", ".image", ".img", ".iso", ".jpeg", ".jpg", ".png",
+    ".qcow2", ".tgz", ".vdi", ".vhd", ".vmdk", ".webp", ".xz", ".zip", ".zst"
+])
+
+
+def accepted_encoding(accept_encoding):
+    """
+    :param accept_encoding: Value of the Accept-Encoding header
+    :returns: Preferred encoding accepted by the client, None to not compress
+    """
+
+    accepted = set()
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip()
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name)
+    for encoding in ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    if "*" in accepted:
+        return ENCODINGS[0]
+    return None
+
+
+def is_compressed(content_type, path=None):
+    """
+    :returns: True if compressing the content is a waste of CPU
+    """
+
+    if content_type in COMPRESSED_CONTENT_TYPES:
+        return True
+    if path is not None:
+        return os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS
+    return False
+
+
+def compressor(encoding):
+    """
+    :returns: Object compressing a stream, with the compress() and flush() methods of zlib
+    """
+
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    if encoding == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    # raw deflate like aiohttp, its client can't decode the zlib format
+    return zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+def compress(data, encoding):
+    """
+    :returns: data compressed with the encoding
+    """
+
+    c = compressor(encoding)
+    return c.compress(data) + c.flush()
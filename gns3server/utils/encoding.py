@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+MessagePack encoding, negotiated with the clients. JSON is used when
+msgpack is not installed or not requested.
+
+* HTTP API: a client sending "Accept: application/x-msgpack" receives
+  msgpack bodies and can send msgpack request bodies
+* Notification websockets: with ?encoding=msgpack the notifications are
+  sent as binary messages
+"""
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    # msgpack is an optional dependency
+    MSGPACK_AVAILABLE = False
+
+MSGPACK_CONTENT_TYPE = "application/x-msgpack"
+
+# Encodings reported in the capabilities of the compute
+ENCODINGS = ["json", "msgpack"] if MSGPACK_AVAILABLE else ["json"]
+
+
+def pack(data):
+    """
+    :returns: data encoded with msgpack
+    """
+
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def unpack(data):
+    """
+    :returns: Python object decoded from msgpack
+    """
+
+    return msgpack.unpackb(data, raw=False)
+
+
+def accepts_msgpack(request):
+    """
+    :returns: True if the answer of the request can be encoded with msgpack
+    """
+
+    return MSGPACK_AVAILABLE and MSGPACK_CONTENT_TYPE in request.headers.get("ACCEPT", "")
+
+
+def websocket_msgpack(request):
+    """
+    :returns: True if the notifications of a websocket can be sent with msgpack
+    """
+
+    return MSGPACK_AVAILABLE and request.query.get("encoding") == "msgpack"
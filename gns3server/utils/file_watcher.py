@@ -15,9 +15,356 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import sys
 import zlib
+import errno
+import struct
 import asyncio
-import os
+import ctypes
+import ctypes.util
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Files watched with inotify are still checked at this interval (seconds):
+# changes made through a memory mapping don't generate inotify events
+SAFETY_POLL_INTERVAL = 60
+
+
+class Inotify:
+    """
+    Minimal inotify binding (Linux only)
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+
+    FILE_CHANGES = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    @property
+    def fd(self):
+
+        return self._fd
+
+    def add_watch(self, path, mask):
+        """
+        :returns: Watch descriptor
+        """
+
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd):
+
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read_events(self):
+        """
+        :returns: List of (watch descriptor, mask, name) for the pending events
+        """
+
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not data:
+                break
+            offset = 0
+            while offset + self._EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = self._EVENT_HEADER.unpack_from(data, offset)
+                offset += self._EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class FileWatcherService:
+    """
+    Shared service behind all the FileWatcher instances. The directories of
+    the watched files are monitored with inotify on Linux: a change is reported
+    once the file has not been modified during the delay of the watcher.
+    Other files are checked by a single timer when their delay has elapsed.
+    """
+
+    def __init__(self, loop=None):
+
+        self._loop = loop or asyncio.get_event_loop()
+        self._poll_watchers = set()
+        self._poll_handle = None
+        self._paths = {}  # path => set of watchers notified with inotify
+        self._listeners = {}  # path => set of callbacks called on each inotify event
+        self._directories = {}  # directory => watch descriptor
+        self._wds = {}  # watch descriptor => directory
+        self._debounce = {}  # watcher => timer handle
+        self._inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = Inotify()
+                self._loop.add_reader(self._inotify.fd, self._read_events)
+            except (OSError, AttributeError, NotImplementedError) as e:
+                log.info("inotify is not available, files will be polled: {}".format(e))
+                if self._inotify:
+                    self._inotify.close()
+                self._inotify = None
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of FileWatcherService
+        for the current event loop. When the event loop changes, the
+        files watched by the previous instance are moved to the new one.
+
+        :returns: instance of FileWatcherService
+        """
+
+        loop = asyncio.get_event_loop()
+        previous = getattr(cls, "_instance", None)
+        if previous is None or previous._loop is not loop:
+            cls._instance = cls(loop)
+            if previous is not None:
+                previous._move_to(cls._instance)
+        return cls._instance
+
+    def _move_to(self, service):
+        """
+        Closes this service and watches its files with another service.
+        """
+
+        watchers = list(self._poll_watchers)
+        debounced = set(self._debounce)
+        listeners = {path: set(callbacks) for path, callbacks in self._listeners.items()}
+        self.close()
+        for watcher in watchers:
+            watcher._service = service
+            service.subscribe(watcher)
+            if watcher in debounced:
+                # a change was waiting for the end of the writes
+                service._debounce[watcher] = service._loop.call_later(watcher.delay, service._debounced, watcher)
+        for path, callbacks in listeners.items():
+            for callback in callbacks:
+                if not service.add_listener(path, callback):
+                    log.warning("Could not follow {} on the new event loop".format(path))
+
+    @property
+    def inotify(self):
+        """
+        :returns: True if inotify is used
+        """
+
+        return self._inotify is not None
+
+    def subscribe(self, watcher):
+        """
+        Starts to watch the files of a watcher.
+        """
+
+        # with the hash strategy the files are always polled, they can
+        # be modified through a memory mapping (Dynamips NVRAM)
+        if self._inotify is not None and watcher.strategy == "mtime" and self._watch_directories(watcher.paths):
+            for path in watcher.paths:
+                self._paths.setdefault(os.path.abspath(path), set()).add(watcher)
+            watcher.next_check = self._loop.time() + max(watcher.delay, SAFETY_POLL_INTERVAL)
+        else:
+            watcher.next_check = self._loop.time() + watcher.delay
+        self._poll_watchers.add(watcher)
+        self._schedule_poll()
+
+    def unsubscribe(self, watcher):
+        """
+        Stops to watch the files of a watcher.
+        """
+
+        self._poll_watchers.discard(watcher)
+        handle = self._debounce.pop(watcher, None)
+        if handle:
+            handle.cancel()
+        for path in watcher.paths:
+            path = os.path.abspath(path)
+            watchers = self._paths.get(path)
+            if watchers is None:
+                continue
+            watchers.discard(watcher)
+            if not watchers:
+                del self._paths[path]
+        self._unwatch_directories()
+        if not self._poll_watchers:
+            self._schedule_poll()
+
+    def add_listener(self, path, callback):
+        """
+        Calls a callback, without delay, each time a file is modified.
+        Used to follow a file which is still written.
+
+        :param path: File path
+        :param callback: Function without parameter
+        :returns: False if inotify is not available, the file has to be polled
+        """
+
+        if self._inotify is None or not self._watch_directories([path]):
+            return False
+        self._listeners.setdefault(os.path.abspath(path), set()).add(callback)
+        return True
+
+    def remove_listener(self, path, callback):
+
+        path = os.path.abspath(path)
+        callbacks = self._listeners.get(path)
+        if callbacks is not None:
+            callbacks.discard(callback)
+            if not callbacks:
+                del self._listeners[path]
+            self._unwatch_directories()
+
+    def _watch_directories(self, paths):
+
+        for path in paths:
+            directory = os.path.dirname(os.path.abspath(path))
+            if directory not in self._directories:
+                try:
+                    wd = self._inotify.add_watch(directory, Inotify.FILE_CHANGES)
+                except OSError as e:
+                    log.debug("Could not watch {} with inotify, polling it: {}".format(directory, e))
+                    self._unwatch_directories()
+                    return False
+                self._directories[directory] = wd
+                self._wds[wd] = directory
+        return True
+
+    def _unwatch_directories(self):
+
+        if self._inotify is None:
+            return
+        used = set(os.path.dirname(path) for path in list(self._paths) + list(self._listeners))
+        for directory in list(self._directories):
+            if directory not in used:
+                wd = self._directories.pop(directory)
+                self._wds.pop(wd, None)
+                self._inotify.rm_watch(wd)
+
+    def _read_events(self):
+
+        try:
+            events = self._inotify.read_events()
+        except OSError as e:
+            log.warning("Could not read inotify events: {}".format(e))
+            return
+
+        changed = set()
+        listeners = set()
+        for wd, mask, name in events:
+            if mask & Inotify.IN_Q_OVERFLOW:
+                # events have been lost, every watcher has to check its files
+                for watchers in self._paths.values():
+                    changed.update(watchers)
+                for callbacks in self._listeners.values():
+                    listeners.update(callbacks)
+                continue
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            if mask & Inotify.IN_IGNORED:
+                # the directory has been removed
+                del self._wds[wd]
+                self._directories.pop(directory, None)
+                continue
+            path = os.path.join(directory, name)
+            changed.update(self._paths.get(path, ()))
+            listeners.update(self._listeners.get(path, ()))
+
+        for callback in listeners:
+            callback()
+
+        for watcher in changed:
+            # debounce: the check is done once the writes are finished
+            handle = self._debounce.pop(watcher, None)
+            if handle:
+                handle.cancel()
+            self._debounce[watcher] = self._loop.call_later(watcher.delay, self._debounced, watcher)
+
+    def _debounced(self, watcher):
+
+        self._debounce.pop(watcher, None)
+        watcher.check()
+
+    def _inotify_watched(self, watcher):
+
+        return any(watcher in self._paths.get(os.path.abspath(path), ()) for path in watcher.paths)
+
+    def _schedule_poll(self):
+
+        if self._poll_handle:
+            self._poll_handle.cancel()
+            self._poll_handle = None
+        if self._poll_watchers:
+            next_check = min(watcher.next_check for watcher in self._poll_watchers)
+            self._poll_handle = self._loop.call_at(next_check, self._poll)
+
+    def _poll(self):
+
+        self._poll_handle = None
+        now = self._loop.time()
+        for watcher in [watcher for watcher in self._poll_watchers if watcher.next_check <= now]:
+            if self._inotify_watched(watcher):
+                watcher.next_check = now + max(watcher.delay, SAFETY_POLL_INTERVAL)
+            else:
+                watcher.next_check = now + watcher.delay
+            watcher.check()
+        self._schedule_poll()
+
+    def close(self):
+
+        if self._poll_handle:
+            self._poll_handle.cancel()
+            self._poll_handle = None
+        for handle in self._debounce.values():
+            handle.cancel()
+        self._debounce = {}
+        self._poll_watchers = set()
+        self._paths = {}
+        self._listeners = {}
+        if self._inotify is not None:
+            try:
+                self._loop.remove_reader(self._inotify.fd)
+            except (RuntimeError, ValueError):
+                pass
+            self._inotify.close()
+            self._inotify = None
 
 
 class FileWatcher:
@@ -25,7 +372,8 @@ class FileWatcher:
     Watch for file change and call the callback when something happen
 
     :param paths: A path or a list of file to watch
-    :param delay: Delay between file check (seconds)
+    :param delay: Delay between file check (seconds), with inotify the
+    callback is called once the file hasn't been modified during this delay
     :param strategy: File change strategy (mtime: modification time, hash: hash compute)
     """
 
@@ -42,6 +390,7 @@ class FileWatcher:
         self._delay = delay
         self._closed = False
         self._strategy = strategy
+        self.next_check = 0
 
         if self._strategy == 'mtime':
             # Store modification time
@@ -57,42 +406,72 @@ class FileWatcher:
             for path in self._paths:
                 try:
                     # Alder32 is a fast but insecure hash algorithm
-                    self._hashed[path] = zlib.adler32(open(path, 'rb').read())
+                    self._hashed[path] = self._hash(path)
                 except OSError:
                     self._hashed[path] = None
-        asyncio.get_event_loop().call_later(self._delay, self._check_config_file_change)
+        self._service = FileWatcherService.instance()
+        self._service.subscribe(self)
 
-    def __del__(self):
-        self._closed = True
+    @property
+    def paths(self):
+        return self._paths
+
+    @property
+    def delay(self):
+        return self._delay
+
+    @property
+    def strategy(self):
+        return self._strategy
 
     def close(self):
-        self._closed = True
+        if not self._closed:
+            self._closed = True
+            self._service.unsubscribe(self)
+
+    @staticmethod
+    def _hash(path):
+        checksum = zlib.adler32(b"")
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                checksum = zlib.adler32(chunk, checksum)
+        return checksum
+
+    def _changed(self, path):
+        if self._strategy == 'mtime':
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                if mtime != self._mtime[path]:
+                    self._mtime[path] = mtime
+                    return True
+            except OSError:
+                self._mtime[path] = None
+        else:
+            try:
+                hashc = self._hash(path)
+                if hashc != self._hashed[path]:
+                    self._hashed[path] = hashc
+                    return True
+            except OSError:
+                self._hashed[path] = None
+        return False
+
+    def check(self):
+        """
+        Checks the files and calls the callback for each modified file.
+        """
 
-    def _check_config_file_change(self):
         if self._closed:
             return
-        changed = False
-
         for path in self._paths:
-            if self._strategy == 'mtime':
+            if self._changed(path):
                 try:
-                    mtime = os.stat(path).st_mtime_ns
-                    if mtime != self._mtime[path]:
-                        changed = True
-                        self._mtime[path] = mtime
-                except OSError:
-                    self._mtime[path] = None
-            else:
-                try:
-                    hashc = zlib.adler32(open(path, 'rb').read())
-                    if hashc != self._hashed[path]:
-                        changed = True
-                        self._hashed[path] = hashc
-                except OSError:
-                    self._hashed[path] = None
-            if changed:
-                self._callback(path)
-        asyncio.get_event_loop().call_later(self._delay, self._check_config_file_change)
+                    self._callback(path)
+                except Exception as e:
+                    log.error("Error in the change callback of {}: {}".format(path, e), exc_info=1)
 
     @property
     def callback(self):
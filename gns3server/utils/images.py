@@ -26,11 +26,12 @@ import logging
 log = logging.getLogger(__name__)
 
 
-def list_images(type):
+def list_images(type, checksums=True):
     """
     Scan directories for available image for a type
 
     :param type: emulator type (dynamips, qemu, iou)
+    :param checksums: Compute the md5sum of the images, None otherwise
     """
     files = set()
     images = []
@@ -80,7 +81,7 @@ def list_images(type):
                             images.append({
                                 "filename": filename,
                                 "path": force_unix_path(path),
-                                "md5sum": md5sum(os.path.join(root, filename)),
+                                "md5sum": md5sum(os.path.join(root, filename)) if checksums else None,
                                 "filesize": os.stat(os.path.join(root, filename)).st_size})
                         except OSError as e:
                             log.warn("Can't add image {}: {}".format(path, str(e)))
@@ -167,7 +168,7 @@ def md5sum(path):
         m = hashlib.md5()
         with open(path, 'rb') as f:
             while True:
-                buf = f.read(128)
+                buf = f.read(1024 * 1024)
                 if not buf:
                     break
                 m.update(buf)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Metrics exported in the Prometheus text format.
+https://prometheus.io/docs/instrumenting/exposition_formats/
+
+Recording a value is a dictionary lookup and an addition, the
+gauges computed from the server state are only read when the
+metrics are requested.
+"""
+
+import re
+import time
+import bisect
+import asyncio
+import functools
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Default buckets of the latency histograms, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+
+def _escape(value):
+
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+
+    labels = ['{}="{}"'.format(name, _escape(value)) for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    if not labels:
+        return ""
+    return "{" + ",".join(labels) + "}"
+
+
+def _format_value(value):
+
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def normalize_path(path):
+    """
+    Replaces the identifiers in a path, to keep the number of label values bounded.
+    """
+
+    return UUID_RE.sub("{id}", path.split("?", 1)[0])
+
+
+class Gauge:
+
+    """
+    Value which can go up and down.
+    """
+
+    TYPE = "gauge"
+
+    def __init__(self, name, documentation, labels=()):
+
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def set(self, value, *labels):
+
+        self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def value(self, *labels):
+
+        return self._values.get(labels, 0)
+
+    def clear(self):
+
+        self._values = {}
+
+    def samples(self):
+
+        for labels, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labels, labels), value
+
+
+class Counter(Gauge):
+
+    """
+    Value which only goes up.
+    """
+
+    TYPE = "counter"
+
+
+class Histogram:
+
+    """
+    Distribution of observed values.
+    """
+
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._buckets = tuple(buckets)
+        self._values = {}
+
+    def observe(self, value, *labels):
+
+        entry = self._values.get(labels)
+        if entry is None:
+            # counts by bucket (the last one is +Inf), sum
+            entry = self._values[labels] = [[0] * (len(self._buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self._buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, *labels):
+
+        entry = self._values.get(labels)
+        if entry is None:
+            return 0
+        return sum(entry[0])
+
+    def samples(self):
+
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                yield self.name + "_bucket", _format_labels(self.labels, labels, 'le="{}"'.format(_format_value(float(bound)))), cumulative
+            yield self.name + "_sum", _format_labels(self.labels, labels), total
+            yield self.name + "_count", _format_labels(self.labels, labels), cumulative
+
+
+class Metrics:
+
+    """
+    Registry of the metrics of the server.
+    """
+
+    def __init__(self):
+
+        self._metrics = {}
+        self._collectors = []
+
+    @classmethod
+    def instance(cls):
+        """
+        Singleton to return only one instance of Metrics.
+
+        :returns: instance of Metrics
+        """
+
+        if not hasattr(cls, "_instance") or cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _register(self, cls, name, *args, **kwargs):
+
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        return metric
+
+    def gauge(self, name, documentation, labels=()):
+
+        return self._register(Gauge, name, documentation, labels)
+
+    def counter(self, name, documentation, labels=()):
+
+        return self._register(Counter, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def add_collector(self, collector):
+        """
+        Adds a function called when the metrics are requested,
+        it updates gauges from the state of the server.
+
+        :param collector: Function without parameter
+        """
+
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self):
+        """
+        :returns: The metrics in the Prometheus text format
+        """
+
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                log.warning("Could not collect metrics with {}: {}".format(collector.__name__, e))
+
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append("# HELP {} {}".format(name, metric.documentation))
+            lines.append("# TYPE {} {}".format(name, metric.TYPE))
+            for sample_name, labels, value in metric.samples():
+                lines.append("{}{} {}".format(sample_name, labels, _format_value(value)))
+        return "\n".join(lines) + "\n"
+
+
+def timed_command(hypervisor):
+    """
+    Decorator recording the duration of the commands sent to a hypervisor,
+    by command verb (the first two words of the command).
+
+    :param hypervisor: Hypervisor name
+    """
+
+    histogram = Metrics.instance().histogram("gns3_hypervisor_command_duration_seconds",
+                                             "Duration of the commands sent to the hypervisors",
+                                             ("hypervisor", "command"))
+
+    def decorator(func):
+
+        func = asyncio.coroutine(func)
+
+        @functools.wraps(func)
+        @asyncio.coroutine
+        def wrapper(self, command, *args, **kwargs):
+            start = time.monotonic()
+            try:
+                return (yield from func(self, command, *args, **kwargs))
+            finally:
+                histogram.observe(time.monotonic() - start, hypervisor, " ".join(command.split()[:2]))
+        return wrapper
+    return decorator
@@ -47,4 +47,15 @@ class PingStats:
             cls._last_mem_percent = psutil.virtual_memory().percent
         stats["cpu_usage_percent"] = cls._last_cpu_percent
         stats["memory_usage_percent"] = cls._last_mem_percent
+        stats["memory_reservations"] = cls._memory_reservations()
         return stats
+
+    @staticmethod
+    def _memory_reservations():
+        """
+        RAM reserved by the nodes running on this server.
+        """
+
+        from gns3server.compute.memory_ledger import MemoryLedger
+        ledger = MemoryLedger.instance()
+        return {"capacity": ledger.capacity, "reserved": ledger.reserved}
@@ -20,9 +20,11 @@ import os.path
 import json
 import os
 
-from gns3server.handlers import *
+from gns3server.handlers import load_handlers
 from gns3server.web.route import Route
 
+load_handlers()
+
 
 class Documentation:
 
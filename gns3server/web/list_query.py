@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import aiohttp.web
+
+
+class ListQuery:
+
+    """
+    Parameters of the list endpoints, read from the query string:
+
+    * fields: comma separated names of the fields to return
+    * <field>=<value>: keep only the objects with this value, the fields
+      which can be filtered depend on the endpoint
+    * limit and cursor: pagination ordered by the cursor field, the cursor
+      of the next page is sent in the X-Next-Cursor header
+
+    :param query: Query of the request
+    :param filters: Fields which can be used as filters
+    :param cursor_field: Field used for the pagination, None if the list can't be paginated
+    """
+
+    def __init__(self, query, filters=(), cursor_field=None):
+
+        self._fields = None
+        if query.get("fields"):
+            self._fields = set(field.strip() for field in query["fields"].split(",") if field.strip())
+
+        self._filters = {}
+        for name, value in query.items():
+            if name in ("fields", "limit", "cursor"):
+                continue
+            if name not in filters:
+                raise aiohttp.web.HTTPBadRequest(text="Unknown parameter {}, this list can be filtered by: {}".format(name, ", ".join(filters) or "nothing"))
+            self._filters[name] = value
+
+        self._cursor_field = cursor_field
+        self._cursor = query.get("cursor")
+        self._limit = None
+        if query.get("limit") is not None:
+            try:
+                self._limit = int(query["limit"])
+            except ValueError:
+                self._limit = 0
+            if self._limit < 1:
+                raise aiohttp.web.HTTPBadRequest(text="The limit must be a positive integer")
+        if (self._limit or self._cursor) and cursor_field is None:
+            raise aiohttp.web.HTTPBadRequest(text="This list can't be paginated")
+
+    @property
+    def fields(self):
+        """
+        Fields to return, None for all the fields.
+        """
+
+        return self._fields
+
+    def wants(self, field):
+        """
+        :returns: True if the field is returned or used to filter the list
+        """
+
+        return self._fields is None or field in self._fields or field in self._filters
+
+    @staticmethod
+    def _matches(value, expected):
+
+        if isinstance(value, bool):
+            return expected.lower() in (("true", "1") if value else ("false", "0"))
+        if value is None:
+            return expected in ("", "null")
+        return str(value) == expected
+
+    def apply(self, items, serialize=None):
+        """
+        :param items: Objects with a __json__ method or dictionaries
+        :param serialize: Function (item, fields) returning the dictionary of an item,
+        fields is None when all of them are required. By default __json__ is used.
+        :returns: Tuple (list of dictionaries, cursor of the next page or None)
+        """
+
+        required = None
+        if self._fields is not None:
+            required = self._fields | set(self._filters)
+            if self._cursor_field:
+                required.add(self._cursor_field)
+
+        answers = []
+        for item in items:
+            if serialize:
+                answer = serialize(item, required)
+            elif hasattr(item, "__json__"):
+                answer = item.__json__()
+            else:
+                answer = item
+            if all(self._matches(answer.get(name), value) for name, value in self._filters.items()):
+                answers.append(answer)
+
+        next_cursor = None
+        if self._limit or self._cursor:
+            answers.sort(key=lambda answer: answer[self._cursor_field])
+            if self._cursor:
+                answers = [answer for answer in answers if answer[self._cursor_field] > self._cursor]
+            if self._limit and len(answers) > self._limit:
+                answers = answers[:self._limit]
+                next_cursor = answers[-1][self._cursor_field]
+
+        if self._fields is not None:
+            answers = [{name: value for name, value in answer.items() if name in self._fields} for answer in answers]
+        return answers, next_cursor
+
+    def respond(self, response, items, serialize=None):
+        """
+        Sends the list as the JSON answer of the request.
+        """
+
+        answers, next_cursor = self.apply(items, serialize=serialize)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = str(next_cursor)
+        # a projection doesn't match the output schema of the complete objects
+        response.json(answers, validate=self._fields is None)
@@ -26,12 +26,20 @@ import jinja2
 import sys
 import os
 
+from ..config import Config
 from ..utils.get_resource import get_resource
+from ..utils.file_watcher import FileWatcherService
+from ..utils.encoding import MSGPACK_CONTENT_TYPE, accepts_msgpack, pack
+from ..utils.compression import accepted_encoding, is_compressed, compressor, compress
+from ..utils.asyncio import wait_run_in_executor
 from ..version import __version__
 
 log = logging.getLogger(__name__)
 renderer = jinja2.Environment(loader=jinja2.FileSystemLoader(get_resource('templates')))
 
+# Size of the reads when a file can't be sent with sendfile
+FILE_CHUNK_SIZE = 256 * 1024
+
 
 class Response(aiohttp.web.Response):
 
@@ -59,7 +67,8 @@ class Response(aiohttp.web.Response):
                 log.debug("%s", request.json)
             log.info("Response: %d %s", self.status, self.reason)
             log.debug(dict(self.headers))
-            if hasattr(self, 'body') and self.body is not None and self.headers["CONTENT-TYPE"] == "application/json":
+            if hasattr(self, 'body') and self.body is not None and self.headers["CONTENT-TYPE"] == "application/json" \
+                    and aiohttp.hdrs.CONTENT_ENCODING not in self.headers:
                 log.debug(json.loads(self.body.decode('utf-8')))
         return (yield from super().prepare(request))
 
@@ -86,12 +95,14 @@ class Response(aiohttp.web.Response):
         kwargs["gns3_host"] = self._request.host
         self.html(template.render(**kwargs))
 
-    def json(self, answer):
+    def json(self, answer, validate=True):
         """
         Set the response content type to application/json and serialize
-        the content.
+        the content. The content is serialized with msgpack if the client
+        accepts it.
 
         :param anwser The response as a Python object
+        :param validate: Validate the answer with the output schema of the route
         """
 
         self.content_type = "application/json"
@@ -104,50 +115,263 @@ class Response(aiohttp.web.Response):
                     elem = elem.__json__()
                 newanswer.append(elem)
             answer = newanswer
-        if self._output_schema is not None:
+        if self._output_schema is not None and validate:
             try:
                 jsonschema.validate(answer, self._output_schema)
             except jsonschema.ValidationError as e:
                 log.error("Invalid output query. JSON schema error: {}".format(e.message))
                 raise aiohttp.web.HTTPBadRequest(text="{}".format(e))
+        if self._request is not None and accepts_msgpack(self._request):
+            self.content_type = MSGPACK_CONTENT_TYPE
+            self.body = pack(answer)
+            return
         self.body = json.dumps(answer, indent=4, sort_keys=True).encode('utf-8')
 
+    def _compression_encoding(self, size):
+        """
+        :param size: Size of the content
+        :returns: Encoding used to compress the content, None to send it as is
+        """
+
+        if self._request is None:
+            return None
+        server_config = Config.instance().get_section_config("Server")
+        if not server_config.getboolean("compression", True):
+            return None
+        if size < server_config.getint("compression_min_size", 1024):
+            return None
+        return accepted_encoding(self._request.headers.get(aiohttp.hdrs.ACCEPT_ENCODING, ""))
+
+    @asyncio.coroutine
+    def _compress_data(self, compress_function, data):
+        """
+        Compresses data, in a thread if they are large enough to block the loop.
+        """
+
+        thread_size = Config.instance().get_section_config("Server").getint("compression_thread_size", 64 * 1024)
+        if len(data) >= thread_size:
+            return (yield from wait_run_in_executor(compress_function, data))
+        return compress_function(data)
+
     @asyncio.coroutine
-    def file(self, path, status=200, set_content_length=True):
+    def compress(self):
         """
-        Return a file as a response
+        Compresses the body with the preferred encoding of the client. Nothing is
+        done for small bodies, already compressed content or a response already sent.
         """
-        ct, encoding = mimetypes.guess_type(path)
-        if not ct:
-            ct = 'application/octet-stream'
-        if encoding:
-            self.headers[aiohttp.hdrs.CONTENT_ENCODING] = encoding
-        self.content_type = ct
 
-        if set_content_length:
-            st = os.stat(path)
-            self.last_modified = st.st_mtime
-            self.headers[aiohttp.hdrs.CONTENT_LENGTH] = str(st.st_size)
-        else:
-            self.enable_chunked_encoding()
+        if self.prepared or not isinstance(self.body, (bytes, bytearray)):
+            return
+        if aiohttp.hdrs.CONTENT_ENCODING in self.headers or is_compressed(self.content_type):
+            return
+        encoding = self._compression_encoding(len(self.body))
+        if encoding is None:
+            return
+        self.body = yield from self._compress_data(lambda data: compress(data, encoding), self.body)
+        self.headers[aiohttp.hdrs.CONTENT_ENCODING] = encoding
+        self.headers[aiohttp.hdrs.VARY] = aiohttp.hdrs.ACCEPT_ENCODING
 
-        self.set_status(status)
+    @asyncio.coroutine
+    def file(self, path, status=200, set_content_length=True, content_type=None):
+        """
+        Return a file as a response. The file is sent with sendfile when
+        possible and a single HTTP range can be requested. Without range,
+        the file is compressed if the client accepts it.
+        """
+        if content_type is None:
+            content_type, encoding = mimetypes.guess_type(path)
+            if not content_type:
+                content_type = 'application/octet-stream'
+            if encoding:
+                self.headers[aiohttp.hdrs.CONTENT_ENCODING] = encoding
+        self.content_type = content_type
 
         try:
             with open(path, 'rb') as fobj:
+                if not set_content_length:
+                    self.enable_chunked_encoding()
+                    self.set_status(status)
+                    yield from self.prepare(self._request)
+                    yield from self._send_chunks(fobj, None)
+                    return
+
+                st = os.fstat(fobj.fileno())
+                self.last_modified = st.st_mtime
+                self.headers[aiohttp.hdrs.ACCEPT_RANGES] = "bytes"
+                encoding = self._file_encoding(path, st.st_size)
+                if encoding:
+                    self.set_status(status)
+                    yield from self._send_compressed(fobj, encoding)
+                    return
+                start, count = self._file_range(st.st_size)
+                if count != st.st_size:
+                    status = 206
+                    self.headers[aiohttp.hdrs.CONTENT_RANGE] = "bytes {}-{}/{}".format(start, start + count - 1, st.st_size)
+                self.headers[aiohttp.hdrs.CONTENT_LENGTH] = str(count)
+                self.set_status(status)
+
+                fobj.seek(start)
                 yield from self.prepare(self._request)
+                if count:
+                    yield from self._sendfile(fobj, start, count)
+        except FileNotFoundError:
+            raise aiohttp.web.HTTPNotFound()
+        except PermissionError:
+            raise aiohttp.web.HTTPForbidden()
 
-                while True:
-                    data = fobj.read(4096)
-                    if not data:
-                        break
-                    yield from self.write(data)
-                    yield from self.drain()
+    def _file_encoding(self, path, size):
+        """
+        :returns: Encoding used to compress a file, None to send it as is
+        """
+
+        if aiohttp.hdrs.CONTENT_ENCODING in self.headers or aiohttp.hdrs.RANGE in self._request.headers:
+            return None
+        if is_compressed(self.content_type, path):
+            return None
+        return self._compression_encoding(size)
+
+    @asyncio.coroutine
+    def _send_compressed(self, fobj, encoding):
+        """
+        Sends a file compressed by chunks, the size of the compressed
+        file is unknown so the chunked encoding is used.
+        """
 
+        self.headers[aiohttp.hdrs.CONTENT_ENCODING] = encoding
+        self.headers[aiohttp.hdrs.VARY] = aiohttp.hdrs.ACCEPT_ENCODING
+        self.enable_chunked_encoding()
+        yield from self.prepare(self._request)
+        stream = compressor(encoding)
+        while True:
+            data = fobj.read(FILE_CHUNK_SIZE)
+            if not data:
+                break
+            data = yield from self._compress_data(stream.compress, data)
+            if data:
+                yield from self.write(data)
+                yield from self.drain()
+        yield from self.write(stream.flush())
+
+    def _file_range(self, size):
+        """
+        :returns: tuple (start, count) of the part of the file requested by the Range header
+        """
+
+        try:
+            http_range = self._request.http_range
+        except ValueError:
+            # an invalid Range header is ignored
+            return 0, size
+        start, end = http_range.start, http_range.stop
+        if start is None and end is None:
+            return 0, size
+        if start is None:
+            # suffix range: the last bytes of the file
+            start, end = max(0, size + end), size
+        if end is None or end > size:
+            end = size
+        if start < size:
+            return start, end - start
+        raise aiohttp.web.HTTPRequestRangeNotSatisfiable(headers={aiohttp.hdrs.CONTENT_RANGE: "bytes */{}".format(size)})
+
+    @asyncio.coroutine
+    def _sendfile(self, fobj, offset, count):
+        """
+        Sends a part of a file with the sendfile system call,
+        the data are not copied to the user space.
+        """
+
+        transport = self._request.transport
+        sock = transport.get_extra_info("socket") if transport else None
+        if not hasattr(os, "sendfile") or sock is None or transport.get_extra_info("sslcontext"):
+            yield from self._send_chunks(fobj, count)
+            return
+
+        # the headers have to be sent before the file content
+        low, high = transport.get_write_buffer_limits()
+        transport.set_write_buffer_limits(high=0)
+        try:
+            yield from self.drain()
+        finally:
+            # the next responses of a keep alive connection use the usual limits
+            transport.set_write_buffer_limits(high=high, low=low)
+
+        loop = asyncio.get_event_loop()
+        # the socket is owned by the transport, the loop only accepts to
+        # wait for it to be writable with another file descriptor
+        out_fd = os.dup(sock.fileno())
+        in_fd = fobj.fileno()
+        try:
+            while count > 0:
+                try:
+                    sent = os.sendfile(out_fd, in_fd, offset, min(count, FILE_CHUNK_SIZE * 16))
+                except (BlockingIOError, InterruptedError):
+                    writable = asyncio.Future()
+                    loop.add_writer(out_fd, writable.set_result, None)
+                    try:
+                        yield from writable
+                    finally:
+                        loop.remove_writer(out_fd)
+                    continue
+                if sent == 0:
+                    # the file has been truncated
+                    break
+                offset += sent
+                count -= sent
+        finally:
+            os.close(out_fd)
+
+    @asyncio.coroutine
+    def _send_chunks(self, fobj, count):
+        """
+        Sends a file, or count bytes of it, by chunks.
+        """
+
+        while count is None or count > 0:
+            data = fobj.read(FILE_CHUNK_SIZE if count is None else min(count, FILE_CHUNK_SIZE))
+            if not data:
+                break
+            if count is not None:
+                count -= len(data)
+            yield from self.write(data)
+            yield from self.drain()
+
+    @asyncio.coroutine
+    def stream(self, path):
+        """
+        Streams a file which is still written (a packet capture for example),
+        the new data are sent as soon as they are written in the file.
+        """
+
+        self.set_status(200)
+        self.enable_chunked_encoding()
+
+        changed = asyncio.Event()
+        service = FileWatcherService.instance()
+        notified = service.add_listener(path, changed.set)
+        try:
+            with open(path, "rb") as f:
+                yield from self.prepare(self._request)
+                while True:
+                    # cleared before the read to not miss a write during the read
+                    changed.clear()
+                    data = f.read(FILE_CHUNK_SIZE)
+                    if data:
+                        yield from self.write(data)
+                        yield from self.drain()
+                    elif notified:
+                        try:
+                            yield from asyncio.wait_for(changed.wait(), 1)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        yield from asyncio.sleep(0.1)
         except FileNotFoundError:
             raise aiohttp.web.HTTPNotFound()
         except PermissionError:
             raise aiohttp.web.HTTPForbidden()
+        finally:
+            service.remove_listener(path, changed.set)
 
     def redirect(self, url):
         """
@@ -17,6 +17,7 @@
 
 import sys
 import json
+import time
 import urllib
 import asyncio
 import aiohttp
@@ -34,6 +35,16 @@ from ..controller.gns3vm.gns3_vm_error import GNS3VMError
 from .response import Response
 from ..crash_report import CrashReport
 from ..config import Config
+from ..utils.metrics import Metrics
+from ..utils.encoding import MSGPACK_AVAILABLE, MSGPACK_CONTENT_TYPE, unpack
+from ..utils.asyncio.loop_watchdog import LoopWatchdog
+
+REQUEST_DURATION = Metrics.instance().histogram("gns3_http_request_duration_seconds",
+                                                "Duration of the API requests",
+                                                ("method", "route", "status"))
+REQUESTS_IN_PROGRESS = Metrics.instance().gauge("gns3_http_requests_in_progress",
+                                                "Number of API requests being processed",
+                                                ("method", "route"))
 
 
 @asyncio.coroutine
@@ -43,7 +54,12 @@ def parse_request(request, input_schema, raw):
     request.json = {}
     if not raw:
         body = yield from request.read()
-        if body:
+        if body and MSGPACK_AVAILABLE and request.content_type == MSGPACK_CONTENT_TYPE:
+            try:
+                request.json = unpack(body)
+            except ValueError as e:
+                raise aiohttp.web.HTTPBadRequest(text="Invalid msgpack {}".format(e))
+        elif body:
             try:
                 request.json = json.loads(body.decode('utf-8'))
             except ValueError as e:
@@ -179,6 +195,7 @@ class Route(object):
 
                         request = yield from parse_request(request, None, raw)
                         yield from func(request, response)
+                        yield from response.compress()
                         return response
 
                     # API call
@@ -200,6 +217,10 @@ class Route(object):
                 except aiohttp.web.HTTPException as e:
                     response = Response(request=request, route=route)
                     response.set_status(e.status)
+                    # keep the headers of the error, for example the Content-Range of a 416
+                    for name, value in e.headers.items():
+                        if name not in (aiohttp.hdrs.CONTENT_TYPE, aiohttp.hdrs.CONTENT_LENGTH):
+                            response.headers[name] = value
                     response.json({"message": e.text, "status": e.status})
                 except (ControllerError, GNS3VMError) as e:
                     log.error("Controller error detected: {type}".format(type=type(e)), exc_info=1)
@@ -239,6 +260,7 @@ class Route(object):
                         tb = "\n".join(lines)
                         response.html("<h1>Internal error</h1><pre>{}</pre>".format(tb))
 
+                yield from response.compress()
                 return response
 
             @asyncio.coroutine
@@ -248,6 +270,24 @@ class Route(object):
                 between the same instance of the node
                 """
 
+                start = time.monotonic()
+                status = 500
+                REQUESTS_IN_PROGRESS.inc(method, route)
+                # the stalls of the event loop are attributed to the route
+                task = asyncio.Task.current_task()
+                LoopWatchdog.instance().label_task(task, "{} {}".format(method, route))
+                try:
+                    response = yield from lock_node(request)
+                    status = response.status
+                    return response
+                finally:
+                    LoopWatchdog.instance().label_task(task, None)
+                    REQUESTS_IN_PROGRESS.dec(method, route)
+                    REQUEST_DURATION.observe(time.monotonic() - start, method, route, status)
+
+            @asyncio.coroutine
+            def lock_node(request):
+
                 if "node_id" in request.match_info:
                     node_id = request.match_info.get("node_id")
 
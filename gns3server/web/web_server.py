@@ -28,16 +28,16 @@ import aiohttp_cors
 import functools
 import time
 import atexit
+import psutil
+import contextlib
 
 from .route import Route
 from ..config import Config
-from ..compute import MODULES
+from ..compute import get_instantiated_managers
 from ..compute.port_manager import PortManager
-from ..compute.qemu import Qemu
 from ..controller import Controller
-
-# do not delete this import
-import gns3server.handlers
+from ..handlers import load_handlers
+from ..utils.asyncio.loop_watchdog import LoopWatchdog
 
 import logging
 log = logging.getLogger(__name__)
@@ -48,10 +48,17 @@ if not (aiohttp.__version__.startswith("2.2") or aiohttp.__version__.startswith(
 
 class WebServer:
 
-    def __init__(self, host, port):
+    """
+    :param controller: Run the controller
+    :param compute: Run the compute
+    """
+
+    def __init__(self, host, port, controller=True, compute=True):
 
         self._host = host
         self._port = port
+        self._controller = controller
+        self._compute = compute
         self._loop = None
         self._handler = None
         self._server = None
@@ -59,9 +66,10 @@ class WebServer:
         self._start_time = time.time()
         self._running = False
         self._closing = False
+        self._startup_phases = []
 
     @staticmethod
-    def instance(host=None, port=None):
+    def instance(host=None, port=None, controller=True, compute=True):
         """
         Singleton to return only one instance of Server.
 
@@ -71,9 +79,40 @@ class WebServer:
         if not hasattr(WebServer, "_instance") or WebServer._instance is None:
             assert host is not None
             assert port is not None
-            WebServer._instance = WebServer(host, port)
+            WebServer._instance = WebServer(host, port, controller=controller, compute=compute)
         return WebServer._instance
 
+    @contextlib.contextmanager
+    def _startup_phase(self, name):
+        """
+        Measures the duration of a step of the server startup.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._startup_phases.append((name, time.perf_counter() - start))
+
+    @property
+    def startup_phases(self):
+        """
+        Durations of the startup steps (name, seconds) in the execution order.
+        """
+
+        return list(self._startup_phases)
+
+    def _log_startup_phases(self, run_start):
+
+        try:
+            # includes the start of the interpreter and the imports
+            since_process_start = " ({:.3f}s since the process start)".format(time.time() - psutil.Process().create_time())
+        except psutil.Error:
+            since_process_start = ""
+        log.info("Server started in {:.3f}s{}: {}".format(time.perf_counter() - run_start,
+                                                           since_process_start,
+                                                           ", ".join("{} {:.3f}s".format(name, duration) for name, duration in self._startup_phases)))
+
     def _run_application(self, handler, ssl_context=None):
         try:
             srv = self._loop.create_server(handler, self._host, self._port, ssl=ssl_context)
@@ -110,12 +149,17 @@ class WebServer:
         if self._app:
             yield from self._app.cleanup()
 
-        yield from Controller.instance().stop()
+        if self._controller:
+            yield from Controller.instance().stop()
 
-        for module in MODULES:
-            log.debug("Unloading module {}".format(module.__name__))
-            m = module.instance()
-            yield from m.unload()
+        # the emulator modules which have never been used are not loaded
+        for manager in get_instantiated_managers():
+            log.debug("Unloading module {}".format(manager.module_name))
+            yield from manager.unload()
+        if self._compute:
+            from ..compute.nvram_extractor import NVRAMExtractor
+            NVRAMExtractor.instance().shutdown()
+        LoopWatchdog.instance().stop()
 
         if PortManager.instance().tcp_ports:
             log.warning("TCP ports are still used {}".format(PortManager.instance().tcp_ports))
@@ -199,17 +243,31 @@ class WebServer:
         """
         Called when the HTTP server start
         """
-        yield from Controller.instance().start()
-        # Because with a large image collection
-        # without md5sum already computed we start the
-        # computing with server start
-        asyncio.async(Qemu.instance().list_images())
+        LoopWatchdog.instance().start()
+        if self._controller:
+            with self._startup_phase("controller"):
+                # a controller without the compute API has no local compute
+                yield from Controller.instance().start(local_compute=self._compute)
+        if self._compute:
+            from ..compute.qemu import Qemu
+            from ..compute.probe_cache import ProbeCache
+            from ..compute.dynamips import Dynamips
+            # Because with a large image collection
+            # without md5sum already computed we start the
+            # computing with server start
+            asyncio.async(Qemu.instance().list_images())
+            # Versions of the emulators are probed only once
+            asyncio.async(ProbeCache.instance().warmup())
+            # Ghost files of a previous run are not referenced anymore
+            asyncio.async(Dynamips.instance().prune_ghosts())
 
     def run(self):
         """
         Starts the server.
         """
 
+        run_start = time.perf_counter()
+
         server_logger = logging.getLogger('aiohttp.server')
         # In debug mode we don't use the standard request log but a more complete in response.py
         if log.getEffectiveLevel() == logging.DEBUG:
@@ -247,6 +305,13 @@ class WebServer:
         for key, val in os.environ.items():
             log.debug("ENV %s=%s", key, val)
 
+        if not self._controller:
+            log.info("Controller is disabled, running only the compute")
+        if not self._compute:
+            log.info("Compute is disabled, running only the controller")
+        with self._startup_phase("handlers"):
+            load_handlers(controller=self._controller, compute=self._compute)
+
         self._app = aiohttp.web.Application()
         # Background task started with the server
         self._app.on_startup.append(self._on_startup)
@@ -264,13 +329,11 @@ class WebServer:
 
         PortManager.instance().console_host = self._host
 
-        for method, route, handler in Route.get_routes():
-            log.debug("Adding route: {} {}".format(method, route))
-            cors.add(self._app.router.add_route(method, route, handler))
-        for module in MODULES:
-            log.debug("Loading module {}".format(module.__name__))
-            m = module.instance()
-            m.port_manager = PortManager.instance()
+        # the emulator managers are created when they are used for the first time
+        with self._startup_phase("routes"):
+            for method, route, handler in Route.get_routes():
+                log.debug("Adding route: {} {}".format(method, route))
+                cors.add(self._app.router.add_route(method, route, handler))
 
         log.info("Starting server on {}:{}".format(self._host, self._port))
 
@@ -278,6 +341,7 @@ class WebServer:
         if self._run_application(self._handler, ssl_context) is False:
             self._loop.stop()
             return
+        self._log_startup_phases(run_start)
 
         self._signal_handling()
         self._exit_handling()
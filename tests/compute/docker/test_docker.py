@@ -20,7 +20,7 @@ import asyncio
 from unittest.mock import MagicMock, patch
 
 from tests.utils import asyncio_patch, AsyncioMagicMock
-from gns3server.compute.docker import Docker, DOCKER_PREFERRED_API_VERSION, DOCKER_MINIMUM_API_VERSION
+from gns3server.compute.docker import Docker, DOCKER_PREFERRED_API_VERSION, DOCKER_MINIMUM_API_VERSION, DOCKER_IMAGE_CACHE_TTL, DOCKER_IMAGE_CACHE_SIZE
 from gns3server.compute.docker.docker_error import DockerError, DockerHttp404Error
 
 
@@ -198,4 +198,86 @@ def test_docker_check_connection_docker_preferred_version_against_older(vm, loop
         asyncio_patch("gns3server.compute.docker.Docker.query", return_value=response):
         vm._connected = False
         loop.run_until_complete(asyncio.async(vm._check_connection()))
-        assert vm._api_version == DOCKER_MINIMUM_API_VERSION
\ No newline at end of file
+        assert vm._api_version == DOCKER_MINIMUM_API_VERSION
+
+
+def test_image_information_cache(loop, vm):
+
+    response = {"Id": "sha256:4e38e38c8ce0", "Config": {}}
+    with asyncio_patch("gns3server.compute.docker.Docker.query", return_value=response) as mock:
+        loop.run_until_complete(asyncio.async(vm.image_information("ubuntu:latest")))
+        info = loop.run_until_complete(asyncio.async(vm.image_information("ubuntu:latest")))
+        assert mock.call_count == 1
+        mock.assert_called_with("GET", "images/ubuntu:latest/json")
+    assert info == response
+
+    vm.invalidate_image("ubuntu:latest")
+    assert len(vm._image_cache) == 0
+    with asyncio_patch("gns3server.compute.docker.Docker.query", return_value=response) as mock:
+        loop.run_until_complete(asyncio.async(vm.image_information("ubuntu:latest")))
+        assert mock.call_count == 1
+
+
+def test_image_information_cache_expire(loop, vm):
+
+    response = {"Id": "sha256:4e38e38c8ce0", "Config": {}}
+    with asyncio_patch("gns3server.compute.docker.Docker.query", return_value=response) as mock:
+        with patch("time.time", return_value=1000):
+            loop.run_until_complete(asyncio.async(vm.image_information("ubuntu:latest")))
+        # The image can have been rebuilt outside of GNS3
+        with patch("time.time", return_value=1000 + DOCKER_IMAGE_CACHE_TTL):
+            loop.run_until_complete(asyncio.async(vm.image_information("ubuntu:latest")))
+        assert mock.call_count == 2
+
+
+def test_image_information_cache_size(loop, vm):
+
+    response = {"Id": "sha256:4e38e38c8ce0", "Config": {}}
+    with asyncio_patch("gns3server.compute.docker.Docker.query", return_value=response):
+        for i in range(DOCKER_IMAGE_CACHE_SIZE + 1):
+            loop.run_until_complete(asyncio.async(vm.image_information("image{}".format(i))))
+    assert len(vm._image_cache) == DOCKER_IMAGE_CACHE_SIZE
+    assert "image0" not in vm._image_cache
+
+
+def test_image_information_single_flight(loop, vm):
+
+    response = {"Id": "sha256:4e38e38c8ce0", "Config": {}}
+    with asyncio_patch("gns3server.compute.docker.Docker.query", return_value=response) as mock:
+        tasks = [vm.image_information("ubuntu:latest") for _ in range(10)]
+        results = loop.run_until_complete(asyncio.gather(*tasks))
+        assert mock.call_count == 1
+    assert results == [response] * 10
+
+
+def test_exec_command(loop, vm):
+
+    response = MagicMock()
+
+    @asyncio.coroutine
+    def read():
+        return b""
+
+    response.read.side_effect = read
+    with asyncio_patch("gns3server.compute.docker.Docker.query", return_value={"Id": "a1b2", "ExitCode": 0}) as mock_query:
+        with asyncio_patch("gns3server.compute.docker.Docker.http_query", return_value=response) as mock_http:
+            exit_code = loop.run_until_complete(asyncio.async(vm.exec_command("e90e34656842", ["ls", "/"])))
+    assert exit_code == 0
+    mock_query.assert_any_call("POST", "containers/e90e34656842/exec", data={
+        "AttachStdin": False,
+        "AttachStdout": True,
+        "AttachStderr": True,
+        "Tty": False,
+        "Cmd": ["ls", "/"]
+    })
+    mock_http.assert_called_with("POST", "exec/a1b2/start", data={"Detach": False, "Tty": False}, timeout=None)
+    mock_query.assert_called_with("GET", "exec/a1b2/json")
+
+
+def test_record_latency(vm):
+
+    vm.record_latency("start", 1.0)
+    vm.record_latency("start", 3.0)
+    stats = vm.latencies()
+    assert stats["start"] == {"count": 2, "average": 2.0, "max": 3.0}
+    assert stats["stop"]["count"] == 0
@@ -939,24 +939,29 @@ def test_create_network_interfaces(vm):
 def test_fix_permission(vm, loop):
     vm._volumes = ["/etc"]
     vm._get_container_state = AsyncioMagicMock(return_value="running")
-    process = MagicMock()
-    with asyncio_patch("asyncio.subprocess.create_subprocess_exec", return_value=process) as mock_exec:
+    with asyncio_patch("gns3server.compute.docker.Docker.exec_command", return_value=0) as mock_exec:
         loop.run_until_complete(vm._fix_permissions())
-    mock_exec.assert_called_with('docker', 'exec', 'e90e34656842', '/gns3/bin/busybox', 'sh', '-c', '(/gns3/bin/busybox find "/etc" -depth -print0 | /gns3/bin/busybox xargs -0 /gns3/bin/busybox stat -c \'%a:%u:%g:%n\' > "/etc/.gns3_perms") && /gns3/bin/busybox chmod -R u+rX "/etc" && /gns3/bin/busybox chown {}:{} -R "/etc"'.format(os.getuid(), os.getgid()))
-    assert process.wait.called
+    mock_exec.assert_called_with('e90e34656842', ['/gns3/bin/busybox', 'sh', '-c', '(/gns3/bin/busybox find "/etc" -depth -print0 | /gns3/bin/busybox xargs -0 /gns3/bin/busybox stat -c \'%a:%u:%g:%n\' > "/etc/.gns3_perms") && /gns3/bin/busybox chmod -R u+rX "/etc" && /gns3/bin/busybox chown {}:{} -R "/etc"'.format(os.getuid(), os.getgid())])
+
+
+def test_fix_permission_exec_error(vm, loop):
+    vm._volumes = ["/etc", "/var"]
+    vm._get_container_state = AsyncioMagicMock(return_value="running")
+    with asyncio_patch("gns3server.compute.docker.Docker.exec_command", side_effect=DockerError("Docker has returned an error: 409")) as mock_exec:
+        loop.run_until_complete(vm._fix_permissions())
+    # A failure doesn't prevent the other volumes from being fixed
+    assert mock_exec.call_count == 2
 
 
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="Not supported on Windows")
 def test_fix_permission_not_running(vm, loop):
     vm._volumes = ["/etc"]
     vm._get_container_state = AsyncioMagicMock(return_value="stopped")
-    process = MagicMock()
     with asyncio_patch("gns3server.compute.docker.Docker.query") as mock_start:
-        with asyncio_patch("asyncio.subprocess.create_subprocess_exec", return_value=process) as mock_exec:
+        with asyncio_patch("gns3server.compute.docker.Docker.exec_command", return_value=0) as mock_exec:
             loop.run_until_complete(vm._fix_permissions())
-    mock_exec.assert_called_with('docker', 'exec', 'e90e34656842', '/gns3/bin/busybox', 'sh', '-c', '(/gns3/bin/busybox find "/etc" -depth -print0 | /gns3/bin/busybox xargs -0 /gns3/bin/busybox stat -c \'%a:%u:%g:%n\' > "/etc/.gns3_perms") && /gns3/bin/busybox chmod -R u+rX "/etc" && /gns3/bin/busybox chown {}:{} -R "/etc"'.format(os.getuid(), os.getgid()))
-    assert mock_start.called
-    assert process.wait.called
+    mock_exec.assert_called_with('e90e34656842', ['/gns3/bin/busybox', 'sh', '-c', '(/gns3/bin/busybox find "/etc" -depth -print0 | /gns3/bin/busybox xargs -0 /gns3/bin/busybox stat -c \'%a:%u:%g:%n\' > "/etc/.gns3_perms") && /gns3/bin/busybox chmod -R u+rX "/etc" && /gns3/bin/busybox chown {}:{} -R "/etc"'.format(os.getuid(), os.getgid())])
+    mock_start.assert_called_with("POST", "containers/e90e34656842/start")
 
 
 def test_read_console_output_with_binary_mode(vm, loop):
@@ -25,7 +25,7 @@ import asyncio
 
 from gns3server.compute.dynamips import Dynamips
 from gns3server.compute.dynamips.dynamips_error import DynamipsError
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 
@@ -126,3 +126,249 @@ def test_duplicate_node(manager, project, async_run):
         with open(destination_node.startup_config_path) as f:
             content = f.read()
             assert content == '!\nhostname R2\necho TEST'
+
+
+def test_idlepc_database(manager, tmpdir):
+    from gns3server.compute.dynamips.idlepc_database import IdlePCDatabase
+
+    path = str(tmpdir / "idlepc.json")
+    database = IdlePCDatabase(path)
+    assert database.get("c1f7e3f3", "c7200") is None
+    database.set("c1f7e3f3", "c7200", "0x60606f54", image="c7200.image")
+    assert database.get("c1f7e3f3", "c7200") == "0x60606f54"
+    assert database.get("c1f7e3f3", "c3725") is None
+
+    # The values are persisted
+    database = IdlePCDatabase(path)
+    assert database.get("c1f7e3f3", "c7200") == "0x60606f54"
+    assert database.entries()[0]["image"] == "c7200.image"
+
+    database.remove("c1f7e3f3", "c7200")
+    assert IdlePCDatabase(path).get("c1f7e3f3", "c7200") is None
+
+
+def test_auto_idlepc_known_value(manager, async_run):
+    vm = AsyncioMagicMock()
+    vm.image = "/tmp/c7200.image"
+    vm.platform = "c7200"
+    manager.idlepc_database.set("c1f7e3f3", "c7200", "0x60606f54")
+    with patch("gns3server.compute.dynamips.md5sum", return_value="c1f7e3f3"):
+        with asyncio_patch("gns3server.compute.dynamips.Dynamips._sequential_auto_idlepc") as mock_probe:
+            assert async_run(manager.auto_idlepc(vm)) == "0x60606f54"
+            assert not mock_probe.called
+    vm.set_idlepc.assert_called_with("0x60606f54")
+
+
+def test_auto_idlepc_store_value(manager, async_run):
+    vm = AsyncioMagicMock()
+    vm.image = "/tmp/c3725.image"
+    vm.platform = "c3725"
+    with patch("gns3server.compute.dynamips.md5sum", return_value="a3f7e3f3"):
+        with asyncio_patch("gns3server.compute.dynamips.Dynamips._sequential_auto_idlepc", return_value="0x60c09aa0"):
+            assert async_run(manager.auto_idlepc(vm)) == "0x60c09aa0"
+    assert manager.idlepc_database.get("a3f7e3f3", "c3725") == "0x60c09aa0"
+    assert os.path.exists(manager.idlepc_database.path)
+
+
+def test_idlepc_candidates(manager):
+    assert manager._idlepc_candidates(["0x60606f54 [33]", "0x6060 [10]", "0x60c09aa0 [12]"]) == ["0x60606f54", "0x60c09aa0"]
+
+
+def test_idlepc_probe_instances(manager):
+    with patch("psutil.cpu_count", return_value=4):
+        assert manager._idlepc_probe_instances(8) == 4
+        assert manager._idlepc_probe_instances(2) == 2
+        assert manager._idlepc_probe_instances(4, concurrency=2) == 2
+        assert manager._idlepc_probe_instances(4, concurrency=8) == 1
+
+
+def test_parallel_auto_idlepc_recheck(manager, async_run):
+    routers = []
+    for _ in range(3):
+        router = AsyncioMagicMock()
+        router.get_idle_pc_prop = AsyncioMagicMock(return_value=["0x60606f54 [33]", "0x60c09aa0 [12]"])
+        routers.append(router)
+    created = list(routers)
+
+    @asyncio.coroutine
+    def create(*args):
+        return created.pop(0)
+
+    deleted = []
+
+    @asyncio.coroutine
+    def delete(router):
+        deleted.append(router)
+
+    probes = []
+
+    @asyncio.coroutine
+    def probe(router, idlepc):
+        probes.append((router, idlepc, len(routers) - len(deleted)))
+        # The first value only looks valid when the routers compete for the CPU
+        if idlepc == "0x60606f54":
+            return len(routers) - len(deleted) > 1
+        return True
+
+    with patch("gns3server.compute.dynamips.Dynamips._create_scratch_router", side_effect=create):
+        with patch("gns3server.compute.dynamips.Dynamips._delete_scratch_router", side_effect=delete):
+            with patch("gns3server.compute.dynamips.Dynamips._probe_idlepc", side_effect=probe):
+                with asyncio_patch("asyncio.sleep"):
+                    assert async_run(manager._parallel_auto_idlepc(None, 3, image="/tmp/c7200.image", platform="c7200", ram=256)) == "0x60c09aa0"
+    assert len(deleted) == 3
+    # The winning value is confirmed with only one router running
+    assert probes[-1][1:] == ("0x60c09aa0", 1)
+
+
+def test_delete_scratch_router_not_created(manager, async_run):
+    router = AsyncioMagicMock()
+    router.name = "idlepc"
+    router.clean_delete = AsyncioMagicMock(side_effect=ValueError("list.remove(x): x not in list"))
+    async_run(manager._delete_scratch_router(router))
+    assert router.hypervisor.stop.called
+
+
+def test_platform_from_image(manager):
+    assert manager.platform_from_image("c7200-adventerprisek9-mz.124-24.T5.image") == "c7200"
+    assert manager.platform_from_image("c3640-a3js-mz.124-25d.image") == "c3600"
+    assert manager.platform_from_image("c2691-adventerprisek9-mz.124-15.T14.image") == "c2691"
+    assert manager.platform_from_image("c2600-adventerprisek9-mz.124-15.T14.image") == "c2600"
+    assert manager.platform_from_image("c1710-bk9no3r2sy-mz.124-23.image") == "c1700"
+    assert manager.platform_from_image("vios-adventerprisek9-m.vmdk") is None
+
+
+def _ghost_vm(image, ram=128, platform="c3725"):
+    vm = AsyncioMagicMock()
+    vm.id = str(uuid.uuid4())
+    vm.mmap = True
+    vm.image = image
+    vm.ram = ram
+    vm.platform = platform
+    vm.ghost_file = ""
+    vm.formatted_ghost_file = MagicMock(return_value="{}-{}.ghost".format(os.path.basename(image), ram))
+    return vm
+
+
+def test_set_ghost_ios_single_flight(manager, async_run, tmpdir):
+    images = []
+    for name in ("c3725.image", "c3745.image"):
+        path = str(tmpdir / name)
+        open(path, "w+").close()
+        images.append(path)
+
+    calls = []
+
+    @asyncio.coroutine
+    def create_ghost(vm, key):
+        calls.append(key)
+        yield from asyncio.sleep(0.01)
+        signature = manager._image_signature(key[0])
+        path = manager._ghost_file_path(vm, signature)
+        open(path, "w+").close()
+        manager._ghosts[path] = {"key": key, "signature": signature, "references": set()}
+
+    vms = [_ghost_vm(images[0]) for _ in range(5)] + [_ghost_vm(images[1]) for _ in range(5)]
+    with patch("gns3server.config.Config.get_section_config", return_value={"ghost_cache_path": str(tmpdir / "ghosts")}):
+        with patch("gns3server.compute.dynamips.Dynamips._create_ghost", side_effect=create_ghost):
+            async_run(asyncio.gather(*[manager._set_ghost_ios(vm) for vm in vms]))
+
+            # One creation by image and the two images are built at the same time
+            assert sorted(calls) == sorted([(images[0], 128, "c3725"), (images[1], 128, "c3725")])
+            for vm in vms:
+                vm.set_ghost_status.assert_called_with(2)
+            ghosts = sorted(manager.ghosts(), key=lambda g: g["image"])
+            assert [g["references"] for g in ghosts] == [5, 5]
+
+            # A ghost file is reused as long as the image doesn't change
+            async_run(manager._set_ghost_ios(_ghost_vm(images[0])))
+            assert len(calls) == 2
+
+
+def test_ghost_file_path(manager, tmpdir):
+    signature = (42, 1.0)
+    with patch("gns3server.config.Config.get_section_config", return_value={"ghost_cache_path": str(tmpdir)}):
+        path1 = manager._ghost_file_path(_ghost_vm("/a/c3725.image"), signature)
+        path2 = manager._ghost_file_path(_ghost_vm("/b/c3725.image"), signature)
+        path3 = manager._ghost_file_path(_ghost_vm("/a/c3725.image"), (43, 2.0))
+    assert len({path1, path2, path3}) == 3
+    assert os.path.basename(path1).startswith("c3725-")
+    assert path1.endswith("c3725.image-128.ghost")
+
+
+def _register_ghost(manager, tmpdir, key, name, references=None):
+    path = str(tmpdir / name)
+    open(path, "w+").close()
+    manager._ghosts[path] = {"key": key, "signature": manager._image_signature(key[0]), "references": set(references or [])}
+    return path
+
+
+def test_release_ghost(manager, async_run, tmpdir):
+    image = str(tmpdir / "c3725.image")
+    open(image, "w+").close()
+    vm = _ghost_vm(image)
+    key = (image, 128, "c3725")
+    ghost_path = _register_ghost(manager, tmpdir, key, "c3725-c3725.image-128.ghost")
+
+    async_run(manager._set_ghost_ios(vm))
+    vm.set_ghost_file.assert_called_with(ghost_path)
+    assert manager._ghosts[ghost_path]["references"] == {vm.id}
+
+    # Still used, the file is kept
+    async_run(manager._delete_unused_ghosts())
+    assert os.path.exists(ghost_path)
+
+    # Unused but current, the file stays in the cache
+    async_run(manager.release_ghost(vm))
+    assert manager._ghosts[ghost_path]["references"] == set()
+    assert os.path.exists(ghost_path)
+
+    async_run(manager._delete_unused_ghosts())
+    assert not os.path.exists(ghost_path)
+    assert manager.ghosts() == []
+
+
+def test_prune_ghosts(manager, async_run, tmpdir):
+    image = str(tmpdir / "c3725.image")
+    open(image, "w+").close()
+    key = (image, 128, "c3725")
+    os.makedirs(str(tmpdir / "ghosts"))
+    used_path = _register_ghost(manager, tmpdir / "ghosts", key, "used.ghost")
+    orphan_path = str(tmpdir / "ghosts" / "orphan.ghost")
+    open(orphan_path, "w+").close()
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"ghost_cache_path": str(tmpdir / "ghosts")}):
+        async_run(manager.prune_ghosts())
+    assert os.path.exists(used_path)
+    assert not os.path.exists(orphan_path)
+
+
+def test_release_ghost_outdated(manager, async_run, tmpdir):
+    image = str(tmpdir / "c3725.image")
+    open(image, "w+").close()
+    vm = _ghost_vm(image)
+    key = (image, 128, "c3725")
+    old_path = _register_ghost(manager, tmpdir, key, "old.ghost", references=[vm.id])
+
+    # The image is replaced, the running router keeps the old ghost file
+    with open(image, "w+") as f:
+        f.write("new image")
+    new_path = _register_ghost(manager, tmpdir, key, "new.ghost")
+    assert manager._current_ghost(key) == new_path
+    assert os.path.exists(old_path)
+
+    async_run(manager.release_ghost(vm))
+    assert not os.path.exists(old_path)
+    assert os.path.exists(new_path)
+
+
+def test_evict_ghosts(manager, async_run, tmpdir):
+    paths = []
+    for i in range(3):
+        image = str(tmpdir / "c3725-{}.image".format(i))
+        open(image, "w+").close()
+        paths.append(_register_ghost(manager, tmpdir, (image, 128, "c3725"), "{}.ghost".format(i)))
+        manager._ghosts[paths[-1]]["last_used"] = i
+
+    with patch("gns3server.config.Config.get_section_config", return_value=MagicMock(getint=MagicMock(return_value=1))):
+        async_run(manager._evict_ghosts())
+    assert [os.path.exists(path) for path in paths] == [False, False, True]
@@ -19,9 +19,11 @@ import os
 import uuid
 import pytest
 import asyncio
+import base64
 import configparser
 
 from unittest.mock import patch
+from tests.utils import asyncio_patch
 from gns3server.compute.dynamips.nodes.router import Router
 from gns3server.compute.dynamips.dynamips_error import DynamipsError
 from gns3server.compute.dynamips import Dynamips
@@ -73,3 +75,18 @@ def test_router_invalid_dynamips_path(project, manager, loop):
         loop.run_until_complete(asyncio.async(router.create()))
         assert router.name == "test"
         assert router.id == "00010203-0405-0607-0809-0a0b0c0d0e0e"
+
+
+def test_save_configs_unchanged_nvram(router, loop):
+    nvram = router._memory_files()[1]
+    os.makedirs(os.path.dirname(nvram), exist_ok=True)
+    open(nvram, "w+").close()
+    startup_config = base64.b64encode(b"hostname R1\n").decode()
+    with asyncio_patch("gns3server.compute.dynamips.nodes.router.Router.extract_config", return_value=(startup_config, None)) as mock:
+        loop.run_until_complete(router.save_configs())
+        assert mock.call_count == 1
+        # The NVRAM has not changed since the last extraction
+        loop.run_until_complete(router.save_configs())
+        assert mock.call_count == 1
+    with open(os.path.join(router._working_directory, router.startup_config_path)) as f:
+        assert "hostname R1" in f.read()
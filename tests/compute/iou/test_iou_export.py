@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+import pytest
+
+from gns3server.compute.iou.utils.iou_export import uncompress_LZC, nvram_export
+
+
+CONFIG = b"hostname R1\n!\ninterface Ethernet0/0\n ip address 10.0.0.1 255.255.255.0\n!\nend\n" * 3
+
+# CONFIG compressed in .Z format (16 bits, block mode)
+CONFIG_LZC = base64.b64decode(
+    "H52QaN7MoeMmTJsyIKTEUBBCQRo3dMrIMRNmDMIidNBIdFOGDowXMBSASAMHRBgyZOSUmTMHRAwYLmDCjAFCRo0aLmzi"
+    "1BmToYIybsgoCDiw4MGECxs+jDix4sWMGzt+DDmy5MmUK1u+jMmVJs+vN3s2BCqUKEGDCBX6XCqRokUQGDXK4egRpEiS"
+    "JlGqZOlSZteaYcHiDDk2qAI="
+)
+
+
+def test_uncompress_LZC():
+    assert uncompress_LZC(CONFIG_LZC) == CONFIG
+    assert uncompress_LZC(b"") == b""
+
+
+def test_uncompress_LZC_invalid():
+    with pytest.raises(ValueError):
+        uncompress_LZC(b"\x1f")
+    with pytest.raises(ValueError):
+        uncompress_LZC(b"\x1f\x8b\x90")
+    with pytest.raises(ValueError):
+        # first code references a dictionary entry not yet defined
+        uncompress_LZC(b"\x1f\x9d\x90\xff\xff")
+
+
+def test_nvram_export_compressed():
+    length = len(CONFIG_LZC)
+    header = bytearray(36)
+    header[0:2] = b"\xab\xcd"
+    header[2:4] = b"\x00\x02"
+    header[16:20] = length.to_bytes(4, "big")
+    nvram = bytes(header) + CONFIG_LZC
+    startup, private = nvram_export(nvram)
+    assert startup == CONFIG
+    assert private is None
@@ -36,6 +36,7 @@ if not sys.platform.startswith("win"):
     from gns3server.compute.iou.iou_error import IOUError
     from gns3server.compute.iou import IOU
 
+from gns3server.compute.probe_cache import ProbeCache
 from gns3server.config import Config
 
 
@@ -126,7 +127,7 @@ def test_start_with_iourc(loop, vm, tmpdir):
     vm._start_ubridge = AsyncioMagicMock(return_value=True)
     vm._ubridge_send = AsyncioMagicMock()
 
-    with patch("gns3server.config.Config.get_section_config", return_value={"iourc_path": fake_file}):
+    with patch("gns3server.compute.iou.iou_vm.IOUVM._config", return_value={"iourc_path": fake_file}):
         with asyncio_patch("asyncio.create_subprocess_exec", return_value=mock_process) as exec_mock:
             mock_process.returncode = None
             loop.run_until_complete(asyncio.async(vm.start()))
@@ -313,6 +314,12 @@ def test_library_check(loop, vm):
 
         loop.run_until_complete(asyncio.async(vm._library_check()))
 
+    # ldd is not executed again as long as the image doesn't change
+    with asyncio_patch("gns3server.utils.asyncio.subprocess_check_output", return_value="libssl => not found") as mock:
+        loop.run_until_complete(asyncio.async(vm._library_check()))
+        assert not mock.called
+
+    ProbeCache.instance().clear()
     with asyncio_patch("gns3server.utils.asyncio.subprocess_check_output", return_value="libssl => not found") as mock:
         with pytest.raises(IOUError):
             loop.run_until_complete(asyncio.async(vm._library_check()))
@@ -417,24 +424,43 @@ def test_iourc_content_fix_carriage_return(vm):
         assert f.read() == "test\n12"
 
 
-def test_extract_configs(vm):
-    assert vm.extract_configs() == (None, None)
+def test_extract_configs(vm, loop):
+    assert loop.run_until_complete(vm.extract_configs()) == (None, None)
 
     with open(os.path.join(vm.working_dir, "nvram_00001"), "w+") as f:
         f.write("CORRUPTED")
-        assert vm.extract_configs() == (None, None)
-
-    with open(os.path.join(vm.working_dir, "nvram_00001"), "w+") as f:
-        f.write("CORRUPTED")
-        assert vm.extract_configs() == (None, None)
+    assert loop.run_until_complete(vm.extract_configs()) == (None, None)
 
     shutil.copy("tests/resources/nvram_iou", os.path.join(vm.working_dir, "nvram_00001"))
 
-    startup_config, private_config = vm.extract_configs()
+    startup_config, private_config = loop.run_until_complete(vm.extract_configs())
     assert len(startup_config) == 1392
     assert len(private_config) == 0
 
 
+def test_save_configs_unchanged_nvram(vm, loop):
+    vm.startup_config_content = "hostname R1"
+    shutil.copy("tests/resources/nvram_iou", os.path.join(vm.working_dir, "nvram_00001"))
+    loop.run_until_complete(vm.save_configs())
+    config_path = os.path.join(vm.working_dir, "startup-config.cfg")
+    assert os.path.getsize(config_path) == 1392
+
+    # The NVRAM has not changed since the last extraction, the file is not written again
+    with open(config_path, "w+") as f:
+        f.write("hostname R2")
+    with asyncio_patch("gns3server.compute.iou.iou_vm.IOUVM.extract_configs") as mock:
+        loop.run_until_complete(vm.save_configs())
+    assert not mock.called
+
+
+def test_nvram_changed_save_error(vm, loop):
+    with asyncio_patch("gns3server.compute.iou.iou_vm.IOUVM.save_configs", side_effect=IOUError("Broken")):
+        with patch("gns3server.compute.iou.iou_vm.log.error") as log_error:
+            vm._nvram_changed(os.path.join(vm.working_dir, "nvram_00001"))
+            loop.run_until_complete(asyncio.sleep(0.01))
+    assert log_error.called
+
+
 def test_application_id(project, manager):
     """
     Checks if uses local manager to get application_id when not set
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import asyncio
+import pytest
+
+from gns3server.compute.qemu.qcow2 import Qcow2
+from gns3server.compute.qemu.linked_clone_pool import LinkedClonePool
+
+
+@asyncio.coroutine
+def create(base_image, path):
+    Qcow2.create_linked_clone(path, base_image)
+
+
+@pytest.fixture
+def base_image(tmpdir):
+    path = str(tmpdir / "empty8G.qcow2")
+    shutil.copy("tests/resources/empty8G.qcow2", path)
+    return path
+
+
+def _ready(pool, base_image):
+    return [f for f in os.listdir(pool._pool_directory(base_image)) if f.endswith(".qcow2")]
+
+
+def test_claim_empty_pool(loop, tmpdir, base_image):
+    pool = LinkedClonePool(str(tmpdir / "pool"), 2)
+    destination = str(tmpdir / "hda_disk.qcow2")
+    assert pool.claim(base_image, destination, create) is False
+    assert not os.path.exists(destination)
+
+    # the claim starts a refill
+    loop.run_until_complete(asyncio.async(pool.wait_refills()))
+    assert len(_ready(pool, base_image)) == 2
+
+
+def test_claim(loop, tmpdir, base_image):
+    pool = LinkedClonePool(str(tmpdir / "pool"), 2)
+    loop.run_until_complete(pool.refill(base_image, create))
+    destination = str(tmpdir / "hda_disk.qcow2")
+    assert pool.claim(base_image, destination, create) is True
+    assert Qcow2(destination).backing_file == base_image
+    assert len(_ready(pool, base_image)) == 1
+
+    loop.run_until_complete(asyncio.async(pool.wait_refills()))
+    assert len(_ready(pool, base_image)) == 2
+
+
+def test_refill_single_flight(loop, tmpdir, base_image):
+    pool = LinkedClonePool(str(tmpdir / "pool"), 3)
+    assert pool.refill(base_image, create) is pool.refill(base_image, create)
+    loop.run_until_complete(asyncio.async(pool.wait_refills()))
+    assert len(_ready(pool, base_image)) == 3
+
+
+def test_refill_removes_outdated_clones(loop, tmpdir, base_image):
+    pool = LinkedClonePool(str(tmpdir / "pool"), 1)
+    loop.run_until_complete(pool.refill(base_image, create))
+    old_directory = pool._pool_directory(base_image)
+
+    # the base image is replaced
+    os.remove(base_image)
+    shutil.copy("tests/resources/empty8G.qcow2", base_image)
+    os.utime(base_image, ns=(0, 0))
+    loop.run_until_complete(pool.refill(base_image, create))
+    assert not os.path.exists(old_directory)
+    assert len(_ready(pool, base_image)) == 1
+
+
+def test_refill_failure(loop, tmpdir, base_image):
+
+    @asyncio.coroutine
+    def failing_create(base_image, path):
+        with open(path, "w+") as f:
+            f.write("partial")
+        raise OSError("No space left on device")
+
+    pool = LinkedClonePool(str(tmpdir / "pool"), 2)
+    loop.run_until_complete(pool.refill(base_image, failing_create))
+    assert os.listdir(pool._pool_directory(base_image)) == []
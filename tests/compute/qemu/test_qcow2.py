@@ -71,3 +71,37 @@ def test_rebase(tmpdir, loop):
     assert qcow2.backing_file == "empty8G.qcow2"
     loop.run_until_complete(asyncio.async(qcow2.rebase(qemu_img(), str(tmpdir / "empty16G.qcow2"))))
     assert qcow2.backing_file == str(tmpdir / "empty16G.qcow2")
+
+
+def test_virtual_size():
+    assert Qcow2.virtual_size("tests/resources/empty8G.qcow2") == 8 * 1024 * 1024 * 1024
+    with pytest.raises(Qcow2Error):
+        Qcow2.virtual_size("tests/resources/nvram_iou")
+
+
+def test_create_linked_clone(tmpdir):
+    base_image = str(tmpdir / "empty8G.qcow2")
+    shutil.copy("tests/resources/empty8G.qcow2", base_image)
+    path = str(tmpdir / "linked.qcow2")
+    Qcow2.create_linked_clone(path, base_image)
+
+    qcow2 = Qcow2(path)
+    assert qcow2.version == 3
+    assert qcow2.backing_file == base_image
+    assert Qcow2.virtual_size(path) == Qcow2.virtual_size(base_image)
+    assert not os.path.exists(path + ".tmp")
+
+    # same refcounts and L1 table as an image created by qemu-img
+    with open(path, "rb") as f:
+        content = f.read()
+    with open("tests/resources/linked.qcow2", "rb") as f:
+        expected = f.read()
+    assert len(content) == len(expected)
+    assert content[0x10000:] == expected[0x10000:]
+
+
+def test_create_linked_clone_invalid_base(tmpdir):
+    path = str(tmpdir / "linked.qcow2")
+    with pytest.raises(Qcow2Error):
+        Qcow2.create_linked_clone(path, "tests/resources/nvram_iou")
+    assert not os.path.exists(path)
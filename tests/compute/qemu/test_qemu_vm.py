@@ -22,6 +22,7 @@ import os
 import sys
 import stat
 import re
+import shutil
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 
@@ -30,6 +31,7 @@ from unittest.mock import patch, MagicMock
 
 from gns3server.compute.qemu.qemu_vm import QemuVM
 from gns3server.compute.qemu.qemu_error import QemuError
+from gns3server.compute.qemu.qcow2 import Qcow2
 from gns3server.compute.qemu import Qemu
 from gns3server.utils import force_unix_path, macaddress_to_int, int_to_macaddress
 from gns3server.compute.notification_manager import NotificationManager
@@ -183,18 +185,19 @@ def test_termination_callback_error(vm, tmpdir, async_run):
 
 def test_reload(loop, vm):
 
-    with asyncio_patch("gns3server.compute.qemu.QemuVM._control_vm") as mock:
+    with asyncio_patch("gns3server.compute.qemu.QemuVM._qmp_command") as mock:
         loop.run_until_complete(asyncio.async(vm.reload()))
-        assert mock.called_with("system_reset")
+        mock.assert_called_with("system_reset")
 
 
 def test_suspend(loop, vm):
 
-    control_vm_result = MagicMock()
-    control_vm_result.match.group.decode.return_value = "running"
-    with asyncio_patch("gns3server.compute.qemu.QemuVM._control_vm", return_value=control_vm_result) as mock:
-        loop.run_until_complete(asyncio.async(vm.suspend()))
-        assert mock.called_with("system_reset")
+    vm.is_running = MagicMock(return_value=True)
+    with asyncio_patch("gns3server.compute.qemu.QemuVM._get_vm_status", return_value="running"):
+        with asyncio_patch("gns3server.compute.qemu.QemuVM._qmp_command") as mock:
+            loop.run_until_complete(asyncio.async(vm.suspend()))
+            mock.assert_called_with("stop")
+    assert vm.status == "suspended"
 
 
 def test_add_nio_binding_udp(vm, loop):
@@ -336,6 +339,52 @@ def test_disk_options(vm, tmpdir, loop, fake_qemu_img_binary):
     assert options == ['-drive', 'file=' + os.path.join(vm.working_dir, "hda_disk.qcow2") + ',if=ide,index=0,media=disk']
 
 
+def test_disk_options_qcow2_without_qemu_img(vm, tmpdir, loop, fake_qemu_img_binary):
+
+    vm._hda_disk_image = str(tmpdir / "test.qcow2")
+    shutil.copy("tests/resources/empty8G.qcow2", vm._hda_disk_image)
+
+    process = MagicMock()
+    process.wait = AsyncioMagicMock(return_value=0)
+    with asyncio_patch("asyncio.create_subprocess_exec", return_value=process) as mock:
+        options = loop.run_until_complete(asyncio.async(vm._disk_options()))
+        # only the image check is done by qemu-img
+        assert "create" not in [call[0][1] for call in mock.call_args_list]
+
+    disk = os.path.join(vm.working_dir, "hda_disk.qcow2")
+    assert Qcow2(disk).backing_file == vm._hda_disk_image
+    assert options == ['-drive', 'file=' + disk + ',if=ide,index=0,media=disk']
+    os.remove(disk)
+
+
+def test_disk_options_linked_clone_pool(vm, tmpdir, loop, fake_qemu_img_binary, config):
+
+    vm._hda_disk_image = str(tmpdir / "test.qcow2")
+    shutil.copy("tests/resources/empty8G.qcow2", vm._hda_disk_image)
+    config.set("Qemu", "linked_clone_pool_size", "1")
+    config.set("Qemu", "linked_clone_pool_path", str(tmpdir / "pool"))
+
+    pool = vm.manager.linked_clone_pool
+    loop.run_until_complete(pool.refill(vm._hda_disk_image, asyncio.coroutine(lambda base_image, path: Qcow2.create_linked_clone(path, base_image))))
+
+    pool_directory = pool._pool_directory(vm._hda_disk_image)
+    clone = os.path.join(pool_directory, os.listdir(pool_directory)[0])
+    clone_inode = os.stat(clone).st_ino
+
+    process = MagicMock()
+    process.wait = AsyncioMagicMock(return_value=0)
+    with asyncio_patch("asyncio.create_subprocess_exec", return_value=process):
+        loop.run_until_complete(asyncio.async(vm._disk_options()))
+    loop.run_until_complete(asyncio.async(pool.wait_refills()))
+
+    disk = os.path.join(vm.working_dir, "hda_disk.qcow2")
+    assert os.stat(disk).st_ino == clone_inode
+    assert Qcow2(disk).backing_file == vm._hda_disk_image
+    # the pool has been refilled
+    assert len([f for f in os.listdir(pool_directory) if f.endswith(".qcow2")]) == 1
+    os.remove(disk)
+
+
 def test_cdrom_option(vm, tmpdir, loop, fake_qemu_img_binary):
 
     vm._cdrom_image = str(tmpdir / "test.iso")
@@ -406,6 +455,34 @@ def test_set_process_priority(vm, loop, fake_qemu_img_binary):
         assert args == ("renice", "-n", "5", "-p", "42")
 
 
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cgroups are only available on Linux")
+def test_start_with_cgroup(vm, loop, tmpdir, config, running_subprocess_mock):
+
+    root = tmpdir / "cgroup"
+    os.makedirs(str(root / "gns3"))
+    for path in (root, root / "gns3"):
+        (path / "cgroup.controllers").write("cpu memory")
+        (path / "cgroup.procs").write("")
+    config.set("Server", "cgroups", True)
+    config.set("Server", "cgroup_path", str(root / "gns3"))
+
+    running_subprocess_mock.pid = 42
+    vm._cpu_throttling = 50
+    with asyncio_patch("gns3server.compute.qemu.QemuVM.start_wrap_console"):
+        with asyncio_patch("gns3server.compute.qemu.QemuVM._set_process_priority") as priority:
+            with asyncio_patch("asyncio.create_subprocess_exec", return_value=running_subprocess_mock):
+                loop.run_until_complete(asyncio.async(vm.start()))
+            assert not priority.called
+
+    assert (root / "gns3" / vm.id / "cgroup.procs").read() == "42"
+    assert (root / "gns3" / vm.id / "cpu.max").read() == "50000 100000"
+    assert (root / "gns3" / vm.id / "cpu.weight").read() == "100"
+    assert vm.resource_usage == {}
+
+    vm.cpu_throttling = 20
+    assert (root / "gns3" / vm.id / "cpu.max").read() == "20000 100000"
+
+
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="Not supported on Windows")
 def test_set_process_priority_normal(vm, loop, fake_qemu_img_binary):
 
@@ -423,33 +500,33 @@ def test_json(vm, project):
     assert json["project_id"] == project.id
 
 
-def test_control_vm(vm, loop):
+def test_qmp_command_not_running(vm, loop):
 
-    vm._process = MagicMock()
-    reader = MagicMock()
-    writer = MagicMock()
-    with asyncio_patch("asyncio.open_connection", return_value=(reader, writer)) as open_connect:
-        res = loop.run_until_complete(asyncio.async(vm._control_vm("test")))
-        assert writer.write.called_with("test")
-    assert res is None
+    vm._monitor = 4242
+    assert loop.run_until_complete(asyncio.async(vm._qmp_command("query-status"))) is None
 
 
-def test_control_vm_expect_text(vm, loop, running_subprocess_mock):
+def test_qmp_command(vm, loop, running_subprocess_mock):
 
     vm._process = running_subprocess_mock
-    reader = MagicMock()
-    writer = MagicMock()
-    with asyncio_patch("asyncio.open_connection", return_value=(reader, writer)) as open_connect:
+    vm._monitor = 4242
+    client = MagicMock()
+    client.execute = AsyncioMagicMock(return_value={"status": "running", "running": True})
+    with asyncio_patch("gns3server.compute.qemu.QemuVM._qmp_client", return_value=client):
+        assert loop.run_until_complete(asyncio.async(vm._get_vm_status())) == "running"
+    client.execute.assert_called_with("query-status", None)
+    assert vm.status == "started"
 
-        future = asyncio.Future()
-        future.set_result(b"epic product")
-        reader.readline.return_value = future
 
-        vm._monitor = 4242
-        res = loop.run_until_complete(asyncio.async(vm._control_vm("test", [b"epic"])))
-        assert writer.write.called_with("test")
+def test_qmp_events(vm):
 
-    assert res == "epic product"
+    vm.status = "started"
+    vm._qmp_event("STOP", {})
+    assert vm.status == "suspended"
+    vm._qmp_event("RESUME", {})
+    assert vm.status == "started"
+    vm._qmp_event("SHUTDOWN", {"guest": True})
+    assert vm.status == "started"
 
 
 def test_build_command(vm, loop, fake_qemu_binary, port_manager):
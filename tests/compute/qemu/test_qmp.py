@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import asyncio
+import pytest
+
+from gns3server.compute.qemu.qmp import QMPClient, QMPError
+
+
+class FakeQMPServer:
+
+    def __init__(self, loop):
+        self.commands = []
+        self.writers = []
+        self.server = loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    @asyncio.coroutine
+    def _handle(self, reader, writer):
+        self.writers.append(writer)
+        self._send(writer, {"QMP": {"version": {"qemu": {"major": 2, "minor": 8, "micro": 0}}, "capabilities": []}})
+        while True:
+            line = yield from reader.readline()
+            if not line:
+                break
+            command = json.loads(line.decode())
+            self.commands.append(command["execute"])
+            asyncio.async(self._answer(writer, command))
+
+    @asyncio.coroutine
+    def _answer(self, writer, command):
+        if command["execute"] == "query-status":
+            # answers are sent out of order to check they are matched by id
+            yield from asyncio.sleep(0.05)
+            self._send(writer, {"return": {"status": "running", "running": True}, "id": command["id"]})
+        elif command["execute"] == "unknown":
+            self._send(writer, {"error": {"class": "CommandNotFound", "desc": "The command unknown has not been found"}, "id": command["id"]})
+        else:
+            self._send(writer, {"return": {}, "id": command["id"]})
+            if command["execute"] == "stop":
+                self._send(writer, {"event": "STOP", "timestamp": {"seconds": 1, "microseconds": 0}})
+
+    def _send(self, writer, message):
+        writer.write(json.dumps(message).encode() + b"\r\n")
+
+    def close(self, loop):
+        for writer in self.writers:
+            writer.close()
+        self.server.close()
+        loop.run_until_complete(self.server.wait_closed())
+
+
+@pytest.fixture
+def qmp_server(loop):
+    server = FakeQMPServer(loop)
+    yield server
+    server.close(loop)
+
+
+def test_execute(loop, qmp_server):
+    events = []
+    client = QMPClient("127.0.0.1", qmp_server.port, lambda event, data: events.append(event))
+    loop.run_until_complete(client.connect())
+    assert client.connected
+
+    # commands are pipelined on the same connection
+    status, stop = loop.run_until_complete(asyncio.gather(client.execute("query-status"), client.execute("stop")))
+    assert status == {"status": "running", "running": True}
+    assert stop == {}
+    assert sorted(qmp_server.commands) == ["qmp_capabilities", "query-status", "stop"]
+    assert len(qmp_server.writers) == 1
+    assert events == ["STOP"]
+
+    with pytest.raises(QMPError):
+        loop.run_until_complete(client.execute("unknown"))
+    client.close()
+    assert not client.connected
+
+
+def test_connection_lost(loop, qmp_server):
+    client = QMPClient("127.0.0.1", qmp_server.port)
+    loop.run_until_complete(client.connect())
+    qmp_server.writers[0].close()
+    loop.run_until_complete(asyncio.sleep(0.05))
+    assert not client.connected
+    with pytest.raises(QMPError):
+        loop.run_until_complete(client.execute("query-status"))
+
+
+def test_connect_refused(loop, qmp_server):
+    port = qmp_server.port
+    qmp_server.close(loop)
+    client = QMPClient("127.0.0.1", port)
+    with pytest.raises(QMPError):
+        loop.run_until_complete(client.connect())
@@ -28,6 +28,7 @@ from gns3server.compute.vpcs.vpcs_vm import VPCSVM
 from gns3server.compute.docker.docker_vm import DockerVM
 from gns3server.compute.vpcs.vpcs_error import VPCSError
 from gns3server.compute.error import NodeError
+from gns3server.compute.memory_ledger import MemoryLedger
 from gns3server.compute.vpcs import VPCS
 from gns3server.compute.nios.nio_udp import NIOUDP
 
@@ -157,3 +158,16 @@ def test_ubridge_apply_bpf_filters(node, async_run):
     node._ubridge_send.assert_any_call("bridge reset_packet_filters VPCS-10")
     node._ubridge_send.assert_any_call("bridge add_packet_filter VPCS-10 filter0 bpf \"icmp[icmptype] == 8\"")
     node._ubridge_send.assert_any_call("bridge add_packet_filter VPCS-10 filter1 bpf \"tcp src port 53\"")
+
+
+def test_reserve_ram(node, loop):
+    loop.run_until_complete(node.reserve_ram(256))
+    assert MemoryLedger.instance().reserved == 256
+    node.status = "started"
+    assert MemoryLedger.instance().reserved == 256
+    node.status = "stopped"
+    assert MemoryLedger.instance().reserved == 0
+
+    loop.run_until_complete(node.reserve_ram(256))
+    loop.run_until_complete(node.close())
+    assert MemoryLedger.instance().reserved == 0
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+from unittest.mock import patch
+
+from gns3server.compute.file_manifest import FileManifest, hash_file, MANIFEST_FILENAME
+
+
+def write_old(path, content):
+    with open(path, "w+") as f:
+        f.write(content)
+    # older than the grace period of the manifest
+    os.utime(path, (time.time() - 60, time.time() - 60))
+
+
+def test_refresh(tmpdir, async_run):
+    write_old(str(tmpdir / "a.txt"), "a")
+    write_old(str(tmpdir / "b.txt"), "b")
+    manifest = FileManifest(str(tmpdir))
+    files = async_run(manifest.refresh())
+    assert sorted(files, key=lambda f: f["path"]) == [
+        {"path": "a.txt", "md5sum": "0cc175b9c0f1b6a831c399e269772661"},
+        {"path": "b.txt", "md5sum": "92eb5ffee6ae2fec3ad71c777531578f"}
+    ]
+    assert os.path.exists(str(tmpdir / MANIFEST_FILENAME))
+
+    # only the modified file is hashed again, even after a restart
+    write_old(str(tmpdir / "b.txt"), "bb")
+    manifest = FileManifest(str(tmpdir))
+    with patch("gns3server.compute.file_manifest.hash_file", side_effect=hash_file) as mock:
+        files = async_run(manifest.refresh())
+        mock.assert_called_once_with(str(tmpdir / "b.txt"))
+    assert {"path": "b.txt", "md5sum": "21ad0bd836b90d08f4cf640b4c298e7c"} in files
+
+
+def test_refresh_recent_file(tmpdir, async_run):
+    (tmpdir / "a.txt").write("a")
+    manifest = FileManifest(str(tmpdir))
+    async_run(manifest.refresh())
+
+    # a file modified during the last seconds is always hashed
+    with patch("gns3server.compute.file_manifest.hash_file", side_effect=hash_file) as mock:
+        async_run(manifest.refresh())
+        assert mock.called
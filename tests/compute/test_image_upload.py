@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import asyncio
+import aiohttp
+import pytest
+
+from gns3server.compute.image_upload import ImageUpload, upload_parameters, BLOCK_SIZE
+
+
+class FakeStream:
+
+    def __init__(self, data, packet_size=4096):
+        self._data = data
+        self._packet_size = packet_size
+
+    @asyncio.coroutine
+    def read(self, size):
+        size = min(size, self._packet_size)
+        packet, self._data = self._data[:size], self._data[size:]
+        return packet
+
+
+def test_write_large(async_run, tmpdir):
+    data = bytes(range(256)) * (BLOCK_SIZE // 128 + 10)
+    upload = ImageUpload(str(tmpdir / "image"), str(tmpdir / "image.tmp"))
+    async_run(upload.start())
+    async_run(upload.write(FakeStream(data, packet_size=100000)))
+    assert upload.offset == len(data)
+    digest = async_run(upload.finish(hashlib.md5(data).hexdigest()))
+    assert digest == hashlib.md5(data).hexdigest()
+    assert (tmpdir / "image").read_binary() == data
+    assert (tmpdir / "image.md5sum").read() == digest
+
+
+def test_resume_after_restart(async_run, tmpdir):
+    upload = ImageUpload(str(tmpdir / "image"), str(tmpdir / "image.abc.tmp"))
+    async_run(upload.start(resume=True))
+    async_run(upload.write(FakeStream(b"hello ")))
+
+    # a new server process continues the upload
+    upload = ImageUpload(str(tmpdir / "image"), str(tmpdir / "image.abc.tmp"))
+    async_run(upload.start(resume=True))
+    assert upload.offset == 6
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        async_run(upload.write(FakeStream(b"world"), offset=0))
+    async_run(upload.write(FakeStream(b"world"), offset=6))
+    assert async_run(upload.finish()) == hashlib.md5(b"hello world").hexdigest()
+    assert (tmpdir / "image").read() == "hello world"
+
+
+def test_upload_parameters():
+    assert upload_parameters({}) == {"upload_id": None, "offset": None, "checksum": None, "complete": True}
+    assert upload_parameters({"upload_id": "abc", "offset": "12"}) == {"upload_id": "abc", "offset": 12, "checksum": None, "complete": False}
+    with pytest.raises(aiohttp.web.HTTPBadRequest):
+        upload_parameters({"offset": "a"})
@@ -26,6 +26,7 @@ from gns3server.compute.vpcs import VPCS
 from gns3server.compute.dynamips import Dynamips
 from gns3server.compute.qemu import Qemu
 from gns3server.compute.error import NodeError, ImageMissingError
+from gns3server.compute import get_modules, get_instantiated_managers
 from gns3server.utils import force_unix_path
 
 
@@ -257,12 +258,12 @@ def test_list_images_recursives(loop, qemu, tmpdir):
 
 
 def test_list_images_empty(loop, qemu, tmpdir):
-    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir)):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir)):
         assert loop.run_until_complete(qemu.list_images()) == []
 
 
 def test_list_images_directory_not_exist(loop, qemu):
-    with patch("gns3server.compute.Qemu.get_images_directory", return_value="/bla"):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value="/bla"):
         assert loop.run_until_complete(qemu.list_images()) == []
 
 
@@ -298,3 +299,11 @@ def test_duplicate_ethernet_switch(async_run, project):
         destination_node_id = str(uuid.uuid4())
         destination_node = async_run(dynamips_manager.create_node("SW-2", project.id, destination_node_id, node_type='ethernet_switch'))
         async_run(dynamips_manager.duplicate_node(source_node_id, destination_node_id))
+
+
+def test_get_instantiated_managers():
+    for module in get_modules():
+        module._instance = None
+    assert get_instantiated_managers() == []
+    vpcs = VPCS.instance()
+    assert get_instantiated_managers() == [vpcs]
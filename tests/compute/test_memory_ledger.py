@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import pytest
+
+from unittest.mock import patch, MagicMock
+from gns3server.compute.memory_ledger import MemoryLedger
+from gns3server.compute.error import NodeError
+
+
+@pytest.fixture
+def ledger(config):
+    config.set("Server", "memory_overcommit_ratio", "1")
+    with patch("psutil.virtual_memory") as mock:
+        mock.return_value.total = 1024 * 1024 * 1024
+        yield MemoryLedger()
+
+
+def fake_node(node_id):
+    node = MagicMock()
+    node.id = node_id
+    node.name = "node{}".format(node_id)
+    return node
+
+
+def test_reserve(ledger, loop):
+    node1 = fake_node(1)
+    loop.run_until_complete(ledger.reserve(node1, 512))
+    loop.run_until_complete(ledger.reserve(fake_node(2), 256))
+    assert ledger.capacity == 1024
+    assert ledger.reserved == 768
+
+    # a node restarted with more RAM updates its reservation
+    loop.run_until_complete(ledger.reserve(node1, 768))
+    assert ledger.reserved == 1024
+
+    ledger.release(node1)
+    assert ledger.reserved == 256
+    ledger.release(node1)
+    assert ledger.reserved == 256
+
+
+def test_reserve_more_than_capacity(ledger, loop):
+    with pytest.raises(NodeError):
+        loop.run_until_complete(ledger.reserve(fake_node(1), 2048))
+
+
+def test_reserve_reject(ledger, loop, config):
+    config.set("Server", "memory_admission", "reject")
+    loop.run_until_complete(ledger.reserve(fake_node(1), 768))
+    with pytest.raises(NodeError):
+        loop.run_until_complete(ledger.reserve(fake_node(2), 512))
+    assert ledger.reserved == 768
+
+
+def test_reserve_warn(ledger, loop, config):
+    config.set("Server", "memory_admission", "warn")
+    loop.run_until_complete(ledger.reserve(fake_node(1), 768))
+    loop.run_until_complete(ledger.reserve(fake_node(2), 512))
+    assert ledger.reserved == 1280
+
+
+def test_reserve_queue(ledger, loop):
+    node1 = fake_node(1)
+    loop.run_until_complete(ledger.reserve(node1, 768))
+
+    started = []
+
+    @asyncio.coroutine
+    def start(node, ram):
+        yield from ledger.reserve(node, ram)
+        started.append(node.id)
+
+    tasks = [asyncio.async(start(fake_node(2), 512)), asyncio.async(start(fake_node(3), 128))]
+    loop.run_until_complete(asyncio.sleep(0.01))
+    # node 3 fits but waits behind node 2
+    assert started == []
+    assert ledger.__json__()["queued"] == 2
+
+    ledger.release(node1)
+    loop.run_until_complete(asyncio.gather(*tasks))
+    assert started == [2, 3]
+    assert ledger.reserved == 640
+    assert ledger.__json__()["queued"] == 0
+
+
+def test_reserve_queue_timeout(ledger, loop, config):
+    config.set("Server", "memory_admission_timeout", "0")
+    loop.run_until_complete(ledger.reserve(fake_node(1), 768))
+    with pytest.raises(NodeError):
+        loop.run_until_complete(ledger.reserve(fake_node(2), 512))
+    assert ledger.__json__()["queued"] == 0
@@ -17,7 +17,10 @@
 
 import uuid
 
+import pytest
+
 from gns3server.compute.notification_manager import NotificationManager
+from gns3server.utils.encoding import MSGPACK_AVAILABLE, unpack
 
 
 def test_queue(async_run):
@@ -69,6 +72,20 @@ def test_queue_json_meta(async_run):
     assert len(notifications._listeners) == 0
 
 
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_queue_msgpack(async_run):
+    NotificationManager.reset()
+    project_id = str(uuid.uuid4())
+    notifications = NotificationManager.instance()
+    with notifications.queue() as queue:
+        res = async_run(queue.get(5))
+        assert "ping" in res
+
+        notifications.emit("test", {"a": 1}, project_id=project_id)
+        res = async_run(queue.get_msgpack(5))
+        assert unpack(res) == {"action": "test", "event": {"a": 1}, "project_id": project_id}
+
+
 def test_queue_ping(async_run):
     """
     If we don't send a message during a long time (0.5 seconds)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import asyncio
+import pytest
+
+from tests.utils import AsyncioMagicMock
+from gns3server.compute.nvram_extractor import NVRAMExtractor
+from gns3server.compute.error import NodeError
+
+
+@pytest.fixture
+def extractor():
+    extractor = NVRAMExtractor()
+    yield extractor
+    extractor.shutdown()
+
+
+def test_extract(extractor, loop, tmpdir):
+    path = str(tmpdir / "nvram_00001")
+    assert loop.run_until_complete(extractor.extract(path)) == (None, None)
+
+    shutil.copy("tests/resources/nvram_iou", path)
+    startup_config, private_config = loop.run_until_complete(extractor.extract(path))
+    assert len(startup_config) == 1392
+
+    with open(path, "w+") as f:
+        f.write("CORRUPTED")
+    assert loop.run_until_complete(extractor.extract(path)) == (None, None)
+
+
+def test_has_changed(extractor, tmpdir):
+    path = str(tmpdir / "nvram_00001")
+    assert extractor.has_changed(path)
+    shutil.copy("tests/resources/nvram_iou", path)
+    assert extractor.has_changed(path)
+    extractor.mark_extracted(path)
+    assert not extractor.has_changed(path)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert extractor.has_changed(path)
+
+    extractor.mark_extracted(path)
+    extractor.forget(path)
+    assert extractor.has_changed(path)
+
+
+def test_save_configs(extractor, loop):
+    running = []
+    concurrent = []
+
+    @asyncio.coroutine
+    def save_configs():
+        running.append(True)
+        concurrent.append(len(running))
+        yield from asyncio.sleep(0.01)
+        running.pop()
+
+    nodes = []
+    for i in range(5):
+        node = AsyncioMagicMock()
+        node.save_configs.side_effect = save_configs
+        nodes.append(node)
+    failing = AsyncioMagicMock()
+    failing.save_configs.side_effect = NodeError("Could not save")
+    nodes.append(failing)
+
+    loop.run_until_complete(extractor.save_configs(nodes, concurrency=3))
+    assert len(concurrent) == 5
+    assert max(concurrent) == 3
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from tests.utils import AsyncioMagicMock, asyncio_patch
+from gns3server.utils import parse_version
+from gns3server.compute.probe_cache import ProbeCache
+
+
+@pytest.fixture
+def probe_cache():
+    return ProbeCache()
+
+
+def test_probe(probe_cache, loop, tmpdir):
+    path = str(tmpdir / "ubridge")
+    with open(path, "w+") as f:
+        f.write("1")
+    mock = AsyncioMagicMock(return_value="ubridge version 0.9.12")
+
+    assert loop.run_until_complete(probe_cache.probe("version", path, mock, path, "-v")) == "ubridge version 0.9.12"
+    assert loop.run_until_complete(probe_cache.probe("version", path, mock, path, "-v")) == "ubridge version 0.9.12"
+    mock.assert_called_once_with(path, "-v")
+
+    # the executable is upgraded
+    with open(path, "w+") as f:
+        f.write("12")
+    loop.run_until_complete(probe_cache.probe("version", path, mock, path, "-v"))
+    assert mock.call_count == 2
+
+
+def test_probe_missing_file(probe_cache, loop, tmpdir):
+    path = str(tmpdir / "ubridge")
+    mock = AsyncioMagicMock(return_value="")
+    loop.run_until_complete(probe_cache.probe("version", path, mock))
+    loop.run_until_complete(probe_cache.probe("version", path, mock))
+    assert mock.call_count == 2
+    assert probe_cache.facts() == []
+
+
+def test_probe_single_flight(probe_cache, loop, tmpdir):
+    path = str(tmpdir / "qemu-img")
+    open(path, "w+").close()
+    calls = []
+
+    @asyncio.coroutine
+    def version():
+        calls.append(1)
+        yield from asyncio.sleep(0.01)
+        return "qemu-img version 2.8.0"
+
+    results = loop.run_until_complete(asyncio.gather(*[probe_cache.probe("version", path, version) for _ in range(5)]))
+    assert results == ["qemu-img version 2.8.0"] * 5
+    assert len(calls) == 1
+
+
+def test_probe_exception_not_cached(probe_cache, loop, tmpdir):
+    path = str(tmpdir / "vpcs")
+    open(path, "w+").close()
+
+    @asyncio.coroutine
+    def fail():
+        raise OSError("Permission denied")
+
+    with pytest.raises(OSError):
+        loop.run_until_complete(probe_cache.probe("version", path, fail))
+    assert loop.run_until_complete(probe_cache.probe("version", path, AsyncioMagicMock(return_value="ok"))) == "ok"
+
+
+def test_probe_sync(probe_cache, tmpdir):
+    path = str(tmpdir / "ubridge")
+    open(path, "w+").close()
+    calls = []
+
+    def privileged():
+        calls.append(1)
+        return True
+
+    assert probe_cache.probe_sync("privileged access", path, privileged) is True
+    assert probe_cache.probe_sync("privileged access", path, privileged) is True
+    assert len(calls) == 1
+
+    # setting capabilities change the ctime of the file
+    os.chmod(path, 0o755)
+    os.utime(path, ns=(0, 0))
+    probe_cache.probe_sync("privileged access", path, privileged)
+    assert len(calls) == 2
+
+
+def test_facts(probe_cache, loop, tmpdir):
+    path = str(tmpdir / "vpcs")
+    open(path, "w+").close()
+    loop.run_until_complete(probe_cache.probe("version", path, AsyncioMagicMock(return_value="Welcome to Virtual PC Simulator, version 0.8\nDedicated to Daling.")))
+    probe_cache.probe_sync("privileged access", path, lambda: False)
+    assert probe_cache.facts() == [{"name": "privileged access", "path": path, "result": False},
+                                   {"name": "version", "path": path, "result": "Welcome to Virtual PC Simulator, version 0.8"}]
+    probe_cache.clear()
+    assert probe_cache.facts() == []
+
+
+def test_warmup_reused(probe_cache, loop, tmpdir, project, port_manager):
+    """
+    The versions probed at startup are not probed again by the uBridge and VPCS checks
+    """
+
+    from gns3server.config import Config
+    from gns3server.ubridge.hypervisor import Hypervisor
+    from gns3server.compute.vpcs import VPCS
+    from gns3server.compute.vpcs.vpcs_vm import VPCSVM
+
+    ubridge_path = str(tmpdir / "ubridge")
+    vpcs_path = str(tmpdir / "vpcs")
+    for path in (ubridge_path, vpcs_path):
+        open(path, "w+").close()
+        os.chmod(path, 0o755)
+    Config.instance().set("Server", "ubridge_path", ubridge_path)
+    Config.instance().set("VPCS", "vpcs_path", vpcs_path)
+
+    @asyncio.coroutine
+    def version(path, *args, **kwargs):
+        if path == ubridge_path:
+            return "ubridge version 0.9.14"
+        return "Welcome to Virtual PC Simulator, version 0.8"
+
+    with patch("gns3server.compute.probe_cache.ProbeCache.instance", return_value=probe_cache):
+        with patch("gns3server.compute.probe_cache.subprocess_check_output", side_effect=version), \
+                asyncio_patch("gns3server.compute.qemu.Qemu.binary_list", return_value=[]), \
+                asyncio_patch("gns3server.compute.qemu.Qemu.img_binary_list", return_value=[]):
+            loop.run_until_complete(probe_cache.warmup())
+
+        with asyncio_patch("gns3server.ubridge.hypervisor.subprocess_check_output") as mock:
+            hypervisor = Hypervisor(project, ubridge_path, str(tmpdir), "127.0.0.1")
+            loop.run_until_complete(hypervisor._check_ubridge_version())
+            assert not mock.called
+        assert hypervisor.version == "0.9.14"
+
+        manager = VPCS.instance()
+        manager.port_manager = port_manager
+        vm = VPCSVM("test", "00010203-0405-0607-0809-0a0b0c0d0e0f", project, manager)
+        with asyncio_patch("gns3server.compute.vpcs.vpcs_vm.subprocess_check_output") as mock:
+            loop.run_until_complete(vm._check_vpcs_version())
+            assert not mock.called
+        assert vm._vpcs_version == parse_version("0.8")
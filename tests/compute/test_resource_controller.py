@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import pytest
+
+from gns3server.compute.resource_controller import ResourceController
+
+
+def fake_cgroup_fs(tmpdir):
+    """
+    Creates the files of a cgroup v2 hierarchy in tmpdir
+    """
+
+    root = tmpdir / "cgroup"
+    os.makedirs(str(root / "gns3"))
+    for path in (root, root / "gns3"):
+        (path / "cgroup.controllers").write("cpuset cpu io memory pids")
+        (path / "cgroup.subtree_control").write("")
+        (path / "cgroup.procs").write("")
+    return str(root / "gns3")
+
+
+def read(path, name):
+    with open(os.path.join(path, name)) as f:
+        return f.read()
+
+
+@pytest.fixture
+def resource_controller(tmpdir, config):
+    config.set("Server", "cgroups", True)
+    config.set("Server", "cgroup_path", fake_cgroup_fs(tmpdir))
+    return ResourceController()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cgroups are only available on Linux")
+def test_available(resource_controller):
+    assert resource_controller.available
+
+
+def test_not_available(tmpdir, config):
+    config.set("Server", "cgroups", True)
+    config.set("Server", "cgroup_path", str(tmpdir / "cgroup" / "gns3"))
+    resource_controller = ResourceController()
+    assert resource_controller.available is False
+    assert resource_controller.create("node1") is None
+
+
+def test_disabled(resource_controller, config):
+    config.set("Server", "cgroups", "False")
+    assert resource_controller.available is False
+
+
+def test_disabled_by_default(tmpdir, config):
+    config.set("Server", "cgroup_path", fake_cgroup_fs(tmpdir))
+    assert ResourceController().available is False
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cgroups are only available on Linux")
+def test_node_cgroup(resource_controller, config):
+    config.set("Server", "cgroup_cpus", "2-3")
+    cgroup = resource_controller.create("node1")
+    assert cgroup.path == os.path.join(resource_controller.root, "node1")
+    assert read(cgroup.path, "cpuset.cpus") == "2-3"
+
+    assert cgroup.add_process(42)
+    assert read(cgroup.path, "cgroup.procs") == "42"
+
+    cgroup.set_cpu_limit(50)
+    assert read(cgroup.path, "cpu.max") == "50000 100000"
+    cgroup.set_cpu_limit(0)
+    assert read(cgroup.path, "cpu.max") == "max 100000"
+
+    cgroup.set_priority("very low")
+    assert read(cgroup.path, "cpu.weight") == "10"
+
+    cgroup.set_memory_limit(resource_controller.memory_limit(1024))
+    assert read(cgroup.path, "memory.high") == str((1280 + 256) * 1024 * 1024)
+    assert not os.path.exists(os.path.join(cgroup.path, "memory.max"))
+    cgroup.set_memory_limit(None)
+    assert read(cgroup.path, "memory.high") == "max"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cgroups are only available on Linux")
+def test_usage(resource_controller):
+    cgroup = resource_controller.create("node1")
+    with open(os.path.join(cgroup.path, "cpu.stat"), "w") as f:
+        f.write("usage_usec 1234\nuser_usec 1000\nsystem_usec 234\n")
+    with open(os.path.join(cgroup.path, "memory.current"), "w") as f:
+        f.write("4096\n")
+    assert cgroup.usage() == {"cpu_usage_usec": 1234, "memory_usage": 4096}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cgroups are only available on Linux")
+def test_remove(resource_controller):
+    cgroup = resource_controller.create("node1")
+    cgroup.add_process(42)
+    # a cgroup with processes cannot be removed
+    assert cgroup.remove() is False
+    os.remove(os.path.join(cgroup.path, "cgroup.procs"))
+    assert cgroup.remove() is True
+    assert not os.path.exists(cgroup.path)
+
+
+def test_memory_limit(resource_controller, config):
+    assert resource_controller.memory_limit(0) is None
+    config.set("Server", "cgroup_memory_margin", "-1")
+    assert resource_controller.memory_limit(1024) is None
@@ -35,14 +35,19 @@ os.environ["PATH"] = tempfile.mkdtemp()
 
 from gns3server.config import Config
 from gns3server.web.route import Route
-# TODO: get rid of *
-from gns3server.handlers import *
-from gns3server.compute import MODULES
+from gns3server.handlers import load_handlers
+from gns3server.compute import get_modules
 from gns3server.compute.port_manager import PortManager
 from gns3server.compute.project_manager import ProjectManager
+from gns3server.compute.probe_cache import ProbeCache
+from gns3server.compute.memory_ledger import MemoryLedger
+from gns3server.compute.resource_controller import ResourceController
+from gns3server.utils.file_watcher import FileWatcherService
 from gns3server.controller import Controller
 from tests.handlers.api.base import Query
 
+load_handlers()
+
 
 @pytest.yield_fixture
 def restore_original_path():
@@ -99,7 +104,7 @@ def http_server(request, loop, port_manager, monkeypatch, controller):
     yield (host, port)
 
     loop.run_until_complete(controller.stop())
-    for module in MODULES:
+    for module in get_modules():
         instance = module.instance()
         monkeypatch.setattr('gns3server.compute.virtualbox.virtualbox_vm.VirtualBoxVM.close', lambda self: True)
         loop.run_until_complete(instance.unload())
@@ -198,15 +203,21 @@ def run_around_tests(monkeypatch, port_manager, controller, config):
 
     tmppath = tempfile.mkdtemp()
 
-    for module in MODULES:
+    for module in get_modules():
         module._instance = None
+    ProbeCache._instance = None
+    MemoryLedger._instance = None
+    ResourceController._instance = None
 
     os.makedirs(os.path.join(tmppath, 'projects'))
     config.set("Server", "projects_path", os.path.join(tmppath, 'projects'))
     config.set("Server", "symbols_path", os.path.join(tmppath, 'symbols'))
     config.set("Server", "images_path", os.path.join(tmppath, 'images'))
     config.set("Server", "appliances_path", os.path.join(tmppath, 'appliances'))
+    config.set("Server", "image_cache_path", os.path.join(tmppath, 'image_cache'))
     config.set("Server", "ubridge_path", os.path.join(tmppath, 'bin', 'ubridge'))
+    # Never move the test processes in real cgroups
+    config.set("Server", "cgroup_path", os.path.join(tmppath, 'cgroup', 'gns3'))
     config.set("Server", "auth", False)
 
     # Prevent executions of the VM if we forgot to mock something
@@ -225,6 +236,10 @@ def run_around_tests(monkeypatch, port_manager, controller, config):
 
     yield
 
+    if getattr(FileWatcherService, "_instance", None) is not None:
+        FileWatcherService._instance.close()
+        FileWatcherService._instance = None
+
     # An helper should not raise Exception
     try:
         shutil.rmtree(tmppath)
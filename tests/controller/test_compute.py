@@ -26,6 +26,7 @@ from unittest.mock import patch, MagicMock
 from gns3server.controller.project import Project
 from gns3server.controller.compute import Compute, ComputeError, ComputeConflict
 from gns3server.version import __version__
+from gns3server.utils.encoding import MSGPACK_AVAILABLE, MSGPACK_CONTENT_TYPE, pack, unpack
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 
@@ -200,6 +201,49 @@ def test_compute_httpQuery_project(compute, async_run):
         mock.assert_called_with("POST", "https://example.com:84/v2/compute/projects", data=json.dumps(project.__json__()), headers={'content-type': 'application/json'}, auth=None, chunked=None, timeout=20)
 
 
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_compute_httpQuery_msgpack(compute, async_run):
+    compute._msgpack = True
+    response = MagicMock()
+    response.status = 200
+    response.content_type = MSGPACK_CONTENT_TYPE
+    response.read = AsyncioMagicMock(return_value=pack({"project_id": "test"}))
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
+        response = async_run(compute.post("/projects", {"a": "b"}))
+        headers = {'content-type': MSGPACK_CONTENT_TYPE, 'accept': '{}, application/json'.format(MSGPACK_CONTENT_TYPE)}
+        mock.assert_called_with("POST", "https://example.com:84/v2/compute/projects", data=pack({"a": "b"}), headers=headers, auth=None, chunked=None, timeout=20)
+    assert response.json == {"project_id": "test"}
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_compute_httpQueryConflictError_msgpack(compute, async_run):
+    compute._msgpack = True
+    response = MagicMock()
+    response.status = 409
+    response.content_type = MSGPACK_CONTENT_TYPE
+    response.read = AsyncioMagicMock(return_value=pack({"message": "Test", "status": 409}))
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response):
+        with pytest.raises(ComputeConflict) as e:
+            async_run(compute.post("/projects", {"a": "b"}))
+    assert e.value.response["message"] == "Test"
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_compute_httpQueryNotConnected_msgpack(compute, controller, async_run):
+    """
+    The compute reports msgpack in its capabilities, the next requests use it
+    """
+    controller._notification = MagicMock()
+    compute._connected = False
+    response = AsyncioMagicMock()
+    response.read = AsyncioMagicMock(return_value=json.dumps({"version": __version__, "encodings": ["json", "msgpack"]}).encode())
+    response.status = 200
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
+        async_run(compute.post("/projects", {"a": "b"}))
+        mock.assert_any_call("POST", "https://example.com:84/v2/compute/projects", data=pack({"a": "b"}), headers={'content-type': MSGPACK_CONTENT_TYPE, 'accept': '{}, application/json'.format(MSGPACK_CONTENT_TYPE)}, auth=None, chunked=None, timeout=20)
+    assert compute._msgpack
+
+
 def test_connectNotification(compute, async_run):
     ws_mock = AsyncioMagicMock()
 
@@ -229,6 +273,37 @@ def test_connectNotification(compute, async_run):
     assert compute._connected is False
 
 
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_connectNotification_msgpack(compute, async_run):
+    ws_mock = AsyncioMagicMock()
+
+    call = 0
+
+    @asyncio.coroutine
+    def receive():
+        nonlocal call
+        call += 1
+        if call == 1:
+            response = MagicMock()
+            response.data = pack({"action": "test", "event": {"a": 1}})
+            response.tp = aiohttp.WSMsgType.binary
+            return response
+        else:
+            response = MagicMock()
+            response.tp = aiohttp.WSMsgType.closed
+            return response
+
+    compute._msgpack = True
+    compute._controller._notification = MagicMock()
+    compute._http_session = AsyncioMagicMock(return_value=ws_mock)
+    compute._http_session.ws_connect = AsyncioMagicMock(return_value=ws_mock)
+    ws_mock.receive = receive
+    async_run(compute._connect_notification())
+
+    compute._http_session.ws_connect.assert_called_with("https://example.com:84/v2/compute/notifications/ws?encoding=msgpack", auth=None)
+    compute._controller.notification.dispatch.assert_called_with('test', {'a': 1}, compute_id=compute.id)
+
+
 def test_connectNotificationPing(compute, async_run):
     """
     When we receive a ping from a compute we update
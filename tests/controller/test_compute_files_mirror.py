@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock, AsyncioBytesIO
+from gns3server.controller.project import Project
+from gns3server.controller.compute_files_mirror import ComputeFilesMirror
+
+
+@pytest.fixture
+def project(controller):
+    return Project(controller=controller, name="test")
+
+
+def fake_compute(files):
+    compute = MagicMock()
+    compute.id = "remote"
+
+    @asyncio.coroutine
+    def download_file(project, path):
+        response = MagicMock()
+        response.content = AsyncioBytesIO(files[path])
+        return response
+
+    compute.download_file = AsyncioMagicMock(side_effect=download_file)
+    return compute
+
+
+def test_sync(project, async_run):
+    files = {"vm-1/disk": b"DISK", "vm-1/config": b"CONFIG"}
+    compute = fake_compute(files)
+    mirror = ComputeFilesMirror(project, compute)
+
+    paths = async_run(mirror.sync([{"path": "vm-1/disk", "md5sum": "1"}, {"path": "vm-1/config", "md5sum": "2"}]))
+    assert compute.download_file.call_count == 2
+    with open(paths["vm-1/disk"], "rb") as f:
+        assert f.read() == b"DISK"
+
+    # only the modified file is downloaded again
+    files["vm-1/config"] = b"CONFIG2"
+    paths = async_run(ComputeFilesMirror(project, compute).sync([{"path": "vm-1/disk", "md5sum": "1"}, {"path": "vm-1/config", "md5sum": "3"}]))
+    assert compute.download_file.call_count == 3
+    with open(paths["vm-1/config"], "rb") as f:
+        assert f.read() == b"CONFIG2"
+
+    # a file removed from the compute is removed from the copy
+    disk = paths["vm-1/disk"]
+    async_run(ComputeFilesMirror(project, compute).sync([{"path": "vm-1/config", "md5sum": "3"}]))
+    assert not os.path.exists(disk)
+
+
+def test_sync_outside_project(project, async_run):
+    compute = fake_compute({})
+    paths = async_run(ComputeFilesMirror(project, compute).sync([{"path": "../../test", "md5sum": "1"}]))
+    assert paths == {}
+    assert not compute.download_file.called
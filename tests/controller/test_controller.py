@@ -378,6 +378,12 @@ def test_start(controller, async_run):
     assert controller.computes["local"].name == socket.gethostname()
 
 
+def test_start_without_local_compute(controller, async_run):
+    with asyncio_patch("gns3server.controller.compute.Compute.connect") as mock:
+        async_run(controller.start(local_compute=False))
+    assert len(controller.computes) == 0
+
+
 def test_start_vm(controller, async_run):
     """
     Start the controller with a GNS3 VM
@@ -491,7 +497,8 @@ def test_appliance_templates(controller, async_run, tmpdir):
 
     with patch("gns3server.config.Config.get_section_config", return_value={"appliances_path": str(tmpdir)}):
         controller.load_appliances()
-    assert len(controller.appliance_templates) > 0
+        # the templates are loaded when they are requested
+        assert len(controller.appliance_templates) > 0
     for appliance in controller.appliance_templates.values():
         assert appliance.__json__()["status"] != "broken"
     assert "Alpine Linux" in [c.__json__()["name"] for c in controller.appliance_templates.values()]
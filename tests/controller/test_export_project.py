@@ -28,7 +28,7 @@ from unittest.mock import MagicMock
 from tests.utils import AsyncioMagicMock, AsyncioBytesIO
 
 from gns3server.controller.project import Project
-from gns3server.controller.export_project import export_project, _filter_files
+from gns3server.controller.export_project import export_project, _filter_files, _link_to_temporary_dir
 
 
 @pytest.fixture
@@ -103,7 +103,7 @@ def test_export(tmpdir, project, async_run):
     with open(os.path.join(path, "project-files", "snapshots", "test"), 'w+') as f:
         f.write("WORLD")
 
-    with patch("gns3server.compute.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
+    with patch("gns3server.compute.dynamips.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
         z = async_run(export_project(project, str(tmpdir), include_images=False))
 
     with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
@@ -303,7 +303,7 @@ def test_export_with_images(tmpdir, project, async_run):
     with open(os.path.join(path, "test.gns3"), 'w+') as f:
         json.dump(topology, f)
 
-    with patch("gns3server.compute.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
+    with patch("gns3server.compute.dynamips.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
         z = async_run(export_project(project, str(tmpdir), include_images=True))
         with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
             for data in z:
@@ -379,6 +379,7 @@ def test_export_images_from_vm(tmpdir, project, async_run, controller):
     mock_response.content.seek(0)
     mock_response.status = 200
     compute.download_image = AsyncioMagicMock(return_value=mock_response)
+    compute.http_query = AsyncioMagicMock(return_value=MagicMock(json=[]))
 
     project._project_created_on_compute.add(compute)
 
@@ -420,6 +421,24 @@ def test_export_images_from_vm(tmpdir, project, async_run, controller):
             assert content == b"IMAGE"
 
 
+def test_link_to_temporary_dir_copy(tmpdir):
+    """
+    The cached image is copied when it can't be linked
+    """
+
+    path = str(tmpdir / "image")
+    with open(path, "w+") as f:
+        f.write("IMAGE")
+    os.makedirs(str(tmpdir / "tmp"))
+
+    with patch("os.link", side_effect=OSError("Invalid cross-device link")):
+        temp_path = _link_to_temporary_dir(path, str(tmpdir / "tmp"))
+    assert os.path.dirname(temp_path) == str(tmpdir / "tmp")
+    os.remove(path)
+    with open(temp_path) as f:
+        assert f.read() == "IMAGE"
+
+
 def test_export_with_ignoring_snapshots(tmpdir, project, async_run):
     with open(os.path.join(project.path, "test.gns3"), 'w+') as f:
         data = {
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import asyncio
+import hashlib
+import aiohttp
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock, AsyncioBytesIO
+from gns3server.controller.image_cache import ImageCache
+
+
+def fake_compute(images):
+    """
+    :param images: Dictionary image => content
+    """
+
+    compute = MagicMock()
+    compute.id = "remote"
+    compute.listing = MagicMock()
+    compute.listing.json = [{"filename": image, "path": image, "md5sum": hashlib.md5(content).hexdigest()} for image, content in images.items()]
+    compute.http_query = AsyncioMagicMock(return_value=compute.listing)
+
+    @asyncio.coroutine
+    def download_image(image_type, image):
+        response = MagicMock()
+        response.status = 200
+        response.content = AsyncioBytesIO(images[image])
+        return response
+
+    compute.download_image = AsyncioMagicMock(side_effect=download_image)
+    return compute
+
+
+@pytest.fixture
+def image_cache(config, tmpdir):
+    config.set("Server", "image_cache_path", str(tmpdir / "cache"))
+    return ImageCache()
+
+
+def test_fetch_once(async_run, image_cache):
+    compute = fake_compute({"linux.img": b"LINUX"})
+    path = async_run(image_cache.fetch(compute, "qemu", "linux.img"))
+    assert os.path.basename(path) == hashlib.md5(b"LINUX").hexdigest()
+    with open(path, "rb") as f:
+        assert f.read() == b"LINUX"
+
+    assert async_run(image_cache.fetch(compute, "qemu", "linux.img")) == path
+    assert compute.download_image.call_count == 1
+
+
+def test_fetch_corrupted(async_run, image_cache):
+    compute = fake_compute({"linux.img": b"LINUX"})
+    compute.listing.json[0]["md5sum"] = hashlib.md5(b"OTHER").hexdigest()
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        async_run(image_cache.fetch(compute, "qemu", "linux.img"))
+    assert os.listdir(image_cache.directory) == []
+
+
+def test_evict_least_recently_used(async_run, config, image_cache):
+    config.set("Server", "image_cache_size", "1")
+    images = {"a.img": b"A" * 600 * 1024, "b.img": b"B" * 600 * 1024}
+    compute = fake_compute(images)
+    path_a = async_run(image_cache.fetch(compute, "qemu", "a.img"))
+    os.utime(path_a, (time.time() - 60, time.time() - 60))
+    path_b = async_run(image_cache.fetch(compute, "qemu", "b.img"))
+    assert not os.path.exists(path_a)
+    assert os.path.exists(path_b)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import asyncio
+import pytest
+from unittest.mock import MagicMock, ANY
+
+from tests.utils import AsyncioMagicMock
+from gns3server.controller.image_distribution import ImageDistribution
+
+
+def fake_compute(compute_id, images=()):
+    compute = MagicMock()
+    compute.id = compute_id
+    response = MagicMock()
+    response.json = [{"filename": filename, "md5sum": checksum} for filename, checksum in images]
+
+    @asyncio.coroutine
+    def post(*args, **kwargs):
+        yield from asyncio.sleep(0.1)
+
+    compute.http_query = AsyncioMagicMock(return_value=response)
+    compute.post = AsyncioMagicMock(side_effect=post)
+    return compute
+
+
+@pytest.fixture
+def distribution(controller):
+    return ImageDistribution(controller)
+
+
+@pytest.fixture
+def linux_img(images_dir):
+    path = os.path.join(images_dir, "QEMU", "linux.img")
+    with open(path, "w+") as f:
+        f.write("linux")
+    return path
+
+
+def test_ensure_single_flight(async_run, distribution, linux_img):
+    compute = fake_compute("remote")
+
+    @asyncio.coroutine
+    def create_nodes():
+        return (yield from asyncio.gather(*[distribution.ensure(compute, "qemu", "linux.img") for _ in range(20)]))
+
+    assert async_run(create_nodes()) == [True] * 20
+    assert compute.post.call_count == 1
+    compute.post.assert_called_with("/qemu/images/linux.img?md5sum=e206a54e97690cce50cc872dd70ee896", data=ANY, timeout=None)
+
+    # the compute is known to have the image now
+    assert async_run(distribution.ensure(compute, "qemu", "linux.img"))
+    assert compute.post.call_count == 1
+
+
+def test_ensure_already_on_compute(async_run, distribution, linux_img):
+    compute = fake_compute("remote", images=[("linux.img", "e206a54e97690cce50cc872dd70ee896")])
+    assert async_run(distribution.ensure(compute, "qemu", "linux.img"))
+    assert not compute.post.called
+
+
+def test_ensure_different_checksum(async_run, distribution, linux_img):
+    compute = fake_compute("remote", images=[("linux.img", "0f4cd6b3d1a1c1ae5fd2a2d4e5c4b84b")])
+    assert async_run(distribution.ensure(compute, "qemu", "linux.img"))
+    assert compute.post.call_count == 1
+
+
+def test_ensure_force(async_run, distribution, linux_img):
+    """
+    The compute reported the image missing, the cached listing is not used
+    """
+
+    compute = fake_compute("remote", images=[("linux.img", "e206a54e97690cce50cc872dd70ee896")])
+    assert async_run(distribution.ensure(compute, "qemu", "linux.img"))
+    assert not compute.post.called
+    assert async_run(distribution.ensure(compute, "qemu", "linux.img", force=True))
+    assert compute.post.call_count == 1
+    assert ("remote", "qemu") not in distribution._listings
+
+
+def test_ensure_missing_on_controller(async_run, distribution, images_dir):
+    compute = fake_compute("remote")
+    assert async_run(distribution.ensure(compute, "qemu", "linux.img")) is False
+    assert not compute.post.called
+
+
+def test_prestage(async_run, distribution, linux_img):
+    compute1 = fake_compute("remote1")
+    compute2 = fake_compute("remote2", images=[("linux.img", "e206a54e97690cce50cc872dd70ee896")])
+    nodes = [
+        (compute1, "qemu", {"hda_disk_image": "linux.img"}),
+        (compute1, "qemu", {"hda_disk_image": "linux.img", "hdb_disk_image": "missing.img"}),
+        (compute2, "qemu", {"hda_disk_image": "linux.img"}),
+        (compute2, "vpcs", {}),
+        (None, "qemu", {"hda_disk_image": "linux.img"})
+    ]
+    async_run(distribution.prestage(nodes))
+    assert compute1.post.call_count == 1
+    assert not compute2.post.called
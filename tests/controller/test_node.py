@@ -128,6 +128,7 @@ def test_json(node, compute):
         "console_type": node.console_type,
         "console_host": str(compute.console_host),
         "command_line": None,
+        "resource_usage": None,
         "node_directory": None,
         "properties": node.properties,
         "status": node.status,
@@ -492,8 +493,9 @@ def test_upload_missing_image(compute, controller, async_run, images_dir):
                 node_type="qemu",
                 properties={"hda_disk_image": "linux.img"})
     open(os.path.join(images_dir, "linux.img"), 'w+').close()
+    compute.http_query = AsyncioMagicMock(return_value=MagicMock(json=[]))
     assert async_run(node._upload_missing_image("qemu", "linux.img")) is True
-    compute.post.assert_called_with("/qemu/images/linux.img", data=ANY, timeout=None)
+    compute.post.assert_called_with("/qemu/images/linux.img?md5sum=d41d8cd98f00b204e9800998ecf8427e", data=ANY, timeout=None)
 
 
 def test_update_label(node):
@@ -122,3 +122,56 @@ def test_various_notification(controller, node):
     notif.emit("log.warning", {"message": "Warning ASA 8 is not officialy supported by GNS3"})
     notif.emit("log.error", {"message": "Permission denied on /tmp"})
     notif.emit("node.updated", node.__json__())
+
+
+def test_delta_notifications(async_run, controller, node, project):
+
+    notif = controller.notification
+    with notif.queue(project) as full_queue:
+        with notif.queue(project, delta=True) as queue:
+            async_run(full_queue.get(0.1))  # ping
+            async_run(queue.get(0.1))  # ping
+            # the complete state is sent first
+            action, event, kwargs = async_run(queue.get(5))
+            assert action == "node.updated"
+            assert event == node.__json__()
+            assert kwargs == {"version": 1}
+
+            node._status = "started"
+            notif.emit("node.updated", node.__json__())
+            action, event, kwargs = async_run(queue.get(5))
+            assert action == "node.updated"
+            assert event == {"node_id": node.id, "project_id": project.id, "status": "started"}
+            assert kwargs == {"version": 2, "delta": True}
+            # the other clients still receive the complete object
+            assert async_run(full_queue.get(5)) == ("node.updated", node.__json__(), {})
+
+            # nothing has changed
+            notif.emit("node.updated", node.__json__())
+            assert queue.empty()
+            assert not full_queue.empty()
+
+            node._status = "stopped"
+            notif.resync(project, queue)
+            action, event, kwargs = async_run(queue.get(5))
+            assert event == node.__json__()
+            assert kwargs == {"version": 3}
+
+        assert project.id not in notif._states
+
+
+def test_delta_notifications_shared(async_run, controller, node, project):
+
+    notif = controller.notification
+    with notif.queue(project, delta=True) as queue1:
+        with notif.queue(project, delta=True) as queue2:
+            for queue in (queue1, queue2):
+                async_run(queue.get(0.1))  # ping
+                async_run(queue.get(5))  # state
+            node._name = "PC-2"
+            notif.emit("node.updated", node.__json__())
+            _, event1, _ = async_run(queue1.get(5))
+            _, event2, _ = async_run(queue2.get(5))
+            # the changes are computed once
+            assert event1 is event2
+            assert event1["name"] == "PC-2"
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+from gns3server.controller.placement import Placement
+from gns3server.controller.project import Project
+from gns3server.controller.node import Node
+from gns3server.controller.link import Link
+
+
+def fake_compute(compute_id, cpu=0, reserved=0, capacity=8192, images=(), node_types=("qemu", "iou", "vpcs")):
+    compute = MagicMock()
+    compute.id = compute_id
+    compute.connected = True
+    compute.capabilities = {"node_types": list(node_types)}
+    compute.cpu_usage_percent = cpu
+    compute.memory_usage_percent = 0
+    compute.memory_reservations = {"capacity": capacity, "reserved": reserved}
+    response = MagicMock()
+    response.json = [{"filename": image} for image in images]
+    compute.http_query = AsyncioMagicMock(return_value=response)
+    return compute
+
+
+def fake_node(node_id, node_type="qemu", **properties):
+    return {"node_id": node_id, "node_type": node_type, "name": node_id, "properties": properties}
+
+
+def link(*node_ids):
+    return {"nodes": [{"node_id": node_id} for node_id in node_ids]}
+
+
+def test_node_images():
+    node = fake_node("1", hda_disk_image="/images/QEMU/linux.qcow2", cdrom_image="", ram=256)
+    assert Placement.node_images(node) == {"linux.qcow2"}
+    assert Placement.node_ram(node) == 256
+    assert Placement.node_images(fake_node("2", "vpcs")) == set()
+
+
+def test_place_least_loaded(controller, async_run):
+    computes = [fake_compute("busy", cpu=90), fake_compute("idle", cpu=5)]
+    placement = async_run(Placement(controller, computes).place([fake_node("1")]))
+    assert placement == {"1": "idle"}
+
+
+def test_place_memory(controller, async_run):
+    computes = [fake_compute("full", reserved=8000), fake_compute("empty", cpu=30)]
+    placement = async_run(Placement(controller, computes).place([fake_node("1", ram=1024)]))
+    assert placement == {"1": "empty"}
+
+
+def test_place_spread_declared_ram(controller, async_run):
+    computes = [fake_compute("a", capacity=2048), fake_compute("b", capacity=2048)]
+    nodes = [fake_node(str(i), ram=1024) for i in range(4)]
+    placement = async_run(Placement(controller, computes).place(nodes))
+    assert sorted(placement.values()) == ["a", "a", "b", "b"]
+
+
+def test_place_image_available(controller, async_run):
+    computes = [fake_compute("a"), fake_compute("b", cpu=40, images=["linux.qcow2"])]
+    placement = async_run(Placement(controller, computes).place([fake_node("1", hda_disk_image="linux.qcow2"),
+                                                                 fake_node("2", hda_disk_image="linux.qcow2")]))
+    assert placement == {"1": "b", "2": "b"}
+    # images are listed only once per compute
+    assert computes[1].http_query.call_count == 1
+
+
+def test_place_node_types(controller, async_run):
+    computes = [fake_compute("windows", node_types=["qemu", "vpcs"]), fake_compute("linux", cpu=80)]
+    placement = async_run(Placement(controller, computes).place([fake_node("1", "iou"), fake_node("2", "docker")]))
+    assert placement == {"1": "linux"}
+
+
+def test_place_link_locality(controller, async_run):
+    computes = [fake_compute("a"), fake_compute("b")]
+    nodes = [fake_node(str(i), "vpcs") for i in range(4)]
+    links = [link("0", "1"), link("1", "2"), link("2", "3")]
+    placement = async_run(Placement(controller, computes).place(nodes, links))
+    assert len(set(placement.values())) == 1
+
+
+def test_place_fixed(controller, async_run):
+    computes = [fake_compute("a", cpu=50), fake_compute("b")]
+    placement = async_run(Placement(controller, computes).place([fake_node("1", "vpcs"), fake_node("2", "vpcs")],
+                                                                [link("1", "2")],
+                                                                fixed={"1": "a"}))
+    assert placement == {"2": "a"}
+
+
+def test_rebalance(controller, async_run):
+    compute_a = fake_compute("a")
+    compute_b = fake_compute("b")
+    controller._computes = {"a": compute_a, "b": compute_b}
+    project = Project(controller=controller, name="Test")
+    node1 = Node(project, compute_a, "node1", node_type="vpcs")
+    node2 = Node(project, compute_b, "node2", node_type="vpcs")
+    project._nodes = {node1.id: node1, node2.id: node2}
+    link = Link(project)
+    link._nodes = [{"node": node1}, {"node": node2}]
+    project._links = {link.id: link}
+
+    suggestion = async_run(Placement(controller).rebalance(project))
+    assert suggestion["cross_compute_links"] == 1
+    assert suggestion["suggested_cross_compute_links"] == 0
+    assert len(suggestion["moves"]) == 1
@@ -19,6 +19,7 @@
 import os
 import sys
 import pytest
+import asyncio
 import aiohttp
 import zipstream
 from unittest.mock import MagicMock
@@ -27,6 +28,7 @@ from unittest.mock import patch
 from uuid import uuid4
 
 from gns3server.controller.project import Project
+from gns3server.controller.compute import ComputeError
 from gns3server.controller.appliance import Appliance
 from gns3server.controller.ports.ethernet_port import EthernetPort
 from gns3server.config import Config
@@ -236,6 +238,77 @@ def test_add_node_from_appliance(async_run, controller):
                                  timeout=1200)
 
 
+def test_add_nodes_from_appliances(async_run, controller):
+    project = Project(controller=controller, name="Test")
+    controller._notification = MagicMock()
+    compute = MagicMock()
+    compute.id = "local"
+    controller._computes["local"] = compute
+    controller._appliances["fakeid"] = Appliance("fakeid", {
+        "server": "local",
+        "name": "Test",
+        "default_name_format": "{name}-{0}",
+        "node_type": "vpcs",
+        "properties": {
+            "a": 1
+        }
+    })
+
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+
+    nodes = [{"appliance_id": "fakeid", "x": i * 10, "y": 0} for i in range(5)]
+    nodes.insert(2, {"appliance_id": "unknown", "x": 0, "y": 0})
+    with patch("gns3server.controller.project.Project.dump") as mock_dump:
+        results = async_run(project.add_nodes_from_appliances(nodes, compute_concurrency=2))
+        assert mock_dump.call_count == 1
+
+    assert [result["status"] for result in results] == [201, 201, 404, 201, 201, 201]
+    assert results[2]["appliance_id"] == "unknown"
+    assert [result["node"]["name"] for result in results if "node" in result] == ["Test-1", "Test-2", "Test-3", "Test-4", "Test-5"]
+    assert results[3]["node"]["x"] == 20
+    assert len(project.nodes) == 5
+
+    # the project is created only once on the compute
+    project_creations = [call for call in compute.post.call_args_list if call[0][0] == "/projects"]
+    assert len(project_creations) == 1
+
+    controller.notification.emit.assert_called_with("project.nodes_creation", {"project_id": project.id, "total": 6, "done": 6, "failed": 1})
+
+
+def test_add_nodes_from_appliances_compute_error(async_run, controller):
+    project = Project(controller=controller, name="Test")
+    controller._notification = MagicMock()
+    compute = MagicMock()
+    compute.id = "local"
+    controller._computes["local"] = compute
+    controller._appliances["fakeid"] = Appliance("fakeid", {
+        "server": "local",
+        "name": "Test",
+        "default_name_format": "{name}-{0}",
+        "node_type": "vpcs"
+    })
+
+    response = MagicMock()
+    response.json = {"console": 2048}
+
+    @asyncio.coroutine
+    def post(path, **kwargs):
+        if path.endswith("/nodes") and kwargs["data"]["name"] == "Test-2":
+            raise aiohttp.web.HTTPConflict(text="No more space")
+        return response
+    compute.post = post
+
+    results = async_run(project.add_nodes_from_appliances([{"appliance_id": "fakeid", "x": 0, "y": 0}] * 3))
+    assert results[1] == {"appliance_id": "fakeid", "status": 409, "message": "No more space"}
+    assert results[0]["node"]["name"] == "Test-1"
+    assert results[2]["node"]["name"] == "Test-3"
+    assert len(project.nodes) == 2
+    # the name of the failed node is free again
+    assert project.update_allocated_node_name("Test-{0}") == "Test-2"
+
+
 def test_delete_node(async_run, controller):
     """
     For a local server we send the project path
@@ -424,6 +497,27 @@ def test_open_close(async_run, controller):
     controller.notification.emit.assert_any_call("project.closed", project.__json__())
 
 
+def test_close_save_configs(async_run, controller):
+    compute = MagicMock()
+    compute.id = "local"
+    compute.post = AsyncioMagicMock()
+    project = Project(controller=controller, name="Test")
+    project._project_created_on_compute.add(compute)
+    async_run(project.close())
+    compute.post.assert_any_call("/projects/{}/configs/save".format(project.id), dont_connect=True)
+    compute.post.assert_any_call("/projects/{}/close".format(project.id), dont_connect=True)
+
+
+def test_close_save_configs_compute_error(async_run, controller):
+    compute = MagicMock()
+    compute.id = "local"
+    compute.post = AsyncioMagicMock(side_effect=ComputeError("Down"))
+    project = Project(controller=controller, name="Test")
+    project._project_created_on_compute.add(compute)
+    async_run(project.close())
+    assert project.status == "closed"
+
+
 def test_open_auto_start(async_run, controller):
     project = Project(controller=controller, status="closed", name="Test", auto_start=True)
     project.start_all = AsyncioMagicMock()
@@ -551,6 +645,22 @@ def test_start_all(project, async_run):
     assert len(compute.post.call_args_list) == 10
 
 
+def test_start_all_warmup_ghosts(project, async_run):
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+
+    for node_i in range(0, 3):
+        async_run(project.add_node(compute, "test", None, node_type="dynamips", properties={"platform": "c7200", "image": "c7200.image", "ram": 256}))
+
+    compute.post = AsyncioMagicMock(return_value=response)
+    async_run(project.start_all())
+    compute.post.assert_any_call("/projects/{}/dynamips/ghosts/warmup".format(project.id), timeout=None)
+    assert len(compute.post.call_args_list) == 4
+
+
 def test_stop_all(project, async_run):
     compute = MagicMock()
     compute.id = "local"
@@ -605,6 +715,17 @@ def test_node_name(project, async_run):
     assert node.name == "R3"
 
 
+def test_node_name_reuse(project):
+    assert project.update_allocated_node_name("test-{0}") == "test-1"
+    assert project.update_allocated_node_name("test-{0}") == "test-2"
+    assert project.update_allocated_node_name("test-{0}") == "test-3"
+    project.remove_allocated_node_name("test-2")
+    assert project.update_allocated_node_name("test-{0}") == "test-2"
+    assert project.update_allocated_node_name("test-{0}") == "test-4"
+    assert project.update_allocated_node_name("R1") == "R1"
+    assert project.update_allocated_node_name("R1") == "R2"
+
+
 def test_duplicate_node(project, async_run):
     compute = MagicMock()
     compute.id = "local"
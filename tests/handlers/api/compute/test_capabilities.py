@@ -23,6 +23,9 @@ import sys
 import pytest
 
 from gns3server.config import Config
+from gns3server.compute.probe_cache import ProbeCache
+from gns3server.compute.memory_ledger import MemoryLedger
+from gns3server.utils.encoding import ENCODINGS
 
 from gns3server.version import __version__
 
@@ -31,11 +34,20 @@ from gns3server.version import __version__
 def test_get(http_compute, windows_platform):
     response = http_compute.get('/capabilities', example=True)
     assert response.status == 200
-    assert response.json == {'node_types': ['cloud', 'ethernet_hub', 'ethernet_switch', 'nat', 'vpcs', 'virtualbox', 'dynamips', 'frame_relay_switch', 'atm_switch', 'qemu', 'vmware', 'docker', 'iou'], 'version': __version__, 'platform': sys.platform}
+    assert response.json == {'node_types': ['cloud', 'ethernet_hub', 'ethernet_switch', 'nat', 'vpcs', 'virtualbox', 'dynamips', 'frame_relay_switch', 'atm_switch', 'qemu', 'vmware', 'docker', 'iou'], 'version': __version__, 'platform': sys.platform, 'probes': [], 'memory': MemoryLedger.instance().__json__(), 'encodings': ENCODINGS}
 
 
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="Not supported on Windows")
 def test_get_on_gns3vm(http_compute, on_gns3vm):
     response = http_compute.get('/capabilities', example=True)
     assert response.status == 200
-    assert response.json == {'node_types': ['cloud', 'ethernet_hub', 'ethernet_switch', 'nat', 'vpcs', 'virtualbox', 'dynamips', 'frame_relay_switch', 'atm_switch', 'qemu', 'vmware', 'docker', 'iou'], 'version': __version__, 'platform': sys.platform}
+    assert response.json == {'node_types': ['cloud', 'ethernet_hub', 'ethernet_switch', 'nat', 'vpcs', 'virtualbox', 'dynamips', 'frame_relay_switch', 'atm_switch', 'qemu', 'vmware', 'docker', 'iou'], 'version': __version__, 'platform': sys.platform, 'probes': [], 'memory': MemoryLedger.instance().__json__(), 'encodings': ENCODINGS}
+
+
+def test_get_probes(http_compute, tmpdir):
+    path = str(tmpdir / "ubridge")
+    open(path, "w+").close()
+    ProbeCache.instance().probe_sync("privileged access", path, lambda: True)
+    response = http_compute.get('/capabilities')
+    assert response.status == 200
+    assert response.json["probes"] == [{"name": "privileged access", "path": path, "result": True}]
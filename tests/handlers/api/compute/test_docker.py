@@ -198,3 +198,10 @@ def test_docker_duplicate(http_compute, vm):
             example=True)
         assert mock.called
         assert response.status == 201
+
+
+def test_docker_latencies(http_compute):
+    with patch("gns3server.compute.docker.Docker.latencies", return_value={"start": {"count": 1, "average": 1.5, "max": 1.5}}):
+        response = http_compute.get("/docker/latencies", example=True)
+    assert response.status == 200
+    assert response.json["start"]["count"] == 1
@@ -183,3 +183,37 @@ def test_upload_image_permission_denied(http_compute, tmpdir, images_dir):
     with patch("gns3server.utils.images.default_images_directory", return_value=str(tmpdir)):
         response = http_compute.post("/dynamips/images/test2", body="TEST", raw=True)
         assert response.status == 409
+
+
+def test_list_idlepcs(http_compute, images_dir):
+    from gns3server.compute.dynamips import Dynamips
+
+    Dynamips.instance().idlepc_database.set("c1f7e3f3", "c7200", "0x60606f54", image="c7200.image")
+    response = http_compute.get("/dynamips/idlepc", example=True)
+    assert response.status == 200
+    assert response.json[0]["idlepc"] == "0x60606f54"
+    assert response.json[0]["platform"] == "c7200"
+
+
+def test_auto_idlepc_invalid_parameters(http_compute, project):
+    url = "/projects/{project_id}/dynamips/nodes/00010203-0405-0607-0809-0a0b0c0d0e0f/auto_idlepc".format(project_id=project.id)
+    assert http_compute.get(url + "?instances=abc").status == 400
+    assert http_compute.get(url + "?instances=-1").status == 400
+    assert http_compute.get(url + "?use_database=yes").status == 400
+
+
+def test_precompute_idlepcs(http_compute):
+    results = {"c7200.image": {"idlepc": "0x60606f54", "platform": "c7200"}}
+    with asyncio_patch("gns3server.compute.dynamips.Dynamips.precompute_idlepcs", return_value=results) as mock:
+        response = http_compute.post("/dynamips/idlepc/precompute", {"images": [{"image": "c7200.image"}], "instances": 4}, example=True)
+    assert mock.called
+    assert response.status == 200
+    assert response.json == results
+
+
+def test_warmup_ghosts(http_compute, project):
+    with asyncio_patch("gns3server.compute.dynamips.Dynamips.warmup_ghosts", return_value=["/tmp/c7200-c7200.image-512.ghost"]) as mock:
+        response = http_compute.post("/projects/{project_id}/dynamips/ghosts/warmup".format(project_id=project.id), example=True)
+    assert mock.called
+    assert response.status == 200
+    assert response.json == ["/tmp/c7200-c7200.image-512.ghost"]
@@ -298,7 +298,7 @@ def test_images(http_compute, fake_iou_bin):
 
 
 def test_image_vm(http_compute, tmpdir):
-    with patch("gns3server.compute.IOU.get_images_directory", return_value=str(tmpdir),):
+    with patch("gns3server.compute.iou.IOU.get_images_directory", return_value=str(tmpdir),):
         response = http_compute.post("/iou/images/test2", body="TEST", raw=True)
         assert response.status == 204
 
@@ -16,8 +16,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import pytest
+import aiohttp
 
 from gns3server.compute.notification_manager import NotificationManager
+from gns3server.utils.encoding import MSGPACK_AVAILABLE, unpack
 
 
 def test_notification_ws(http_compute, async_run):
@@ -33,3 +36,18 @@ def test_notification_ws(http_compute, async_run):
     assert answer["action"] == "test"
 
     async_run(http_compute.close())
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_notification_ws_msgpack(http_compute, async_run):
+    ws = http_compute.websocket("/notifications/ws?encoding=msgpack")
+    answer = async_run(ws.receive())
+    assert answer.tp == aiohttp.WSMsgType.binary
+    assert unpack(answer.data)["action"] == "ping"
+
+    NotificationManager.instance().emit("test", {"a": 1})
+
+    answer = async_run(ws.receive())
+    assert unpack(answer.data) == {"action": "test", "event": {"a": 1}}
+
+    async_run(http_compute.close())
@@ -23,6 +23,7 @@ import uuid
 import os
 import asyncio
 import aiohttp
+import pytest
 import zipfile
 
 from unittest.mock import patch
@@ -30,6 +31,7 @@ from tests.utils import asyncio_patch
 
 from gns3server.handlers.api.compute.project_handler import ProjectHandler
 from gns3server.compute.project_manager import ProjectManager
+from gns3server.utils.encoding import MSGPACK_AVAILABLE, MSGPACK_CONTENT_TYPE, pack, unpack
 
 
 def test_create_project_with_path(http_compute, tmpdir):
@@ -39,6 +41,22 @@ def test_create_project_with_path(http_compute, tmpdir):
         assert response.json["project_id"] == "00010203-0405-0607-0809-0a0b0c0d0e0f"
 
 
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_create_project_msgpack(http_compute):
+    body = pack({"name": "test", "project_id": "00010203-0405-0607-0809-0a0b0c0d0e0f"})
+    headers = {"content-type": MSGPACK_CONTENT_TYPE, "accept": "{}, application/json".format(MSGPACK_CONTENT_TYPE)}
+    response = http_compute.post("/projects", body, raw=True, headers=headers)
+    assert response.status == 201
+    assert response.headers["CONTENT-TYPE"] == MSGPACK_CONTENT_TYPE
+    assert unpack(response.body)["project_id"] == "00010203-0405-0607-0809-0a0b0c0d0e0f"
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_create_project_invalid_msgpack(http_compute):
+    response = http_compute.post("/projects", b"\xc1", raw=True, headers={"content-type": MSGPACK_CONTENT_TYPE})
+    assert response.status == 400
+
 def test_create_project_without_dir(http_compute):
     query = {"name": "test", "project_id": "10010203-0405-0607-0809-0a0b0c0d0e0f"}
     response = http_compute.post("/projects", query, example=True)
@@ -105,6 +123,13 @@ def test_close_project(http_compute, project):
         assert mock.called
 
 
+def test_save_project_configs(http_compute, project):
+    with asyncio_patch("gns3server.compute.project.Project.save_configs", return_value=True) as mock:
+        response = http_compute.post("/projects/{project_id}/configs/save".format(project_id=project.id), example=True)
+        assert response.status == 204
+        assert mock.called
+
+
 def test_close_project_two_client_connected(http_compute, project):
 
     ProjectHandler._notifications_listening = {project.id: 2}
@@ -139,6 +164,60 @@ def test_get_file(http_compute, tmpdir):
     assert response.status == 404
 
 
+def test_get_file_range(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    with open(os.path.join(project.path, "hello"), "w+") as f:
+        f.write("hello world")
+
+    response = http_compute.get("/projects/{project_id}/files/hello".format(project_id=project.id), headers={"Range": "bytes=6-"}, raw=True)
+    assert response.status == 206
+    assert response.body == b"world"
+    assert response.headers["Content-Range"] == "bytes 6-10/11"
+
+    response = http_compute.get("/projects/{project_id}/files/hello".format(project_id=project.id), headers={"Range": "bytes=0-4"}, raw=True)
+    assert response.status == 206
+    assert response.body == b"hello"
+
+    response = http_compute.get("/projects/{project_id}/files/hello".format(project_id=project.id), headers={"Range": "bytes=-3"}, raw=True)
+    assert response.status == 206
+    assert response.body == b"rld"
+
+    response = http_compute.get("/projects/{project_id}/files/hello".format(project_id=project.id), headers={"Range": "bytes=20-"}, raw=True)
+    assert response.status == 416
+    assert response.headers["Content-Range"] == "bytes */11"
+
+
+def test_get_file_compressed(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    content = b'{"name": "test"}\n' * 100000
+    for name in ("test.gns3", "test.zip"):
+        with open(os.path.join(project.path, name), "wb+") as f:
+            f.write(content)
+
+    response = http_compute.get("/projects/{project_id}/files/test.gns3".format(project_id=project.id), headers={"Accept-Encoding": "gzip"}, raw=True)
+    assert response.status == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.body == content
+
+    # Already compressed
+    response = http_compute.get("/projects/{project_id}/files/test.zip".format(project_id=project.id), headers={"Accept-Encoding": "gzip"}, raw=True)
+    assert response.status == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Content-Length"] == str(len(content))
+
+    # A range is sent as is
+    response = http_compute.get("/projects/{project_id}/files/test.gns3".format(project_id=project.id), headers={"Accept-Encoding": "gzip", "Range": "bytes=0-15"}, raw=True)
+    assert response.status == 206
+    assert "Content-Encoding" not in response.headers
+    assert response.body == b'{"name": "test"}'
+
+
 def test_write_file(http_compute, tmpdir):
 
     with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
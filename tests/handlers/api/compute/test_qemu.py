@@ -242,8 +242,17 @@ def test_images(http_compute, tmpdir, fake_qemu_vm):
     assert response.json == [{"filename": "linux载.img", "path": "linux载.img", "md5sum": "c4ca4238a0b923820dcc509a6f75849b", "filesize": 1}]
 
 
+def test_images_fields(http_compute, tmpdir, fake_qemu_vm):
+
+    with patch("gns3server.utils.images.md5sum") as md5sum:
+        response = http_compute.get("/qemu/images?fields=filename,filesize")
+    assert response.status == 200
+    assert response.json == [{"filename": "linux载.img", "filesize": 1}]
+    assert not md5sum.called
+
+
 def test_upload_image(http_compute, tmpdir):
-    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir),):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir),):
         response = http_compute.post("/qemu/images/test2使", body="TEST", raw=True)
         assert response.status == 204
 
@@ -256,7 +265,7 @@ def test_upload_image(http_compute, tmpdir):
 
 
 def test_upload_image_ova(http_compute, tmpdir):
-    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir),):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir),):
         response = http_compute.post("/qemu/images/test2.ova/test2.vmdk", body="TEST", raw=True)
         assert response.status == 204
 
@@ -268,8 +277,37 @@ def test_upload_image_ova(http_compute, tmpdir):
         assert checksum == "033bd94b1168d7e4f0d644c3c95e35bf"
 
 
+def test_upload_image_resumable(http_compute, tmpdir):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir),):
+        response = http_compute.post("/qemu/images/test2?upload_id=abc&offset=0", body="TE", raw=True)
+        assert response.status == 200
+        assert response.json == {"offset": 2}
+        assert not os.path.exists(str(tmpdir / "test2"))
+
+        # the connection has been lost, the client resends the data after the offset
+        response = http_compute.post("/qemu/images/test2?upload_id=abc&offset=0", body="TE", raw=True)
+        assert response.status == 409
+
+        response = http_compute.post("/qemu/images/test2?upload_id=abc&offset=2&complete=1&md5sum=033bd94b1168d7e4f0d644c3c95e35bf", body="ST", raw=True)
+        assert response.status == 204
+
+    with open(str(tmpdir / "test2")) as f:
+        assert f.read() == "TEST"
+
+    with open(str(tmpdir / "test2.md5sum")) as f:
+        assert f.read() == "033bd94b1168d7e4f0d644c3c95e35bf"
+
+
+def test_upload_image_checksum_mismatch(http_compute, tmpdir):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir),):
+        response = http_compute.post("/qemu/images/test2?md5sum=0123456789abcdef0123456789abcdef", body="TEST", raw=True)
+        assert response.status == 409
+    assert not os.path.exists(str(tmpdir / "test2"))
+    assert not os.path.exists(str(tmpdir / "test2.tmp"))
+
+
 def test_upload_image_forbiden_location(http_compute, tmpdir):
-    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir),):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir),):
         response = http_compute.post("/qemu/images/../../test2", body="TEST", raw=True)
         assert response.status == 404
 
@@ -279,7 +317,7 @@ def test_upload_image_permission_denied(http_compute, tmpdir):
         f.write("")
     os.chmod(str(tmpdir / "test2.tmp"), 0)
 
-    with patch("gns3server.compute.Qemu.get_images_directory", return_value=str(tmpdir),):
+    with patch("gns3server.compute.qemu.Qemu.get_images_directory", return_value=str(tmpdir),):
         response = http_compute.post("/qemu/images/test2", body="TEST", raw=True)
         assert response.status == 409
 
@@ -295,7 +333,7 @@ def test_create_img_relative(http_compute):
         "lazy_refcounts": "off",
         "size": 100
     }
-    with asyncio_patch("gns3server.compute.Qemu.create_disk"):
+    with asyncio_patch("gns3server.compute.qemu.Qemu.create_disk"):
         response = http_compute.post("/qemu/img", body=body, example=True)
 
     assert response.status == 201
@@ -316,7 +354,7 @@ def test_create_img_absolute_non_local(http_compute):
         "lazy_refcounts": "off",
         "size": 100
     }
-    with asyncio_patch("gns3server.compute.Qemu.create_disk"):
+    with asyncio_patch("gns3server.compute.qemu.Qemu.create_disk"):
         response = http_compute.post("/qemu/img", body=body, example=True)
 
     assert response.status == 403
@@ -337,14 +375,14 @@ def test_create_img_absolute_local(http_compute):
         "lazy_refcounts": "off",
         "size": 100
     }
-    with asyncio_patch("gns3server.compute.Qemu.create_disk"):
+    with asyncio_patch("gns3server.compute.qemu.Qemu.create_disk"):
         response = http_compute.post("/qemu/img", body=body, example=True)
 
     assert response.status == 201
 
 
 def test_capabilities(http_compute):
-    with asyncio_patch("gns3server.compute.Qemu.get_kvm_archs", return_value=["x86_64"]):
+    with asyncio_patch("gns3server.compute.qemu.Qemu.get_kvm_archs", return_value=["x86_64"]):
         response = http_compute.get("/qemu/capabilities", example=True)
         assert response.json["kvm"] == ["x86_64"]
 
@@ -37,3 +37,14 @@ def test_version_output(http_compute):
 def test_debug_output(http_compute):
     response = http_compute.get('/debug')
     assert response.status == 200
+
+
+def test_metrics(http_compute):
+    http_compute.get('/version')
+    response = http_compute.get('/metrics', raw=True)
+    assert response.status == 200
+    assert response.headers["CONTENT-TYPE"].startswith("text/plain")
+    body = response.body.decode()
+    assert 'gns3_http_request_duration_seconds_count{method="GET",route="/v2/compute/version",status="200"}' in body
+    assert 'gns3_compute_ports_used{protocol="tcp"}' in body
+    assert "# TYPE gns3_compute_notification_queue_size gauge" in body
@@ -86,3 +86,23 @@ def test_create_node_from_appliance(http_controller, controller, project, comput
     print(response.body)
     assert response.route == "/projects/{project_id}/appliances/{appliance_id}"
     assert response.status == 201
+
+
+def test_create_nodes_from_appliances(http_controller, controller, project, compute):
+
+    id = str(uuid.uuid4())
+    results = [{"appliance_id": id, "status": 201, "node": {"name": "test-1"}},
+               {"appliance_id": "unknown", "status": 404, "message": "Appliance unknown doesn't exist"}]
+    with asyncio_patch("gns3server.controller.project.Project.add_nodes_from_appliances", return_value=results) as mock:
+        response = http_controller.post("/projects/{}/appliances".format(project.id), {
+            "nodes": [
+                {"appliance_id": id, "x": 42, "y": 12},
+                {"appliance_id": "unknown", "x": 0, "y": 0, "compute_id": "local"}
+            ],
+            "compute_concurrency": 2
+        })
+    mock.assert_called_with([{"appliance_id": id, "x": 42, "y": 12},
+                             {"appliance_id": "unknown", "x": 0, "y": 0, "compute_id": "local"}], compute_concurrency=2)
+    assert response.route == "/projects/{project_id}/appliances"
+    assert response.status == 200
+    assert response.json == {"nodes": results}
@@ -26,6 +26,7 @@ import aiohttp
 import pytest
 
 
+from unittest.mock import patch, PropertyMock
 from tests.utils import asyncio_patch
 
 from gns3server.handlers.api.controller.project_handler import ProjectHandler
@@ -90,6 +91,16 @@ def test_list_drawing(http_controller, tmpdir, project, async_run):
     assert len(response.json) == 1
 
 
+def test_list_drawing_fields(http_controller, project):
+    drawing = Drawing(project, svg="missing.png")
+    project._drawings[drawing.id] = drawing
+    with patch("gns3server.controller.drawing.Drawing.svg", new_callable=PropertyMock) as svg:
+        response = http_controller.get("/projects/{}/drawings?fields=drawing_id,x,y".format(project.id))
+    assert response.status == 200
+    assert response.json == [{"drawing_id": drawing.id, "x": 0, "y": 0}]
+    assert not svg.called
+
+
 def test_delete_drawing(http_controller, tmpdir, project, async_run):
 
     drawing = Drawing(project)
@@ -91,6 +91,28 @@ def test_list_node(http_controller, tmpdir, project, compute):
     assert response.json[0]["name"] == "test"
 
 
+def test_list_node_query(http_controller, project, compute):
+    for name, node_type in (("PC-1", "vpcs"), ("PC-2", "vpcs"), ("SW-1", "ethernet_switch")):
+        node = Node(project, compute, name, node_type=node_type)
+        project._nodes[node.id] = node
+
+    response = http_controller.get("/projects/{}/nodes?fields=name,status&node_type=vpcs".format(project.id))
+    assert response.status == 200
+    assert sorted(response.json, key=lambda node: node["name"]) == [{"name": "PC-1", "status": "stopped"},
+                                                                    {"name": "PC-2", "status": "stopped"}]
+
+    response = http_controller.get("/projects/{}/nodes?fields=node_id&limit=2".format(project.id))
+    assert len(response.json) == 2
+    cursor = response.headers["X-Next-Cursor"]
+    assert cursor == response.json[-1]["node_id"]
+    response = http_controller.get("/projects/{}/nodes?fields=node_id&limit=2&cursor={}".format(project.id, cursor))
+    assert len(response.json) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+    response = http_controller.get("/projects/{}/nodes?color=red".format(project.id))
+    assert response.status == 400
+
+
 def test_get_node(http_controller, tmpdir, project, compute):
     response = MagicMock()
     response.json = {"console": 2048}
@@ -93,6 +93,12 @@ def test_get_project(http_controller, project):
     assert response.json["name"] == "test"
 
 
+def test_rebalance_project(http_controller, project):
+    response = http_controller.get("/projects/{project_id}/rebalance".format(project_id=project.id), example=True)
+    assert response.status == 200
+    assert response.json == {"moves": [], "cross_compute_links": 0, "suggested_cross_compute_links": 0}
+
+
 def test_delete_project(http_controller, project):
     with asyncio_patch("gns3server.controller.project.Project.delete", return_value=True) as mock:
         response = http_controller.delete("/projects/{project_id}".format(project_id=project.id), example=True)
@@ -170,6 +176,35 @@ def test_notification_ws(http_controller, controller, project, async_run):
     assert project.status == "opened"
 
 
+def test_notification_ws_delta(http_controller, controller, project, async_run):
+    class Node:
+
+        def __json__(self):
+            return {"node_id": "node1", "project_id": project.id, "name": "PC-1", "status": "stopped"}
+
+    node = Node()
+    project._nodes = {"node1": node}
+
+    ws = http_controller.websocket("/projects/{project_id}/notifications/ws?delta=1".format(project_id=project.id))
+    answer = json.loads(async_run(ws.receive()).data)
+    assert answer["action"] == "ping"
+    answer = json.loads(async_run(ws.receive()).data)
+    assert answer == {"action": "node.updated", "event": node.__json__(), "version": 1}
+
+    controller.notification.emit("node.updated", {"node_id": "node1", "project_id": project.id, "name": "PC-1", "status": "started"})
+    answer = json.loads(async_run(ws.receive()).data)
+    assert answer == {"action": "node.updated", "event": {"node_id": "node1", "project_id": project.id, "status": "started"}, "version": 2, "delta": True}
+
+    ws.send_str(json.dumps({"action": "resync"}))
+    answer = json.loads(async_run(ws.receive()).data)
+    assert answer["event"]["status"] == "stopped"
+    assert answer["version"] == 3
+
+    async_run(http_controller.close())
+    ws.close()
+    project._nodes = {}
+
+
 def test_export_with_images(http_controller, tmpdir, loop, project):
     project.dump = MagicMock()
 
@@ -196,7 +231,7 @@ def test_export_with_images(http_controller, tmpdir, loop, project):
     with open(os.path.join(project.path, "test.gns3"), 'w+') as f:
         json.dump(topology, f)
 
-    with patch("gns3server.compute.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
+    with patch("gns3server.compute.dynamips.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
         response = http_controller.get("/projects/{project_id}/export?include_images=1".format(project_id=project.id), raw=True)
     assert response.status == 200
     assert response.headers['CONTENT-TYPE'] == 'application/gns3project'
@@ -238,7 +273,7 @@ def test_export_without_images(http_controller, tmpdir, loop, project):
     with open(os.path.join(project.path, "test.gns3"), 'w+') as f:
         json.dump(topology, f)
 
-    with patch("gns3server.compute.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
+    with patch("gns3server.compute.dynamips.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
         response = http_controller.get("/projects/{project_id}/export?include_images=0".format(project_id=project.id), raw=True)
     assert response.status == 200
     assert response.headers['CONTENT-TYPE'] == 'application/gns3project'
@@ -70,3 +70,12 @@ def test_debug_non_local(http_controller, config, tmpdir):
     config.set("Server", "local", False)
     response = http_controller.post('/debug')
     assert response.status == 403
+
+
+def test_metrics(http_controller, controller, project):
+    with controller.notification.queue(project):
+        response = http_controller.get('/metrics', raw=True)
+    assert response.status == 200
+    body = response.body.decode()
+    assert 'gns3_controller_notification_clients{{project_id="{}"}} 1'.format(project.id) in body
+    assert "# TYPE gns3_http_request_duration_seconds histogram" in body
@@ -32,8 +32,27 @@ def test_symbols(http_controller):
     } in response.json
 
 
+def test_symbols_compressed(http_controller):
+    response = http_controller.get('/symbols', headers={"Accept-Encoding": "gzip"})
+    assert response.status == 200
+    assert response.headers["CONTENT-ENCODING"] == "gzip"
+    assert response.headers["VARY"] == "Accept-Encoding"
+    assert {
+        'symbol_id': ':/symbols/firewall.svg',
+        'filename': 'firewall.svg',
+        'builtin': True
+    } in response.json
+
+
+def test_symbols_compression_disabled(http_controller):
+    Config.instance().set("Server", "compression", False)
+    response = http_controller.get('/symbols', headers={"Accept-Encoding": "gzip"})
+    assert response.status == 200
+    assert "CONTENT-ENCODING" not in response.headers
+
+
 def test_get(http_controller):
-    response = http_controller.get('/symbols/' + urllib.parse.quote(':/symbols/firewall.svg') + '/raw')
+    response = http_controller.get('/symbols/' + urllib.parse.quote(':/symbols/firewall.svg') + '/raw', headers={"Accept-Encoding": "identity"})
     assert response.status == 200
     assert response.headers['CONTENT-TYPE'] == 'image/svg+xml'
     assert response.headers['CONTENT-LENGTH'] == '9381'
@@ -44,6 +63,15 @@ def test_get(http_controller):
     assert response.status == 200
 
 
+def test_get_compressed(http_controller):
+    response = http_controller.get('/symbols/' + urllib.parse.quote(':/symbols/firewall.svg') + '/raw', headers={"Accept-Encoding": "deflate"})
+    assert response.status == 200
+    assert response.headers['CONTENT-TYPE'] == 'image/svg+xml'
+    assert response.headers['CONTENT-ENCODING'] == 'deflate'
+    assert 'CONTENT-LENGTH' not in response.headers
+    assert '</svg>' in response.html
+
+
 def test_upload(http_controller, symbols_dir):
     response = http_controller.post("/symbols/test2/raw", body="TEST", raw=True)
     assert response.status == 204
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import json
+
+from benchmarks.__main__ import parse_arguments, run
+from benchmarks.harness import compare
+from benchmarks.micro import compress_LZC
+from benchmarks.topology import generate_topology
+from gns3server.compute.iou.utils.iou_export import uncompress_LZC
+
+
+def test_generate_topology():
+    topology = generate_topology(6, 9, 2, ["a", "b"])
+    assert len(topology["nodes"]) == 6
+    assert len(topology["links"]) == 9
+    assert len(topology["drawings"]) == 2
+    assert topology == generate_topology(6, 9, 2, ["a", "b"])
+    ports = set()
+    for link in topology["links"]:
+        assert link["nodes"][0]["node_id"] != link["nodes"][1]["node_id"]
+        for node in link["nodes"]:
+            port = (node["node_id"], node["adapter_number"])
+            assert port not in ports
+            ports.add(port)
+
+
+def test_compress_LZC():
+    data = os.urandom(20000) + b"interface Ethernet0/0\n" * 5000
+    assert uncompress_LZC(compress_LZC(data)) == data
+
+
+def test_run(loop, tmpdir):
+    args = parse_arguments(["--nodes", "4", "--links", "5", "--drawings", "1", "--repeat", "1",
+                            "--ports", "10", "--events", "10"])
+    results = loop.run_until_complete(run(args, str(tmpdir))).__json__()
+    assert results["parameters"]["nodes"] == 4
+    for name in ("micro.uncompress_LZC", "micro.ubridge_parser", "micro.telnet_iac_parser",
+                 "port_manager.tcp_allocation", "controller.create_links", "controller.export",
+                 "controller.import", "controller.project_open"):
+        assert results["benchmarks"][name]["runs"] == 1
+
+    baseline = json.loads(json.dumps(results))
+    baseline["benchmarks"]["micro.uncompress_LZC"]["median"] /= 2
+    output = io.StringIO()
+    assert compare(results, baseline, output=output) == ["micro.uncompress_LZC"]
+    assert "REGRESSION" in output.getvalue()
@@ -140,3 +140,17 @@ def test_set_config_with_args():
     assert server_config["certfile"] == "bla"
     assert server_config["certkey"] == "blu"
     assert server_config.getboolean("debug")
+
+
+def test_parse_arguments_mode(tmpdir):
+
+    Config.reset()
+    Config.instance(str(tmpdir / "test.cfg"))
+
+    args = run.parse_arguments([])
+    assert not args.controller_only
+    assert not args.compute_only
+    assert run.parse_arguments(["--controller-only"]).controller_only
+    assert run.parse_arguments(["--compute-only"]).compute_only
+    with pytest.raises(SystemExit):
+        run.parse_arguments(["--controller-only", "--compute-only"])
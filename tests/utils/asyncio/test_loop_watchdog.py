@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import asyncio
+
+from gns3server.utils.asyncio.loop_watchdog import LoopWatchdog
+
+
+def test_loop_watchdog_stall(loop, config):
+    config.set("Server", "loop_lag_threshold", "0.2")
+    watchdog = LoopWatchdog()
+
+    @asyncio.coroutine
+    def blocking():
+        watchdog.label_task(asyncio.Task.current_task(), "GET /v2/test")
+        yield from asyncio.sleep(0.1)
+        time.sleep(0.6)
+        yield from asyncio.sleep(0.2)
+
+    watchdog.start(loop)
+    try:
+        loop.run_until_complete(blocking())
+    finally:
+        watchdog.stop()
+
+    data = watchdog.__json__()
+    assert data["running"] is False
+    assert data["stalls"] == 1
+    assert data["max_lag"] >= 0.5
+    offender = data["offenders"][0]
+    assert offender["label"] == "GET /v2/test"
+    assert "test_loop_watchdog.py" in offender["location"]
+    assert "in blocking" in offender["location"]
+    assert offender["count"] == 1
+
+
+def test_loop_watchdog_disabled(loop, config):
+    config.set("Server", "loop_lag_threshold", "0")
+    watchdog = LoopWatchdog()
+    watchdog.start(loop)
+    assert watchdog.running is False
+
+
+def test_event_loop_endpoint(http_compute):
+    response = http_compute.get("/debug/event_loop")
+    assert response.status == 200
+    assert response.json["offenders"] == []
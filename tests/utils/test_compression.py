@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import zlib
+import gzip
+import pytest
+
+from gns3server.utils.compression import ZSTD_AVAILABLE, accepted_encoding, is_compressed, compress, compressor
+
+
+def test_accepted_encoding():
+    assert accepted_encoding("gzip, deflate") == "gzip"
+    assert accepted_encoding("deflate") == "deflate"
+    assert accepted_encoding("gzip;q=0, deflate;q=0.5") == "deflate"
+    assert accepted_encoding("identity") is None
+    assert accepted_encoding("") is None
+    assert accepted_encoding("br") is None
+    assert accepted_encoding("*") is not None
+
+
+@pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard is not installed")
+def test_accepted_encoding_zstd():
+    assert accepted_encoding("gzip, deflate, zstd") == "zstd"
+
+
+def test_is_compressed():
+    assert is_compressed("image/png")
+    assert is_compressed("application/octet-stream", "/tmp/project.gns3project")
+    assert is_compressed("application/octet-stream", "/tmp/disk.QCOW2")
+    assert not is_compressed("application/json")
+    assert not is_compressed("application/octet-stream", "/tmp/project.gns3")
+
+
+def test_compress():
+    data = b"hello world" * 1000
+    assert gzip.decompress(compress(data, "gzip")) == data
+    assert zlib.decompress(compress(data, "deflate"), -zlib.MAX_WBITS) == data
+
+
+def test_compressor():
+    data = b"hello world" * 1000
+    stream = compressor("gzip")
+    compressed = stream.compress(data[:5000]) + stream.compress(data[5000:]) + stream.flush()
+    assert gzip.decompress(compressed) == data
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from unittest.mock import MagicMock
+
+from gns3server.utils.encoding import MSGPACK_AVAILABLE, MSGPACK_CONTENT_TYPE, pack, unpack, accepts_msgpack, websocket_msgpack
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_pack_unpack():
+    data = {"name": "PC1", "ports": [{"adapter_number": 0}], "x": -10, "ratio": 1.5, "console": None}
+    assert unpack(pack(data)) == data
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_accepts_msgpack():
+    request = MagicMock()
+    request.headers = {"ACCEPT": "{}, application/json".format(MSGPACK_CONTENT_TYPE)}
+    assert accepts_msgpack(request)
+    request.headers = {"ACCEPT": "application/json"}
+    assert not accepts_msgpack(request)
+    request.headers = {}
+    assert not accepts_msgpack(request)
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_websocket_msgpack():
+    request = MagicMock()
+    request.query = {"encoding": "msgpack"}
+    assert websocket_msgpack(request)
+    request.query = {}
+    assert not websocket_msgpack(request)
+
+
+def test_msgpack_not_available(monkeypatch):
+    request = MagicMock()
+    request.headers = {"ACCEPT": MSGPACK_CONTENT_TYPE}
+    request.query = {"encoding": "msgpack"}
+    monkeypatch.setattr("gns3server.utils.encoding.MSGPACK_AVAILABLE", False)
+    assert not accepts_msgpack(request)
+    assert not websocket_msgpack(request)
@@ -15,12 +15,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import sys
 import pytest
 import asyncio
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 
-from gns3server.utils.file_watcher import FileWatcher
+from gns3server.utils.file_watcher import FileWatcher, FileWatcherService
 
 
 @pytest.mark.parametrize("strategy", ['mtime', 'hash'])
@@ -62,3 +63,109 @@ def test_file_watcher_list(async_run, tmpdir, strategy):
     file2.write("b")
     async_run(asyncio.sleep(1.5))
     callback.assert_called_with(str(file2))
+
+
+def test_file_watcher_close(async_run, tmpdir):
+    file = tmpdir / "test"
+    file.write("a")
+    callback = MagicMock()
+    fw = FileWatcher(file, callback, delay=0.1)
+    fw.close()
+    file.write("b")
+    async_run(asyncio.sleep(0.5))
+    assert not callback.called
+
+
+def test_file_watcher_shared_timer(async_run, tmpdir):
+    watchers = [FileWatcher(tmpdir / "test{}".format(i), MagicMock(), delay=0.5, strategy="hash") for i in range(10)]
+    service = FileWatcherService.instance()
+    assert service._poll_handle is not None
+    for watcher in watchers:
+        watcher.close()
+    assert service._poll_handle is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+def test_file_watcher_inotify_debounce(async_run, tmpdir):
+    file = tmpdir / "test"
+    file.write("a")
+    callback = MagicMock()
+    fw = FileWatcher(file, callback, delay=1)
+
+    @asyncio.coroutine
+    def write():
+        # rapid writes are reported once
+        for i in range(5):
+            file.write(str(i))
+            yield from asyncio.sleep(0.05)
+        yield from asyncio.sleep(1.5)
+
+    async_run(write())
+    assert callback.call_count == 1
+    callback.assert_called_with(str(file))
+    fw.close()
+    assert FileWatcherService.instance()._directories == {}
+
+
+def test_file_watcher_polling_fallback(async_run, tmpdir):
+    with patch("gns3server.utils.file_watcher.Inotify", side_effect=OSError("Not supported")):
+        FileWatcherService._instance = None
+        assert not FileWatcherService.instance().inotify
+        file = tmpdir / "test"
+        file.write("a")
+        callback = MagicMock()
+        FileWatcher(file, callback, delay=0.2)
+        file.write("b")
+        async_run(asyncio.sleep(0.5))
+        callback.assert_called_with(str(file))
+    FileWatcherService._instance = None
+
+
+def test_file_watcher_service_new_loop(async_run, tmpdir):
+    """
+    The watched files are moved to the service of the new event loop
+    """
+
+    file = tmpdir / "test"
+    file.write("a")
+    callback = MagicMock()
+    fw = FileWatcher(file, callback, delay=0.1)
+    service = FileWatcherService.instance()
+
+    previous_loop = asyncio.get_event_loop()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        new_service = FileWatcherService.instance()
+        assert new_service is not service
+        assert fw in new_service._poll_watchers
+        assert fw not in service._poll_watchers
+        file.write("b")
+        loop.run_until_complete(asyncio.sleep(0.5))
+        callback.assert_called_with(str(file))
+        fw.close()
+        assert fw not in new_service._poll_watchers
+    finally:
+        FileWatcherService._instance.close()
+        FileWatcherService._instance = None
+        asyncio.set_event_loop(previous_loop)
+        loop.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+def test_file_watcher_service_listener(async_run, tmpdir):
+    file = tmpdir / "test"
+    file.write("a")
+    callback = MagicMock()
+    service = FileWatcherService.instance()
+    assert service.add_listener(str(file), callback)
+
+    @asyncio.coroutine
+    def write():
+        file.write("b", mode="a")
+        yield from asyncio.sleep(0.1)
+
+    async_run(write())
+    assert callback.called
+    service.remove_listener(str(file), callback)
+    assert service._directories == {}
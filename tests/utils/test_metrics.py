@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+from gns3server.utils.metrics import Metrics, normalize_path, timed_command
+
+
+def test_histogram():
+    metrics = Metrics()
+    histogram = metrics.histogram("test_duration_seconds", "Test", ("path",), buckets=(0.1, 1))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    assert histogram.count("/a") == 3
+    assert histogram.count("/b") == 0
+    assert metrics.render() == """# HELP test_duration_seconds Test
+# TYPE test_duration_seconds histogram
+test_duration_seconds_bucket{path="/a",le="0.1"} 1
+test_duration_seconds_bucket{path="/a",le="1"} 2
+test_duration_seconds_bucket{path="/a",le="+Inf"} 3
+test_duration_seconds_sum{path="/a"} 5.55
+test_duration_seconds_count{path="/a"} 3
+"""
+
+
+def test_gauge():
+    metrics = Metrics()
+    gauge = metrics.gauge("test_gauge", "Test", ("name",))
+    assert metrics.gauge("test_gauge", "Test", ("name",)) is gauge
+    gauge.inc("a")
+    gauge.inc("a")
+    gauge.dec("a")
+    gauge.set(4, 'b"')
+    assert gauge.value("a") == 1
+    assert 'test_gauge{name="b\\""} 4' in metrics.render()
+    gauge.clear()
+    assert gauge.value("a") == 0
+
+
+def test_collector():
+    metrics = Metrics()
+
+    def collect():
+        metrics.gauge("test_collected", "Test").set(42)
+
+    def broken():
+        raise ValueError()
+
+    metrics.add_collector(broken)
+    metrics.add_collector(collect)
+    assert "test_collected 42" in metrics.render()
+
+
+def test_normalize_path():
+    assert normalize_path("/projects/a1e920ca-338a-4e9f-b363-aa607b09dd80/nodes?x=1") == "/projects/{id}/nodes"
+
+
+def test_timed_command(loop):
+
+    class Hypervisor:
+
+        @timed_command("test")
+        def send(self, command):
+            yield from asyncio.sleep(0)
+            return [command]
+
+    assert loop.run_until_complete(Hypervisor().send("vm create R1 1")) == ["vm create R1 1"]
+    histogram = Metrics.instance().histogram("gns3_hypervisor_command_duration_seconds", "")
+    assert histogram.count("test", "vm create") == 1
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import aiohttp.web
+
+from gns3server.web.list_query import ListQuery
+
+
+ITEMS = [
+    {"node_id": "c", "name": "PC-3", "status": "started", "locked": False},
+    {"node_id": "a", "name": "PC-1", "status": "stopped", "locked": True},
+    {"node_id": "b", "name": "PC-2", "status": "started", "locked": False},
+]
+
+
+def test_no_parameters():
+
+    assert ListQuery({}).apply(ITEMS) == (ITEMS, None)
+
+
+def test_fields():
+
+    query = ListQuery({"fields": "name, status"})
+    assert query.fields == {"name", "status"}
+    assert query.wants("name")
+    assert not query.wants("node_id")
+    answers, _ = query.apply(ITEMS)
+    assert answers[0] == {"name": "PC-3", "status": "started"}
+
+
+def test_fields_serialize():
+
+    required = []
+
+    def serialize(item, fields):
+        required.append(fields)
+        return item
+
+    query = ListQuery({"fields": "name", "status": "started"}, filters=("status",), cursor_field="node_id")
+    query.apply(ITEMS, serialize=serialize)
+    # the filters and the cursor are required even if they are not returned
+    assert required[0] == {"name", "status", "node_id"}
+    assert ListQuery({}).apply(ITEMS, serialize=serialize)[0] == ITEMS
+    assert required[-1] is None
+
+
+def test_filters():
+
+    query = ListQuery({"status": "started"}, filters=("status", "locked"))
+    assert [item["name"] for item in query.apply(ITEMS)[0]] == ["PC-3", "PC-2"]
+    query = ListQuery({"locked": "true"}, filters=("status", "locked"))
+    assert [item["name"] for item in query.apply(ITEMS)[0]] == ["PC-1"]
+
+
+def test_unknown_filter():
+
+    with pytest.raises(aiohttp.web.HTTPBadRequest):
+        ListQuery({"status": "started"}, filters=("node_type",))
+
+
+def test_pagination():
+
+    query = ListQuery({"limit": "2"}, cursor_field="node_id")
+    answers, cursor = query.apply(ITEMS)
+    assert [item["node_id"] for item in answers] == ["a", "b"]
+    assert cursor == "b"
+    query = ListQuery({"limit": "2", "cursor": cursor}, cursor_field="node_id")
+    answers, cursor = query.apply(ITEMS)
+    assert [item["node_id"] for item in answers] == ["c"]
+    assert cursor is None
+
+
+def test_pagination_invalid():
+
+    with pytest.raises(aiohttp.web.HTTPBadRequest):
+        ListQuery({"limit": "0"}, cursor_field="node_id")
+    with pytest.raises(aiohttp.web.HTTPBadRequest):
+        ListQuery({"limit": "a"}, cursor_field="node_id")
+    with pytest.raises(aiohttp.web.HTTPBadRequest):
+        ListQuery({"limit": "2"})
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import socket
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+from gns3server.web.response import Response
+
+
+def test_sendfile_restores_write_buffer_limits(async_run, tmpdir):
+    path = str(tmpdir / "test")
+    with open(path, "wb+") as f:
+        f.write(b"hello world")
+
+    sock, peer = socket.socketpair()
+    try:
+        transport = MagicMock()
+        transport.get_extra_info = lambda name: sock if name == "socket" else None
+        transport.get_write_buffer_limits.return_value = (16384, 65536)
+        request = MagicMock()
+        request.transport = transport
+        response = Response(request=request)
+        response.drain = AsyncioMagicMock()
+
+        with open(path, "rb") as f:
+            async_run(response._sendfile(f, 6, 5))
+        assert peer.recv(1024) == b"world"
+        transport.set_write_buffer_limits.assert_called_with(high=65536, low=16384)
+    finally:
+        sock.close()
+        peer.close()